@@ -0,0 +1,42 @@
+import json
+
+import bm
+
+
+def _body(fields, depth, attack):
+    if depth <= 1:
+        body = {"field_%d" % i: "value %d with some text" % i for i in range(fields)}
+        if attack:
+            body["field_0"] = "<script>alert(1)</script>"
+        return body
+    return {"nested_%d" % i: [_body(fields // 10 or 1, depth - 1, attack and not i)] for i in range(10)}
+
+
+class AppSecDDWafRun(bm.Scenario):
+    body_fields: int
+    body_depth: int
+    attack: bool
+
+    def run(self):
+        from ddtrace.appsec import _metrics
+        from ddtrace.appsec._constants import DEFAULT
+        from ddtrace.appsec._constants import WAF_DATA_NAMES
+        from ddtrace.appsec._ddwaf import DDWaf
+
+        with open(DEFAULT.RULES) as f:
+            rules = json.load(f)
+
+        waf = DDWaf(rules, b"", b"", _metrics)
+        data = {
+            WAF_DATA_NAMES.REQUEST_METHOD: "POST",
+            WAF_DATA_NAMES.REQUEST_URI_RAW: "/api/v1/items",
+            WAF_DATA_NAMES.REQUEST_HEADERS_NO_COOKIES: {"content-type": "application/json", "user-agent": "bm"},
+            WAF_DATA_NAMES.REQUEST_BODY: _body(self.body_fields, self.body_depth, self.attack),
+        }
+
+        def _(loops):
+            for _ in range(loops):
+                ctx = waf._at_request_start()
+                waf.run(ctx, data)
+
+        yield _
@@ -19,3 +19,39 @@ class BMDebugger(Debugger):
             cls.pending_probes.extend(probes)
         else:
             cls._instance._on_configuration(ProbePollerEvent.NEW_PROBES, probes)
+
+
+class BMSnapshotSignal:
+    """Minimal log signal carrying a snapshot of the given local variables.
+
+    It exposes only what the log signal encoders read, so that encoding can be
+    measured without instrumenting any code.
+    """
+
+    def __init__(self, _locals, level=2, maxsize=100, maxlen=255, maxfields=20):
+        import inspect
+        import threading
+        import time
+
+        from ddtrace.debugging._signal.utils import capture_pairs
+
+        self.frame = inspect.currentframe()
+        self.thread = threading.current_thread()
+        self.trace_context = None
+        self.message = "benchmark snapshot"
+        self.timestamp = time.time()
+        self.snapshot = {
+            "id": "benchmark",
+            "timestamp": int(self.timestamp * 1e3),
+            "probe": {"id": "benchmark", "version": 0, "location": {"file": __file__, "lines": [1]}},
+            "captures": {
+                "lines": {
+                    "1": {
+                        "arguments": {},
+                        "locals": capture_pairs(_locals.items(), level, maxlen, maxsize, maxfields),
+                        "throwable": None,
+                    }
+                }
+            },
+            "language": "python",
+        }
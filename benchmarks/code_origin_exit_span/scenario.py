@@ -0,0 +1,37 @@
+import bm
+
+from ddtrace.ext import SpanTypes
+
+
+class CodeOriginExitSpan(bm.Scenario):
+    nspans: int
+    stack_depth: int
+    code_origin: bool
+
+    def run(self):
+        from ddtrace.debugging._origin.span import SpanCodeOriginProcessorExit
+        from ddtrace.trace import Span
+
+        # The processor is not registered to avoid starting the uploader
+        processor = SpanCodeOriginProcessorExit()
+        code_origin = self.code_origin
+        nspans = self.nspans
+
+        def start_spans():
+            for _ in range(nspans):
+                span = Span("db.query", span_type=SpanTypes.SQL)
+                if code_origin:
+                    processor.on_span_start(span)
+
+        def call(depth):
+            if depth:
+                return call(depth - 1)
+            return start_spans()
+
+        stack_depth = self.stack_depth
+
+        def _(loops):
+            for _ in range(loops):
+                call(stack_depth)
+
+        yield _
@@ -0,0 +1,35 @@
+import bm
+from bm.di_utils import BMSnapshotSignal
+
+
+class Custom:
+    def __init__(self, i):
+        self.name = "custom-%d" % i
+        self.data = {"key-%d" % j: [j, str(j), {"nested": j}] for j in range(5)}
+
+
+class DebuggerSnapshotEncoder(bm.Scenario):
+    num_locals: int
+    collection_size: int
+    max_signal_size: int
+
+    def run(self):
+        from ddtrace.debugging._encoding import LogSignalJsonEncoder
+
+        class Encoder(LogSignalJsonEncoder):
+            MAX_SIGNAL_SIZE = self.max_signal_size
+
+        _locals = {
+            "local_%d" % i: [Custom(j) for j in range(self.collection_size)]
+            if i % 2
+            else {"key-%d" % j: "value-%d" % j for j in range(self.collection_size)}
+            for i in range(self.num_locals)
+        }
+        signal = BMSnapshotSignal(_locals)
+        encoder = Encoder("benchmark")
+
+        def _(loops):
+            for _ in range(loops):
+                encoder.encode(signal)
+
+        yield _
@@ -0,0 +1,44 @@
+import threading
+from typing import Callable
+from typing import Generator
+
+import bm
+
+
+class LockContention(bm.Scenario):
+    nthreads: int
+    nops: int
+    profile_locks: bool
+    capture_pct: float
+
+    def run(self) -> Generator[Callable[[int], None], None, None]:
+        if self.profile_locks:
+            from ddtrace.internal.datadog.profiling import ddup
+            from ddtrace.profiling.collector.threading import ThreadingLockCollector
+
+            ddup.config(env="benchmarks", service="lock_contention", version="0.0.0")
+            ddup.start()
+
+            # The collector is left running: the locks must be created while it
+            # is active to be profiled.
+            ThreadingLockCollector(capture_pct=self.capture_pct).start()
+
+        # Every thread contends on the same lock
+        lock = threading.Lock()
+        nthreads = self.nthreads
+        nops = self.nops
+
+        def worker() -> None:
+            for _ in range(nops):
+                with lock:
+                    pass
+
+        def _(loops: int) -> None:
+            for _ in range(loops):
+                threads = [threading.Thread(target=worker) for _ in range(nthreads)]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+
+        yield _
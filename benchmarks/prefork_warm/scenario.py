@@ -0,0 +1,49 @@
+import json
+import os
+
+import bm
+
+
+class PreforkWarm(bm.Scenario):
+    workers: int
+    nrules: int
+    prefork_warm: bool
+
+    # Not helpful for subprocess benchmarks
+    cprofile_loops: int = 0
+
+    def run(self):
+        from ddtrace import config
+        from ddtrace.trace import tracer
+
+        config._prefork_warm_enabled = self.prefork_warm
+        config._trace_sampling_rules = json.dumps(
+            [{"sample_rate": 0.5, "service": "web-%d" % i, "name": "request.*"} for i in range(self.nrules)]
+        )
+        config._sampling_rules = json.dumps(
+            [{"service": "web-%d" % i, "name": "request.*", "max_per_second": 10} for i in range(self.nrules)]
+        )
+        # Compile the sampling rules in the parent process, like a pre-fork
+        # server would do on startup.
+        tracer._recreate()
+
+        workers = self.workers
+
+        def _(loops):
+            for _ in range(loops):
+                # Measure the time it takes for every worker to produce its
+                # first span after fork.
+                pids = []
+                for _ in range(workers):
+                    pid = os.fork()
+                    if pid == 0:
+                        try:
+                            tracer.trace("request.handle", service="web-0").finish()
+                        finally:
+                            os._exit(0)
+                    pids.append(pid)
+
+                for pid in pids:
+                    os.waitpid(pid, 0)
+
+        yield _
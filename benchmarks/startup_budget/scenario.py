@@ -0,0 +1,67 @@
+import json
+import os
+import subprocess
+import sys
+
+import bm
+
+
+# Modules that must not be imported on startup, unless the product that needs
+# them is enabled.
+LAZY_MODULES = {
+    "ddtrace.appsec._iast": {"DD_IAST_ENABLED"},
+    "ddtrace.appsec._processor": {"DD_APPSEC_ENABLED"},
+    "ddtrace.debugging._debugger": {"DD_DYNAMIC_INSTRUMENTATION_ENABLED"},
+    "ddtrace.internal.ci_visibility": set(),
+    "ddtrace.internal.runtime.runtime_metrics": {"DD_RUNTIME_METRICS_ENABLED"},
+    "ddtrace.internal.symbol_db.symbols": set(),
+    "ddtrace.llmobs": {"DD_LLMOBS_ENABLED"},
+    "ddtrace.vendor.ply": set(),
+    "ddtrace.vendor.psutil": {"DD_PROFILING_ENABLED", "DD_RUNTIME_METRICS_ENABLED"},
+}
+
+
+class StartupBudget(bm.Scenario):
+    env: str
+
+    # Not helpful for subprocess benchmarks
+    cprofile_loops: int = 0
+
+    def run(self):
+        env = os.environ.copy()
+        # We only want to measure the cost of bootstrapping the library, so
+        # we disable the services that need an agent to talk to.
+        env.update(
+            {
+                "DD_INSTRUMENTATION_TELEMETRY_ENABLED": "false",
+                "DD_REMOTE_CONFIGURATION_ENABLED": "false",
+            }
+        )
+        if self.env:
+            env.update(json.loads(self.env))
+
+        # Check that the subsystems that are not enabled have not been loaded.
+        # A breach of the budget fails the benchmark straight away.
+        modules = json.loads(
+            subprocess.check_output(
+                [sys.executable, "-c", "import ddtrace.auto, sys, json; print(json.dumps(list(sys.modules)))"],
+                env=env,
+            )
+        )
+        enabled = {k for k, v in env.items() if v.lower() in ("1", "true")}
+        loaded = sorted(
+            m
+            for m in modules
+            for lazy, products in LAZY_MODULES.items()
+            if (m == lazy or m.startswith(lazy + ".")) and not products & enabled
+        )
+        if loaded:
+            raise RuntimeError("Startup budget breached, modules loaded eagerly: %s" % ", ".join(loaded))
+
+        args = [sys.executable, "-c", "import ddtrace.auto"]
+
+        def _(loops: int):
+            for _ in range(loops):
+                subprocess.check_call(args=args, env=env)
+
+        yield _
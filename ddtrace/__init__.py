@@ -7,6 +7,13 @@ LOADED_MODULES = frozenset(sys.modules.keys())
 
 # Ensure we capture references to unpatched modules as early as possible
 import ddtrace.internal._unpatched  # noqa
+
+# Measure the cost of importing the rest of the library, if requested
+if os.environ.get("_DD_IMPORT_PROFILE_FILE"):
+    from ddtrace.internal.import_profile import ImportProfiler
+
+    ImportProfiler.install()
+
 from ._logger import configure_ddtrace_logger
 
 # configure ddtrace logger before other modules log
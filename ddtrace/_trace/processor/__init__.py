@@ -11,6 +11,7 @@ from typing import Union
 
 from ddtrace._trace.sampler import DatadogSampler
 from ddtrace._trace.sampler import RateSampler
+from ddtrace._trace.sampling_rule import SamplingRule
 from ddtrace._trace.span import Span
 from ddtrace._trace.span import _get_64_highest_order_bits_as_hex
 from ddtrace.constants import _APM_ENABLED_METRIC_KEY as MK_APM_ENABLED
@@ -138,6 +139,7 @@ class TraceSamplingProcessor(TraceProcessor):
         single_span_rules: List[SpanSamplingRule],
         apm_opt_out: bool,
         agent_based_samplers: Optional[dict] = None,
+        trace_sampling_rules: Optional[List[SamplingRule]] = None,
     ):
         super(TraceSamplingProcessor, self).__init__()
         self._compute_stats_enabled = compute_stats_enabled
@@ -148,6 +150,7 @@ class TraceSamplingProcessor(TraceProcessor):
         # we need to set the rate limiting to 1 trace per minute
         # for the backend to consider the service as alive.
         sampler_kwargs: Dict[str, Any] = {
+            "rules": trace_sampling_rules,
             "agent_based_samplers": agent_based_samplers,
         }
         if self.apm_opt_out:
@@ -518,13 +521,16 @@ class SpanAggregator(SpanProcessor):
         apm_opt_out: Optional[bool] = None,
         appsec_enabled: Optional[bool] = None,
         reset_buffer: bool = True,
+        reuse_sampling_rules: bool = False,
     ) -> None:
         """
         Resets the internal state of the SpanAggregator, including the writer, sampling processor,
         user-defined processors, and optionally the trace buffer and span metrics.
 
         This method is typically used after a process fork or during runtime reconfiguration.
-        Arguments that are None will not override existing values.
+        Arguments that are None will not override existing values. If ``reuse_sampling_rules``
+        is set, the sampling rules compiled by the current sampling processor are adopted by
+        the new one, instead of being parsed again from the configuration.
         """
         try:
             # Stop the writer to ensure it is not running while we reconfigure it.
@@ -546,13 +552,22 @@ class SpanAggregator(SpanProcessor):
             compute_stats = self.sampling_processor._compute_stats_enabled
         if apm_opt_out is None:
             apm_opt_out = self.sampling_processor.apm_opt_out
+        sampler = self.sampling_processor.sampler
+        trace_sampling_rules: Optional[List[SamplingRule]] = None
+        if reuse_sampling_rules:
+            single_span_rules = self.sampling_processor.single_span_rules
+            for rule in single_span_rules:
+                rule._reset_limiter()
+            if isinstance(sampler, DatadogSampler):
+                trace_sampling_rules = sampler.rules
+        else:
+            single_span_rules = get_span_sampling_rules()
         self.sampling_processor = TraceSamplingProcessor(
             compute_stats,
-            get_span_sampling_rules(),
+            single_span_rules,
             apm_opt_out,
-            self.sampling_processor.sampler._agent_based_samplers
-            if isinstance(self.sampling_processor.sampler, DatadogSampler)
-            else None,
+            sampler._agent_based_samplers if isinstance(sampler, DatadogSampler) else None,
+            trace_sampling_rules,
         )
 
         # Update user processors if provided.
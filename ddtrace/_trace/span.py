@@ -1,4 +1,3 @@
-from io import StringIO
 import math
 import pprint
 import sys
@@ -55,6 +54,7 @@ from ddtrace.internal.logger import get_logger
 from ddtrace.internal.sampling import SamplingMechanism
 from ddtrace.internal.sampling import set_sampling_decision_maker
 from ddtrace.internal.utils.deprecations import DDTraceDeprecationWarning
+from ddtrace.internal.utils.tracebacks import format_exception
 from ddtrace.settings._config import config
 from ddtrace.vendor.debtcollector import deprecate
 
@@ -545,21 +545,8 @@ class Span(object):
         # Ensure the limit is negative for traceback.print_exception (to keep most recent frames)
         limit: int = -abs(limit)  # type: ignore[no-redef]
 
-        # Create a buffer to hold the traceback
-        buff = StringIO()
-        # Print the exception traceback to the buffer with the specified limit
-        traceback.print_exception(exc_type, exc_val, exc_tb, file=buff, limit=limit)
-        tb = buff.getvalue()
-
-        # Check if the traceback exceeds the maximum allowed length
-        while len(tb) > MAX_SPAN_META_VALUE_LEN and abs(limit) > 1:
-            # Reduce the limit by half and print the traceback again
-            limit //= 2
-            buff = StringIO()
-            traceback.print_exception(exc_type, exc_val, exc_tb, file=buff, limit=limit)
-            tb = buff.getvalue()
-
-        return tb
+        # The formatted stack is cached by traceback fingerprint
+        return format_exception(exc_type, exc_val, exc_tb, limit=limit, max_len=MAX_SPAN_META_VALUE_LEN)
 
     def set_exc_info(
         self,
@@ -415,7 +415,9 @@ class Tracer(object):
 
     def _child_after_fork(self):
         self._pid = getpid()
-        self._recreate(reset_buffer=True)
+        # In pre-fork warm mode the child adopts the sampling rules that have
+        # been resolved by the parent process.
+        self._recreate(reset_buffer=True, reuse_sampling_rules=config._prefork_warm_enabled)
         self._new_process = True
 
     def _recreate(
@@ -425,6 +427,7 @@ class Tracer(object):
         apm_opt_out: Optional[bool] = None,
         appsec_enabled: Optional[bool] = None,
         reset_buffer: bool = True,
+        reuse_sampling_rules: bool = False,
     ) -> None:
         """Re-initialize the tracer's processors and trace writer"""
         # Stop the writer.
@@ -435,6 +438,7 @@ class Tracer(object):
             apm_opt_out=apm_opt_out,
             appsec_enabled=appsec_enabled,
             reset_buffer=reset_buffer,
+            reuse_sampling_rules=reuse_sampling_rules,
         )
         self._span_processors, self._appsec_processor = _default_span_processors_factory(
             self._endpoint_call_counter_span_processor,
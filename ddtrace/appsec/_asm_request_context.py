@@ -101,6 +101,8 @@ class ASM_Environment:
         self.callbacks: Dict[str, Any] = {_CONTEXT_CALL: []}
         self.telemetry: Telemetry_result = Telemetry_result()
         self.addresses_sent: Set[str] = set()
+        # addresses set since the last time the WAF was called for the request
+        self.addresses_changed: Set[str] = set()
         self.waf_triggers: List[Dict[str, Any]] = []
         self.blocked: Optional[Dict[str, Any]] = None
         self.finalized: bool = False
@@ -304,6 +306,9 @@ def set_waf_address(address: str, value: Any) -> None:
         set_value(_WAF_ADDRESSES, address, waf_value)
     else:
         set_value(_WAF_ADDRESSES, address, value)
+    env = _get_asm_context()
+    if env is not None:
+        env.addresses_changed.add(address)
     if address in (SPAN_DATA_NAMES.REQUEST_HTTP_IP, SPAN_DATA_NAMES.REQUEST_HEADERS_NO_COOKIES_CASE):
         core.set_item(address, value)
 
@@ -436,6 +441,15 @@ def get_data_sent() -> Set[str]:
     return env.addresses_sent
 
 
+def pop_changed_addresses() -> Set[str]:
+    """Return the addresses set since the last call and reset the tracking."""
+    env = _get_asm_context()
+    if env is None:
+        return set()
+    changed, env.addresses_changed = env.addresses_changed, set()
+    return changed
+
+
 def asm_request_context_set(
     remote_ip: Optional[str] = None,
     headers: Any = None,
@@ -0,0 +1,389 @@
+// Native conversion of Python request data into libddwaf objects.
+//
+// The objects are built with the ddwaf_object_* helpers of the loaded
+// libddwaf, whose addresses are given by set_functions, so that all their
+// memory comes from the allocator of libddwaf and they can be released with
+// ddwaf_object_free, either directly or by the WAF context that takes their
+// ownership. The limits and the truncation reporting follow those of the
+// pure-Python implementation of ddwaf_object.
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <stdbool.h>
+#include <stdint.h>
+#include <string.h>
+
+#define DDWAF_OBJ_INVALID 0
+#define DDWAF_OBJ_SIGNED (1 << 0)
+#define DDWAF_OBJ_UNSIGNED (1 << 1)
+#define DDWAF_OBJ_STRING (1 << 2)
+#define DDWAF_OBJ_ARRAY (1 << 3)
+#define DDWAF_OBJ_MAP (1 << 4)
+#define DDWAF_OBJ_BOOL (1 << 5)
+#define DDWAF_OBJ_FLOAT (1 << 6)
+#define DDWAF_OBJ_NULL (1 << 7)
+
+// Depth reported when a container is truncated because it is nested too deep
+#define DDWAF_MAX_CONTAINER_DEPTH 20
+
+typedef struct _ddwaf_object ddwaf_object;
+
+struct _ddwaf_object
+{
+    const char* parameterName;
+    uint64_t parameterNameLength;
+    union
+    {
+        const char* stringValue;
+        uint64_t uintValue;
+        int64_t intValue;
+        ddwaf_object* array;
+        bool boolean;
+        double f64;
+    };
+    uint64_t nbEntries;
+    int type;
+};
+
+// The functions of libddwaf building the objects, resolved from the loaded
+// library. The objects are only ever allocated by libddwaf itself, which may
+// be linked with its own allocator.
+typedef ddwaf_object* (*ddwaf_object_stringl_fn)(ddwaf_object*, const char*, size_t);
+typedef ddwaf_object* (*ddwaf_object_container_fn)(ddwaf_object*);
+typedef bool (*ddwaf_object_array_add_fn)(ddwaf_object*, ddwaf_object*);
+typedef bool (*ddwaf_object_map_addl_fn)(ddwaf_object*, const char*, size_t, ddwaf_object*);
+typedef void (*ddwaf_object_free_fn)(ddwaf_object*);
+
+static ddwaf_object_stringl_fn ddwaf_object_stringl = NULL;
+static ddwaf_object_container_fn ddwaf_object_array = NULL;
+static ddwaf_object_container_fn ddwaf_object_map = NULL;
+static ddwaf_object_array_add_fn ddwaf_object_array_add = NULL;
+static ddwaf_object_map_addl_fn ddwaf_object_map_addl = NULL;
+static ddwaf_object_free_fn ddwaf_object_free = NULL;
+
+typedef struct
+{
+    PyObject* observator;
+    long long max_string_length;
+} marshal_ctx;
+
+static int
+observe(PyObject* observator, const char* method, Py_ssize_t value)
+{
+    PyObject* result = PyObject_CallMethod(observator, method, "n", value);
+    if (result == NULL) {
+        return -1;
+    }
+    Py_DECREF(result);
+    return 0;
+}
+
+// Get a UTF-8 view of a string, dropping the characters that cannot be
+// encoded. The returned object, if any, owns the buffer.
+static int
+utf8_view(PyObject* string, const char** buffer, Py_ssize_t* size, PyObject** owner)
+{
+    *owner = NULL;
+    *buffer = PyUnicode_AsUTF8AndSize(string, size);
+    if (*buffer != NULL) {
+        return 0;
+    }
+
+    // Strings with lone surrogates cannot be encoded strictly
+    PyErr_Clear();
+    *owner = PyUnicode_AsEncodedString(string, "utf-8", "ignore");
+    if (*owner == NULL) {
+        return -1;
+    }
+    *buffer = PyBytes_AS_STRING(*owner);
+    *size = PyBytes_GET_SIZE(*owner);
+    return 0;
+}
+
+// Get the length of a string truncated to the maximum string length. Like
+// the C string helpers of libddwaf, the string stops at the first null byte.
+static int
+truncate_string(marshal_ctx* ctx, const char* buffer, Py_ssize_t size, size_t* length)
+{
+    if (size > ctx->max_string_length) {
+        if (observe(ctx->observator, "set_string_length", size) < 0) {
+            return -1;
+        }
+        size = (Py_ssize_t)ctx->max_string_length;
+    }
+
+    *length = strnlen(buffer, (size_t)size);
+    return 0;
+}
+
+static int
+make_string(marshal_ctx* ctx, const char* buffer, Py_ssize_t size, ddwaf_object* object)
+{
+    size_t length = 0;
+    if (truncate_string(ctx, buffer, size, &length) < 0) {
+        return -1;
+    }
+    if (ddwaf_object_stringl(object, buffer, length) == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    return 0;
+}
+
+static int
+make_string_from_unicode(marshal_ctx* ctx, PyObject* string, ddwaf_object* object)
+{
+    const char* buffer = NULL;
+    Py_ssize_t size = 0;
+    PyObject* owner = NULL;
+
+    if (utf8_view(string, &buffer, &size, &owner) < 0) {
+        return -1;
+    }
+    int result = make_string(ctx, buffer, size, object);
+    Py_XDECREF(owner);
+    return result;
+}
+
+static int
+marshal(marshal_ctx* ctx, PyObject* value, ddwaf_object* object, long long max_objects, long long max_depth);
+
+static int
+marshal_list(marshal_ctx* ctx, PyObject* list, ddwaf_object* object, long long max_objects, long long max_depth)
+{
+    if (max_depth <= 0) {
+        if (observe(ctx->observator, "set_container_depth", DDWAF_MAX_CONTAINER_DEPTH) < 0) {
+            return -1;
+        }
+        max_objects = 0;
+    }
+
+    ddwaf_object_array(object);
+
+    // The list might change while we are converting its items
+    for (Py_ssize_t i = 0; i < PyList_GET_SIZE(list); i++) {
+        if (i >= max_objects) {
+            return observe(ctx->observator, "set_container_size", PyList_GET_SIZE(list));
+        }
+        PyObject* item = PyList_GET_ITEM(list, i);
+        ddwaf_object entry;
+        Py_INCREF(item);
+        int result = marshal(ctx, item, &entry, max_objects, max_depth - 1);
+        Py_DECREF(item);
+        if (result < 0) {
+            return -1;
+        }
+        // The array takes the ownership of the entry
+        if (!ddwaf_object_array_add(object, &entry)) {
+            ddwaf_object_free(&entry);
+            PyErr_NoMemory();
+            return -1;
+        }
+    }
+
+    return 0;
+}
+
+static int
+marshal_dict(marshal_ctx* ctx, PyObject* dict, ddwaf_object* object, long long max_objects, long long max_depth)
+{
+    if (max_depth <= 0) {
+        if (observe(ctx->observator, "set_container_depth", DDWAF_MAX_CONTAINER_DEPTH) < 0) {
+            return -1;
+        }
+        max_objects = 0;
+    }
+
+    ddwaf_object_map(object);
+
+    PyObject* key = NULL;
+    PyObject* val = NULL;
+    Py_ssize_t pos = 0;
+    long long counter = 0;
+    while (PyDict_Next(dict, &pos, &key, &val)) {
+        // Non-string keys are discarded, but still count towards the limit
+        long long index = counter++;
+        if (!PyUnicode_Check(key) && !PyBytes_Check(key)) {
+            continue;
+        }
+        if (index >= max_objects) {
+            return observe(ctx->observator, "set_container_size", PyDict_GET_SIZE(dict));
+        }
+
+        Py_INCREF(key);
+        Py_INCREF(val);
+        const char* buffer = NULL;
+        Py_ssize_t buffer_size = 0;
+        PyObject* owner = NULL;
+        int result = -1;
+        if (PyBytes_Check(key)) {
+            buffer = PyBytes_AS_STRING(key);
+            buffer_size = PyBytes_GET_SIZE(key);
+            result = 0;
+        } else {
+            result = utf8_view(key, &buffer, &buffer_size, &owner);
+        }
+        size_t length = 0;
+        if (result == 0) {
+            result = truncate_string(ctx, buffer, buffer_size, &length);
+        }
+        if (result == 0) {
+            ddwaf_object entry;
+            result = marshal(ctx, val, &entry, max_objects, max_depth - 1);
+            // The map copies the key and takes the ownership of the entry
+            if (result == 0 && !ddwaf_object_map_addl(object, buffer, length, &entry)) {
+                ddwaf_object_free(&entry);
+                PyErr_NoMemory();
+                result = -1;
+            }
+        }
+        Py_XDECREF(owner);
+        Py_DECREF(val);
+        Py_DECREF(key);
+        if (result < 0) {
+            return -1;
+        }
+    }
+
+    return 0;
+}
+
+static int
+marshal(marshal_ctx* ctx, PyObject* value, ddwaf_object* object, long long max_objects, long long max_depth)
+{
+    int result = 0;
+
+    memset(object, 0, sizeof(ddwaf_object));
+
+    if (PyBool_Check(value)) {
+        object->boolean = (value == Py_True);
+        object->type = DDWAF_OBJ_BOOL;
+    } else if (PyLong_Check(value)) {
+        // Values outside the 64-bit range wrap around, as with ctypes
+        object->intValue = (int64_t)PyLong_AsUnsignedLongLongMask(value);
+        if (PyErr_Occurred()) {
+            return -1;
+        }
+        object->type = DDWAF_OBJ_SIGNED;
+    } else if (PyUnicode_Check(value)) {
+        result = make_string_from_unicode(ctx, value, object);
+    } else if (PyBytes_Check(value)) {
+        result = make_string(ctx, PyBytes_AS_STRING(value), PyBytes_GET_SIZE(value), object);
+    } else if (PyFloat_Check(value)) {
+        object->f64 = PyFloat_AS_DOUBLE(value);
+        object->type = DDWAF_OBJ_FLOAT;
+    } else if (PyList_Check(value) || PyDict_Check(value)) {
+        if (Py_EnterRecursiveCall(" while converting an object for the WAF")) {
+            return -1;
+        }
+        result = PyList_Check(value) ? marshal_list(ctx, value, object, max_objects, max_depth)
+                                     : marshal_dict(ctx, value, object, max_objects, max_depth);
+        Py_LeaveRecursiveCall();
+    } else if (value != Py_None) {
+        PyObject* string = PyObject_Str(value);
+        if (string == NULL) {
+            return -1;
+        }
+        result = make_string_from_unicode(ctx, string, object);
+        Py_DECREF(string);
+    } else {
+        object->type = DDWAF_OBJ_NULL;
+    }
+
+    if (result < 0) {
+        ddwaf_object_free(object);
+    }
+
+    return result;
+}
+
+static PyObject*
+marshal_into(PyObject* Py_UNUSED(module), PyObject* args)
+{
+    unsigned long long address = 0;
+    PyObject* value = NULL;
+    marshal_ctx ctx = { NULL, 0 };
+    long long max_objects = 0;
+    long long max_depth = 0;
+
+    if (!PyArg_ParseTuple(args,
+                          "KOOLLL:marshal_into",
+                          &address,
+                          &value,
+                          &ctx.observator,
+                          &max_objects,
+                          &max_depth,
+                          &ctx.max_string_length)) {
+        return NULL;
+    }
+
+    if (address == 0) {
+        PyErr_SetString(PyExc_ValueError, "invalid object address");
+        return NULL;
+    }
+
+    if (ddwaf_object_free == NULL) {
+        PyErr_SetString(PyExc_RuntimeError, "the functions of libddwaf are not set");
+        return NULL;
+    }
+
+    if (marshal(&ctx, value, (ddwaf_object*)(uintptr_t)address, max_objects, max_depth) < 0) {
+        return NULL;
+    }
+
+    Py_RETURN_NONE;
+}
+
+static PyObject*
+set_functions(PyObject* Py_UNUSED(module), PyObject* args)
+{
+    unsigned long long stringl = 0;
+    unsigned long long array = 0;
+    unsigned long long map = 0;
+    unsigned long long array_add = 0;
+    unsigned long long map_addl = 0;
+    unsigned long long free_ = 0;
+
+    if (!PyArg_ParseTuple(args, "KKKKKK:set_functions", &stringl, &array, &map, &array_add, &map_addl, &free_)) {
+        return NULL;
+    }
+
+    if (stringl == 0 || array == 0 || map == 0 || array_add == 0 || map_addl == 0 || free_ == 0) {
+        PyErr_SetString(PyExc_ValueError, "invalid function address");
+        return NULL;
+    }
+
+    ddwaf_object_stringl = (ddwaf_object_stringl_fn)(uintptr_t)stringl;
+    ddwaf_object_array = (ddwaf_object_container_fn)(uintptr_t)array;
+    ddwaf_object_map = (ddwaf_object_container_fn)(uintptr_t)map;
+    ddwaf_object_array_add = (ddwaf_object_array_add_fn)(uintptr_t)array_add;
+    ddwaf_object_map_addl = (ddwaf_object_map_addl_fn)(uintptr_t)map_addl;
+    ddwaf_object_free = (ddwaf_object_free_fn)(uintptr_t)free_;
+
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef MarshalMethods[] = {
+    { "set_functions",
+      (PyCFunction)set_functions,
+      METH_VARARGS,
+      "set_functions(stringl, array, map, array_add, map_addl, free): set the addresses of the libddwaf functions "
+      "building the objects" },
+    { "marshal_into",
+      (PyCFunction)marshal_into,
+      METH_VARARGS,
+      "marshal_into(address, value, observator, max_objects, max_depth, max_string_length): convert a Python object "
+      "into the ddwaf_object at the given address" },
+    { NULL, NULL, 0, NULL }
+};
+
+static struct PyModuleDef marshal_module = { PyModuleDef_HEAD_INIT,
+                                             "ddtrace.appsec._ddwaf._marshal",
+                                             "libddwaf objects marshaller",
+                                             -1,
+                                             MarshalMethods };
+
+PyMODINIT_FUNC
+PyInit__marshal(void)
+{
+    return PyModule_Create(&marshal_module);
+}
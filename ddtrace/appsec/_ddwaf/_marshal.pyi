@@ -0,0 +1,8 @@
+from typing import Any
+
+from ddtrace.appsec._utils import _observator
+
+def set_functions(stringl: int, array: int, map: int, array_add: int, map_addl: int, free: int) -> None: ...
+def marshal_into(
+    address: int, value: Any, observator: _observator, max_objects: int, max_depth: int, max_string_length: int
+) -> None: ...
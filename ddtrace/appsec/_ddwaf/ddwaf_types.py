@@ -17,6 +17,12 @@ from ddtrace.internal.logger import get_logger
 from ddtrace.settings.asm import config as asm_config
 
 
+try:
+    from ddtrace.appsec._ddwaf import _marshal
+except ImportError:
+    _marshal = None  # type: ignore[assignment]
+
+
 DDWafRulesType = Union[None, int, str, List[Any], Dict[str, Any]]
 
 log = get_logger(__name__)
@@ -38,6 +44,33 @@ ARCHI = machine().lower()
 
 with unpatching_popen():
     ddwaf = ctypes.CDLL(asm_config._asm_libddwaf)
+
+
+def _load_marshaller() -> Any:
+    """Return the native marshaller, set up to build the objects with the functions of the loaded libddwaf."""
+    if _marshal is None:
+        return None
+    try:
+        _marshal.set_functions(
+            *(
+                ctypes.cast(getattr(ddwaf, name), ctypes.c_void_p).value
+                for name in (
+                    "ddwaf_object_stringl",
+                    "ddwaf_object_array",
+                    "ddwaf_object_map",
+                    "ddwaf_object_array_add",
+                    "ddwaf_object_map_addl",
+                    "ddwaf_object_free",
+                )
+            )
+        )
+    except (AttributeError, ValueError):
+        log.debug("libddwaf does not export the functions used by the native marshaller", exc_info=True)
+        return None
+    return _marshal.marshal_into
+
+
+marshal_into = _load_marshaller()
 #
 # Constants
 #
@@ -110,6 +143,11 @@ class ddwaf_object(ctypes.Structure):
         max_depth: int = DDWAF_MAX_CONTAINER_DEPTH,
         max_string_length: int = DDWAF_MAX_STRING_LENGTH,
     ) -> None:
+        if marshal_into is not None:
+            # Build the whole object tree natively, with the same limits
+            marshal_into(ctypes.addressof(self), struct, observator, max_objects, max_depth, max_string_length)
+            return
+
         def truncate_string(string: bytes) -> bytes:
             if len(string) > max_string_length:
                 observator.set_string_length(len(string))
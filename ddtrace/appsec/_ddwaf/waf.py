@@ -9,6 +9,7 @@ from typing import Set
 from typing import Tuple
 
 from ddtrace.appsec._constants import DEFAULT
+from ddtrace.appsec._ddwaf.ddwaf_types import DDWAF_OBJ_TYPE
 from ddtrace.appsec._ddwaf.ddwaf_types import ddwaf_config
 from ddtrace.appsec._ddwaf.ddwaf_types import ddwaf_get_version
 from ddtrace.appsec._ddwaf.ddwaf_types import ddwaf_object
@@ -180,26 +181,31 @@ class DDWaf(WAF):
 
         result_obj = ddwaf_object()
         observator = _observator()
-        wrapper = ddwaf_object(data, observator=observator)
+        # Persistent addresses already sent are kept by the WAF context, so
+        # ephemeral-only calls (e.g. RASP) do not need a persistent object.
+        wrapper = ddwaf_object(data, observator=observator) if data or not ephemeral_data else None
         wrapper_ephemeral = ddwaf_object(ephemeral_data, observator=observator) if ephemeral_data else None
         error = ddwaf_run(ctx.ctx, wrapper, wrapper_ephemeral, result_obj, int(timeout_ms * 1000))
         if error < 0:
-            LOGGER.debug("run DDWAF error: %d\ninput %s\nerror %s", error, wrapper.struct, self.info.errors)
-        result = result_obj.struct
-        if error == DDWAF_ERR_INTERNAL or not isinstance(result, dict):
+            # DEV: the input object is only decoded if the message is logged
+            LOGGER.debug("run DDWAF error: %d\ninput %r\nerror %s", error, wrapper, self.info.errors)
+        result = _result_fields(result_obj)
+        if error == DDWAF_ERR_INTERNAL or result is None:
             # result is not valid
             ddwaf_object_free(result_obj)
             return DDWaf_result(error, [], {}, 0, 0, False, self.empty_observator, {})
+        # Containers are only decoded when they have entries, which is seldom
+        # the case for events and actions.
         main_res = DDWaf_result(
             error,
-            result["events"],
-            result["actions"],
-            result["duration"] / 1e3,
+            _decode(result["events"], []),
+            _decode(result["actions"], {}),
+            result["duration"].struct / 1e3,
             (time.monotonic() - start) * 1e6,
-            result["timeout"],
+            result["timeout"].struct,
             observator,
-            result["attributes"],
-            result["keep"],
+            _decode(result["attributes"], {}),
+            result["keep"].struct,
         )
         ddwaf_object_free(result_obj)
         return main_res
@@ -213,5 +219,19 @@ class DDWaf(WAF):
             ddwaf_object_free(self._default_ruleset)
 
 
+def _result_fields(result_obj: ddwaf_object) -> Optional[Dict[str, ddwaf_object]]:
+    """Index the top-level entries of a result map without decoding them."""
+    if result_obj.type != DDWAF_OBJ_TYPE.DDWAF_OBJ_MAP:
+        return None
+    return {
+        obj.parameterName[: obj.parameterNameLength].decode("UTF-8", errors="ignore"): obj
+        for obj in result_obj.value.array[: result_obj.nbEntries]
+    }
+
+
+def _decode(obj: ddwaf_object, empty: Any) -> Any:
+    return obj.struct if obj.nbEntries else empty
+
+
 def version() -> str:
     return ddwaf_get_version().decode("UTF-8")
@@ -47,6 +47,11 @@ from ddtrace.settings.asm import config as asm_config
 
 log = get_logger(__name__)
 
+# WAF data keys and names, by the request context address holding their value
+_WAF_KEYS_BY_SPAN_ADDRESS: Dict[str, Tuple[str, str]] = {
+    SPAN_DATA_NAMES[key]: (key, waf_name) for key, waf_name in WAF_DATA_NAMES if key in SPAN_DATA_NAMES
+}
+
 
 def _transform_headers(data: Union[Dict[str, str], List[Tuple[str, str]]]) -> Dict[str, Union[str, List[str]]]:
     normalized: Dict[str, Union[str, List[str]]] = {}
@@ -251,7 +256,18 @@ class AppSecSpanProcessor(SpanProcessor):
 
         data = {}
         ephemeral_data = {}
-        iter_data = [(key, WAF_DATA_NAMES[key]) for key in custom_data] if custom_data is not None else WAF_DATA_NAMES
+        if custom_data is not None:
+            iter_data = [(key, WAF_DATA_NAMES[key]) for key in custom_data]
+        elif force_sent:
+            iter_data = WAF_DATA_NAMES
+        else:
+            # Only the addresses that changed since the last call need to be
+            # sent. The others are either already in the WAF context or unset.
+            iter_data = [
+                _WAF_KEYS_BY_SPAN_ADDRESS[address]
+                for address in _asm_request_context.pop_changed_addresses()
+                if address in _WAF_KEYS_BY_SPAN_ADDRESS
+            ]
         data_already_sent = _asm_request_context.get_data_sent()
         if data_already_sent is None:
             data_already_sent = set()
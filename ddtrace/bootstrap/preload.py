@@ -3,13 +3,13 @@ Bootstrapping code that is run when using the `ddtrace-run` Python entrypoint
 Add all monkey-patching that needs to run by default here
 """
 
+import os
 import typing as t
 
 from ddtrace import config  # noqa:F401
 from ddtrace.internal.logger import get_logger  # noqa:F401
 from ddtrace.internal.module import ModuleWatchdog  # noqa:F401
 from ddtrace.internal.products import manager  # noqa:F401
-from ddtrace.internal.runtime.runtime_metrics import RuntimeWorker  # noqa:F401
 from ddtrace.settings.crashtracker import config as crashtracker_config
 from ddtrace.settings.profiling import config as profiling_config  # noqa:F401
 from ddtrace.trace import tracer
@@ -63,6 +63,8 @@ if profiling_config.enabled:
         log.error("failed to enable profiling", exc_info=True)
 
 if config._runtime_metrics_enabled:
+    from ddtrace.internal.runtime.runtime_metrics import RuntimeWorker
+
     RuntimeWorker.enable()
 
 if config._otel_enabled:
@@ -94,3 +96,11 @@ if config._llmobs_enabled:
 @register_post_preload
 def _():
     tracer._generate_diagnostic_logs()
+
+
+if os.getenv("_DD_IMPORT_PROFILE_FILE"):
+    from ddtrace.internal.import_profile import ImportProfiler
+
+    # The import profiler has been installed by the ddtrace package. We report
+    # the import costs once the library has been bootstrapped.
+    register_post_preload(ImportProfiler.dump)
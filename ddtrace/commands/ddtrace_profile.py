@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+import argparse
+from datetime import datetime
+import glob
+import os
+import sys
+import typing  # noqa:F401
+
+from ddtrace.internal.datadog.profiling import pprof
+
+
+USAGE = """
+Work with the profiles written by the profiler when DD_PROFILING_OUTPUT_PPROF is set.
+
+
+Examples
+ddtrace-profile merge '/tmp/profiles/app.*' > app.collapsed
+ddtrace-profile merge --format top --sample-type wall-time --thread MainThread '/tmp/profiles/app.*'
+ddtrace-profile merge --endpoint 'GET /users*' --since 2025-01-01T12:00 --until 2025-01-01T13:00 '/tmp/profiles/*'
+"""
+
+
+def _parse_time(value: str) -> int:
+    """Returns the given Unix timestamp or ISO 8601 date in nanoseconds."""
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            raise argparse.ArgumentTypeError("invalid time: %r" % value)
+    return int(seconds * 1e9)
+
+
+def _get_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description=USAGE,
+        prog="ddtrace-profile",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    subparsers = parser.add_subparsers(dest="subcommand", required=True)
+
+    merge = subparsers.add_parser(
+        "merge",
+        help="merge profiles into collapsed stacks or a list of the top functions",
+        description=(
+            "Merge the profiles of the given files, across processes and time windows.\n"
+            "The files are read one at a time, and at most --max-stacks stacks are kept in memory."
+        ),
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    merge.add_argument("files", nargs="+", help="profile files, or glob patterns matching them")
+    merge.add_argument(
+        "-t", "--sample-type", default="cpu-time", help="type of the values to merge (default: %(default)s)"
+    )
+    merge.add_argument(
+        "-f",
+        "--format",
+        choices=("collapsed", "top"),
+        default="collapsed",
+        help=(
+            "collapsed: one line per stack, for flame graph tools (default)\n"
+            "top: the functions with the highest values"
+        ),
+    )
+    merge.add_argument("-n", "--top", type=int, default=20, help="number of functions listed (default: %(default)s)")
+    merge.add_argument("--sort", choices=("self", "total"), default="self", help="order of the functions listed")
+    merge.add_argument("-o", "--output", help="file to write to (default: standard output)")
+    merge.add_argument("--lines", action="store_true", help="include the file and line of the frames")
+    merge.add_argument("--group-by", metavar="LABEL", help="add the value of the given label as the root frame")
+    merge.add_argument(
+        "--max-stacks",
+        type=int,
+        default=100000,
+        help="number of distinct stacks kept in memory, the others are merged into [other] (default: %(default)s)",
+    )
+    merge.add_argument("--pid", type=int, action="append", help="only merge the profiles of these processes")
+    merge.add_argument("--since", type=_parse_time, help="only merge the profiles ending after this time")
+    merge.add_argument("--until", type=_parse_time, help="only merge the profiles starting before this time")
+    for kind, labels in pprof.FILTER_LABELS.items():
+        merge.add_argument(
+            "--" + kind,
+            action="append",
+            metavar="PATTERN",
+            help="only merge the samples whose %s matches the pattern" % " or ".join(labels),
+        )
+    return parser
+
+
+def _expand_files(patterns: typing.List[str]) -> typing.Iterator[str]:
+    for pattern in patterns:
+        if os.path.exists(pattern):
+            yield pattern
+        else:
+            for path in sorted(glob.iglob(pattern)):
+                if os.path.isfile(path):
+                    yield path
+
+
+def merge(args: argparse.Namespace) -> int:
+    sample_filter = pprof.SampleFilter({kind: getattr(args, kind) or [] for kind in pprof.FILTER_LABELS})
+    aggregator = pprof.StackAggregator(args.max_stacks)
+    pids = set(args.pid) if args.pid else None
+    merged = skipped = 0
+    unit = None
+
+    for path in _expand_files(args.files):
+        if pids is not None:
+            parsed = pprof.parse_output_filename(path)
+            if parsed is None or parsed[0] not in pids:
+                continue
+
+        try:
+            profile = pprof.Profile(pprof.read_file(path))
+        except (OSError, pprof.PprofError) as e:
+            print("ddtrace-profile: skipping %s: %s" % (path, e), file=sys.stderr)
+            skipped += 1
+            continue
+
+        if args.since is not None and profile.time_nanos + profile.duration_nanos < args.since:
+            continue
+        if args.until is not None and profile.time_nanos > args.until:
+            continue
+
+        index = profile.sample_type_index(args.sample_type)
+        if index is None:
+            continue
+        unit = profile.sample_types[index][1]
+
+        for stack, values, labels in profile.samples(with_lines=args.lines):
+            if index >= len(values) or not values[index]:
+                continue
+            if sample_filter and not sample_filter.match(labels):
+                continue
+            if args.group_by is not None:
+                stack = (str(labels.get(args.group_by, "")),) + stack
+            aggregator.add(stack, values[index])
+        merged += 1
+
+    if merged == 0:
+        print("ddtrace-profile: no profile with %s samples found" % args.sample_type, file=sys.stderr)
+        return 1
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        if args.format == "collapsed":
+            for stack, value in aggregator.collapsed():
+                out.write("%s %d\n" % (stack, value))
+        else:
+            total = aggregator.total() or 1
+            out.write("%s (%s) in %d profiles\n" % (args.sample_type, unit, merged))
+            out.write("%15s %7s %15s %7s  %s\n" % ("self", "self%", "total", "total%", "function"))
+            for frame, self_value, total_value in aggregator.top(args.top, by_total=args.sort == "total"):
+                out.write(
+                    "%15d %6.2f%% %15d %6.2f%%  %s\n"
+                    % (self_value, 100.0 * self_value / total, total_value, 100.0 * total_value / total, frame)
+                )
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if aggregator.dropped_stacks:
+        print(
+            "ddtrace-profile: %d stacks with low values were merged into %s, increase --max-stacks to keep them"
+            % (aggregator.dropped_stacks, pprof.OTHER_STACKS),
+            file=sys.stderr,
+        )
+    if skipped:
+        print("ddtrace-profile: %d files could not be read" % skipped, file=sys.stderr)
+    return 0
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> None:
+    parser = _get_arg_parser()
+    args = parser.parse_args(argv)
+    if args.subcommand == "merge":
+        sys.exit(merge(args))
+
+
+if __name__ == "__main__":
+    main()
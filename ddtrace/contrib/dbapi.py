@@ -106,7 +106,8 @@ class TracedCursor(wrapt.ObjectProxy):
             if dbm_propagator:
                 # this check is necessary to prevent fetch methods from trying to add dbm propagation
                 result = core.dispatch_with_results(
-                    f"{self._self_config.integration_name}.execute", (self._self_config, s, args, kwargs)
+                    f"{self._self_config.integration_name}.execute",
+                    (self._self_config, s, args, kwargs, self.__wrapped__),
                 ).result
                 if result:
                     s, args, kwargs = result.value
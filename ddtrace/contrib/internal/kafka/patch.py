@@ -250,8 +250,13 @@ def _instrument_message(messages, pin, start_ns, instance, err):
     # First message is used to extract context and enrich datadog spans
     # This approach aligns with the opentelemetry confluent kafka semantics
     first_message = messages[0] if len(messages) else None
-    if first_message is not None and config.kafka.distributed_tracing_enabled and first_message.headers():
-        ctx = Propagator.extract(dict(first_message.headers()))
+    is_batch = len(messages) > 1
+    # Headers are read once per message and shared by trace context extraction and data streams monitoring
+    headers = [dict(message.headers() or ()) for message in messages] if is_batch else None
+    if first_message is not None and config.kafka.distributed_tracing_enabled:
+        first_headers = headers[0] if headers is not None else first_message.headers()
+        if first_headers:
+            ctx = Propagator.extract(dict(first_headers))
     with pin.tracer.start_span(
         name=schematize_messaging_operation(kafkax.CONSUME, provider="kafka", direction=SpanDirection.PROCESSING),
         service=trace_utils.ext_service(pin, config.kafka),
@@ -263,12 +268,18 @@ def _instrument_message(messages, pin, start_ns, instance, err):
         span.start_ns = start_ns
         cluster_id = None
 
-        for message in messages:
-            if message is not None and first_message is not None:
-                cluster_id = _get_cluster_id(instance, str(first_message.topic()))
-                core.set_item("kafka_cluster_id", cluster_id)
-                core.set_item("kafka_topic", str(first_message.topic()))
-                core.dispatch("kafka.consume.start", (instance, first_message, span))
+        if is_batch:
+            cluster_id = _get_cluster_id(instance, str(first_message.topic()))
+            core.set_item("kafka_cluster_id", cluster_id)
+            core.set_item("kafka_topic", str(first_message.topic()))
+            if config.kafka.distributed_tracing_enabled:
+                _link_upstream_contexts(span, ctx, headers)
+            core.dispatch("kafka.consume.batch.start", (instance, messages, headers, span))
+        elif first_message is not None:
+            cluster_id = _get_cluster_id(instance, str(first_message.topic()))
+            core.set_item("kafka_cluster_id", cluster_id)
+            core.set_item("kafka_topic", str(first_message.topic()))
+            core.dispatch("kafka.consume.start", (instance, first_message, span))
 
         span.set_tag_str(MESSAGING_SYSTEM, kafkax.SERVICE)
         span.set_tag_str(COMPONENT, config.kafka.integration_name)
@@ -306,6 +317,24 @@ def _instrument_message(messages, pin, start_ns, instance, err):
             span.set_exc_info(*sys.exc_info())
 
 
+def _link_upstream_contexts(span, parent_ctx, headers):
+    """Link the consumer span to the trace context of every message of a batch"""
+    linked = set()
+    if parent_ctx is not None and parent_ctx.trace_id is not None:
+        # The context of the first message is already the parent of the span
+        linked.add((parent_ctx.trace_id, parent_ctx.span_id))
+    for message_headers in headers:
+        if not message_headers:
+            continue
+        upstream_ctx = Propagator.extract(message_headers)
+        if not upstream_ctx.trace_id or not upstream_ctx.span_id:
+            continue
+        key = (upstream_ctx.trace_id, upstream_ctx.span_id)
+        if key not in linked:
+            linked.add(key)
+            span.link_span(upstream_ctx)
+
+
 def traced_commit(func, instance, args, kwargs):
     pin = Pin.get_from(instance)
     if not pin or not pin.enabled():
@@ -13,6 +13,7 @@ from ddtrace.internal.schema import schematize_database_operation
 from ddtrace.internal.schema import schematize_service_name
 from ddtrace.internal.utils.formats import asbool
 from ddtrace.propagation._database_monitoring import _DBM_Propagator
+from ddtrace.propagation._database_monitoring import mysql_query_attributes_injector
 from ddtrace.settings.asm import config as asm_config
 from ddtrace.trace import Pin
 
@@ -24,7 +25,7 @@ config._add(
         _dbapi_span_name_prefix="mysql",
         _dbapi_span_operation_name=schematize_database_operation("mysql.query", database_provider="mysql"),
         trace_fetch_methods=asbool(os.getenv("DD_MYSQL_TRACE_FETCH_METHODS", default=False)),
-        _dbm_propagator=_DBM_Propagator(0, "query"),
+        _dbm_propagator=_DBM_Propagator(0, "query", query_attributes_injector=mysql_query_attributes_injector),
     ),
 )
 
@@ -21,7 +21,7 @@ from urllib import parse
 
 import wrapt
 
-from ddtrace.contrib.internal.trace_utils_base import USER_AGENT_PATTERNS  # noqa:F401
+from ddtrace.contrib.internal.trace_utils_base import USER_AGENT_PATTERNS
 from ddtrace.contrib.internal.trace_utils_base import _get_header_value_case_insensitive
 from ddtrace.contrib.internal.trace_utils_base import _get_request_header_user_agent
 from ddtrace.contrib.internal.trace_utils_base import _normalize_tag_name
@@ -34,10 +34,12 @@ from ddtrace.internal.compat import ensure_text
 from ddtrace.internal.compat import ip_is_global
 from ddtrace.internal.core.event_hub import dispatch
 from ddtrace.internal.logger import get_logger
+from ddtrace.internal.utils.http import normalize_header_name
 import ddtrace.internal.utils.wrappers
 from ddtrace.propagation.http import HTTPPropagator
 from ddtrace.settings._config import config
 from ddtrace.settings.asm import config as asm_config
+from ddtrace.settings.http import HttpConfig
 from ddtrace.trace import Pin
 
 
@@ -75,6 +77,70 @@ IP_PATTERNS = (
 )
 
 
+class _HeaderPlan(object):
+    """Precompiled view of the headers an integration reads on every request.
+
+    The plan is rebuilt only when the traced headers (``DD_TRACE_HEADER_TAGS``, remote configuration or
+    ``config.<integration>.http.trace_headers``) or the client IP settings change.
+    """
+
+    __slots__ = ("key", "request_tags", "response_tags", "lookups")
+
+    def __init__(self, key, header_tags, client_ip_enabled, client_ip_header):
+        # type: (Tuple, Dict[str, str], bool, Optional[str]) -> None
+        self.key = key
+        # Maps a normalized header name to the tag it is stored under
+        self.request_tags = {name: tag or _normalize_tag_name(REQUEST, name) for name, tag in header_tags.items()}
+        self.response_tags = {name: tag or _normalize_tag_name(RESPONSE, name) for name, tag in header_tags.items()}
+        # Headers read from case sensitive header collections (e.g. WSGI environ) to tag the request span
+        lookups = set(USER_AGENT_PATTERNS)
+        lookups.add(http.REFERER_HEADER)
+        # The client IP headers are only looked up when a consumer of the client IP is enabled
+        if client_ip_enabled:
+            lookups.update((client_ip_header,) if client_ip_header else IP_PATTERNS)
+        self.lookups = frozenset(lookups)
+
+
+def _header_plan(integration_config):
+    # type: (IntegrationConfig) -> Optional[_HeaderPlan]
+    """Return the header plan of an integration, rebuilding it if its configuration changed"""
+    http_config = getattr(integration_config, "http", None)
+    if not isinstance(http_config, HttpConfig):
+        # Duck-typed integration configs only expose _header_tag_name
+        return None
+    global_http_config = integration_config.global_config._http
+    client_ip_enabled = asm_config._asm_enabled or config._retrieve_client_ip
+    key = (
+        http_config._header_tags,
+        http_config._version,
+        global_http_config._header_tags,
+        global_http_config._version,
+        config._client_ip_header,
+        client_ip_enabled,
+    )
+    plan = getattr(http_config, "_header_plan", None)
+    if plan is not None and plan.key == key:
+        return plan
+
+    header_tags = dict(global_http_config._header_tags)
+    header_tags.update(http_config._header_tags)
+    client_ip_header = config._client_ip_header.lower().replace("_", "-") if config._client_ip_header else None
+    plan = http_config._header_plan = _HeaderPlan(key, header_tags, client_ip_enabled, client_ip_header)
+    return plan
+
+
+def _collect_headers(headers, names):
+    # type: (Mapping[str, str], frozenset) -> Dict[str, str]
+    """Extract the given normalized header names from a case sensitive header collection in a single pass"""
+    found = {}  # type: Dict[str, str]
+    for key, value in headers.items():
+        name = key.lower().replace("_", "-")
+        # An exact match takes precedence, like in _get_header_value_case_insensitive
+        if name in names and (name not in found or key == name):
+            found[name] = value
+    return found
+
+
 def _store_headers(headers, span, integration_config, request_or_response):
     # type: (Dict[str, str], Span, IntegrationConfig, str) -> None
     """
@@ -95,6 +161,17 @@ def _store_headers(headers, span, integration_config, request_or_response):
         log.debug("Skipping headers tracing as no integration config was provided")
         return
 
+    plan = _header_plan(integration_config)
+    if plan is not None:
+        tags = plan.request_tags if request_or_response == REQUEST else plan.response_tags
+        if not tags:
+            return
+        for header_name, header_value in headers.items():
+            tag_name = tags.get(normalize_header_name(header_name))
+            if tag_name is not None:
+                span.set_tag_str(tag_name, header_value)
+        return
+
     for header_name, header_value in headers.items():
         # config._header_tag_name gets an element of the dictionary in config._trace_http_header_tags
         # which gets the value from DD_TRACE_HEADER_TAGS environment variable."""
@@ -438,12 +515,19 @@ def set_http_meta(
 
     request_ip = peer_ip
     if request_headers:
-        user_agent = _get_request_header_user_agent(request_headers, headers_are_case_sensitive)
+        lookup_headers = request_headers
+        if headers_are_case_sensitive:
+            plan = _header_plan(integration_config)
+            if plan is not None:
+                # Normalize only the headers read below instead of scanning all of them on every lookup
+                lookup_headers = _collect_headers(request_headers, plan.lookups)
+
+        user_agent = _get_request_header_user_agent(lookup_headers, headers_are_case_sensitive)
         if user_agent:
             span.set_tag_str(http.USER_AGENT, user_agent)
 
         # Extract referrer host if referer header is present
-        referrer_host = _get_request_header_referrer_host(request_headers, headers_are_case_sensitive)
+        referrer_host = _get_request_header_referrer_host(lookup_headers, headers_are_case_sensitive)
         if referrer_host:
             span.set_tag_str(http.REFERRER_HOSTNAME, referrer_host)
 
@@ -456,7 +540,7 @@ def set_http_meta(
             if not request_ip:
                 # Not calculated: framework does not support IP blocking or testing env
                 request_ip = (
-                    _get_request_header_client_ip(request_headers, peer_ip, headers_are_case_sensitive) or peer_ip
+                    _get_request_header_client_ip(lookup_headers, peer_ip, headers_are_case_sensitive) or peer_ip
                 )
 
             if request_ip:
@@ -467,10 +551,10 @@ def set_http_meta(
             """We should store both http.<request_or_response>.headers.<header_name> and
             http.<key>. The last one
             is the DD standardized tag for user-agent"""
-            _store_request_headers(dict(request_headers), span, integration_config)
+            _store_request_headers(request_headers, span, integration_config)
 
     if response_headers is not None and integration_config.is_header_tracing_configured:
-        _store_response_headers(dict(response_headers), span, integration_config)
+        _store_response_headers(response_headers, span, integration_config)
 
     if retries_remain is not None:
         span.set_tag_str(http.RETRIES_REMAIN, str(retries_remain))
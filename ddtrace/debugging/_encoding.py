@@ -1,20 +1,19 @@
 import abc
-from dataclasses import dataclass
-from heapq import heapify
-from heapq import heappop
-from heapq import heappush
+from functools import partial
 import json
 import os
 from threading import Thread
-from types import FrameType
+from types import CodeType
 from typing import Any
 from typing import Callable
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Tuple
 from typing import Union
 
 from ddtrace.debugging._config import di_config
+from ddtrace.debugging._metrics import metrics
 from ddtrace.debugging._signal.log import LogSignal
 from ddtrace.debugging._signal.snapshot import Snapshot
 from ddtrace.internal import forksafe
@@ -24,6 +23,14 @@ from ddtrace.internal.utils.formats import format_trace_id
 
 
 log = get_logger(__name__)
+meter = metrics.get_meter("encoder")
+
+PRUNED_PROPERTY = '{"pruned":true}'
+PRUNED_LEN = len(PRUNED_PROPERTY)
+PRUNED_BYTES = PRUNED_PROPERTY.encode()
+
+_encode_str = json.encoder.encode_basestring_ascii  # type: ignore[attr-defined]
+_CONTAINER_TYPES = (dict, list, tuple)
 
 
 class JsonBuffer(object):
@@ -46,6 +53,34 @@ class JsonBuffer(object):
         self.size += size
         return size
 
+    def put_with(self, encode: Callable[[bytearray], None]) -> int:
+        """Encode an item directly at the end of the buffer.
+
+        The item is removed if the encoder fails or if it does not fit within
+        the buffer.
+        """
+        if self._flushed:
+            self._reset()
+
+        buffer = self._buffer
+        mark = len(buffer)
+        if self.size > 2:
+            buffer += b","
+        start = len(buffer)
+        try:
+            encode(buffer)
+        except BaseException:
+            del buffer[mark:]
+            raise
+
+        size = len(buffer) - start
+        if self.max_size is not None and self.size + size > self.max_size:
+            del buffer[mark:]
+            raise BufferFull(self.size, size)
+
+        self.size += len(buffer) - mark
+        return size
+
     def _reset(self):
         self.size = 2
         self._buffer = bytearray(b"[")
@@ -64,6 +99,10 @@ class Encoder(abc.ABC):
     def encode(self, item: Any) -> bytes:
         """Encode the given snapshot."""
 
+    def encode_into(self, item: Any, buffer: bytearray) -> None:
+        """Encode the given snapshot at the end of the given buffer."""
+        buffer.extend(self.encode(item))
+
 
 class BufferedEncoder(abc.ABC):
     count = 0
@@ -77,9 +116,7 @@ class BufferedEncoder(abc.ABC):
         """Flush the buffer and return the encoded data."""
 
 
-def _logs_track_logger_details(thread: Thread, frame: FrameType) -> Dict[str, Any]:
-    code = frame.f_code
-
+def _logs_track_logger_details(thread: Thread, code: CodeType) -> Dict[str, Any]:
     return {
         "name": code.co_filename,
         "method": code.co_name,
@@ -105,7 +142,7 @@ def _build_log_track_payload(
         "service": service,
         "debugger": {"snapshot": signal.snapshot},
         "host": host,
-        "logger": _logs_track_logger_details(signal.thread, signal.frame),
+        "logger": _logs_track_logger_details(signal.thread, signal.code),
         "ddsource": "dd_debugger",
         "message": signal.message,
         "timestamp": int(signal.timestamp * 1e3),  # milliseconds,
@@ -123,181 +160,147 @@ def _build_log_track_payload(
     return payload
 
 
-class JSONTree:
-    @dataclass
-    class Node:
-        start: int
-        end: int
-        level: int
-        parent: Optional["JSONTree.Node"]
-        children: List["JSONTree.Node"]
-
-        pruned: int = 0
-        not_captured_depth: bool = False
-        not_captured: bool = False
-
-        @property
-        def key(self):
-            return self.not_captured_depth, self.level, self.not_captured, len(self)
-
-        def __len__(self):
-            return self.end - self.start
-
-        def __lt__(self, other):
-            # The Python heapq pops the smallest item, so we reverse the
-            # comparison.
-            return self.key > other.key
-
-        @property
-        def leaves(self):
-            if not self.children:
-                yield self
-            else:
-                for child in self.children[::-1]:
-                    yield from child.leaves
-
-    def __init__(self, data):
-        self._iter = enumerate(data)
-        self._stack: List["JSONTree.Node"] = []  # TODO: deque
-        self.root = None
-        self.level = 0
-
-        self._string_iter = None
-
-        self._state = self._object
-        self._on_string_match = self._not_captured
-
-        self._parse()
-
-    def _depth_string(self, i, c):
-        self._stack[-1].not_captured_depth = True
-        return self._object
-
-    def _not_captured(self, i, c):
-        if c == '"':
-            self._string_iter = iter("depth")
-            self._on_string_match = self._depth_string
-            return self._string
-
-        elif c not in " :\n\t\r":
-            return self._object
-
-        return self._state
-
-    def _not_captured_string(self, i, c):
-        self._stack[-1].not_captured = True
-        return self._not_captured
-
-    def _escape(self, i, c):
-        return self._string
-
-    def _string(self, i, c):
-        if c == '"':
-            return (
-                self._on_string_match(i, c)
-                if self._string_iter is not None and next(self._string_iter, None) is None
-                else self._object
-            )
-
-        elif c == "\\":
-            # If we are escaping a character, we are not parsing the
-            # "notCapturedReason" string.
-            self._string_iter = None
-            return self._escape
-
-        if self._string_iter is not None and c != next(self._string_iter, None):
-            self._string_iter = None
-
-    def _object(self, i, c):
-        if c == "}":
-            o = self._stack.pop()
-            o.end = i + 1
-            self.level -= 1
-            if not self._stack:
-                self.root = o
-
-        elif c == '"':
-            self._string_iter = iter("notCapturedReason")
-            self._on_string_match = self._not_captured_string
-            return self._string
-
-        elif c == "{":
-            o = self.Node(i, 0, self.level, None, [])
-            self.level += 1
-            if self._stack:
-                o.parent = self._stack[-1]
-                o.parent.children.append(o)
-            self._stack.append(o)
-
-    def _parse(self):
-        for i, c in self._iter:
-            self._state = self._state(i, c) or self._state
-            if self.root is not None:
-                return
+class JSONStreamEncoder:
+    """Encode a JSON payload at the end of a buffer, within a size budget.
 
-    @property
-    def leaves(self):
-        return list(self.root.leaves) if self.root is not None else []
+    The output is the same as ``json.dumps`` with the default arguments, as
+    long as it fits within the budget. Otherwise, the objects nested at least
+    ``min_level`` deep that do not fit are replaced with the pruned marker.
+    The payload is encoded in a single pass: each value is written straight
+    into the buffer, and an object that overflows is rolled back and replaced
+    with the marker. Room is kept for the values that follow an object, so
+    the objects that come first are kept. The objects that start once the
+    budget is spent are replaced without being encoded.
+    """
 
+    def __init__(self, buffer: bytearray, budget: int, min_level: int = 0) -> None:
+        self._buffer = buffer
+        self._limit = len(buffer) + budget
+        self._min_level = min_level
+        self._min_sizes: Dict[Tuple[int, int], int] = {}
 
-class LogSignalJsonEncoder(Encoder):
-    MAX_SIGNAL_SIZE = (1 << 20) - 2
-    MIN_LEVEL = 5
+    def encode(self, value: Any) -> None:
+        try:
+            self._encode(value, 0, self._limit)
+        finally:
+            self._min_sizes.clear()
+
+    def _min_size(self, value: Any, level: int) -> int:
+        # The size of the value once all the objects that can be are pruned.
+        # The size of each container is only computed once.
+        if isinstance(value, dict):
+            if level >= self._min_level:
+                return PRUNED_LEN
+        elif not isinstance(value, _CONTAINER_TYPES):
+            return len(_encode_value(value))
+
+        key = (id(value), level)
+        try:
+            return self._min_sizes[key]
+        except KeyError:
+            pass
+
+        if isinstance(value, dict):
+            size = 2 + sum(len(_encode_key(k)) + 4 + self._min_size(v, level + 1) for k, v in value.items())
+        else:
+            size = 2 + sum(self._min_size(item, level) + 2 for item in value)
+        self._min_sizes[key] = size
+        return size
 
-    def __init__(self, service: str, host: Optional[str] = None) -> None:
-        self._service = service
-        self._host = host
+    def _encode(self, value: Any, level: int, limit: int) -> None:
+        if isinstance(value, dict):
+            self._encode_object(value, level, limit)
+        elif isinstance(value, (list, tuple)):
+            self._encode_array(value, level, limit)
+        else:
+            self._buffer += _encode_value(value)
+
+    def _encode_array(self, value: Union[list, tuple], level: int, limit: int) -> None:
+        buffer = self._buffer
+        sizes = [self._min_size(item, level) + 2 for item in value]
+        reserved = sum(sizes) + 1
+
+        buffer += b"["
+        for i, item in enumerate(value):
+            reserved -= sizes[i]
+            if i:
+                buffer += b", "
+            self._encode(item, level, limit - reserved)
+        buffer += b"]"
+
+    def _encode_object(self, value: dict, level: int, limit: int) -> None:
+        buffer = self._buffer
+        start = len(buffer)
+        prunable = level >= self._min_level
+
+        if prunable and start + PRUNED_LEN >= limit:
+            buffer += PRUNED_BYTES
+            return
+
+        if not any(isinstance(v, _CONTAINER_TYPES) for v in value.values()):
+            # Objects without nested values are encoded by the native JSON
+            # encoder, in a single call.
+            encoded = json.dumps(value).encode()
+            buffer += PRUNED_BYTES if prunable and start + len(encoded) > limit else encoded
+            return
+
+        keys = [_encode_key(k) for k in value]
+        sizes = [len(k) + 4 + self._min_size(v, level + 1) for k, v in zip(keys, value.values())]
+        reserved = sum(sizes) + 1
+
+        buffer += b"{"
+        for i, (k, v) in enumerate(zip(keys, value.values())):
+            reserved -= sizes[i]
+            if i:
+                buffer += b", "
+            buffer += k
+            buffer += b": "
+            self._encode(v, level + 1, limit - reserved)
+            if prunable and len(buffer) + reserved > limit:
+                # The object does not fit, even with the values that follow
+                # pruned, so we roll it back.
+                del buffer[start:]
+                buffer += PRUNED_BYTES
+                return
+        buffer += b"}"
 
-    def encode(self, item: LogSignal) -> bytes:
-        return self.pruned(json.dumps(_build_log_track_payload(self._service, item, self._host))).encode("utf-8")
 
-    def pruned(self, log_signal_json: str) -> str:
-        if len(log_signal_json) <= self.MAX_SIGNAL_SIZE:
-            return log_signal_json
+def _encode_scalar(value: Any) -> str:
+    if value is None:
+        return "null"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, (int, float)):
+        return json.dumps(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
 
-        PRUNED_PROPERTY = '{"pruned":true}'
-        PRUNED_LEN = len(PRUNED_PROPERTY)
 
-        tree = JSONTree(log_signal_json)
-        if tree.root is None:
-            return log_signal_json
+def _encode_value(value: Any) -> bytes:
+    return (_encode_str(value) if isinstance(value, str) else _encode_scalar(value)).encode()
 
-        delta = len(tree.root) - self.MAX_SIGNAL_SIZE
-        nodes, s = {}, 0
 
-        leaves = [_ for _ in tree.leaves if _.level >= self.MIN_LEVEL]
-        heapify(leaves)
-        while leaves:
-            leaf = heappop(leaves)
-            nodes[leaf.start] = leaf
-            s += len(leaf) - PRUNED_LEN
-            if s > delta:
-                break
+def _encode_key(key: Any) -> bytes:
+    return _encode_str(key if isinstance(key, str) else _encode_scalar(key)).encode()
 
-            parent = leaf.parent
-            if parent is None:
-                continue
 
-            parent.pruned += 1
-            if parent.pruned >= len(parent.children):
-                # We have pruned all the children of this parent node so we can
-                # treat it as a leaf now.
-                parent.not_captured_depth = parent.not_captured = True
-                heappush(leaves, parent)
-                for c in parent.children:
-                    del nodes[c.start]
-                    s -= len(c) - PRUNED_LEN
+class LogSignalJsonEncoder(Encoder):
+    MAX_SIGNAL_SIZE = (1 << 20) - 2
+    MIN_LEVEL = 5
 
-        pruned_nodes = sorted(nodes.values(), key=lambda n: n.start)  # Leaf nodes don't overlap
+    def __init__(self, service: str, host: Optional[str] = None) -> None:
+        self._service = service
+        self._host = host
 
-        segments = [log_signal_json[: pruned_nodes[0].start]]
-        for n, m in zip(pruned_nodes, pruned_nodes[1:]):
-            segments.append(PRUNED_PROPERTY)
-            segments.append(log_signal_json[n.end : m.start])
-        segments.append(PRUNED_PROPERTY)
-        segments.append(log_signal_json[pruned_nodes[-1].end :])
+    def encode(self, item: LogSignal) -> bytes:
+        buffer = bytearray()
+        self.encode_into(item, buffer)
+        return bytes(buffer)
 
-        return "".join(segments)
+    def encode_into(self, item: LogSignal, buffer: bytearray) -> None:
+        payload = _build_log_track_payload(self._service, item, self._host)
+        JSONStreamEncoder(buffer, self.MAX_SIGNAL_SIZE, self.MIN_LEVEL).encode(payload)
 
 
 class SignalQueue(BufferedEncoder):
@@ -311,11 +314,23 @@ class SignalQueue(BufferedEncoder):
         self._buffer = JsonBuffer(buffer_size)
         self._lock = forksafe.Lock()
         self._on_full = on_full
+        self._deferred: List[Snapshot] = []
         self.count = 0
         self.max_size = buffer_size - self._buffer.size
 
     def put(self, item: Snapshot) -> int:
-        return self.put_encoded(item, self._encoder.encode(item))
+        if getattr(item, "deferred", False):
+            return self._defer(item)
+
+        try:
+            with self._lock:
+                size = self._buffer.put_with(partial(self._encoder.encode_into, item))
+                self.count += 1
+                return size
+        except BufferFull:
+            if self._on_full is not None:
+                self._on_full(item, b"")
+            raise
 
     def put_encoded(self, item: Snapshot, encoded: bytes) -> int:
         try:
@@ -328,13 +343,54 @@ class SignalQueue(BufferedEncoder):
                 self._on_full(item, encoded)
             raise
 
+    def _defer(self, item: Snapshot) -> int:
+        # The signal is encoded by the thread that flushes the queue. We only
+        # keep a bounded number of signals waiting to be encoded.
+        with self._lock:
+            pending = len(self._deferred)
+            if pending < di_config.max_deferred_signals:
+                self._deferred.append(item)
+                self.count += 1
+                return 0
+
+        if self._on_full is not None:
+            self._on_full(item, b"")
+        raise BufferFull(pending, 0)
+
+    def _encode_deferred(self) -> None:
+        with self._lock:
+            deferred, self._deferred = self._deferred, []
+            self.count -= len(deferred)
+
+        for i, item in enumerate(deferred):
+            with self._lock:
+                try:
+                    self._buffer.put_with(partial(self._encoder.encode_into, item))
+                    self.count += 1
+                except BufferFull:
+                    # Keep the remaining signals for the next flush
+                    self._deferred[:0] = deferred[i:]
+                    self.count += len(deferred) - i
+                    return
+                except RuntimeError:
+                    # The values of the signal were changed by another thread
+                    # while they were being captured, e.g. a dictionary that
+                    # changed size during iteration.
+                    log.debug("Deferred signal %r changed while being encoded", item, exc_info=True)
+                    meter.increment("deferred.mutated")
+                except Exception:
+                    log.error("Failed to encode deferred signal %r", item, exc_info=True)
+
     def flush(self) -> Optional[Union[bytes, bytearray]]:
+        if self._deferred:
+            self._encode_deferred()
+
         with self._lock:
-            if self.count == 0:
+            if self.count == len(self._deferred):
                 # Reclaim memory
                 self._buffer._reset()
                 return None
 
             encoded = self._buffer.flush()
-            self.count = 0
+            self.count = len(self._deferred)
             return encoded
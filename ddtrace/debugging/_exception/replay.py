@@ -21,6 +21,7 @@ from ddtrace.internal.packages import is_user_code
 from ddtrace.internal.rate_limiter import BudgetRateLimiterWithJitter as RateLimiter
 from ddtrace.internal.rate_limiter import RateLimitExceeded
 from ddtrace.internal.utils.time import HourGlass
+from ddtrace.internal.utils.tracebacks import fingerprint
 from ddtrace.settings.exception_replay import config
 from ddtrace.trace import Span
 
@@ -66,14 +67,7 @@ def exception_ident(exc: BaseException, tb: t.Optional[TracebackType]) -> int:
     that we can use to identify the exception. This can be used to rate limit
     the number of times we capture information of the same exception.
     """
-    h = 0
-    _tb = tb
-    while _tb is not None:
-        frame = _tb.tb_frame
-        h = (h << 1) ^ (id(frame.f_code) << 4 | frame.f_lasti)
-        h &= 0xFFFFFFFFFFFFFFFF
-        _tb = _tb.tb_next
-    return (id(type(exc)) << 64) | h
+    return (id(type(exc)) << 64) | fingerprint(tb)
 
 
 def exception_chain_ident(chain: ExceptionChain) -> int:
@@ -1,10 +1,10 @@
 from dataclasses import dataclass
 from functools import partial
-from itertools import count
 from pathlib import Path
 import sys
 from threading import current_thread
 from time import monotonic_ns
+from types import CodeType
 from types import FrameType
 from types import FunctionType
 import typing as t
@@ -38,6 +38,64 @@ def frame_stack(frame: FrameType) -> t.Iterator[FrameType]:
         _frame = _frame.f_back
 
 
+class _CodeOrigin(t.NamedTuple):
+    file: str
+    line: str
+    module: t.Optional[str]
+    name: str
+    is_user: bool
+
+
+# Resolved code origin information, by code object. The cache is bounded to
+# avoid keeping dynamically generated code objects alive indefinitely.
+_CODE_ORIGIN_CACHE: t.Dict[CodeType, _CodeOrigin] = {}
+_CODE_ORIGIN_CACHE_SIZE = 4096
+
+
+def _code_origin(frame: FrameType) -> _CodeOrigin:
+    code = frame.f_code
+    try:
+        return _CODE_ORIGIN_CACHE[code]
+    except KeyError:
+        pass
+
+    filename = code.co_filename
+    is_user = is_user_code(filename)
+
+    # Get the module and function name from the frame and code object. In
+    # Python3.11+ qualname is available, otherwise we'll fallback to the
+    # unqualified name.
+    origin = _CodeOrigin(
+        file=filename,
+        line=str(code.co_firstlineno),
+        module=frame.f_globals.get("__name__") if is_user else None,
+        name=getattr(code, "co_qualname", code.co_name),
+        is_user=is_user,
+    )
+
+    if len(_CODE_ORIGIN_CACHE) >= _CODE_ORIGIN_CACHE_SIZE:
+        _CODE_ORIGIN_CACHE.clear()
+    _CODE_ORIGIN_CACHE[code] = origin
+
+    return origin
+
+
+class _FrameTagNames(dict):
+    """Tag names for the frame at a given position in the exit span stack."""
+
+    def __missing__(self, n: int) -> t.Tuple[str, str, str, str, str]:
+        names = self[n] = t.cast(
+            t.Tuple[str, str, str, str, str],
+            tuple(
+                sys.intern(f"_dd.code_origin.frames.{n}.{_}") for _ in ("file", "line", "type", "method", "snapshot_id")
+            ),
+        )
+        return names
+
+
+_FRAME_TAGS = _FrameTagNames()
+
+
 def wrap_entrypoint(collector: SignalCollector, f: t.Callable) -> None:
     if not _isinstance(f, FunctionType):
         return
@@ -242,51 +300,49 @@ class SpanCodeOriginProcessorExit(SpanProcessor):
 
         span.set_tag_str("_dd.code_origin.type", "exit")
 
+        # Check if we have any level 2 debugging sessions running for the
+        # current trace
+        capture = any(s.level >= 2 for s in Session.from_trace())
+
         # Add call stack information to the exit span. Report only the part of
         # the stack that belongs to user code.
-        seq = count(0)
+        n = 0
+        max_user_frames = co_config.max_user_frames
         for frame in frame_stack(sys._getframe(1)):
-            code = frame.f_code
-            filename = code.co_filename
-
-            if is_user_code(filename):
-                n = next(seq)
-                if n >= co_config.max_user_frames:
-                    break
-
-                span.set_tag_str(f"_dd.code_origin.frames.{n}.file", filename)
-                span.set_tag_str(f"_dd.code_origin.frames.{n}.line", str(code.co_firstlineno))
-
-                # Get the module and function name from the frame and code object. In Python3.11+ qualname
-                # is available, otherwise we'll fallback to the unqualified name.
-                try:
-                    name = code.co_qualname  # type: ignore[attr-defined]
-                except AttributeError:
-                    name = code.co_name
-
-                mod = frame.f_globals.get("__name__")
-                span.set_tag_str(f"_dd.code_origin.frames.{n}.type", mod) if mod else None
-                span.set_tag_str(f"_dd.code_origin.frames.{n}.method", name) if name else None
-
-                # Check if we have any level 2 debugging sessions running for
-                # the current trace
-                if any(s.level >= 2 for s in Session.from_trace()):
-                    # Create a snapshot
-                    snapshot = Snapshot(
-                        probe=ExitSpanProbe.from_frame(frame),
-                        frame=frame,
-                        thread=current_thread(),
-                        trace_context=span,
-                    )
-
-                    # Capture on entry
-                    snapshot.do_line()
-
-                    # Collect
-                    self.__uploader__.get_collector().push(snapshot)
-
-                    # Correlate the snapshot with the span
-                    span.set_tag_str(f"_dd.code_origin.frames.{n}.snapshot_id", snapshot.uuid)
+            origin = _code_origin(frame)
+            if not origin.is_user:
+                continue
+
+            if n >= max_user_frames:
+                break
+
+            file_tag, line_tag, type_tag, method_tag, snapshot_id_tag = _FRAME_TAGS[n]
+            n += 1
+
+            span.set_tag_str(file_tag, origin.file)
+            span.set_tag_str(line_tag, origin.line)
+            if origin.module:
+                span.set_tag_str(type_tag, origin.module)
+            if origin.name:
+                span.set_tag_str(method_tag, origin.name)
+
+            if capture:
+                # Create a snapshot
+                snapshot = Snapshot(
+                    probe=ExitSpanProbe.from_frame(frame),
+                    frame=frame,
+                    thread=current_thread(),
+                    trace_context=span,
+                )
+
+                # Capture on entry
+                snapshot.do_line()
+
+                # Collect
+                self.__uploader__.get_collector().push(snapshot)
+
+                # Correlate the snapshot with the span
+                span.set_tag_str(snapshot_id_tag, snapshot.uuid)
 
     def on_span_finish(self, span: Span) -> None:
         pass
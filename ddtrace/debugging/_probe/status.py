@@ -11,7 +11,7 @@ from ddtrace.debugging._probe.model import Probe
 from ddtrace.internal import runtime
 from ddtrace.internal.logger import get_logger
 from ddtrace.internal.utils.http import FormData
-from ddtrace.internal.utils.http import connector
+from ddtrace.internal.utils.http import get_connection_pool
 from ddtrace.internal.utils.http import multipart
 from ddtrace.internal.utils.retry import fibonacci_backoff_with_jitter
 
@@ -31,7 +31,7 @@ class ProbeStatusLogger:
     def __init__(self, service: str) -> None:
         self._service = service
         self._queue: Queue[str] = Queue()
-        self._connect = connector(di_config._intake_url, timeout=di_config.upload_timeout)
+        self._connect = get_connection_pool(di_config._intake_url).connector(timeout=di_config.upload_timeout)
         # Make it retryable
         self._write_payload_with_backoff = fibonacci_backoff_with_jitter(
             initial_wait=0.618 * self.RETRY_INTERVAL / (1.618**self.RETRY_ATTEMPTS) / 2,
@@ -87,6 +87,8 @@ class ProbeStatusLogger:
                     log.error("Failed to upload payload: [%d] %r", resp.status, resp.read())
                     meter.increment("upload.error", tags={"status": str(resp.status)})
                 else:
+                    # Drain the response so that the connection can be reused
+                    resp.read()
                     meter.increment("upload.success")
                     meter.distribution("upload.size", len(body))
         except Exception:
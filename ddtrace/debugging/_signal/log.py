@@ -1,5 +1,6 @@
 import abc
 from dataclasses import dataclass
+from types import CodeType
 import typing as t
 
 from ddtrace.debugging._probe.model import FunctionLocationMixin
@@ -27,6 +28,11 @@ class LogSignal(Signal):
         """Whether the signal has a log message to emit."""
         pass
 
+    @property
+    def code(self) -> CodeType:
+        """The code of the frame that emitted the signal."""
+        return self.frame.f_code
+
     @property
     def data(self) -> t.Dict[str, t.Any]:
         """Extra data to include in the snapshot portion of the log message."""
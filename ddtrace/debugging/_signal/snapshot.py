@@ -1,16 +1,28 @@
+from collections import Counter
+from collections import OrderedDict
+from collections import defaultdict
+from collections import deque
+from copy import copy
 from dataclasses import dataclass
 from dataclasses import field
 from itertools import chain
 import sys
+from time import thread_time
+from types import CodeType
 from types import FrameType
 from types import FunctionType
 from types import ModuleType
 from typing import Any
 from typing import Dict
+from typing import Iterable
+from typing import List
 from typing import Mapping
 from typing import Optional
+from typing import Tuple
+from typing import Union
 from typing import cast
 
+from ddtrace.debugging._config import di_config
 from ddtrace.debugging._expressions import DDExpressionEvaluationError
 from ddtrace.debugging._probe.model import DEFAULT_CAPTURE_LIMITS
 from ddtrace.debugging._probe.model import CaptureLimits
@@ -20,6 +32,7 @@ from ddtrace.debugging._probe.model import LiteralTemplateSegment
 from ddtrace.debugging._probe.model import LogFunctionProbe
 from ddtrace.debugging._probe.model import LogLineProbe
 from ddtrace.debugging._probe.model import LogProbeMixin
+from ddtrace.debugging._probe.model import RateLimitMixin
 from ddtrace.debugging._probe.model import TemplateSegment
 from ddtrace.debugging._redaction import REDACTED_PLACEHOLDER
 from ddtrace.debugging._redaction import DDRedactedExpressionError
@@ -36,6 +49,7 @@ from ddtrace.internal.utils.time import HourGlass
 
 
 CAPTURE_TIME_BUDGET = 0.2  # seconds
+DEFERRED_CAPTURE_CPU_BUDGET = 0.001  # seconds of CPU time per snapshot
 
 
 _NOTSET = object()
@@ -44,27 +58,34 @@ _NOTSET = object()
 EXCLUDE_GLOBAL_TYPES = (ModuleType, type, FunctionType)
 
 
-def _capture_context(
-    frame: FrameType,
-    throwable: ExcInfoType,
-    retval: Any = _NOTSET,
-    limits: CaptureLimits = DEFAULT_CAPTURE_LIMITS,
+def _collect_values(
+    frame: FrameType, throwable: ExcInfoType, retval: Any = _NOTSET
+) -> Tuple[Iterable[Tuple[str, Any]], Iterable[Tuple[str, Any]], Iterable[Tuple[str, Any]]]:
+    arguments = get_args(frame)
+    _locals: Iterable[Tuple[str, Any]] = get_locals(frame)
+    _globals = ((n, v) for n, v in get_globals(frame) if not isinstance(v, EXCLUDE_GLOBAL_TYPES))
+
+    _, exc, _ = throwable
+    if exc is not None:
+        _locals = chain(_locals, [("@exception", exc)])
+    elif retval is not _NOTSET:
+        _locals = chain(_locals, [("@return", retval)])
+
+    return arguments, _locals, _globals
+
+
+def _capture_values(
+    arguments: Iterable[Tuple[str, Any]],
+    _locals: Iterable[Tuple[str, Any]],
+    _globals: Iterable[Tuple[str, Any]],
+    throwable: Optional[Dict[str, Any]],
+    limits: CaptureLimits,
 ) -> Dict[str, Any]:
     with HourGlass(duration=CAPTURE_TIME_BUDGET) as hg:
 
         def timeout(_):
             return not hg.trickling()
 
-        arguments = get_args(frame)
-        _locals = get_locals(frame)
-        _globals = ((n, v) for n, v in get_globals(frame) if not isinstance(v, EXCLUDE_GLOBAL_TYPES))
-
-        _, exc, _ = throwable
-        if exc is not None:
-            _locals = chain(_locals, [("@exception", exc)])
-        elif retval is not _NOTSET:
-            _locals = chain(_locals, [("@return", retval)])
-
         return {
             "arguments": utils.capture_pairs(
                 arguments, limits.max_level, limits.max_len, limits.max_size, limits.max_fields, timeout
@@ -81,10 +102,61 @@ def _capture_context(
             )
             if _globals
             else {},
-            "throwable": utils.capture_exc_info(throwable),
+            "throwable": throwable,
         }
 
 
+def _capture_context(
+    frame: FrameType,
+    throwable: ExcInfoType,
+    retval: Any = _NOTSET,
+    limits: CaptureLimits = DEFAULT_CAPTURE_LIMITS,
+) -> Dict[str, Any]:
+    return _capture_values(*_collect_values(frame, throwable, retval), utils.capture_exc_info(throwable), limits)
+
+
+# Builtin containers that are copied when the capture is deferred, so that
+# later changes to them are not reflected in the snapshot.
+_COPIED_CONTAINER_TYPES = frozenset([list, dict, set, deque, defaultdict, Counter, OrderedDict])
+
+
+def _shallow_copy(pairs: Iterable[Tuple[str, Any]], limits: CaptureLimits) -> List[Tuple[str, Any]]:
+    # Containers larger than the capture size are kept by reference, since a
+    # truncated copy would not report the right size.
+    return [(n, copy(v) if type(v) in _COPIED_CONTAINER_TYPES and len(v) <= limits.max_size else v) for n, v in pairs]
+
+
+@dataclass
+class _DeferredContext:
+    """Shallow copy of the values of a frame, captured later by the uploader thread.
+
+    The exception being handled is captured right away, so that its traceback
+    does not keep the frames alive.
+    """
+
+    arguments: List[Tuple[str, Any]]
+    locals: List[Tuple[str, Any]]
+    static_fields: List[Tuple[str, Any]]
+    throwable: Optional[Dict[str, Any]]
+    limits: CaptureLimits
+
+    @classmethod
+    def collect(
+        cls, frame: FrameType, throwable: ExcInfoType, retval: Any, limits: CaptureLimits
+    ) -> "_DeferredContext":
+        arguments, _locals, _globals = _collect_values(frame, throwable, retval)
+        return cls(
+            _shallow_copy(arguments, limits),
+            _shallow_copy(_locals, limits),
+            list(_globals),
+            utils.capture_exc_info(throwable),
+            limits,
+        )
+
+    def capture(self) -> Dict[str, Any]:
+        return _capture_values(self.arguments, self.locals, self.static_fields, self.throwable, self.limits)
+
+
 _EMPTY_CAPTURED_CONTEXT: Dict[str, Any] = {"arguments": {}, "locals": {}, "staticFields": {}, "throwable": None}
 
 
@@ -95,12 +167,13 @@ class Snapshot(LogSignal):
     Used to collect the minimum amount of information from a firing probe.
     """
 
-    entry_capture: Optional[dict] = field(default=None)
-    return_capture: Optional[dict] = field(default=None)
-    line_capture: Optional[dict] = field(default=None)
+    entry_capture: Optional[Union[dict, _DeferredContext]] = field(default=None)
+    return_capture: Optional[Union[dict, _DeferredContext]] = field(default=None)
+    line_capture: Optional[Union[dict, _DeferredContext]] = field(default=None)
     _stack: Optional[list] = field(default=None)
     _message: Optional[str] = field(default=None)
     duration: Optional[int] = field(default=None)  # nanoseconds
+    _code: Optional[CodeType] = field(default=None)
 
     def _eval_segment(self, segment: TemplateSegment, _locals: Mapping[str, Any]) -> str:
         probe = cast(LogProbeMixin, self.probe)
@@ -131,7 +204,42 @@ class Snapshot(LogSignal):
 
         self._stack = utils.capture_stack(self.frame)
 
-        return _capture_context(frame, exc_info, retval=retval, limits=probe.limits) if probe.take_snapshot else None
+        if not probe.take_snapshot:
+            return None
+
+        if self.deferred:
+            return _DeferredContext.collect(frame, exc_info, retval, probe.limits)
+
+        return _capture_context(frame, exc_info, retval=retval, limits=probe.limits)
+
+    @property
+    def deferred(self) -> bool:
+        """Whether the values are serialized only when the snapshot is encoded."""
+        return di_config.deferred_capture
+
+    def _release_frame(self) -> None:
+        # Deferred snapshots wait for the uploader thread, which only needs the
+        # code of the frame, so we let the frame be freed.
+        if self.deferred:
+            self._code = self.frame.f_code
+            self.frame = None  # type: ignore[assignment]
+
+    def _resolve(self, capture: Optional[Union[dict, _DeferredContext]]) -> Dict[str, Any]:
+        if capture is None:
+            return _EMPTY_CAPTURED_CONTEXT
+        if not isinstance(capture, _DeferredContext):
+            return capture
+
+        start = thread_time()
+        try:
+            return capture.capture()
+        finally:
+            # Snapshots that take longer than the budget to capture count as
+            # many snapshots towards the rate limit of the probe.
+            probe = self.probe
+            excess = (thread_time() - start) / DEFERRED_CAPTURE_CPU_BUDGET - 1.0
+            if excess > 0 and isinstance(probe, RateLimitMixin):
+                probe.limiter.charge(excess)
 
     def enter(self, scope: Mapping[str, Any]) -> None:
         self.entry_capture = self._do(_NOTSET, (None, None, None), scope)
@@ -151,8 +259,15 @@ class Snapshot(LogSignal):
                 break
             tb = tb.tb_next
 
+        self._release_frame()
+
     def line(self, scope) -> None:
         self.line_capture = self._do(_NOTSET, sys.exc_info(), scope)
+        self._release_frame()
+
+    @property
+    def code(self) -> CodeType:
+        return self._code if self._code is not None else self.frame.f_code
 
     @property
     def message(self) -> Optional[str]:
@@ -168,11 +283,11 @@ class Snapshot(LogSignal):
         captures = {}
         if isinstance(probe, LogProbeMixin) and probe.take_snapshot:
             if isinstance(probe, LineLocationMixin):
-                captures = {"lines": {str(probe.line): self.line_capture or _EMPTY_CAPTURED_CONTEXT}}
+                captures = {"lines": {str(probe.line): self._resolve(self.line_capture)}}
             elif isinstance(probe, FunctionLocationMixin):
                 captures = {
-                    "entry": self.entry_capture or _EMPTY_CAPTURED_CONTEXT,
-                    "return": self.return_capture or _EMPTY_CAPTURED_CONTEXT,
+                    "entry": self._resolve(self.entry_capture),
+                    "return": self._resolve(self.return_capture),
                 }
 
         return {
@@ -11,7 +11,7 @@ from ddtrace.debugging._metrics import metrics
 from ddtrace.debugging._signal.collector import SignalCollector
 from ddtrace.internal.logger import get_logger
 from ddtrace.internal.periodic import ForksafeAwakeablePeriodicService
-from ddtrace.internal.utils.http import connector
+from ddtrace.internal.utils.http import get_connection_pool
 from ddtrace.internal.utils.retry import fibonacci_backoff_with_jitter
 
 
@@ -56,7 +56,7 @@ class LogsIntakeUploaderV1(ForksafeAwakeablePeriodicService):
 
         if di_config._tags_in_qs and di_config.tags:
             self.ENDPOINT += f"?ddtags={quote(di_config.tags)}"
-        self._connect = connector(di_config._intake_url, timeout=di_config.upload_timeout)
+        self._connect = get_connection_pool(di_config._intake_url).connector(timeout=di_config.upload_timeout)
 
         # Make it retry-able
         self._write_with_backoff = fibonacci_backoff_with_jitter(
@@ -85,6 +85,8 @@ class LogsIntakeUploaderV1(ForksafeAwakeablePeriodicService):
                     log.error("Failed to upload payload: [%d] %r", resp.status, resp.read())
                     meter.increment("upload.error", tags={"status": str(resp.status)})
                 else:
+                    # Drain the response so that the connection can be reused
+                    resp.read()
                     meter.increment("upload.success")
                     meter.distribution("upload.size", len(payload))
         except Exception:
@@ -17,6 +17,16 @@ constexpr uint64_t g_crashtracker_timeout_ms = 5000;
 // Default value for the max number of samples to keep in the StaticSamplePool
 constexpr size_t g_default_sample_pool_capacity = 4;
 
+// Default number of serialized profiles waiting to be uploaded, beyond which the oldest ones are dropped
+constexpr size_t g_default_upload_queue_size = 2;
+
+// Default number of profiles kept in the upload dump directory, and the prefix of their file names
+constexpr size_t g_default_upload_dump_max_files = 10;
+constexpr const char* g_upload_dump_prefix = "profile";
+
+// Maximum number of upload latencies kept between two reads of the upload stats
+constexpr size_t g_max_upload_latencies = 64;
+
 // Default name of the runtime.  This will almost certainly get overridden by the caller, but we set it here
 // as a reasonable default just in case.
 constexpr std::string_view g_runtime_name = "CPython";
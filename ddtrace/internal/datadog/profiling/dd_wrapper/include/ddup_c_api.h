@@ -0,0 +1,63 @@
+#pragma once
+
+// C-compatible interface to the sample API, for native collectors which are
+// not built against dd_wrapper. The table is exported by the ddup extension as
+// a PyCapsule named DDUP_C_API_CAPSULE_NAME, so that collectors can feed samples
+// directly to libdatadog without going through Python objects.
+
+#include <stddef.h>
+#include <stdint.h>
+
+#define DDUP_C_API_CAPSULE_NAME "ddtrace.internal.datadog.profiling.ddup._ddup._C_API"
+
+// Bumped whenever the layout of ddup_c_api_t changes. Consumers must check it
+// before using the table.
+#define DDUP_C_API_VERSION 3
+
+#ifdef __cplusplus
+extern "C"
+{
+#endif
+    // Opaque handle to a Datadog::Sample
+    typedef struct ddup_c_sample ddup_c_sample_t;
+
+    typedef struct
+    {
+        uint32_t version;
+
+        ddup_c_sample_t* (*start_sample)(void);
+        void (*push_alloc)(ddup_c_sample_t* sample, int64_t size, int64_t count);
+        void (*push_heap)(ddup_c_sample_t* sample, int64_t size);
+        void (*push_threadinfo)(ddup_c_sample_t* sample,
+                                int64_t thread_id,
+                                int64_t thread_native_id,
+                                const char* thread_name,
+                                size_t thread_name_len);
+        void (*push_monotonic_ns)(ddup_c_sample_t* sample, int64_t monotonic_ns);
+
+        // Strings are interned for the lifetime of the process. The returned
+        // ids can be used to push frames without copying their strings.
+        uint32_t (*intern_string)(const char* s, size_t len);
+        void (*push_frame_interned)(ddup_c_sample_t* sample, uint32_t name_id, uint32_t filename_id, int64_t line);
+
+        void (*flush_sample)(ddup_c_sample_t* sample);
+        void (*drop_sample)(ddup_c_sample_t* sample);
+
+        // Lock samples
+        void (*push_acquire)(ddup_c_sample_t* sample, int64_t acquire_time, int64_t count);
+        void (*push_release)(ddup_c_sample_t* sample, int64_t release_time, int64_t count);
+        void (*push_lock_name)(ddup_c_sample_t* sample, const char* lock_name, size_t lock_name_len);
+
+        // Task and trace context
+        void (*push_task_id)(ddup_c_sample_t* sample, int64_t task_id);
+        void (*push_task_name)(ddup_c_sample_t* sample, const char* task_name, size_t task_name_len);
+        void (*push_span_id)(ddup_c_sample_t* sample, uint64_t span_id);
+        void (*push_local_root_span_id)(ddup_c_sample_t* sample, uint64_t local_root_span_id);
+        void (*push_trace_type)(ddup_c_sample_t* sample, const char* trace_type, size_t trace_type_len);
+
+        // Heap growth samples
+        void (*push_heap_growth)(ddup_c_sample_t* sample, int64_t size);
+    } ddup_c_api_t;
+#ifdef __cplusplus
+} // extern "C"
+#endif
@@ -1,5 +1,7 @@
 #pragma once
 
+#include "ddup_c_api.h"
+
 #include <stddef.h>
 #include <stdint.h>
 #include <string_view>
@@ -8,6 +10,7 @@
 // Forward decl of the return pointer
 namespace Datadog {
 class Sample;
+struct UploadStats;
 }
 
 #ifdef __cplusplus
@@ -25,6 +28,8 @@ extern "C"
     void ddup_config_timeline(bool enable);
     void ddup_config_output_filename(std::string_view filename);
     void ddup_config_sample_pool_capacity(uint64_t capacity);
+    void ddup_config_upload_queue_size(uint64_t size);
+    void ddup_config_upload_dump(std::string_view dir, uint64_t max_files);
 
     void ddup_config_user_tag(std::string_view key, std::string_view val);
     void ddup_config_sample_type(unsigned int type);
@@ -35,6 +40,12 @@ extern "C"
     void ddup_profile_set_endpoints(std::unordered_map<int64_t, std::string_view> span_ids_to_endpoints);
     void ddup_profile_add_endpoint_counts(std::unordered_map<std::string_view, int64_t> trace_endpoints_to_counts);
     bool ddup_upload();
+    bool ddup_upload_wait(uint64_t timeout_ms);
+    void ddup_upload_take_stats(Datadog::UploadStats& stats);
+
+    // Effective rate of the stack sampler, sent along with the next profile
+    void ddup_set_sampling_overhead_budget(double budget);
+    void ddup_record_sampling_round(double thread_sampling_probability, unsigned int stack_depth_limit);
 
     // Proxy functions to the underlying sample
     Datadog::Sample* ddup_start_sample();
@@ -44,6 +55,7 @@ extern "C"
     void ddup_push_release(Datadog::Sample* sample, int64_t release_time, int64_t count);
     void ddup_push_alloc(Datadog::Sample* sample, int64_t size, int64_t count);
     void ddup_push_heap(Datadog::Sample* sample, int64_t size);
+    void ddup_push_thread_state(Datadog::Sample* sample, std::string_view state, int64_t time, int64_t count);
     void ddup_push_gpu_gputime(Datadog::Sample* sample, int64_t time, int64_t count);
     void ddup_push_gpu_memory(Datadog::Sample* sample, int64_t mem, int64_t count);
     void ddup_push_gpu_flops(Datadog::Sample* sample, int64_t flops, int64_t count);
@@ -65,12 +77,16 @@ extern "C"
                          std::string_view _filename,
                          uint64_t address,
                          int64_t line);
+    void ddup_drop_frame(Datadog::Sample* sample);
     void ddup_push_absolute_ns(Datadog::Sample* sample, int64_t timestamp_ns);
     void ddup_push_monotonic_ns(Datadog::Sample* sample, int64_t monotonic_ns);
     void ddup_flush_sample(Datadog::Sample* sample);
     // Stack v2 specific flush, which reverses the locations
     void ddup_flush_sample_v2(Datadog::Sample* sample);
     void ddup_drop_sample(Datadog::Sample* sample);
+
+    // C-compatible table of the sample functions, for native collectors
+    const ddup_c_api_t* ddup_get_c_api();
 #ifdef __cplusplus
 } // extern "C"
 #endif
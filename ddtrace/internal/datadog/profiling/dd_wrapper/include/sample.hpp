@@ -4,8 +4,11 @@
 #include "profile.hpp"
 #include "types.hpp"
 
+#include <deque>
+#include <mutex>
 #include <string>
 #include <string_view>
+#include <unordered_map>
 #include <vector>
 
 extern "C"
@@ -51,6 +54,27 @@ struct StringArena
     std::string_view insert(std::string_view s);
 };
 
+// StringTable interns strings for the lifetime of the process, and identifies
+// them with stable ids. It is meant for the strings that repeat across samples,
+// like function and file names, which native collectors can then push without
+// copying them into the arena of every sample.
+class StringTable
+{
+  private:
+    std::mutex mtx;
+    // A deque never moves its elements, so the views held by the map, and the
+    // ones returned by get, stay valid as new strings are interned.
+    std::deque<std::string> strings;
+    std::unordered_map<std::string_view, uint32_t> ids;
+
+  public:
+    StringTable();
+    uint32_t intern(std::string_view s);
+    // Returns the empty string for unknown ids
+    std::string_view get(uint32_t id);
+    void postfork_child();
+};
+
 } // namespace internal
 
 class SampleManager; // friend
@@ -59,6 +83,7 @@ class Sample
 {
   private:
     static inline Profile profile_state{}; // TODO pointer to global state?
+    static inline internal::StringTable string_table{};
     unsigned int max_nframes;
     SampleType type_mask;
     std::string errmsg;
@@ -100,6 +125,8 @@ class Sample
     bool push_release(int64_t lock_time, int64_t count);
     bool push_alloc(int64_t size, int64_t count);
     bool push_heap(int64_t size);
+    bool push_heap_growth(int64_t size);
+    bool push_thread_state(std::string_view state, int64_t time, int64_t count);
     bool push_gpu_gputime(int64_t time, int64_t count);
     bool push_gpu_memory(int64_t size, int64_t count);
     bool push_gpu_flops(int64_t flops, int64_t count);
@@ -131,6 +158,14 @@ class Sample
                     int64_t line               // for ddog_prof_Location
     );
 
+    // Counts a frame which is not recorded, e.g. because the sampler limits the depth of the stacks. It is
+    // reported in the "frames omitted" frame.
+    void drop_frame() { ++dropped_frames; }
+
+    // Same as push_frame, for strings interned with intern_string
+    void push_frame_interned(uint32_t name_id, uint32_t filename_id, int64_t line);
+    static uint32_t intern_string(std::string_view s);
+
     // Flushes the current buffer, clearing it
     bool flush_sample(bool reverse_locations = false);
 
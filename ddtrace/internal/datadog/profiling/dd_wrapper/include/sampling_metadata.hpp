@@ -0,0 +1,38 @@
+#pragma once
+
+#include <chrono>
+#include <cstdint>
+#include <mutex>
+#include <string>
+
+namespace Datadog {
+
+class SamplingMetadata
+{
+    // Summarizes how the stack sampler sampled the process over the period of a profile, so that it can be sent
+    // along with the profile. When the sampler lowers its rate to stay within its overhead budget, this gives what
+    // is needed to rescale the number of samples.
+  private:
+    static inline std::mutex mtx{};
+    static inline double overhead_budget = 0.0;
+    static inline std::chrono::steady_clock::time_point period_start = std::chrono::steady_clock::now();
+    static inline uint64_t rounds = 0;
+    static inline double thread_sampling_probability_sum = 0.0;
+    // Lowest limit on the depth of the stacks over the period, or 0 if the stacks were never limited
+    static inline unsigned int min_stack_depth_limit = 0;
+
+  public:
+    static void set_overhead_budget(double budget);
+
+    // Called by the sampler at each sampling round, with the probability of sampling each thread and the limit on the
+    // depth of the stacks (0 for none)
+    static void record_round(double thread_sampling_probability, unsigned int stack_depth_limit);
+
+    // Returns the metadata of the period since the last call as a JSON object, or an empty string if there was no
+    // sampling round, and starts a new period
+    static std::string take_json();
+
+    static void postfork_child();
+};
+
+} // namespace Datadog
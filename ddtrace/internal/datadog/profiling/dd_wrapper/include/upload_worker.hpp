@@ -0,0 +1,89 @@
+#pragma once
+
+#include "constants.hpp"
+#include "uploader.hpp"
+
+#include <chrono>
+#include <condition_variable>
+#include <deque>
+#include <mutex>
+#include <string>
+#include <string_view>
+#include <vector>
+
+extern "C"
+{
+#include "datadog/profiling.h"
+}
+
+namespace Datadog {
+
+struct UploadStats
+{
+    // Number of requests which succeeded and failed
+    uint64_t succeeded = 0;
+    uint64_t failed = 0;
+    // Number of profiles lost, because the queue was full or because their upload failed
+    uint64_t dropped = 0;
+    // Number of the lost profiles which were written to the dump directory
+    uint64_t dumped = 0;
+    // Duration of the requests, at most g_max_upload_latencies of them
+    std::vector<int64_t> latencies_ns;
+};
+
+class UploadWorker
+{
+    // Sends the serialized profiles from a dedicated thread, so that neither the collection of the samples nor the
+    // serialization of the next profiles wait on the network.
+    // The profiles waiting to be sent are kept in a bounded queue, and the oldest one is dropped when it is full.
+    // The profiles which are dropped, or whose upload failed, can be dumped to a directory for inspection, in the same
+    // format as the files written when an output filename is configured. They are not sent again: the exporter
+    // consumes the serialized profile when building the request, and it cannot be rebuilt from the bytes.
+  private:
+    struct PendingUpload
+    {
+        Uploader uploader;
+        ddog_prof_EncodedProfile encoded;
+    };
+
+    struct State
+    {
+        std::mutex mutex;
+        std::condition_variable pending_cv;
+        std::condition_variable idle_cv;
+        std::deque<PendingUpload> queue;
+        bool started = false;
+        bool sending = false;
+        UploadStats stats;
+    };
+
+    // The state is never destroyed, since the thread may still use it while the static destructors run at exit
+    static inline State* state = new State();
+
+    static inline size_t queue_size = g_default_upload_queue_size;
+    static inline std::string dump_dir;
+    static inline size_t dump_max_files = g_default_upload_dump_max_files;
+
+    static void run();
+    // Keeps the max_files most recent dumped profiles in the given directory, whichever process wrote them
+    static void prune_dump_dir(const std::string& dir, size_t max_files);
+    static bool dump(uint64_t seq, std::string_view bytes);
+    static void discard(PendingUpload& upload);
+
+  public:
+    static void set_queue_size(size_t size);
+    static void set_dump(std::string_view dir, size_t max_files);
+
+    // Queues the serialized profile to be sent by the upload thread, which is started on first use
+    static bool enqueue(Uploader&& uploader, ddog_prof_EncodedProfile encoded);
+
+    // Waits for the queued profiles to be sent. Returns false on timeout.
+    static bool wait(std::chrono::milliseconds timeout);
+
+    // Returns the stats accumulated since the last call
+    static UploadStats take_stats();
+
+    static void postfork_child();
+};
+
+} // namespace Datadog
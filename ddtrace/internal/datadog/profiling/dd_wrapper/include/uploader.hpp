@@ -6,6 +6,9 @@
 #include <atomic>
 #include <memory>
 #include <mutex>
+#include <optional>
+#include <string>
+#include <string_view>
 
 extern "C"
 {
@@ -21,13 +24,29 @@ class Uploader
     std::string errmsg;
     static inline ddog_CancellationToken cancel{ .inner = nullptr };
     static inline std::atomic<uint64_t> upload_seq{ 0 };
+    uint64_t seq = 0;
     std::string output_filename;
+    // Sent along with the profile, e.g. the effective rate of the stack sampler
+    std::string internal_metadata_json;
     ddog_prof_ProfileExporter ddog_exporter{ .inner = nullptr };
 
     bool export_to_file(ddog_prof_EncodedProfile* encoded);
 
   public:
-    bool upload(ddog_prof_Profile& profile);
+    // Serializes the profile, which resets it. This is the only step that needs the profile.
+    std::optional<ddog_prof_EncodedProfile> serialize(ddog_prof_Profile& profile);
+    // Writes the serialized profile to the output file if one is configured. Otherwise, hands it over to the
+    // UploadWorker, which sends it from its own thread.
+    bool upload(ddog_prof_EncodedProfile encoded);
+    // Sends the serialized profile to the agent, waiting for the response. Called from the UploadWorker thread.
+    bool send(ddog_prof_EncodedProfile* encoded);
+
+    uint64_t get_seq() const { return seq; }
+    void set_internal_metadata(std::string json) { internal_metadata_json = std::move(json); }
+    // Writes the bytes of a serialized profile to <prefix>.<pid>.<seq>
+    static bool write_to_file(std::string_view prefix, uint64_t seq, std::string_view bytes);
+    static std::optional<std::string_view> get_bytes(ddog_prof_EncodedProfile* encoded);
+
     static void cancel_inflight();
     static void lock();
     static void unlock();
@@ -38,13 +57,10 @@ class Uploader
     Uploader(std::string_view _url, ddog_prof_ProfileExporter ddog_exporter);
     ~Uploader()
     {
-        // We need to call _drop() on the exporter and the cancellation token,
-        // as their inner pointers are allocated on the Rust side. And since
-        // there could be a request in flight, we first need to cancel it. Then,
-        // we drop the exporter and the cancellation token.
-        ddog_CancellationToken_cancel(&cancel);
+        // We need to call _drop() on the exporter, as its inner pointer is allocated on the Rust side. The uploaders
+        // are destroyed once their request completed, by the UploadWorker, so there is no request in flight to cancel
+        // here: the cancellation token belongs to the request being sent, if any, and is dropped by the next one.
         ddog_prof_Exporter_drop(&ddog_exporter);
-        ddog_CancellationToken_drop(&cancel);
     }
 
     // Disable copy constructor and copy assignment operator to avoid double-free
@@ -68,7 +84,9 @@ class Uploader
     {
         ddog_exporter = other.ddog_exporter;
         other.ddog_exporter = { .inner = nullptr };
+        seq = other.seq;
         output_filename = std::move(other.output_filename);
+        internal_metadata_json = std::move(other.internal_metadata_json);
         errmsg = std::move(other.errmsg);
     }
 
@@ -78,7 +96,9 @@ class Uploader
             ddog_prof_Exporter_drop(&ddog_exporter);
             ddog_exporter = other.ddog_exporter;
             other.ddog_exporter = { .inner = nullptr };
+            seq = other.seq;
             output_filename = std::move(other.output_filename);
+            internal_metadata_json = std::move(other.internal_metadata_json);
             errmsg = std::move(other.errmsg);
         }
         return *this;
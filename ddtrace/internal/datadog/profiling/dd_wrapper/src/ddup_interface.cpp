@@ -5,6 +5,8 @@
 #include "profile.hpp"
 #include "sample.hpp"
 #include "sample_manager.hpp"
+#include "sampling_metadata.hpp"
+#include "upload_worker.hpp"
 #include "uploader.hpp"
 #include "uploader_builder.hpp"
 
@@ -27,7 +29,9 @@ void
 ddup_postfork_child()
 {
     Datadog::Uploader::postfork_child();
+    Datadog::UploadWorker::postfork_child();
     Datadog::SampleManager::postfork_child();
+    Datadog::SamplingMetadata::postfork_child();
     Datadog::UploaderBuilder::postfork_child();
 }
 
@@ -132,6 +136,18 @@ ddup_config_sample_pool_capacity(uint64_t capacity) // cppcheck-suppress unusedF
     Datadog::SampleManager::set_sample_pool_capacity(capacity);
 }
 
+void
+ddup_config_upload_queue_size(uint64_t size) // cppcheck-suppress unusedFunction
+{
+    Datadog::UploadWorker::set_queue_size(size);
+}
+
+void
+ddup_config_upload_dump(std::string_view dir, uint64_t max_files) // cppcheck-suppress unusedFunction
+{
+    Datadog::UploadWorker::set_dump(dir, max_files);
+}
+
 bool
 ddup_is_initialized() // cppcheck-suppress unusedFunction
 {
@@ -202,6 +218,15 @@ ddup_push_heap(Datadog::Sample* sample, int64_t size) // cppcheck-suppress unuse
     sample->push_heap(size);
 }
 
+void
+ddup_push_thread_state(Datadog::Sample* sample, // cppcheck-suppress unusedFunction
+                       std::string_view state,
+                       int64_t time,
+                       int64_t count)
+{
+    sample->push_thread_state(state, time, count);
+}
+
 void
 ddup_push_gpu_gputime(Datadog::Sample* sample, int64_t time, int64_t count) // cppcheck-suppress unusedFunction
 {
@@ -295,6 +320,12 @@ ddup_push_frame(Datadog::Sample* sample, // cppcheck-suppress unusedFunction
     sample->push_frame(_name, _filename, address, line);
 }
 
+void
+ddup_drop_frame(Datadog::Sample* sample) // cppcheck-suppress unusedFunction
+{
+    sample->drop_frame();
+}
+
 void
 ddup_push_absolute_ns(Datadog::Sample* sample, int64_t timestamp_ns) // cppcheck-suppress unusedFunction
 {
@@ -325,6 +356,157 @@ ddup_drop_sample(Datadog::Sample* sample) // cppcheck-suppress unusedFunction
     Datadog::SampleManager::drop_sample(sample);
 }
 
+// Adapters between the C API, which only uses C types, and the sample API
+namespace {
+
+Datadog::Sample*
+as_sample(ddup_c_sample_t* sample)
+{
+    return reinterpret_cast<Datadog::Sample*>(sample);
+}
+
+ddup_c_sample_t*
+c_start_sample()
+{
+    return reinterpret_cast<ddup_c_sample_t*>(ddup_start_sample());
+}
+
+void
+c_push_alloc(ddup_c_sample_t* sample, int64_t size, int64_t count)
+{
+    as_sample(sample)->push_alloc(size, count);
+}
+
+void
+c_push_heap(ddup_c_sample_t* sample, int64_t size)
+{
+    as_sample(sample)->push_heap(size);
+}
+
+void
+c_push_heap_growth(ddup_c_sample_t* sample, int64_t size)
+{
+    as_sample(sample)->push_heap_growth(size);
+}
+
+void
+c_push_threadinfo(ddup_c_sample_t* sample,
+                  int64_t thread_id,
+                  int64_t thread_native_id,
+                  const char* thread_name,
+                  size_t thread_name_len)
+{
+    as_sample(sample)->push_threadinfo(thread_id, thread_native_id, std::string_view(thread_name, thread_name_len));
+}
+
+void
+c_push_monotonic_ns(ddup_c_sample_t* sample, int64_t monotonic_ns)
+{
+    as_sample(sample)->push_monotonic_ns(monotonic_ns);
+}
+
+uint32_t
+c_intern_string(const char* s, size_t len)
+{
+    return Datadog::Sample::intern_string(std::string_view(s, len));
+}
+
+void
+c_push_frame_interned(ddup_c_sample_t* sample, uint32_t name_id, uint32_t filename_id, int64_t line)
+{
+    as_sample(sample)->push_frame_interned(name_id, filename_id, line);
+}
+
+void
+c_flush_sample(ddup_c_sample_t* sample)
+{
+    as_sample(sample)->flush_sample();
+}
+
+void
+c_drop_sample(ddup_c_sample_t* sample)
+{
+    ddup_drop_sample(as_sample(sample));
+}
+
+void
+c_push_acquire(ddup_c_sample_t* sample, int64_t acquire_time, int64_t count)
+{
+    as_sample(sample)->push_acquire(acquire_time, count);
+}
+
+void
+c_push_release(ddup_c_sample_t* sample, int64_t release_time, int64_t count)
+{
+    as_sample(sample)->push_release(release_time, count);
+}
+
+void
+c_push_lock_name(ddup_c_sample_t* sample, const char* lock_name, size_t lock_name_len)
+{
+    as_sample(sample)->push_lock_name(std::string_view(lock_name, lock_name_len));
+}
+
+void
+c_push_task_id(ddup_c_sample_t* sample, int64_t task_id)
+{
+    as_sample(sample)->push_task_id(task_id);
+}
+
+void
+c_push_task_name(ddup_c_sample_t* sample, const char* task_name, size_t task_name_len)
+{
+    as_sample(sample)->push_task_name(std::string_view(task_name, task_name_len));
+}
+
+void
+c_push_span_id(ddup_c_sample_t* sample, uint64_t span_id)
+{
+    as_sample(sample)->push_span_id(span_id);
+}
+
+void
+c_push_local_root_span_id(ddup_c_sample_t* sample, uint64_t local_root_span_id)
+{
+    as_sample(sample)->push_local_root_span_id(local_root_span_id);
+}
+
+void
+c_push_trace_type(ddup_c_sample_t* sample, const char* trace_type, size_t trace_type_len)
+{
+    as_sample(sample)->push_trace_type(std::string_view(trace_type, trace_type_len));
+}
+
+const ddup_c_api_t c_api = {
+    .version = DDUP_C_API_VERSION,
+    .start_sample = c_start_sample,
+    .push_alloc = c_push_alloc,
+    .push_heap = c_push_heap,
+    .push_threadinfo = c_push_threadinfo,
+    .push_monotonic_ns = c_push_monotonic_ns,
+    .intern_string = c_intern_string,
+    .push_frame_interned = c_push_frame_interned,
+    .flush_sample = c_flush_sample,
+    .drop_sample = c_drop_sample,
+    .push_acquire = c_push_acquire,
+    .push_release = c_push_release,
+    .push_lock_name = c_push_lock_name,
+    .push_task_id = c_push_task_id,
+    .push_task_name = c_push_task_name,
+    .push_span_id = c_push_span_id,
+    .push_local_root_span_id = c_push_local_root_span_id,
+    .push_trace_type = c_push_trace_type,
+    .push_heap_growth = c_push_heap_growth,
+};
+
+} // namespace
+
+const ddup_c_api_t*
+ddup_get_c_api() // cppcheck-suppress unusedFunction
+{
+    return &c_api;
+}
+
 bool
 ddup_upload() // cppcheck-suppress unusedFunction
 {
@@ -351,13 +533,42 @@ ddup_upload() // cppcheck-suppress unusedFunction
     auto& uploader = std::get<Datadog::Uploader>(uploader_or_err);
     // There are a few things going on here.
     // * profile_borrow() takes a reference in a way that locks the areas where the profile might
-    //  be modified.  It gets released and cleared after uploading.
-    // * Uploading cancels inflight uploads. There are better ways to do this, but this is what
-    //   we have for now.
-    uploader.upload(Datadog::Sample::profile_borrow());
+    //  be modified.  It gets released and cleared after serializing.
+    // * The serialized profile is sent by the upload thread, so that the profile is never locked
+    //   while waiting on the network.
+    auto encoded = uploader.serialize(Datadog::Sample::profile_borrow());
     Datadog::Sample::profile_release();
     Datadog::Sample::profile_clear_state();
-    return true;
+    if (!encoded) {
+        return false;
+    }
+    uploader.set_internal_metadata(Datadog::SamplingMetadata::take_json());
+    return uploader.upload(*encoded);
+}
+
+void
+ddup_set_sampling_overhead_budget(double budget) // cppcheck-suppress unusedFunction
+{
+    Datadog::SamplingMetadata::set_overhead_budget(budget);
+}
+
+void
+ddup_record_sampling_round(double thread_sampling_probability, // cppcheck-suppress unusedFunction
+                           unsigned int stack_depth_limit)
+{
+    Datadog::SamplingMetadata::record_round(thread_sampling_probability, stack_depth_limit);
+}
+
+bool
+ddup_upload_wait(uint64_t timeout_ms) // cppcheck-suppress unusedFunction
+{
+    return Datadog::UploadWorker::wait(std::chrono::milliseconds(timeout_ms));
+}
+
+void
+ddup_upload_take_stats(Datadog::UploadStats& stats) // cppcheck-suppress unusedFunction
+{
+    stats = Datadog::UploadWorker::take_stats();
 }
 
 void
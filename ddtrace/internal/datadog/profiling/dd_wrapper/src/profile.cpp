@@ -119,6 +119,13 @@ Datadog::Profile::setup_samplers()
         val_idx.gpu_flops = get_value_idx("gpu-flops", "count");
         val_idx.gpu_flops_samples = get_value_idx("gpu-flops-samples", "count");
     }
+    if (0U != (type_mask & SampleType::HeapGrowth)) {
+        val_idx.heap_growth = get_value_idx("heap-growth", "bytes");
+    }
+    if (0U != (type_mask & SampleType::ThreadState)) {
+        val_idx.thread_state_time = get_value_idx("thread-state-time", "nanoseconds");
+        val_idx.thread_state_count = get_value_idx("thread-state-samples", "count");
+    }
 
     // Whatever the first sampler happens to be is the default "period" for the profile
     // The value of 1 is a pointless default.
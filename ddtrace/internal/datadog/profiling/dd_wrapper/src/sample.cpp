@@ -44,6 +44,45 @@ Datadog::internal::StringArena::insert(std::string_view s)
     return std::string_view(chunk->data() + base, s.size());
 }
 
+Datadog::internal::StringTable::StringTable()
+{
+    // Id 0 is the empty string, which is also what we return for unknown ids
+    strings.emplace_back();
+    ids.emplace(strings.back(), 0);
+}
+
+uint32_t
+Datadog::internal::StringTable::intern(std::string_view s)
+{
+    const std::lock_guard<std::mutex> lock(mtx);
+    auto it = ids.find(s);
+    if (it != ids.end()) {
+        return it->second;
+    }
+    auto id = static_cast<uint32_t>(strings.size());
+    const std::string_view view = strings.emplace_back(s);
+    ids.emplace(view, id);
+    return id;
+}
+
+std::string_view
+Datadog::internal::StringTable::get(uint32_t id)
+{
+    const std::lock_guard<std::mutex> lock(mtx);
+    if (id >= strings.size()) {
+        return {};
+    }
+    return strings[id];
+}
+
+void
+Datadog::internal::StringTable::postfork_child()
+{
+    // The mutex may have been held by another thread at the time of the fork.
+    // The strings are still valid in the child, so we only reset the mutex.
+    new (&mtx) std::mutex();
+}
+
 Datadog::Sample::Sample(SampleType _type_mask, unsigned int _max_nframes)
   : max_nframes{ _max_nframes }
   , type_mask{ _type_mask }
@@ -97,6 +136,41 @@ Datadog::Sample::push_frame(std::string_view name, std::string_view filename, ui
     }
 }
 
+uint32_t
+Datadog::Sample::intern_string(std::string_view s)
+{
+    return string_table.intern(s);
+}
+
+void
+Datadog::Sample::push_frame_interned(uint32_t name_id, uint32_t filename_id, int64_t line)
+{
+    static const ddog_prof_Mapping null_mapping = { 0, 0, 0, to_slice(""), { 0 }, to_slice(""), { 0 } };
+
+    if (locations.size() > max_nframes) {
+        ++dropped_frames;
+        return;
+    }
+
+    // Interned strings live as long as the process, so there is no need to
+    // copy them into the arena
+    const ddog_prof_Location loc = {
+        .mapping = null_mapping, // No support for mappings in Python
+        .function = {
+          .name = to_slice(string_table.get(name_id)),
+          .name_id = { 0 },
+          .system_name = {}, // No support for system_name in Python
+          .system_name_id = { 0 },
+          .filename = to_slice(string_table.get(filename_id)),
+          .filename_id = { 0 },
+        },
+        .address = 0,
+        .line = line,
+    };
+
+    locations.emplace_back(loc);
+}
+
 bool
 Datadog::Sample::push_label(const ExportLabelKey key, std::string_view val)
 {
@@ -304,6 +378,48 @@ Datadog::Sample::push_heap(int64_t size)
     return false;
 }
 
+bool
+Datadog::Sample::push_heap_growth(int64_t size)
+{
+    static bool already_warned_params = false;
+    static bool already_warned = false; // cppcheck-suppress threadsafety-threadsafety
+
+    if (size < 0) {
+        if (!already_warned_params) {
+            already_warned_params = true;
+            std::cerr << "bad push heap growth (params)" << std::endl;
+        }
+        return false;
+    }
+
+    if (0U != (type_mask & SampleType::HeapGrowth)) {
+        values[profile_state.val().heap_growth] += size;
+        return true;
+    }
+    if (!already_warned) {
+        already_warned = true;
+        std::cerr << "bad push heap growth" << std::endl;
+    }
+    return false;
+}
+
+bool
+Datadog::Sample::push_thread_state(std::string_view state, int64_t time, int64_t count)
+{
+    static bool already_warned = false; // cppcheck-suppress threadsafety-threadsafety
+    if (0U != (type_mask & SampleType::ThreadState)) {
+        push_label(ExportLabelKey::thread_state, state);
+        values[profile_state.val().thread_state_time] += time * count;
+        values[profile_state.val().thread_state_count] += count;
+        return true;
+    }
+    if (!already_warned) {
+        already_warned = true;
+        std::cerr << "bad push thread state" << std::endl;
+    }
+    return false;
+}
+
 bool
 Datadog::Sample::push_gpu_gputime(int64_t time, int64_t count)
 {
@@ -561,4 +677,5 @@ void
 Datadog::Sample::postfork_child()
 {
     profile_state.postfork_child();
+    string_table.postfork_child();
 }
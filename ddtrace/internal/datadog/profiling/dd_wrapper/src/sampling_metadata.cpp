@@ -0,0 +1,58 @@
+#include "sampling_metadata.hpp"
+
+#include <sstream>
+
+using namespace Datadog;
+
+void
+Datadog::SamplingMetadata::set_overhead_budget(double budget)
+{
+    const std::lock_guard<std::mutex> lock(mtx);
+    overhead_budget = budget;
+}
+
+void
+Datadog::SamplingMetadata::record_round(double thread_sampling_probability, unsigned int stack_depth_limit)
+{
+    const std::lock_guard<std::mutex> lock(mtx);
+    ++rounds;
+    thread_sampling_probability_sum += thread_sampling_probability;
+    if (stack_depth_limit > 0 && (min_stack_depth_limit == 0 || stack_depth_limit < min_stack_depth_limit)) {
+        min_stack_depth_limit = stack_depth_limit;
+    }
+}
+
+std::string
+Datadog::SamplingMetadata::take_json()
+{
+    const std::lock_guard<std::mutex> lock(mtx);
+    auto now = std::chrono::steady_clock::now();
+    auto elapsed_s = std::chrono::duration<double>(now - period_start).count();
+    period_start = now;
+
+    if (rounds == 0) {
+        return {};
+    }
+
+    std::ostringstream oss;
+    oss << R"({"stack_sampling":{"overhead_budget_pct":)" << overhead_budget * 100.0 << R"(,"rounds":)" << rounds
+        << R"(,"effective_rate_hz":)" << (elapsed_s > 0 ? static_cast<double>(rounds) / elapsed_s : 0.0)
+        << R"(,"thread_sampling_probability":)" << thread_sampling_probability_sum / static_cast<double>(rounds)
+        << R"(,"stack_depth_limit":)" << min_stack_depth_limit << "}}";
+
+    rounds = 0;
+    thread_sampling_probability_sum = 0.0;
+    min_stack_depth_limit = 0;
+    return oss.str();
+}
+
+void
+Datadog::SamplingMetadata::postfork_child()
+{
+    // NB placement-new to re-init and leak the mutex because doing anything else is UB
+    new (&mtx) std::mutex();
+    rounds = 0;
+    thread_sampling_probability_sum = 0.0;
+    min_stack_depth_limit = 0;
+    period_start = std::chrono::steady_clock::now();
+}
@@ -0,0 +1,215 @@
+#include "upload_worker.hpp"
+
+#include <algorithm>
+#include <dirent.h>
+#include <iostream>
+#include <optional>
+#include <stdio.h> // remove
+#include <sys/stat.h>
+#include <system_error>
+#include <thread>
+#include <utility>
+#include <vector>
+
+using namespace Datadog;
+
+void
+Datadog::UploadWorker::set_queue_size(size_t size)
+{
+    const std::lock_guard<std::mutex> lock(state->mutex);
+    queue_size = size > 0 ? size : 1;
+}
+
+void
+Datadog::UploadWorker::set_dump(std::string_view dir, size_t max_files)
+{
+    const std::lock_guard<std::mutex> lock(state->mutex);
+    dump_dir = dir;
+    dump_max_files = max_files;
+}
+
+void
+Datadog::UploadWorker::prune_dump_dir(const std::string& dir, size_t max_files)
+{
+    // The directory might be shared by several processes, so the files are listed rather than remembered
+    // We can't use C++ filesystem here because of limitations in manylinux, so we'll use the C API
+    DIR* d = opendir(dir.c_str());
+    if (d == nullptr) {
+        return;
+    }
+
+    std::vector<std::pair<time_t, std::string>> files;
+    const std::string_view prefix = g_upload_dump_prefix;
+    for (struct dirent* entry = readdir(d); entry != nullptr; entry = readdir(d)) {
+        std::string_view name(entry->d_name);
+        if (name.substr(0, prefix.size()) != prefix || name.size() == prefix.size() || name[prefix.size()] != '.') {
+            continue;
+        }
+        std::string path = dir + "/" + entry->d_name;
+        struct stat st;
+        if (stat(path.c_str(), &st) == 0 && S_ISREG(st.st_mode)) {
+            files.emplace_back(st.st_mtime, std::move(path));
+        }
+    }
+    closedir(d);
+
+    if (files.size() <= max_files) {
+        return;
+    }
+
+    // Oldest first. Files written within the same second are ordered by name, i.e. by process and sequence number.
+    std::sort(files.begin(), files.end());
+    for (size_t i = 0; i < files.size() - max_files; i++) {
+        remove(files[i].second.c_str());
+    }
+}
+
+bool
+Datadog::UploadWorker::dump(uint64_t seq, std::string_view bytes)
+{
+    std::string dir;
+    size_t max_files = 0;
+    {
+        const std::lock_guard<std::mutex> lock(state->mutex);
+        if (dump_dir.empty() || dump_max_files == 0) {
+            return false;
+        }
+        dir = dump_dir;
+        max_files = dump_max_files;
+    }
+
+    if (!Uploader::write_to_file(dir + "/" + g_upload_dump_prefix, seq, bytes)) {
+        return false;
+    }
+    prune_dump_dir(dir, max_files);
+
+    const std::lock_guard<std::mutex> lock(state->mutex);
+    state->stats.dumped++;
+    return true;
+}
+
+void
+Datadog::UploadWorker::discard(PendingUpload& upload)
+{
+    auto bytes = Uploader::get_bytes(&upload.encoded);
+    if (bytes) {
+        dump(upload.uploader.get_seq(), *bytes);
+    }
+    ddog_prof_EncodedProfile_drop(&upload.encoded);
+
+    const std::lock_guard<std::mutex> lock(state->mutex);
+    state->stats.dropped++;
+}
+
+void
+Datadog::UploadWorker::run()
+{
+    // The state is replaced in the child after a fork, but this thread only exists in the parent
+    State* s = state;
+    while (true) {
+        std::unique_lock<std::mutex> lock(s->mutex);
+        s->pending_cv.wait(lock, [s]() { return !s->queue.empty(); });
+        PendingUpload upload = std::move(s->queue.front());
+        s->queue.pop_front();
+        s->sending = true;
+        bool keep_bytes = !dump_dir.empty() && dump_max_files > 0;
+        lock.unlock();
+
+        // Sending the request consumes the serialized profile, so its bytes are copied beforehand to be able to dump
+        // it if the upload fails.
+        std::string bytes;
+        if (keep_bytes) {
+            auto view = Uploader::get_bytes(&upload.encoded);
+            if (view) {
+                bytes = *view;
+            }
+        }
+
+        auto start = std::chrono::steady_clock::now();
+        bool ok = upload.uploader.send(&upload.encoded);
+        auto latency_ns =
+          std::chrono::duration_cast<std::chrono::nanoseconds>(std::chrono::steady_clock::now() - start).count();
+
+        if (!ok && !bytes.empty()) {
+            dump(upload.uploader.get_seq(), bytes);
+        }
+
+        lock.lock();
+        if (ok) {
+            s->stats.succeeded++;
+        } else {
+            s->stats.failed++;
+            s->stats.dropped++;
+        }
+        if (s->stats.latencies_ns.size() < g_max_upload_latencies) {
+            s->stats.latencies_ns.push_back(latency_ns);
+        }
+        s->sending = false;
+        if (s->queue.empty()) {
+            s->idle_cv.notify_all();
+        }
+        // The uploader and its exporter are destroyed without holding the lock
+        lock.unlock();
+    }
+}
+
+bool
+Datadog::UploadWorker::enqueue(Uploader&& uploader, ddog_prof_EncodedProfile encoded)
+{
+    std::optional<PendingUpload> dropped;
+    {
+        std::unique_lock<std::mutex> lock(state->mutex);
+        if (!state->started) {
+            try {
+                std::thread(run).detach();
+                state->started = true;
+            } catch (const std::system_error& e) {
+                // Fall back to sending the profile from the calling thread
+                lock.unlock();
+                static bool already_warned = false; // cppcheck-suppress threadsafety-threadsafety
+                if (!already_warned) {
+                    already_warned = true;
+                    std::cerr << "Failed to start the upload thread: " << e.what() << std::endl;
+                }
+                return uploader.send(&encoded);
+            }
+        }
+
+        if (state->queue.size() >= queue_size) {
+            dropped.emplace(std::move(state->queue.front()));
+            state->queue.pop_front();
+        }
+        state->queue.push_back({ std::move(uploader), encoded });
+    }
+    state->pending_cv.notify_one();
+
+    if (dropped) {
+        discard(*dropped);
+    }
+    return true;
+}
+
+bool
+Datadog::UploadWorker::wait(std::chrono::milliseconds timeout)
+{
+    std::unique_lock<std::mutex> lock(state->mutex);
+    return state->idle_cv.wait_for(lock, timeout, []() { return state->queue.empty() && !state->sending; });
+}
+
+UploadStats
+Datadog::UploadWorker::take_stats()
+{
+    const std::lock_guard<std::mutex> lock(state->mutex);
+    UploadStats stats = std::move(state->stats);
+    state->stats = UploadStats{};
+    return stats;
+}
+
+void
+Datadog::UploadWorker::postfork_child()
+{
+    // The upload thread does not exist in the child, and the profiles of the parent must not be sent again by the
+    // child, so we start over. NB the previous state is leaked, since its mutex might be held by a thread of the
+    // parent.
+    state = new State();
+}
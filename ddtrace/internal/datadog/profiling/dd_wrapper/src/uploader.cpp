@@ -2,6 +2,7 @@
 
 #include "code_provenance.hpp"
 #include "libdatadog_helpers.hpp"
+#include "upload_worker.hpp"
 
 #include <errno.h> // errno
 #include <fstream> // ofstream
@@ -18,35 +19,41 @@
 using namespace Datadog;
 
 Datadog::Uploader::Uploader(std::string_view _output_filename, ddog_prof_ProfileExporter _ddog_exporter)
-  : output_filename{ _output_filename }
+  // Increment the upload sequence number every time we build an uploader.
+  // Upoloaders are use-once-and-destroy.
+  : seq{ ++upload_seq }
+  , output_filename{ _output_filename }
   , ddog_exporter{ _ddog_exporter }
 {
-    // Increment the upload sequence number every time we build an uploader.
-    // Upoloaders are use-once-and-destroy.
-    upload_seq++;
+}
+
+std::optional<std::string_view>
+Datadog::Uploader::get_bytes(ddog_prof_EncodedProfile* encoded)
+{
+    auto bytes_res = ddog_prof_EncodedProfile_bytes(encoded);
+    if (bytes_res.tag == DDOG_PROF_RESULT_BYTE_SLICE_ERR_BYTE_SLICE) {
+        std::cerr << "Error getting bytes from encoded profile: "
+                  << err_to_msg(&bytes_res.err, "Error getting bytes from encoded profile") << std::endl;
+        ddog_Error_drop(&bytes_res.err);
+        return std::nullopt;
+    }
+    return std::string_view{ reinterpret_cast<const char*>(bytes_res.ok.ptr), bytes_res.ok.len };
 }
 
 bool
-Datadog::Uploader::export_to_file(ddog_prof_EncodedProfile* encoded)
+Datadog::Uploader::write_to_file(std::string_view prefix, uint64_t seq, std::string_view bytes)
 {
     // Write the profile to a file using the following format for filename:
-    // <output_filename>.<process_id>.<sequence_number>
+    // <prefix>.<process_id>.<sequence_number>
     std::ostringstream oss;
-    oss << output_filename << "." << getpid() << "." << upload_seq;
+    oss << prefix << "." << getpid() << "." << seq;
     std::string filename = oss.str();
     std::ofstream out(filename, std::ios::binary);
     if (!out.is_open()) {
         std::cerr << "Error opening output file " << filename << ": " << strerror(errno) << std::endl;
         return false;
     }
-    auto bytes_res = ddog_prof_EncodedProfile_bytes(encoded);
-    if (bytes_res.tag == DDOG_PROF_RESULT_BYTE_SLICE_ERR_BYTE_SLICE) {
-        std::cerr << "Error getting bytes from encoded profile: "
-                  << err_to_msg(&bytes_res.err, "Error getting bytes from encoded profile") << std::endl;
-        ddog_Error_drop(&bytes_res.err);
-        return false;
-    }
-    out.write(reinterpret_cast<const char*>(bytes_res.ok.ptr), bytes_res.ok.len);
+    out.write(bytes.data(), bytes.size());
     if (out.fail()) {
         std::cerr << "Error writing to output file " << filename << ": " << strerror(errno) << std::endl;
         return false;
@@ -55,9 +62,18 @@ Datadog::Uploader::export_to_file(ddog_prof_EncodedProfile* encoded)
 }
 
 bool
-Datadog::Uploader::upload(ddog_prof_Profile& profile)
+Datadog::Uploader::export_to_file(ddog_prof_EncodedProfile* encoded)
+{
+    auto bytes = get_bytes(encoded);
+    if (!bytes) {
+        return false;
+    }
+    return write_to_file(output_filename, seq, *bytes);
+}
+
+std::optional<ddog_prof_EncodedProfile>
+Datadog::Uploader::serialize(ddog_prof_Profile& profile)
 {
-    // Serialize the profile
     ddog_prof_Profile_SerializeResult serialize_result = ddog_prof_Profile_serialize(&profile, nullptr, nullptr);
     if (serialize_result.tag !=
         DDOG_PROF_PROFILE_SERIALIZE_RESULT_OK) { // NOLINT (cppcoreguidelines-pro-type-union-access)
@@ -65,16 +81,26 @@ Datadog::Uploader::upload(ddog_prof_Profile& profile)
         errmsg = err_to_msg(&err, "Error serializing pprof");
         std::cerr << errmsg << std::endl;
         ddog_Error_drop(&err);
-        return false;
+        return std::nullopt;
     }
-    ddog_prof_EncodedProfile* encoded = &serialize_result.ok; // NOLINT (cppcoreguidelines-pro-type-union-access)
+    return serialize_result.ok; // NOLINT (cppcoreguidelines-pro-type-union-access)
+}
 
+bool
+Datadog::Uploader::upload(ddog_prof_EncodedProfile encoded)
+{
     if (!output_filename.empty()) {
-        bool ret = export_to_file(encoded);
-        ddog_prof_EncodedProfile_drop(encoded);
+        bool ret = export_to_file(&encoded);
+        ddog_prof_EncodedProfile_drop(&encoded);
         return ret;
     }
 
+    return UploadWorker::enqueue(std::move(*this), encoded);
+}
+
+bool
+Datadog::Uploader::send(ddog_prof_EncodedProfile* encoded)
+{
     std::vector<ddog_prof_Exporter_File> to_compress_files;
 
     std::string_view json_str = CodeProvenance::get_instance().get_json_str();
@@ -87,6 +113,8 @@ Datadog::Uploader::upload(ddog_prof_Profile& profile)
         });
     }
 
+    ddog_CharSlice internal_metadata = to_slice(internal_metadata_json);
+
     auto build_res = ddog_prof_Exporter_Request_build(
       &ddog_exporter,
       encoded,
@@ -97,7 +125,7 @@ Datadog::Uploader::upload(ddog_prof_Profile& profile)
       },
       ddog_prof_Exporter_Slice_File_empty(), // files_to_export_unmodified
       nullptr,                               // optional_additional_tags
-      nullptr,                               // optional_internal_metadata_json
+      internal_metadata_json.empty() ? nullptr : &internal_metadata, // optional_internal_metadata_json
       nullptr                                // optional_info_json
     );
     ddog_prof_EncodedProfile_drop(encoded);
@@ -162,6 +162,47 @@ TEST(UploadDeathTest, LotsaSamplesLotsaFrames)
     EXPECT_EXIT(lotsa_frames_lotsa_samples(), ::testing::ExitedWithCode(0), "");
 }
 
+void
+c_api_interned_frames()
+{
+    configure("my_test_service", "my_test_env", "0.0.1", "https://127.0.0.1:9126", "cpython", "3.10.6", "3.100", 64);
+
+    const ddup_c_api_t* api = ddup_get_c_api();
+    if (api->version != DDUP_C_API_VERSION) {
+        std::exit(1);
+    }
+
+    // Interning the same string twice gives the same id
+    const std::string name = "my_function";
+    const uint32_t name_id = api->intern_string(name.data(), name.size());
+    const uint32_t file_id = api->intern_string("my_file", 7);
+    if (name_id == file_id || api->intern_string("my_function", 11) != name_id) {
+        std::exit(1);
+    }
+
+    for (int i = 0; i < 100; i++) {
+        auto h = api->start_sample();
+        api->push_heap(h, 100);
+        api->push_threadinfo(h, i + 1024, i, "MyFavoriteThreadEver", 20);
+        for (int j = 0; j < 128; j++) {
+            // Frames beyond the limit are dropped
+            api->push_frame_interned(h, name_id, file_id, j);
+        }
+        api->flush_sample(h);
+        api->drop_sample(h);
+    }
+
+    // Upload.  It'll fail, but whatever
+    ddup_upload();
+
+    std::exit(0);
+}
+
+TEST(UploadDeathTest, CApiInternedFrames)
+{
+    EXPECT_EXIT(c_api_interned_frames(), ::testing::ExitedWithCode(0), "");
+}
+
 int
 main(int argc, char** argv)
 {
@@ -1,3 +1,4 @@
+from typing import Any
 from typing import Dict
 from typing import Optional
 from typing import Union
@@ -5,6 +6,8 @@ from .._types import StringType
 from ddtrace._trace.span import Span
 from ddtrace._trace.tracer import Tracer
 
+_C_API: object
+
 def config(
     env: StringType,
     service: StringType,
@@ -14,9 +17,15 @@ def config(
     timeline_enabled: Optional[bool],
     output_filename: Optional[str],
     sample_pool_capacity: Optional[int],
+    upload_queue_size: Optional[int],
+    upload_dump_dir: Optional[str],
+    upload_dump_max_files: Optional[int],
 ) -> None: ...
 def start() -> None: ...
 def upload(tracer: Optional[Tracer], enable_code_provenance: Optional[bool]) -> None: ...
+def wait_uploads(timeout: float) -> bool: ...
+def upload_stats() -> Dict[str, Any]: ...
+def take_sampling_metadata() -> str: ...
 
 class SampleHandle:
     def flush_sample(self) -> None: ...
@@ -2,13 +2,17 @@
 # cython: language_level=3
 
 import platform
+from typing import Any
 from typing import Dict
 from typing import Optional
 from typing import Union
 
+from cpython.pycapsule cimport PyCapsule_New
 from cpython.unicode cimport PyUnicode_AsUTF8AndSize
+from libcpp.string cimport string
 from libcpp.unordered_map cimport unordered_map
 from libcpp.utility cimport pair
+from libcpp.vector cimport vector
 
 import ddtrace
 from ddtrace._trace.span import Span
@@ -37,6 +41,23 @@ cdef extern from "sample.hpp" namespace "Datadog":
     ctypedef struct Sample:
         pass
 
+cdef extern from "ddup_c_api.h":
+    ctypedef struct ddup_c_api_t:
+        pass
+
+cdef extern from "upload_worker.hpp" namespace "Datadog":
+    cdef cppclass UploadStats:
+        uint64_t succeeded
+        uint64_t failed
+        uint64_t dropped
+        uint64_t dumped
+        vector[int64_t] latencies_ns
+
+cdef extern from "sampling_metadata.hpp" namespace "Datadog":
+    cdef cppclass SamplingMetadata:
+        @staticmethod
+        string take_json()
+
 cdef extern from "ddup_interface.hpp":
     void ddup_config_env(string_view env)
     void ddup_config_service(string_view service)
@@ -49,6 +70,8 @@ cdef extern from "ddup_interface.hpp":
     void ddup_config_timeline(bint enable)
     void ddup_config_output_filename(string_view output_filename)
     void ddup_config_sample_pool_capacity(uint64_t sample_pool_capacity)
+    void ddup_config_upload_queue_size(uint64_t size)
+    void ddup_config_upload_dump(string_view dir, uint64_t max_files)
 
     void ddup_config_user_tag(string_view key, string_view val)
     void ddup_config_sample_type(unsigned int type)
@@ -58,6 +81,8 @@ cdef extern from "ddup_interface.hpp":
     void ddup_profile_set_endpoints(unordered_map[int64_t, string_view] span_ids_to_endpoints)
     void ddup_profile_add_endpoint_counts(unordered_map[string_view, int64_t] trace_endpoints_to_counts)
     bint ddup_upload() nogil
+    bint ddup_upload_wait(uint64_t timeout_ms) nogil
+    void ddup_upload_take_stats(UploadStats& stats)
 
     Sample *ddup_start_sample()
     void ddup_push_walltime(Sample *sample, int64_t walltime, int64_t count)
@@ -85,6 +110,8 @@ cdef extern from "ddup_interface.hpp":
     void ddup_flush_sample(Sample *sample)
     void ddup_drop_sample(Sample *sample)
 
+    const ddup_c_api_t *ddup_get_c_api()
+
 
 cdef extern from "code_provenance_interface.hpp":
     void code_provenance_set_json_str(string_view json_str)
@@ -103,6 +130,18 @@ cdef call_func_with_str(func_ptr_t func, str_arg: StringType):
     if utf8_data != NULL:
         func(string_view(utf8_data, utf8_size))
 
+cdef call_ddup_config_upload_dump(dump_dir: StringType, max_files: int):
+    if not dump_dir:
+        return
+    if isinstance(dump_dir, bytes):
+        ddup_config_upload_dump(string_view(<const char*>dump_dir, len(dump_dir)), max_files)
+        return
+    cdef const char* utf8_data
+    cdef Py_ssize_t utf8_size
+    utf8_data = PyUnicode_AsUTF8AndSize(dump_dir, &utf8_size)
+    if utf8_data != NULL:
+        ddup_config_upload_dump(string_view(utf8_data, utf8_size), max_files)
+
 cdef call_ddup_config_user_tag(key: StringType, val: StringType):
     if not key or not val:
         return
@@ -318,6 +357,11 @@ cdef int64_t clamp_to_int64_unsigned(value):
     return value
 
 
+# C-level sample API, for native collectors that push samples without going
+# through Python objects. See ddup_c_api.h.
+_C_API = PyCapsule_New(<void*>ddup_get_c_api(), b"ddtrace.internal.datadog.profiling.ddup._ddup._C_API", NULL)
+
+
 # Module-level flag to track if code provenance has been set
 cdef bint _code_provenance_set = False
 
@@ -330,7 +374,10 @@ def config(
         max_nframes: Optional[int] = None,
         timeline_enabled: Optional[bool] = None,
         output_filename: StringType = None,
-        sample_pool_capacity: Optional[int] = None) -> None:
+        sample_pool_capacity: Optional[int] = None,
+        upload_queue_size: Optional[int] = None,
+        upload_dump_dir: StringType = None,
+        upload_dump_max_files: Optional[int] = None) -> None:
 
     # Try to provide a ddtrace-specific default service if one is not given
     service = service or DEFAULT_SERVICE_NAME
@@ -360,6 +407,10 @@ def config(
         ddup_config_timeline(True)
     if sample_pool_capacity:
         ddup_config_sample_pool_capacity(clamp_to_uint64_unsigned(sample_pool_capacity))
+    if upload_queue_size:
+        ddup_config_upload_queue_size(clamp_to_uint64_unsigned(upload_queue_size))
+    if upload_dump_dir and upload_dump_max_files:
+        call_ddup_config_upload_dump(upload_dump_dir, clamp_to_uint64_unsigned(upload_dump_max_files))
 
 
 def start() -> None:
@@ -398,6 +449,35 @@ def upload(tracer: Optional[Tracer] = ddtrace.tracer, enable_code_provenance: Op
         ddup_upload()
 
 
+def wait_uploads(timeout: float) -> bool:
+    # The profiles are sent by a native thread, so that the caller does not wait on the network. This waits for the
+    # profiles uploaded so far to be sent, e.g. before exiting.
+    cdef uint64_t timeout_ms = clamp_to_uint64_unsigned(int(timeout * 1000))
+    cdef bint ret
+    with nogil:
+        ret = ddup_upload_wait(timeout_ms)
+    return ret
+
+
+def upload_stats() -> Dict[str, Any]:
+    # Returns the stats of the uploads since the last call
+    cdef UploadStats stats
+    ddup_upload_take_stats(stats)
+    return {
+        "succeeded": stats.succeeded,
+        "failed": stats.failed,
+        "dropped": stats.dropped,
+        "dumped": stats.dumped,
+        "latencies_ns": list(stats.latencies_ns),
+    }
+
+
+def take_sampling_metadata() -> str:
+    # Returns the metadata of the stack sampler since the last call, which is otherwise sent with the next profile
+    # uploaded to the agent, and starts a new period
+    return SamplingMetadata.take_json().decode("utf-8")
+
+
 cdef class SampleHandle:
     cdef Sample *ptr
 
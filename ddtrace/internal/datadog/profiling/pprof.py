@@ -0,0 +1,331 @@
+"""Reading and merging of the pprof files written by the profiler.
+
+When an output filename is configured, the profiler writes each profile to ``<output_filename>.<pid>.<seq>``,
+as an LZ4 compressed pprof protobuf. The profiles are decoded here with a minimal protobuf reader, which only
+knows the fields of the pprof format used to rebuild the stacks, so that no generated code is needed.
+"""
+import fnmatch
+import gzip
+import re
+import sys
+import typing as t
+
+
+LZ4_FRAME_MAGIC = b"\x04\x22\x4d\x18"
+GZIP_MAGIC = b"\x1f\x8b"
+
+# The labels matched by the sample filters
+FILTER_LABELS = {
+    "thread": ("thread name", "thread id"),
+    "task": ("task name", "task id"),
+    "span": ("span id", "local root span id"),
+    "endpoint": ("trace endpoint",),
+}
+
+_OUTPUT_FILENAME_RE = re.compile(r"\.(\d+)\.(\d+)$")
+
+# Name of the stack which accumulates the values of the stacks dropped to bound the memory used
+OTHER_STACKS = "[other]"
+
+Stack = t.Tuple[str, ...]
+LabelValue = t.Union[str, int]
+
+
+class PprofError(Exception):
+    pass
+
+
+def parse_output_filename(path: str) -> t.Optional[t.Tuple[int, int]]:
+    """Returns the process id and sequence number of a file written by the profiler."""
+    match = _OUTPUT_FILENAME_RE.search(path)
+    if match is None:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+def read_file(path: str) -> bytes:
+    """Returns the serialized pprof profile of the given file, which can be compressed with LZ4 or gzip."""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if data.startswith(LZ4_FRAME_MAGIC):
+        try:
+            import lz4.frame
+        except ImportError:
+            raise PprofError(
+                "the lz4 package is required to read the LZ4 compressed file %s, "
+                "install it with: pip install 'ddtrace[lz4]'" % path
+            )
+        return lz4.frame.decompress(data)
+    if data.startswith(GZIP_MAGIC):
+        return gzip.decompress(data)
+    return data
+
+
+def _read_varint(buf: memoryview, pos: int) -> t.Tuple[int, int]:
+    result = 0
+    shift = 0
+    while True:
+        try:
+            b = buf[pos]
+        except IndexError:
+            raise PprofError("truncated varint")
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _read_fields(buf: memoryview) -> t.Iterator[t.Tuple[int, int, t.Any]]:
+    """Yields the field number, wire type and value of the fields of a message.
+
+    The value of the length-delimited fields is a view of their bytes.
+    """
+    pos = 0
+    end = len(buf)
+    while pos < end:
+        key, pos = _read_varint(buf, pos)
+        field, wire_type = key >> 3, key & 0x7
+        if wire_type == 0:
+            value, pos = _read_varint(buf, pos)
+        elif wire_type == 2:
+            length, pos = _read_varint(buf, pos)
+            if pos + length > end:
+                raise PprofError("truncated field %d" % field)
+            value = buf[pos : pos + length]
+            pos += length
+        elif wire_type == 1:
+            value = int.from_bytes(buf[pos : pos + 8], "little")
+            pos += 8
+        elif wire_type == 5:
+            value = int.from_bytes(buf[pos : pos + 4], "little")
+            pos += 4
+        else:
+            raise PprofError("unsupported wire type %d" % wire_type)
+        yield field, wire_type, value
+
+
+def _read_repeated(wire_type: int, value: t.Any) -> t.List[int]:
+    # Repeated integers are packed by default, but may also be encoded one per field
+    if wire_type != 2:
+        return [value]
+    values = []
+    pos = 0
+    while pos < len(value):
+        v, pos = _read_varint(value, pos)
+        values.append(v)
+    return values
+
+
+def _to_int64(value: int) -> int:
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+class Profile(object):
+    """A decoded pprof profile.
+
+    Only the parts needed to rebuild the stacks and the labels of the samples are decoded.
+    """
+
+    def __init__(self, data: bytes) -> None:
+        buf = memoryview(data)
+        self.strings: t.List[str] = []
+        self.time_nanos = 0
+        self.duration_nanos = 0
+        self._sample_types: t.List[t.Tuple[int, int]] = []
+        self._samples: t.List[memoryview] = []
+        self._locations: t.List[memoryview] = []
+        self._functions: t.List[memoryview] = []
+
+        # The string table is usually at the end, so the messages referring to it are decoded afterwards
+        for field, wire_type, value in _read_fields(buf):
+            if field == 1:
+                self._sample_types.append(self._read_value_type(value))
+            elif field == 2:
+                self._samples.append(value)
+            elif field == 4:
+                self._locations.append(value)
+            elif field == 5:
+                self._functions.append(value)
+            elif field == 6:
+                self.strings.append(bytes(value).decode("utf-8", "replace"))
+            elif field == 9:
+                self.time_nanos = _to_int64(value)
+            elif field == 10:
+                self.duration_nanos = _to_int64(value)
+
+    @staticmethod
+    def _read_value_type(buf: memoryview) -> t.Tuple[int, int]:
+        type_ = unit = 0
+        for field, _, value in _read_fields(buf):
+            if field == 1:
+                type_ = value
+            elif field == 2:
+                unit = value
+        return type_, unit
+
+    def _string(self, index: int) -> str:
+        try:
+            return self.strings[index]
+        except IndexError:
+            raise PprofError("invalid string index %d" % index)
+
+    @property
+    def sample_types(self) -> t.List[t.Tuple[str, str]]:
+        return [(self._string(type_), self._string(unit)) for type_, unit in self._sample_types]
+
+    def sample_type_index(self, name: str) -> t.Optional[int]:
+        for i, (type_, _) in enumerate(self.sample_types):
+            if type_ == name:
+                return i
+        return None
+
+    def _read_functions(self, with_lines: bool) -> t.Dict[int, t.Tuple[str, str]]:
+        functions = {}
+        for buf in self._functions:
+            function_id = name = filename = 0
+            for field, _, value in _read_fields(buf):
+                if field == 1:
+                    function_id = value
+                elif field == 2:
+                    name = value
+                elif field == 4:
+                    filename = value
+            functions[function_id] = (self._string(name) or "<unknown>", self._string(filename) if with_lines else "")
+        return functions
+
+    def _read_locations(self, with_lines: bool) -> t.Dict[int, Stack]:
+        functions = self._read_functions(with_lines)
+        locations = {}
+        for buf in self._locations:
+            location_id = 0
+            frames = []
+            for field, _, value in _read_fields(buf):
+                if field == 1:
+                    location_id = value
+                elif field == 4:
+                    function_id = lineno = 0
+                    for line_field, _, line_value in _read_fields(value):
+                        if line_field == 1:
+                            function_id = line_value
+                        elif line_field == 2:
+                            lineno = _to_int64(line_value)
+                    name, filename = functions.get(function_id, ("<unknown>", ""))
+                    if filename:
+                        name = "%s (%s:%d)" % (name, filename, lineno)
+                    frames.append(sys.intern(name))
+            # The functions inlined in a location come first, followed by their callers
+            locations[location_id] = tuple(reversed(frames))
+        return locations
+
+    def _read_labels(self, buf: memoryview) -> t.Tuple[str, LabelValue]:
+        key = str_ = num = 0
+        for field, _, value in _read_fields(buf):
+            if field == 1:
+                key = value
+            elif field == 2:
+                str_ = value
+            elif field == 3:
+                num = _to_int64(value)
+        return self._string(key), (self._string(str_) if str_ else num)
+
+    def samples(self, with_lines: bool = False) -> t.Iterator[t.Tuple[Stack, t.List[int], t.Dict[str, LabelValue]]]:
+        """Yields the stack of each sample, from the root to the leaf, its values and its labels."""
+        locations = self._read_locations(with_lines)
+        for buf in self._samples:
+            location_ids: t.List[int] = []
+            values: t.List[int] = []
+            labels: t.Dict[str, LabelValue] = {}
+            for field, wire_type, value in _read_fields(buf):
+                if field == 1:
+                    location_ids.extend(_read_repeated(wire_type, value))
+                elif field == 2:
+                    values.extend(_to_int64(v) for v in _read_repeated(wire_type, value))
+                elif field == 3:
+                    key, label_value = self._read_labels(value)
+                    labels[key] = label_value
+
+            # The locations of a sample start with the leaf
+            stack: t.List[str] = []
+            for location_id in reversed(location_ids):
+                stack.extend(locations.get(location_id, ("<unknown>",)))
+            yield tuple(stack), values, labels
+
+
+class SampleFilter(object):
+    """Matches the samples whose labels match the given patterns.
+
+    The patterns are shell-style wildcards, matched against any of the labels of their kind (see ``FILTER_LABELS``).
+    A sample is kept if it matches one of the patterns of each kind.
+    """
+
+    def __init__(self, patterns: t.Dict[str, t.Sequence[str]]) -> None:
+        self._patterns = [(FILTER_LABELS[kind], list(values)) for kind, values in patterns.items() if values]
+
+    def __bool__(self) -> bool:
+        return bool(self._patterns)
+
+    def match(self, labels: t.Dict[str, LabelValue]) -> bool:
+        for keys, patterns in self._patterns:
+            values = [str(labels[key]) for key in keys if key in labels]
+            if not any(fnmatch.fnmatchcase(value, pattern) for value in values for pattern in patterns):
+                return False
+        return True
+
+
+class StackAggregator(object):
+    """Sums the values of the samples by stack, keeping at most ``max_stacks`` stacks.
+
+    When the limit is reached, the stacks with the lowest values are merged into a single ``[other]`` stack, so
+    that the memory used does not depend on the number of profiles merged. The stacks with the highest values, which
+    are the ones reported, are kept.
+    """
+
+    def __init__(self, max_stacks: int = 100000) -> None:
+        self.max_stacks = max(max_stacks, 2)
+        self.stacks: t.Dict[Stack, int] = {}
+        self.other = 0
+        self.dropped_stacks = 0
+
+    def add(self, stack: Stack, value: int) -> None:
+        if stack in self.stacks:
+            self.stacks[stack] += value
+            return
+        if len(self.stacks) >= self.max_stacks:
+            self._prune()
+        self.stacks[stack] = value
+
+    def _prune(self) -> None:
+        keep = self.max_stacks // 2
+        ranked = sorted(self.stacks.items(), key=lambda item: item[1], reverse=True)
+        for _, value in ranked[keep:]:
+            self.other += value
+        self.dropped_stacks += len(ranked) - keep
+        self.stacks = dict(ranked[:keep])
+
+    def collapsed(self) -> t.Iterator[t.Tuple[str, int]]:
+        """Yields the stacks in the collapsed format, i.e. their frames separated by semicolons, and their values."""
+        for stack, value in sorted(self.stacks.items()):
+            if value:
+                yield ";".join(stack), value
+        if self.other:
+            yield OTHER_STACKS, self.other
+
+    def total(self) -> int:
+        return sum(self.stacks.values()) + self.other
+
+    def top(self, n: int, by_total: bool = False) -> t.List[t.Tuple[str, int, int]]:
+        """Returns the ``n`` frames with the highest self (or total) value, with their self and total values."""
+        self_values: t.Dict[str, int] = {}
+        total_values: t.Dict[str, int] = {}
+        for stack, value in self.stacks.items():
+            if not stack:
+                continue
+            self_values[stack[-1]] = self_values.get(stack[-1], 0) + value
+            # Recursive frames are only counted once in the total of a stack
+            for frame in set(stack):
+                total_values[frame] = total_values.get(frame, 0) + value
+        ranking = total_values if by_total else self_values
+        ranked = sorted(ranking, key=lambda frame: (-ranking[frame], frame))[:n]
+        return [(frame, self_values.get(frame, 0), total_values[frame]) for frame in ranked]
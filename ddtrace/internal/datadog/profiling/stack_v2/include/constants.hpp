@@ -8,7 +8,23 @@ constexpr unsigned int g_min_sampling_period_us = g_default_sampling_period_us /
 constexpr unsigned int g_max_sampling_period_us = 1000000;       // 1 seconds
 constexpr unsigned int g_adaptive_sampling_interval_us = 250000; // 250 ms
 constexpr double g_default_sampling_period_s = g_default_sampling_period_us / 1e6;
-constexpr double g_target_overhead = 0.01; // 1% overhead
+constexpr double g_default_overhead_budget = 0.01; // 1% of the CPU time of the process
+
+// When staying within the overhead budget would require sampling less often than this, the sampler first reduces
+// the cost of each sampling round instead, by sampling a random subset of the threads and limiting the depth of the
+// stacks, down to the minimums below.
+constexpr unsigned int g_max_full_sampling_period_us = 100000; // 10 Hz
+constexpr double g_min_thread_sampling_probability = 0.1;
+constexpr unsigned int g_min_stack_depth_limit = 16;
 
 // Echion maintains a cache of frames--the size of this cache is specified up-front.
 constexpr unsigned int g_default_echion_frame_cache_size = 1024;
+
+// When only a subset of the asyncio tasks is sampled, the subset is picked again at this interval. Picking a random
+// task takes at most the given number of probes of the table of the set of all the tasks on average.
+constexpr unsigned int g_task_sampler_refresh_interval_us = 1000000; // 1 second
+constexpr unsigned int g_task_sampler_probes_per_task = 16;
+// Maximum number of tasks waiting for each other that are followed from a task
+constexpr unsigned int g_max_task_chain = 64;
+// Maximum number of the done callbacks of a task that are read to find the task awaiting it
+constexpr unsigned int g_max_task_callbacks = 8;
@@ -1,8 +1,11 @@
 #pragma once
 #include "constants.hpp"
 #include "stack_renderer.hpp"
+#include "task_sampler.hpp"
+#include "thread_state_sampler.hpp"
 
 #include <atomic>
+#include <random>
 
 namespace Datadog {
 
@@ -38,6 +41,24 @@ class Sampler
     bool do_adaptive_sampling = true;
     void adapt_sampling_interval();
 
+    // Share of the CPU time of the process that the sampling thread may use
+    std::atomic<double> overhead_budget{ g_default_overhead_budget };
+
+    // Probability of sampling each thread at each round, and limit on the depth of the stacks (0 for none). These are
+    // lowered by the adaptive sampling when sampling less often is not enough to stay within the overhead budget.
+    // Only used by the sampling thread.
+    double thread_sampling_probability = 1.0;
+    unsigned int stack_depth_limit = 0;
+    std::minstd_rand thread_sampling_rng;
+
+    // Only used by the sampling thread
+    ThreadStateSampler thread_state_sampler;
+    std::atomic<bool> do_thread_state_sampling{ false };
+
+    // Selects the asyncio tasks to sample when there is a budget on their number
+    TaskSampler task_sampler;
+    void prepare_task_sampling();
+
   public:
     // Singleton instance
     static Sampler& get();
@@ -50,6 +71,8 @@ class Sampler
                       PyObject* _asyncio_scheduled_tasks,
                       PyObject* _asyncio_eager_tasks);
     void link_tasks(PyObject* parent, PyObject* child);
+    void unlink_task(PyObject* child);
+    void postfork_child();
     void sampling_thread(const uint64_t seq_num);
     void track_greenlet(uintptr_t greenlet_id, StringTable::Key name, PyObject* frame);
     void untrack_greenlet(uintptr_t greenlet_id);
@@ -62,6 +85,13 @@ class Sampler
     // self-time, and we're not currently accounting for the echion self-time.
     void set_interval(double new_interval);
     void set_adaptive_sampling(bool value) { do_adaptive_sampling = value; }
+    // The adaptive sampling keeps the CPU time of the sampling thread within this share of the CPU time of the process
+    void set_overhead_budget(double budget);
+    // Whether to sample the state of the threads (running, holding or waiting for the GIL, etc.)
+    void set_thread_state_sampling(bool value) { do_thread_state_sampling.store(value); }
+    // Only sample the running asyncio tasks, the tasks awaiting them and a random subset of the other tasks of at
+    // most the given size. Must be set before init_asyncio.
+    void set_asyncio_task_budget(size_t budget, PyTypeObject* task_type) { task_sampler.set_budget(budget, task_type); }
 };
 
 } // namespace Datadog
@@ -1,5 +1,6 @@
 #pragma once
 
+#include <atomic>
 #include <chrono>
 #include <fstream>
 #include <memory>
@@ -30,6 +31,8 @@ struct ThreadState
     microsecond_t wall_time_ns = 0;
     microsecond_t cpu_time_ns = 0;
     int64_t now_time_ns = 0;
+    // Running, holding or waiting for the GIL, etc. Empty if not sampled.
+    std::string_view run_state;
 };
 
 class StackRenderer : public RendererInterface
@@ -39,6 +42,15 @@ class StackRenderer : public RendererInterface
     // Whether task name has been pushed for the current sample. Whenever
     // the sample is created, this has to be reset.
     bool pushed_task_name = false;
+    // When only a subset of the suspended tasks is sampled, the wall time of the tasks which are not running is
+    // scaled by this weight so that they account for the ones that were not sampled.
+    std::atomic<double> suspended_task_weight{ 1.0 };
+    // Maximum number of frames rendered for each sample, or 0 for no limit. The frames beyond it are counted as
+    // omitted. Set by the sampler, from the sampling thread, to bound the cost of deep stacks.
+    unsigned int max_depth = 0;
+    // Number of frames rendered for the current sample, and the most over all the samples since the last read
+    unsigned int depth = 0;
+    unsigned int max_depth_seen = 0;
 
     void open() override {}
     void close() override {}
@@ -62,6 +74,18 @@ class StackRenderer : public RendererInterface
     virtual void render_cpu_time(uint64_t cpu_time_us) override;
     virtual void render_stack_end(MetricType metric_type, uint64_t value) override;
     virtual bool is_valid() override;
+
+  public:
+    void set_suspended_task_weight(double weight) { suspended_task_weight.store(weight); }
+    // Set the state of the next thread to be rendered, as sampled by the ThreadStateSampler
+    void set_thread_run_state(std::string_view run_state) { thread_state.run_state = run_state; }
+    void set_max_depth(unsigned int value) { max_depth = value; }
+    unsigned int take_max_depth_seen()
+    {
+        auto value = max_depth_seen;
+        max_depth_seen = 0;
+        return value;
+    }
 };
 
 } // namespace Datadog
@@ -0,0 +1,89 @@
+#pragma once
+
+#include "python_headers.hpp"
+
+#include <atomic>
+#include <chrono>
+#include <mutex>
+#include <random>
+#include <unordered_map>
+#include <unordered_set>
+#include <utility>
+#include <vector>
+
+namespace Datadog {
+
+// Offsets of the fields of the asyncio tasks read by the task sampler. The layout of the tasks is only known to the
+// sampler, which includes the task mirrors of echion.
+struct TaskLayout
+{
+    size_t fut_waiter = 0;
+    size_t callback0 = 0;
+    size_t callbacks = 0;
+};
+
+class TaskSampler
+{
+    // Selects the asyncio tasks unwound at each sample when there are too many of them to unwind all of them.
+    // Echion reads the tasks from a set of weak references. Instead of the set of all the tasks kept by asyncio, it is
+    // given a set built here before each sampling round, with:
+    // - the running task of each event loop and the tasks awaiting it, taken at each sample, so that short tasks are
+    //   sampled while they run
+    // - a random subset of the other tasks, within the budget, picked again periodically
+    // The subset is picked by probing random slots of the table of the set of all the tasks, so that its cost does not
+    // depend on the number of tasks. The wall time of the tasks of the subset is scaled by the weight returned by
+    // prepare, so that they account for the tasks that were not picked.
+    // Besides the configuration and the gather links, only used by the sampling thread.
+  private:
+    std::atomic<size_t> budget{ 0 };
+    // The set of weak references to all the tasks, kept by asyncio, and the type of the tasks
+    std::atomic<PyObject*> all_tasks{ nullptr };
+    std::atomic<PyTypeObject*> task_type{ nullptr };
+    const TaskLayout layout;
+
+    // Tasks gathered by another task, which does not appear in their done callbacks. Echion forgets the links of the
+    // tasks it is not given, so they are kept here.
+    std::mutex gather_parents_mtx;
+    std::unordered_map<PyObject*, PyObject*> gather_parents;
+
+    // The tasks of the subset picked at the last refresh, with the tasks awaiting them
+    std::vector<PyObject*> suspended_tasks;
+    double suspended_task_weight = 1.0;
+    std::chrono::steady_clock::time_point next_refresh{};
+    std::minstd_rand rng;
+
+    // The set given to echion, and the weak references it holds
+    std::vector<PyWeakReference> refs;
+    std::vector<setentry> table;
+    PySetObject view{};
+
+    bool is_task(PyObject* object);
+    PyObject* read_field(PyObject* task, size_t offset);
+    PyObject* gather_parent(PyObject* task);
+    // Returns the task awaiting the given one, if any
+    PyObject* awaiter(PyObject* task);
+    void add_with_awaiters(PyObject* task, std::vector<PyObject*>& tasks);
+    void refresh();
+
+  public:
+    explicit TaskSampler(TaskLayout task_layout);
+
+    void set_budget(size_t value, PyTypeObject* type);
+    bool enabled() const { return budget.load() > 0; }
+
+    // Keeps the set of all the tasks, and returns the set to give to echion in its place
+    PyObject* track(PyObject* tasks);
+
+    void link(PyObject* parent, PyObject* child);
+    void unlink(PyObject* child);
+    void postfork_child();
+
+    // Builds the set of the tasks to sample in the coming round and returns the weight of the tasks of the subset.
+    // The eager tasks are read separately by echion, so they are left out. The gather links of the tasks of the set
+    // are added to the given links, to be given back to echion.
+    double prepare(const std::vector<PyObject*>& running_tasks,
+                   const std::unordered_set<PyObject*>& eager_tasks,
+                   std::vector<std::pair<PyObject*, PyObject*>>& links);
+};
+
+} // namespace Datadog
@@ -0,0 +1,70 @@
+#pragma once
+
+#include "python_headers.hpp"
+
+#include <stdint.h>
+#include <string_view>
+#include <unordered_map>
+
+#include <sys/types.h>
+
+namespace Datadog {
+
+// The states reported in the "thread state" label of the thread state samples
+namespace ThreadStateLabel {
+// Running without holding the GIL, e.g. in native code that released it, or about to take it back
+constexpr std::string_view running = "running";
+// Holding the GIL and running, i.e. running Python code
+constexpr std::string_view holding_gil = "holding-gil";
+// Holding the GIL but blocked, e.g. in a syscall made without releasing the GIL. Every other thread that wants
+// to run Python code is waiting for this one.
+constexpr std::string_view holding_gil_blocked = "holding-gil-blocked";
+// Waiting to take the GIL
+constexpr std::string_view waiting_gil = "waiting-gil";
+// Blocked without holding the GIL, e.g. in a syscall for I/O, a sleep or a lock
+constexpr std::string_view blocked = "blocked";
+} // namespace ThreadStateLabel
+
+class ThreadStateSampler
+{
+    // Finds the state of the Python threads from the sampling thread, without stopping them.
+    // Whether a thread holds the GIL is read from the GIL of its interpreter. Whether it is running, and whether it is
+    // blocked waiting for the GIL, is read from /proc/self/task/<tid>/syscall, which gives the syscall the thread is
+    // blocked in and its arguments: threads waiting for the GIL are blocked in a futex wait on one of the condition
+    // variables or mutexes of the GIL.
+    // This is only supported on Linux. Elsewhere no state is reported.
+  private:
+    // The syscall files are kept open across samples, since reading them again from the start regenerates them
+    struct SyscallFile
+    {
+        int fd = -1;
+        uint64_t seen = 0;
+    };
+    std::unordered_map<unsigned long, SyscallFile> syscall_files;
+    pid_t pid = 0;
+    uint64_t round = 0;
+
+    // GIL of the interpreter being sampled
+    uintptr_t gil_addr = 0;
+    uintptr_t gil_holder_id = 0;
+
+    int syscall_file(unsigned long native_id);
+    void close_all();
+
+  public:
+    ThreadStateSampler() = default;
+    ~ThreadStateSampler() { close_all(); }
+    ThreadStateSampler(const ThreadStateSampler&) = delete;
+    ThreadStateSampler& operator=(const ThreadStateSampler&) = delete;
+
+    // Called before sampling the threads of each interpreter
+    void begin_interp(PyInterpreterState* interp);
+
+    // Returns the state of the given thread of the current interpreter, or an empty string if it is unknown
+    std::string_view sample(uintptr_t thread_id, unsigned long native_id);
+
+    // Called once all the threads have been sampled, to close the files of the threads which are gone
+    void end();
+};
+
+} // namespace Datadog
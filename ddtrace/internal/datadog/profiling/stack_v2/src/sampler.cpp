@@ -7,7 +7,14 @@
 #include "echion/tasks.h"
 #include "echion/threads.h"
 
+#include <algorithm>
+#include <chrono>
+#include <cmath>
+#include <cstddef>
 #include <pthread.h>
+#include <unordered_set>
+#include <utility>
+#include <vector>
 
 using namespace Datadog;
 
@@ -114,17 +121,55 @@ Sampler::adapt_sampling_interval()
     // time. With:
     //    s - sampler time
     //    p - process time
-    //    o - overhead threshold
+    //    o - overhead budget
     //    I - interval
     //    I'- interval after adjustment
     // we use the following formula to adapt the sampling interval
     //    I' = I * [(s / p) / o]
     // As the value could be small when the process is idle, we use a lower
     // bound of the sampling interval to avoid CPU spikes from the sampler.
-    auto new_interval =
-      static_cast<microsecond_t>(current_interval * ((sampler_thread_delta / process_delta) / g_target_overhead));
+    auto target_interval = current_interval * ((sampler_thread_delta / process_delta) / overhead_budget.load());
+
+    // The deepest stack rendered since the last adjustment, which is the limit if the stacks were limited
+    auto depth_seen = renderer_ptr->take_max_depth_seen();
+
+    if (target_interval > g_max_full_sampling_period_us) {
+        // Sampling less often would miss too much of what the process does, so we first make each sampling round
+        // cheaper. The cost of a round is roughly proportional to the number of threads sampled and to the depth of
+        // their stacks, so the excess is split between the two, and what remains is made up by the interval.
+        auto excess = target_interval / g_max_full_sampling_period_us;
+        auto step = std::sqrt(excess);
+
+        auto new_probability = std::max(thread_sampling_probability / step, g_min_thread_sampling_probability);
+        if (new_probability < thread_sampling_probability) {
+            excess *= new_probability / thread_sampling_probability;
+            thread_sampling_probability = new_probability;
+        }
+
+        auto current_depth = stack_depth_limit > 0 ? stack_depth_limit : depth_seen;
+        auto new_depth =
+          std::max(static_cast<unsigned int>(static_cast<double>(current_depth) / step), g_min_stack_depth_limit);
+        if (new_depth < current_depth) {
+            excess *= static_cast<double>(new_depth) / static_cast<double>(current_depth);
+            stack_depth_limit = new_depth;
+        }
+
+        target_interval = g_max_full_sampling_period_us * std::max(excess, 1.0);
+    } else if (target_interval < g_max_full_sampling_period_us / 2) {
+        // Well within the budget: sample all the threads and frames again, gradually since this makes each sampling
+        // round more expensive
+        thread_sampling_probability = std::min(thread_sampling_probability * 2, 1.0);
+        if (stack_depth_limit > 0) {
+            stack_depth_limit *= 2;
+            if (stack_depth_limit >= g_backend_max_nframes) {
+                stack_depth_limit = 0;
+            }
+        }
+    }
+    renderer_ptr->set_max_depth(stack_depth_limit);
 
     // Cap the new interval to the min/max sampling period
+    auto new_interval = static_cast<microsecond_t>(target_interval);
     if (new_interval < g_min_sampling_period_us) {
         new_interval = g_min_sampling_period_us;
     } else if (new_interval > g_max_sampling_period_us) {
@@ -151,11 +196,33 @@ Sampler::sampling_thread(const uint64_t seq_num)
         sample_time_prev = sample_time_now;
 
         // Perform the sample
+        const bool sample_thread_state = do_thread_state_sampling.load();
+        // When only a subset of the threads is sampled, the wall time of the sampled ones is scaled so that they
+        // account for the others. Their CPU time is the time since their previous sample, so it needs no scaling.
+        const double probability = thread_sampling_probability;
+        const auto thread_wall_time_us = static_cast<microsecond_t>(static_cast<double>(wall_time_us) / probability);
+        std::uniform_real_distribution<double> thread_sampling_dist(0.0, 1.0);
+        if (task_sampler.enabled()) {
+            prepare_task_sampling();
+        }
         for_each_interp([&](PyInterpreterState* interp) -> void {
+            if (sample_thread_state) {
+                thread_state_sampler.begin_interp(interp);
+            }
             for_each_thread(interp, [&](PyThreadState* tstate, ThreadInfo& thread) {
-                thread.sample(interp->id, tstate, wall_time_us);
+                if (probability < 1.0 && thread_sampling_dist(thread_sampling_rng) >= probability) {
+                    return;
+                }
+                renderer_ptr->set_thread_run_state(
+                  sample_thread_state ? thread_state_sampler.sample(thread.thread_id, thread.native_id)
+                                      : std::string_view{});
+                thread.sample(interp->id, tstate, thread_wall_time_us);
             });
         });
+        ddup_record_sampling_round(probability, stack_depth_limit);
+        if (sample_thread_state) {
+            thread_state_sampler.end();
+        }
 
         if (do_adaptive_sampling) {
             // Adjust the sampling interval at most every second
@@ -185,8 +252,20 @@ Sampler::set_interval(double new_interval_s)
     sample_interval_us.store(new_interval_us);
 }
 
+void
+Sampler::set_overhead_budget(double budget)
+{
+    overhead_budget.store(budget);
+    ddup_set_sampling_overhead_budget(budget);
+}
+
 Sampler::Sampler()
   : renderer_ptr{ std::make_shared<StackRenderer>() }
+  , thread_sampling_rng{ static_cast<std::minstd_rand::result_type>(
+      std::chrono::steady_clock::now().time_since_epoch().count()) }
+  , task_sampler{ TaskLayout{ offsetof(TaskObj, task_fut_waiter),
+                              offsetof(TaskObj, task_callback0),
+                              offsetof(TaskObj, task_callbacks) } }
 {
 }
 
@@ -231,6 +310,7 @@ Sampler::one_time_setup()
     // Run the atfork handler to ensure that we're tracking the correct process
     _stack_v2_atfork_child();
     pthread_atfork(nullptr, nullptr, _stack_v2_atfork_child);
+    pthread_atfork(nullptr, nullptr, []() { Sampler::get().postfork_child(); });
 
     // Register our rendering callbacks with echion's Renderer singleton
     Renderer::get().set_renderer(renderer_ptr);
@@ -281,6 +361,9 @@ Sampler::start()
     static std::once_flag once;
     std::call_once(once, [this]() { this->one_time_setup(); });
 
+    // The budget is reported along with the profiles, even if it was never set
+    ddup_set_sampling_overhead_budget(overhead_budget.load());
+
     // Launch the sampling thread.
     // Thread lifetime is bounded by the value of the sequence number.  When it is changed from the value the thread was
     // launched with, the thread will exit.
@@ -327,7 +410,9 @@ Sampler::init_asyncio(PyObject* _asyncio_current_tasks,
                       PyObject* _asyncio_eager_tasks)
 {
     asyncio_current_tasks = _asyncio_current_tasks;
-    asyncio_scheduled_tasks = _asyncio_scheduled_tasks;
+    // With a budget, echion is given the tasks selected by the task sampler instead of all the tasks
+    asyncio_scheduled_tasks =
+      task_sampler.enabled() ? task_sampler.track(_asyncio_scheduled_tasks) : _asyncio_scheduled_tasks;
     asyncio_eager_tasks = _asyncio_eager_tasks;
     if (asyncio_eager_tasks == Py_None) {
         asyncio_eager_tasks = NULL;
@@ -337,8 +422,66 @@ Sampler::init_asyncio(PyObject* _asyncio_current_tasks,
 void
 Sampler::link_tasks(PyObject* parent, PyObject* child)
 {
+    {
+        std::lock_guard<std::mutex> guard(task_link_map_lock);
+        task_link_map[child] = parent;
+    }
+    if (task_sampler.enabled() && parent != Py_None) {
+        task_sampler.link(parent, child);
+    }
+}
+
+void
+Sampler::postfork_child()
+{
+    task_sampler.postfork_child();
+}
+
+void
+Sampler::unlink_task(PyObject* child)
+{
+    task_sampler.unlink(child);
+}
+
+void
+Sampler::prepare_task_sampling()
+{
+    if (asyncio_current_tasks == NULL) {
+        return;
+    }
+
+    // The running task of each event loop, looked up like echion does when it unwinds the tasks
+    std::vector<PyObject*> running_tasks;
+    std::unordered_set<PyObject*> eager_tasks;
+    try {
+        MirrorDict current_tasks(asyncio_current_tasks);
+        {
+            std::lock_guard<std::mutex> guard(thread_info_map_lock);
+            for (auto& entry : thread_info_map) {
+                if (entry.second->asyncio_loop == 0) {
+                    continue;
+                }
+                PyObject* task = current_tasks.get_item(reinterpret_cast<PyObject*>(entry.second->asyncio_loop));
+                if (task != NULL) {
+                    running_tasks.push_back(task);
+                }
+            }
+        }
+        if (asyncio_eager_tasks != NULL) {
+            eager_tasks = MirrorSet(asyncio_eager_tasks).as_unordered_set();
+        }
+    } catch (MirrorError&) {
+        // The running tasks are sampled in the next round
+    }
+
+    std::vector<std::pair<PyObject*, PyObject*>> links;
+    renderer_ptr->set_suspended_task_weight(task_sampler.prepare(running_tasks, eager_tasks, links));
+
+    // Echion forgets the gather links of the tasks it was not given in the previous rounds
     std::lock_guard<std::mutex> guard(task_link_map_lock);
-    task_link_map[child] = parent;
+    for (auto& link : links) {
+        task_link_map[link.second] = link.first;
+    }
 }
 
 void
@@ -53,10 +53,14 @@ StackRenderer::render_thread_begin(PyThreadState* tstate,
                                   // since we don't know if we'll get a CPU time here.
 
     pushed_task_name = false;
+    depth = 0;
 
     // Finalize the thread information we have
     ddup_push_threadinfo(sample, static_cast<int64_t>(thread_id), static_cast<int64_t>(native_id), name);
     ddup_push_walltime(sample, thread_state.wall_time_ns, 1);
+    if (!thread_state.run_state.empty()) {
+        ddup_push_thread_state(sample, thread_state.run_state, thread_state.wall_time_ns, 1);
+    }
 
     const std::optional<Span> active_span = ThreadSpanLinks::get_instance().get_active_span_from_thread_id(thread_id);
     if (active_span) {
@@ -90,9 +94,16 @@ StackRenderer::render_task_begin(std::string task_name, bool on_cpu)
                              static_cast<int64_t>(thread_state.native_id),
                              thread_state.name);
         ddup_push_task_name(sample, task_name);
-        ddup_push_walltime(sample, thread_state.wall_time_ns, 1);
+        auto wall_time_ns = thread_state.wall_time_ns;
+        if (!on_cpu) {
+            wall_time_ns = static_cast<microsecond_t>(static_cast<double>(wall_time_ns) * suspended_task_weight.load());
+        }
+        ddup_push_walltime(sample, wall_time_ns, 1);
         if (on_cpu)
             ddup_push_cputime(sample, thread_state.cpu_time_ns, 1); // initialized to 0, so possibly a no-op
+        // The state of the thread is only relevant to the task running on it
+        if (on_cpu && !thread_state.run_state.empty())
+            ddup_push_thread_state(sample, thread_state.run_state, thread_state.wall_time_ns, 1);
         ddup_push_monotonic_ns(sample, thread_state.now_time_ns);
 
         // We also want to make sure the tid -> span_id mapping is present in the sample for the task
@@ -105,6 +116,7 @@ StackRenderer::render_task_begin(std::string task_name, bool on_cpu)
         }
 
         pushed_task_name = true;
+        depth = 0;
     }
 }
 
@@ -122,6 +134,20 @@ StackRenderer::render_frame(Frame& frame)
         return;
     }
 
+    auto line = frame.location.line;
+
+    // The frames beyond the depth limit are skipped before looking up their strings, which is most of the cost of
+    // rendering them. The dummy frame holding the task name is not part of the stack.
+    if (line != 0) {
+        if (max_depth > 0 && depth >= max_depth) {
+            ddup_drop_frame(sample);
+            return;
+        }
+        if (++depth > max_depth_seen) {
+            max_depth_seen = depth;
+        }
+    }
+
     // Ordinarily we could just call frame_cache->lookup() here, but our
     // underlying frame is owned by the LRUCache, which may have cleaned it up,
     // causing the table keys to be garbage.  Since individual frames in
@@ -143,8 +169,6 @@ StackRenderer::render_frame(Frame& frame)
         name_str = missing_name;
     }
 
-    auto line = frame.location.line;
-
     // DEV: Echion pushes a dummy frame containing task name, and its line
     // number is set to 0.
     if (line == 0) {
@@ -191,6 +191,81 @@ stack_v2_set_adaptive_sampling(PyObject* Py_UNUSED(self), PyObject* args)
     Py_RETURN_NONE;
 }
 
+static PyObject*
+stack_v2_set_thread_state_sampling(PyObject* Py_UNUSED(self), PyObject* args)
+{
+    int do_thread_state_sampling = false;
+
+    if (!PyArg_ParseTuple(args, "|p", &do_thread_state_sampling)) {
+        return NULL;
+    }
+
+    Sampler::get().set_thread_state_sampling(do_thread_state_sampling);
+
+    Py_RETURN_NONE;
+}
+
+static PyObject*
+stack_v2_set_asyncio_task_budget(PyObject* Py_UNUSED(self), PyObject* args)
+{
+    Py_ssize_t budget;
+    PyObject* task_type;
+
+    if (!PyArg_ParseTuple(args, "nO!", &budget, &PyType_Type, &task_type)) {
+        return NULL;
+    }
+
+    if (budget < 0) {
+        PyErr_SetString(PyExc_ValueError, "the asyncio task budget must not be negative");
+        return NULL;
+    }
+
+    Sampler::get().set_asyncio_task_budget(static_cast<size_t>(budget), reinterpret_cast<PyTypeObject*>(task_type));
+
+    Py_RETURN_NONE;
+}
+
+static PyObject*
+stack_v2_unlink_tasks(PyObject* Py_UNUSED(self), PyObject* args)
+{
+    PyObject* children;
+
+    if (!PyArg_ParseTuple(args, "O", &children)) {
+        return NULL;
+    }
+
+    PyObject* sequence = PySequence_Fast(children, "children must be a sequence");
+    if (sequence == NULL) {
+        return NULL;
+    }
+    Py_ssize_t size = PySequence_Fast_GET_SIZE(sequence);
+    for (Py_ssize_t i = 0; i < size; i++) {
+        Sampler::get().unlink_task(PySequence_Fast_GET_ITEM(sequence, i));
+    }
+    Py_DECREF(sequence);
+
+    Py_RETURN_NONE;
+}
+
+static PyObject*
+stack_v2_set_overhead_budget(PyObject* Py_UNUSED(self), PyObject* args)
+{
+    double budget_pct;
+
+    if (!PyArg_ParseTuple(args, "d", &budget_pct)) {
+        return NULL;
+    }
+
+    if (budget_pct <= 0.0 || budget_pct > 100.0) {
+        PyErr_SetString(PyExc_ValueError, "the overhead budget must be greater than 0 and at most 100 percent");
+        return NULL;
+    }
+
+    Sampler::get().set_overhead_budget(budget_pct / 100.0);
+
+    Py_RETURN_NONE;
+}
+
 static PyObject*
 track_greenlet(PyObject* Py_UNUSED(m), PyObject* args)
 {
@@ -269,6 +344,11 @@ static PyMethodDef _stack_v2_methods[] = {
     { "track_asyncio_loop", stack_v2_track_asyncio_loop, METH_VARARGS, "Map the name of a task with its identifier" },
     { "init_asyncio", stack_v2_init_asyncio, METH_VARARGS, "Initialise asyncio tracking" },
     { "link_tasks", stack_v2_link_tasks, METH_VARARGS, "Link two tasks" },
+    { "unlink_tasks", stack_v2_unlink_tasks, METH_VARARGS, "Unlink gathered tasks from the task gathering them" },
+    { "set_asyncio_task_budget",
+      stack_v2_set_asyncio_task_budget,
+      METH_VARARGS,
+      "Set the maximum number of suspended asyncio tasks sampled, and the type of the tasks" },
     // greenlet support
     { "track_greenlet", track_greenlet, METH_VARARGS, "Map a greenlet with its identifier" },
     { "untrack_greenlet", untrack_greenlet, METH_VARARGS, "Untrack a terminated greenlet" },
@@ -276,6 +356,14 @@ static PyMethodDef _stack_v2_methods[] = {
     { "update_greenlet_frame", update_greenlet_frame, METH_VARARGS, "Update the frame of a greenlet" },
 
     { "set_adaptive_sampling", stack_v2_set_adaptive_sampling, METH_VARARGS, "Set adaptive sampling" },
+    { "set_overhead_budget",
+      stack_v2_set_overhead_budget,
+      METH_VARARGS,
+      "Set the share of the CPU time of the process the sampler may use, in percent" },
+    { "set_thread_state_sampling",
+      stack_v2_set_thread_state_sampling,
+      METH_VARARGS,
+      "Set the sampling of the state of the threads" },
     { NULL, NULL, 0, NULL }
 };
 
@@ -0,0 +1,260 @@
+#include "task_sampler.hpp"
+
+#include "constants.hpp"
+
+#include "echion/vm.h"
+
+#include <algorithm>
+#include <cstddef>
+#include <new>
+
+using namespace Datadog;
+
+#if PY_VERSION_HEX < 0x030c0000
+// The callback waking up a task awaiting another one. From 3.12, it is a builtin function bound to the task.
+typedef struct
+{
+    PyObject_HEAD PyObject* ww_task;
+} TaskWakeupMethWrapper;
+#endif
+
+TaskSampler::TaskSampler(TaskLayout task_layout)
+  : layout(task_layout)
+  , rng(static_cast<std::minstd_rand::result_type>(std::chrono::steady_clock::now().time_since_epoch().count()))
+{
+    // Echion might read the set before the first sampling round
+    table.assign(1, setentry{});
+    view.table = table.data();
+    view.mask = 0;
+}
+
+void
+TaskSampler::set_budget(size_t value, PyTypeObject* type)
+{
+    task_type.store(type);
+    budget.store(value);
+}
+
+PyObject*
+TaskSampler::track(PyObject* tasks)
+{
+    all_tasks.store(tasks);
+    return reinterpret_cast<PyObject*>(&view);
+}
+
+void
+TaskSampler::link(PyObject* parent, PyObject* child)
+{
+    const std::lock_guard<std::mutex> lock(gather_parents_mtx);
+    gather_parents[child] = parent;
+}
+
+void
+TaskSampler::unlink(PyObject* child)
+{
+    const std::lock_guard<std::mutex> lock(gather_parents_mtx);
+    gather_parents.erase(child);
+}
+
+void
+TaskSampler::postfork_child()
+{
+    // NB placement-new to re-init and leak the mutex because doing anything else is UB
+    new (&gather_parents_mtx) std::mutex();
+}
+
+bool
+TaskSampler::is_task(PyObject* object)
+{
+    if (object == nullptr) {
+        return false;
+    }
+    PyObject header;
+    if (copy_type(object, header)) {
+        return false;
+    }
+    return header.ob_type == task_type.load();
+}
+
+PyObject*
+TaskSampler::read_field(PyObject* task, size_t offset)
+{
+    PyObject* value = nullptr;
+    if (copy_generic(reinterpret_cast<char*>(task) + offset, &value, sizeof(value))) {
+        return nullptr;
+    }
+    return value;
+}
+
+PyObject*
+TaskSampler::gather_parent(PyObject* task)
+{
+    const std::lock_guard<std::mutex> lock(gather_parents_mtx);
+    auto it = gather_parents.find(task);
+    return it != gather_parents.end() ? it->second : nullptr;
+}
+
+PyObject*
+TaskSampler::awaiter(PyObject* task)
+{
+    PyObject* parent = gather_parent(task);
+    if (is_task(parent)) {
+        return parent;
+    }
+
+    // A task awaiting another one adds the callback waking it up to the done callbacks of the other one. The first
+    // callback is kept on its own, the others in a list of (callback, context) tuples.
+    PyObject* callbacks[g_max_task_callbacks];
+    size_t count = 0;
+    PyObject* callback0 = read_field(task, layout.callback0);
+    if (callback0 != nullptr) {
+        callbacks[count++] = callback0;
+    }
+    PyObject* list_addr = read_field(task, layout.callbacks);
+    PyListObject list;
+    if (list_addr != nullptr && !copy_type(list_addr, list) && list.ob_item != nullptr && list.ob_base.ob_size > 0) {
+        auto n = std::min(static_cast<size_t>(list.ob_base.ob_size), g_max_task_callbacks - count);
+        PyObject* items[g_max_task_callbacks];
+        if (!copy_generic(list.ob_item, items, n * sizeof(PyObject*))) {
+            for (size_t i = 0; i < n; i++) {
+                PyObject* callback = read_field(items[i], offsetof(PyTupleObject, ob_item));
+                if (callback != nullptr) {
+                    callbacks[count++] = callback;
+                }
+            }
+        }
+    }
+
+    for (size_t i = 0; i < count; i++) {
+#if PY_VERSION_HEX >= 0x030c0000
+        PyCFunctionObject function;
+        if (copy_type(callbacks[i], function) || function.ob_base.ob_type != &PyCFunction_Type) {
+            continue;
+        }
+        PyObject* owner = function.m_self;
+#else
+        TaskWakeupMethWrapper wrapper;
+        if (copy_type(callbacks[i], wrapper)) {
+            continue;
+        }
+        PyObject* owner = wrapper.ww_task;
+#endif
+        if (is_task(owner)) {
+            return owner;
+        }
+    }
+
+    return nullptr;
+}
+
+void
+TaskSampler::add_with_awaiters(PyObject* task, std::vector<PyObject*>& tasks)
+{
+    for (unsigned int i = 0; i < g_max_task_chain && task != nullptr; i++) {
+        tasks.push_back(task);
+        task = awaiter(task);
+    }
+}
+
+void
+TaskSampler::refresh()
+{
+    suspended_tasks.clear();
+    suspended_task_weight = 1.0;
+
+    PyObject* tasks_addr = all_tasks.load();
+    PySetObject set;
+    if (tasks_addr == nullptr || copy_type(tasks_addr, set) || set.mask < 0 || set.table == nullptr) {
+        return;
+    }
+
+    const auto total = static_cast<size_t>(set.used);
+    const size_t slots = static_cast<size_t>(set.mask) + 1;
+    const size_t wanted = budget.load();
+    const size_t max_probes = wanted * g_task_sampler_probes_per_task;
+
+    // When the table is small enough, all its slots are read, which picks all the tasks if they fit in the budget
+    const bool exhaustive = slots <= max_probes;
+    const size_t probes = exhaustive ? slots : max_probes;
+    std::uniform_int_distribution<size_t> slot_dist(0, slots - 1);
+
+    std::unordered_set<PyObject*> seen;
+    size_t picked = 0;
+    for (size_t i = 0; i < probes && picked < wanted; i++) {
+        setentry entry;
+        if (copy_type(set.table + (exhaustive ? i : slot_dist(rng)), entry) || entry.key == nullptr) {
+            continue;
+        }
+        // Slots of removed entries hold a dummy key, which is not a weak reference
+        PyWeakReference ref;
+        if (copy_type(entry.key, ref) || ref.ob_base.ob_type != &_PyWeakref_RefType) {
+            continue;
+        }
+        PyObject* task = ref.wr_object;
+        if (!is_task(task) || !seen.insert(task).second) {
+            continue;
+        }
+
+        // Only the tasks that do not await another task are picked. Echion unwinds the tasks awaiting them along
+        // with them.
+        if (is_task(read_field(task, layout.fut_waiter))) {
+            continue;
+        }
+        picked++;
+        add_with_awaiters(task, suspended_tasks);
+    }
+
+    // Each of the tasks seen stands for the tasks that were not
+    if (!seen.empty() && total > seen.size()) {
+        suspended_task_weight = static_cast<double>(total) / static_cast<double>(seen.size());
+    }
+}
+
+double
+TaskSampler::prepare(const std::vector<PyObject*>& running_tasks,
+                     const std::unordered_set<PyObject*>& eager_tasks,
+                     std::vector<std::pair<PyObject*, PyObject*>>& links)
+{
+    auto now = std::chrono::steady_clock::now();
+    if (now >= next_refresh) {
+        refresh();
+        next_refresh = now + std::chrono::microseconds(g_task_sampler_refresh_interval_us);
+    }
+
+    std::vector<PyObject*> tasks;
+    for (auto task : running_tasks) {
+        add_with_awaiters(task, tasks);
+    }
+    // The tasks of the subset might have completed and been freed since they were picked
+    for (auto task : suspended_tasks) {
+        if (is_task(task)) {
+            tasks.push_back(task);
+        }
+    }
+
+    std::unordered_set<PyObject*> unique;
+    refs.clear();
+    for (auto task : tasks) {
+        if (eager_tasks.count(task) > 0 || !unique.insert(task).second) {
+            continue;
+        }
+        PyWeakReference ref{};
+        ref.wr_object = task;
+        refs.push_back(ref);
+
+        PyObject* parent = gather_parent(task);
+        if (parent != nullptr) {
+            links.emplace_back(parent, task);
+        }
+    }
+
+    table.assign(std::max<size_t>(refs.size(), 1), setentry{});
+    for (size_t i = 0; i < refs.size(); i++) {
+        table[i].key = reinterpret_cast<PyObject*>(&refs[i]);
+    }
+    view.table = table.data();
+    view.mask = static_cast<Py_ssize_t>(table.size()) - 1;
+    view.fill = view.used = static_cast<Py_ssize_t>(refs.size());
+
+    return suspended_task_weight;
+}
@@ -0,0 +1,166 @@
+#include "thread_state_sampler.hpp"
+
+#include "echion/interp.h"
+#include "echion/vm.h"
+
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+
+#ifdef __linux__
+#include <fcntl.h>
+#include <sys/syscall.h>
+#include <unistd.h>
+#endif
+
+using namespace Datadog;
+
+void
+ThreadStateSampler::begin_interp(PyInterpreterState* interp)
+{
+    gil_addr = 0;
+    gil_holder_id = 0;
+
+#ifdef __linux__
+    // The files opened before a fork belong to the threads of the parent process
+    pid_t current_pid = getpid();
+    if (current_pid != pid) {
+        close_all();
+        pid = current_pid;
+    }
+#endif
+
+#if PY_VERSION_HEX >= 0x030c0000
+    // Each interpreter can have its own GIL. Interpreters sharing the GIL of the main interpreter point to it.
+    auto addr = reinterpret_cast<uintptr_t>(interp->ceval.gil);
+#else
+    (void)interp;
+    auto addr = reinterpret_cast<uintptr_t>(&_PyRuntime.ceval.gil);
+#endif
+    struct _gil_runtime_state gil;
+    if (addr == 0 || copy_type(reinterpret_cast<void*>(addr), gil)) {
+        return;
+    }
+    gil_addr = addr;
+
+#if PY_VERSION_HEX >= 0x030d0000
+    auto locked = gil.locked;
+    auto holder = reinterpret_cast<uintptr_t>(gil.last_holder);
+#else
+    auto locked = gil.locked._value;
+    auto holder = static_cast<uintptr_t>(gil.last_holder._value);
+#endif
+    // The last holder is kept once the GIL is released
+    if (locked <= 0 || holder == 0) {
+        return;
+    }
+
+    PyThreadState tstate;
+    if (copy_type(reinterpret_cast<void*>(holder), tstate)) {
+        return;
+    }
+    gil_holder_id = static_cast<uintptr_t>(tstate.thread_id);
+}
+
+#ifdef __linux__
+int
+ThreadStateSampler::syscall_file(unsigned long native_id)
+{
+    auto& file = syscall_files[native_id];
+    file.seen = round;
+    if (file.fd < 0) {
+        char path[64];
+        snprintf(path, sizeof(path), "/proc/self/task/%lu/syscall", native_id);
+        file.fd = open(path, O_RDONLY | O_CLOEXEC);
+    }
+    return file.fd;
+}
+#endif
+
+std::string_view
+ThreadStateSampler::sample(uintptr_t thread_id, unsigned long native_id)
+{
+#ifdef __linux__
+    if (gil_addr == 0) {
+        return {};
+    }
+
+    int fd = syscall_file(native_id);
+    if (fd < 0) {
+        return {};
+    }
+
+    char buf[256];
+    ssize_t n = pread(fd, buf, sizeof(buf) - 1, 0);
+    if (n <= 0) {
+        // The thread is gone, or the native id was reused by a new thread. Try again on the next sample.
+        close(fd);
+        syscall_files[native_id].fd = -1;
+        return {};
+    }
+    buf[n] = '\0';
+
+    bool holds_gil = thread_id == gil_holder_id;
+
+    // The file contains "running" when the thread is running or runnable, and otherwise the number of the syscall
+    // it is blocked in (-1 if none) followed by its arguments.
+    if (strncmp(buf, "running", 7) == 0) {
+        return holds_gil ? ThreadStateLabel::holding_gil : ThreadStateLabel::running;
+    }
+    if (holds_gil) {
+        return ThreadStateLabel::holding_gil_blocked;
+    }
+
+    char* end = nullptr;
+    long nr = strtol(buf, &end, 10);
+    bool is_futex = nr == SYS_futex;
+#ifdef SYS_futex_time64
+    is_futex = is_futex || nr == SYS_futex_time64;
+#endif
+    if (is_futex) {
+        // The first argument of the futex syscall is the address of the futex word, which is within the condition
+        // variables and the mutexes of the GIL for the threads waiting to take it.
+        auto uaddr = static_cast<uintptr_t>(strtoull(end, nullptr, 16));
+        if (uaddr >= gil_addr && uaddr < gil_addr + sizeof(struct _gil_runtime_state)) {
+            return ThreadStateLabel::waiting_gil;
+        }
+    }
+    return ThreadStateLabel::blocked;
+#else
+    (void)thread_id;
+    (void)native_id;
+    return {};
+#endif
+}
+
+void
+ThreadStateSampler::end()
+{
+#ifdef __linux__
+    for (auto it = syscall_files.begin(); it != syscall_files.end();) {
+        if (it->second.seen != round) {
+            if (it->second.fd >= 0) {
+                close(it->second.fd);
+            }
+            it = syscall_files.erase(it);
+        } else {
+            ++it;
+        }
+    }
+    ++round;
+#endif
+}
+
+void
+ThreadStateSampler::close_all()
+{
+#ifdef __linux__
+    for (auto& [native_id, file] : syscall_files) {
+        (void)native_id;
+        if (file.fd >= 0) {
+            close(file.fd);
+        }
+    }
+#endif
+    syscall_files.clear();
+}
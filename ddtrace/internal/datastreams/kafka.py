@@ -1,4 +1,7 @@
 import time
+from typing import Dict  # noqa:F401
+from typing import List  # noqa:F401
+from typing import Tuple  # noqa:F401
 
 from confluent_kafka import TopicPartition
 
@@ -85,15 +88,7 @@ def dsm_kafka_message_consume(instance, message, span):
     cluster_id = core.get_item("kafka_cluster_id")
     group = instance._group_id
 
-    payload_size = 0
-    if hasattr(message, "len"):
-        # message.len() is only supported for some versions of confluent_kafka
-        payload_size += message.len()
-    else:
-        payload_size += _calculate_byte_size(message.value())
-
-    payload_size += _calculate_byte_size(message.key())
-    payload_size += _calculate_byte_size(headers)
+    payload_size = _message_payload_size(message, headers)
 
     ctx = DsmPathwayCodec.decode(headers, processor())
 
@@ -116,6 +111,52 @@ def dsm_kafka_message_consume(instance, message, span):
         )
 
 
+def _message_payload_size(message, headers):
+    payload_size = 0
+    if hasattr(message, "len"):
+        # message.len() is only supported for some versions of confluent_kafka
+        payload_size += message.len()
+    else:
+        payload_size += _calculate_byte_size(message.value())
+
+    payload_size += _calculate_byte_size(message.key())
+    payload_size += _calculate_byte_size(headers)
+    return payload_size
+
+
+def dsm_kafka_messages_consume(instance, messages, headers, span):
+    """Set the data streams checkpoints of a batch of consumed messages at once"""
+    from . import data_streams_processor as processor
+
+    cluster_id = core.get_item("kafka_cluster_id")
+    group = instance._group_id
+    now_sec = time.time()
+
+    # Messages of a batch can come from several topics, each with its own edge
+    carriers_by_topic = {}  # type: Dict[str, Tuple[List[Dict], List[int]]]
+    commit_offsets = {}  # type: Dict[Tuple[str, int], int]
+    for message, message_headers in zip(messages, headers):
+        topic = str(message.topic())
+        carriers, payload_sizes = carriers_by_topic.setdefault(topic, ([], []))
+        carriers.append(message_headers)
+        payload_sizes.append(_message_payload_size(message, message_headers))
+
+        if instance._auto_commit:
+            # Only the highest offset of each partition needs to be reported
+            reported_offset = (message.offset() + 1) if isinstance(message.offset(), INT_TYPES) else -1
+            partition_key = (message.topic(), message.partition())
+            commit_offsets[partition_key] = max(reported_offset, commit_offsets.get(partition_key, -1))
+
+    for topic, (carriers, payload_sizes) in carriers_by_topic.items():
+        edge_tags = ["direction:in", "group:" + group, "topic:" + topic, "type:kafka"]
+        if cluster_id:
+            edge_tags.append("kafka_cluster_id:" + str(cluster_id))
+        processor().set_checkpoints(edge_tags, carriers, payload_sizes, now_sec=now_sec, span=span)
+
+    for (topic, partition), reported_offset in commit_offsets.items():
+        processor().track_kafka_commit(group, topic, partition, reported_offset, now_sec)
+
+
 def dsm_kafka_message_commit(instance, args, kwargs):
     from . import data_streams_processor as processor
 
@@ -137,4 +178,5 @@ def dsm_kafka_message_commit(instance, args, kwargs):
 if config._data_streams_enabled:
     core.on("kafka.produce.start", dsm_kafka_message_produce)
     core.on("kafka.consume.start", dsm_kafka_message_consume)
+    core.on("kafka.consume.batch.start", dsm_kafka_messages_consume)
     core.on("kafka.commit.start", dsm_kafka_message_commit)
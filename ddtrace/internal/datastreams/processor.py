@@ -8,11 +8,13 @@ import struct
 import threading
 import time
 import typing
+from typing import Any  # noqa:F401
 from typing import DefaultDict  # noqa:F401
 from typing import Dict  # noqa:F401
 from typing import List  # noqa:F401
 from typing import NamedTuple  # noqa:F401
 from typing import Optional  # noqa:F401
+from typing import Tuple  # noqa:F401
 from typing import Union  # noqa:F401
 
 from ddtrace.internal import compat
@@ -25,11 +27,11 @@ from ddtrace.settings._config import config
 from ddtrace.version import get_version
 
 from .._encoding import packb
-from ..agent import get_connection
 from ..forksafe import Lock
 from ..hostname import get_hostname
 from ..logger import get_logger
 from ..periodic import PeriodicService
+from ..utils.http import get_connection_pool
 from ..writer import _human_size
 from .encoding import decode_var_int_64
 from .encoding import encode_var_int_64
@@ -193,6 +195,69 @@ class DataStreamsProcessor(PeriodicService):
             stats.payload_size.add(payload_size)
             self._buckets[bucket_time_ns].pathway_stats[aggr_key] = stats
 
+    def on_checkpoints_creation(self, checkpoints, now_sec):
+        # type: (List[Tuple[int, int, str, float, float, int]], float) -> None
+        """
+        on_checkpoints_creation records the stats of several checkpoints created at the same time, like the
+        checkpoints of a batch of consumed messages, taking the lock only once.
+
+        :param checkpoints: tuples of (hash, parent hash, comma separated edge tags, edge latency,
+            full pathway latency, payload size)
+        :param now_sec: current time
+        """
+        if not self._enabled:
+            return
+
+        now_ns = int(now_sec * 1e9)
+
+        with self._lock:
+            bucket_time_ns = now_ns - (now_ns % self._bucket_size_ns)
+            pathway_stats = self._buckets[bucket_time_ns].pathway_stats
+            for (
+                hash_value,
+                parent_hash,
+                edge_tags,
+                edge_latency_sec,
+                full_pathway_latency_sec,
+                payload_size,
+            ) in checkpoints:
+                stats = pathway_stats[(edge_tags, hash_value, parent_hash)]
+                stats.full_pathway_latency.add(full_pathway_latency_sec)
+                stats.edge_latency.add(edge_latency_sec)
+                stats.payload_size.add(payload_size)
+
+    def set_checkpoints(self, tags, carriers, payload_sizes, now_sec=None, span=None):
+        # type: (List[str], List[Dict[str, Any]], List[int], Optional[float], Any) -> Optional[DataStreamsCtx]
+        """
+        Sets a checkpoint for each of the given carriers, e.g. for a batch of messages consumed at once.
+
+        The pathway context of each carrier is decoded and checkpointed with the same edge tags. The hash of
+        checkpoints that share the same parent is computed only once and the stats are recorded in bulk.
+
+        :param tags: a list of strings identifying the pathway and direction
+        :param carriers: the headers of each message
+        :param payload_sizes: the size of each message in bytes
+        :param now_sec: The time in seconds to count as "now" when computing latencies
+        :return: the context of the last checkpoint, which becomes the current context
+        """
+        if not now_sec:
+            now_sec = time.time()
+        tags = sorted(tags)
+        edge_tags = ",".join(tags)
+        hashes = {}  # type: Dict[int, int]
+        checkpoints = []
+        ctx = None
+        for carrier, payload_size in zip(carriers, payload_sizes):
+            ctx = DsmPathwayCodec.decode(carrier, self)
+            parent_hash, hash_value, edge_latency_sec, pathway_latency_sec = ctx._checkpoint(tags, now_sec, hashes)
+            checkpoints.append(
+                (hash_value, parent_hash, edge_tags, edge_latency_sec, pathway_latency_sec, payload_size)
+            )
+        if ctx is not None and span:
+            span.set_tag_str("pathway.hash", str(ctx.hash))
+        self.on_checkpoints_creation(checkpoints, now_sec)
+        return ctx
+
     def track_kafka_produce(self, topic, partition, offset, now_sec):
         now_ns = int(now_sec * 1e9)
         key = PartitionKey(topic, partition)
@@ -271,9 +336,10 @@ class DataStreamsProcessor(PeriodicService):
 
     def _flush_stats(self, payload: bytes) -> None:
         try:
-            conn = get_connection(self._agent_url, self._timeout)
-            conn.request("POST", self._endpoint, payload, self._headers)
-            resp = conn.getresponse()
+            with get_connection_pool(self._agent_url).connection(self._timeout) as conn:
+                conn.request("POST", self._endpoint, payload, self._headers)
+                resp = conn.getresponse()
+                body = resp.read()
         except Exception:
             log.debug("failed to submit pathway stats to the Datadog agent at %s", self._agent_endpoint, exc_info=True)
             raise
@@ -286,7 +352,7 @@ class DataStreamsProcessor(PeriodicService):
                     "failed to send data stream stats payload, %s (%s) (%s) response from Datadog agent at %s",
                     resp.status,
                     resp.reason,
-                    resp.read(),
+                    body,
                     self._agent_endpoint,
                 )
             else:
@@ -504,6 +570,34 @@ class DataStreamsCtx:
             hash_value, parent_hash, tags, now_sec, edge_latency_sec, pathway_latency_sec, payload_size=payload_size
         )
 
+    def _checkpoint(self, tags, now_sec, hashes):
+        # type: (List[str], float, Dict[int, int]) -> Tuple[int, int, float, float]
+        """
+        Moves a freshly decoded context to a new checkpoint without recording its stats.
+
+        This is the fast path of ``set_checkpoint`` used for batches: a decoded context has no previous
+        direction, so the loop detection logic does not apply. ``hashes`` memoizes the hash of the checkpoint
+        by parent hash, as all the checkpoints of a batch share the same sorted tags.
+
+        :return: the parent hash, the hash, the edge latency and the full pathway latency of the checkpoint
+        """
+        parent_hash = self.hash
+        try:
+            hash_value = hashes[parent_hash]
+        except KeyError:
+            hash_value = hashes[parent_hash] = self._compute_hash(tags, parent_hash)
+        edge_latency_sec = max(now_sec - self.current_edge_start_sec, 0.0)
+        pathway_latency_sec = max(now_sec - self.pathway_start_sec, 0.0)
+        for t in tags:
+            if t.startswith("direction:"):
+                self.previous_direction = t
+                break
+        self.closest_opposite_direction_hash = parent_hash
+        self.closest_opposite_direction_edge_start = now_sec
+        self.hash = hash_value
+        self.current_edge_start_sec = now_sec
+        return parent_hash, hash_value, edge_latency_sec, pathway_latency_sec
+
 
 class DsmPathwayCodec:
     """
@@ -1,9 +1,18 @@
 import http.client as httplib
+from typing import Any  # noqa:F401
+from typing import Dict  # noqa:F401
+from typing import Optional  # noqa:F401
+from typing import Tuple  # noqa:F401
 from urllib import parse
 
 from ddtrace.internal.runtime import container
 
 
+# Errors raised when the server closed a keep-alive connection before it could be
+# reused. RemoteDisconnected is a ConnectionResetError.
+_STALE_CONNECTION_ERRORS = (ConnectionResetError, ConnectionAbortedError, BrokenPipeError)
+
+
 class HTTPConnectionMixin:
     """
     Mixin for HTTP(S) connections for performing internal adjustments.
@@ -11,9 +20,16 @@ class HTTPConnectionMixin:
     Currently this mixin performs the following adjustments:
     - insert a base path to requested URLs
     - update headers with container info
+    - retry once on a fresh socket when a reused keep-alive connection turns
+      out to have been closed by the server
     """
 
     _base_path = "/"  # type: str
+    _response = None  # type: Optional[httplib.HTTPResponse]
+    # Set by the connection pool when handing out an idle connection, until the
+    # first request over it has been answered.
+    _reused = False  # type: bool
+    _replay = None  # type: Optional[Tuple[str, str, Any, Dict[str, str], bool]]
 
     def putrequest(self, method, url, skip_host=False, skip_accept_encoding=False):
         # type: (str, str, bool, bool) -> None
@@ -34,7 +50,55 @@ class HTTPConnectionMixin:
 
         container.update_headers(_headers)
 
-        return super().request(method, url, body=body, headers=_headers, encode_chunked=encode_chunked)
+        if not self._reused:
+            return super().request(method, url, body=body, headers=_headers, encode_chunked=encode_chunked)
+
+        # Only bodies that can be sent again are eligible for a retry
+        replayable = body is None or isinstance(body, (bytes, str))
+        self._replay = (method, url, body, _headers, encode_chunked) if replayable else None
+        try:
+            return super().request(method, url, body=body, headers=_headers, encode_chunked=encode_chunked)
+        except _STALE_CONNECTION_ERRORS:
+            if self._replay is None:
+                self._reused = False
+                raise
+        self._retry()
+
+    def getresponse(self):
+        try:
+            self._response = response = super().getresponse()  # type: ignore[misc]
+        except _STALE_CONNECTION_ERRORS:
+            if not self._reused or self._replay is None:
+                raise
+            self._retry()
+            self._response = response = super().getresponse()  # type: ignore[misc]
+        finally:
+            self._reused = False
+            self._replay = None
+        return response
+
+    def _retry(self):
+        # type: () -> None
+        """Send the last request again over a new socket."""
+        method, url, body, headers, encode_chunked = self._replay  # type: ignore[misc]
+        self._reused = False
+        self._replay = None
+        # The request is sent from scratch: closing resets the state of the
+        # connection and the next request opens a new socket.
+        self.close()  # type: ignore[attr-defined]
+        super().request(method, url, body=body, headers=headers, encode_chunked=encode_chunked)  # type: ignore[misc]
+
+    def is_reusable(self):
+        # type: () -> bool
+        """Whether another request can be sent over the open socket without reconnecting.
+
+        This is the case only when the last response has been fully read and the
+        server did not ask to close the connection.
+        """
+        if self.sock is None:  # type: ignore[attr-defined]
+            return False
+        response = self._response
+        return response is None or (response.isclosed() and not response.will_close)
 
 
 class HTTPConnection(HTTPConnectionMixin, httplib.HTTPConnection):
@@ -0,0 +1,138 @@
+"""Import-time profiling.
+
+When the ``_DD_IMPORT_PROFILE_FILE`` environment variable is set, the import
+profiler is installed as early as possible by the ``ddtrace`` package and
+measures the time spent importing every module. The report is written to the
+given file, or to the standard error if the value is ``-``, once the library
+has been bootstrapped, or at exit if the library is not being bootstrapped.
+
+The report has the same layout as the one produced by ``python -X importtime``
+and lists the modules in decreasing order of self time.
+"""
+
+from importlib.machinery import ModuleSpec
+import os
+import sys
+import threading
+from time import monotonic_ns
+from types import ModuleType
+import typing as t
+
+from ddtrace.internal import atexit
+from ddtrace.internal.logger import get_logger
+from ddtrace.internal.module import BaseModuleWatchdog
+
+
+log = get_logger(__name__)
+
+
+IMPORT_PROFILE_FILE_ENV = "_DD_IMPORT_PROFILE_FILE"
+
+
+class ImportCost(t.NamedTuple):
+    self_ns: int
+    cumulative_ns: int
+
+
+class _ImportFrame:
+    __slots__ = ("name", "start", "children")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.start = monotonic_ns()
+        self.children = 0
+
+
+class ImportProfiler(BaseModuleWatchdog):
+    """Module watchdog that measures the cost of every import.
+
+    The time of an import is measured from the moment the module is looked up
+    to the moment it has been executed. The self time of a module excludes the
+    time spent importing the modules it imports in turn.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        self.costs: t.Dict[str, ImportCost] = {}
+
+        # Imports can happen concurrently in different threads, so we keep a
+        # stack of the imports in progress for each thread.
+        self._stacks: t.Dict[int, t.List[_ImportFrame]] = {}
+
+    def find_spec(
+        self, fullname: str, path: t.Optional[str] = None, target: t.Optional[ModuleType] = None
+    ) -> t.Optional[ModuleSpec]:
+        if fullname in self._finding:
+            return None
+
+        stack = self._stacks.setdefault(threading.get_ident(), [])
+        frame = _ImportFrame(fullname)
+        stack.append(frame)
+
+        spec = super().find_spec(fullname, path, target)
+        if spec is None and stack and stack[-1] is frame:
+            # The module will not be imported by us, so there is nothing to
+            # measure.
+            stack.pop()
+
+        return spec
+
+    def after_import(self, module: ModuleType) -> None:
+        end = monotonic_ns()
+
+        stack = self._stacks.get(threading.get_ident())
+        if not stack:
+            return
+
+        name = module.__name__
+        for i in range(len(stack) - 1, -1, -1):
+            if stack[i].name == name:
+                break
+        else:
+            return
+
+        # Any frames above the one of this module belong to imports that
+        # failed, and whose time is therefore accounted as self time.
+        frame = stack[i]
+        del stack[i:]
+
+        elapsed = end - frame.start
+        self.costs[name] = ImportCost(elapsed - frame.children, elapsed)
+        if stack:
+            stack[-1].children += elapsed
+
+    def report(self, out: t.TextIO) -> None:
+        """Write the import-time report to the given stream."""
+        out.write("import time: self [us] | cumulative | imported package\n")
+        for name, cost in sorted(self.costs.items(), key=lambda _: _[1].self_ns, reverse=True):
+            out.write("import time: %12d | %10d | %s\n" % (cost.self_ns // 1000, cost.cumulative_ns // 1000, name))
+
+    @classmethod
+    def install(cls) -> None:
+        super().install()
+
+        atexit.register(cls.dump)
+
+    @classmethod
+    def dump(cls) -> None:
+        """Uninstall the profiler and write the report to the configured file."""
+        instance = t.cast(t.Optional[ImportProfiler], cls._instance)
+        if instance is None or not cls.is_installed():
+            return
+
+        cls.uninstall()
+        atexit.unregister(cls.dump)
+
+        path = os.getenv(IMPORT_PROFILE_FILE_ENV)
+        if not path:
+            return
+
+        try:
+            if path == "-":
+                instance.report(sys.stderr)
+            else:
+                with open(path, "w") as f:
+                    instance.report(f)
+        except Exception:
+            log.error("Failed to write the import-time report to %s", path, exc_info=True)
@@ -1,16 +1,22 @@
 import collections
 from functools import lru_cache as cached
 from functools import singledispatch
+import hashlib
 import inspect
+import json
 import logging
+import os
 import sys
 import sysconfig
+import tempfile
+import threading
 from types import ModuleType
 import typing as t
 
 from ddtrace.internal.compat import Path
 from ddtrace.internal.module import origin
 from ddtrace.internal.utils.cache import callonce
+from ddtrace.settings._packages import config as cache_config
 from ddtrace.settings.third_party import config as tp_config
 
 
@@ -21,10 +27,109 @@ Distribution = t.NamedTuple("Distribution", [("name", str), ("version", str)])
 
 _PACKAGE_DISTRIBUTIONS: t.Optional[t.Mapping[str, t.List[str]]] = None
 
+# Bump this whenever the format of the cached data changes
+_CACHE_VERSION = 1
+
+
+class _DistributionsCache:
+    """On-disk cache of the metadata extracted from the installed distributions.
+
+    The cache is keyed by a fingerprint of the Python version and of the
+    modification times of the ``sys.path`` entries. Installing, upgrading or
+    removing a distribution adds or removes its ``.dist-info`` directory, which
+    changes the modification time of the parent directory and invalidates the
+    cache.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._path: t.Optional[Path] = None
+        self._data: t.Optional[t.Dict[str, t.Any]] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint() -> str:
+        h = hashlib.sha256(f"{_CACHE_VERSION}:{sys.version}".encode())
+        for entry in sys.path:
+            path = os.path.abspath(entry or os.curdir)
+            try:
+                h.update(f"{path}:{os.stat(path).st_mtime_ns}\0".encode())
+            except OSError:
+                # Entries that do not exist cannot contribute distributions
+                continue
+        return h.hexdigest()
+
+    @property
+    def path(self) -> Path:
+        # The fingerprint is computed only once so that the cache file does not change if the process itself
+        # writes to one of the sys.path entries.
+        if self._path is None:
+            self._path = self.directory / f"packages-{self.fingerprint()[:32]}.json"
+        return self._path
+
+    def _load(self) -> t.Dict[str, t.Any]:
+        try:
+            with self.path.open() as f:
+                if hasattr(os, "getuid") and os.fstat(f.fileno()).st_uid != os.getuid():
+                    # Do not trust a cache that was written by another user
+                    return {}
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except Exception:
+            LOG.debug("Failed to load the distributions cache", exc_info=True)
+            return {}
+
+    def get(self, key: str) -> t.Optional[t.Any]:
+        with self._lock:
+            if self._data is None:
+                self._data = self._load()
+            return self._data.get(key)
+
+    def set(self, key: str, value: t.Any) -> None:
+        with self._lock:
+            if self._data is None:
+                self._data = self._load()
+            self._data[key] = value
+
+            path = self.path
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            try:
+                self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+                with tmp_path.open("w") as f:
+                    json.dump(self._data, f)
+                # Atomically replace the cache file so that concurrent readers never see a partial write
+                os.replace(tmp_path, path)
+            except Exception:
+                LOG.debug("Failed to store the distributions cache", exc_info=True)
+                try:
+                    tmp_path.unlink()
+                except OSError:
+                    pass
+
+
+@callonce
+def _distributions_cache() -> t.Optional[_DistributionsCache]:
+    if not cache_config.enabled:
+        return None
+
+    if cache_config.dir is not None:
+        return _DistributionsCache(Path(cache_config.dir))
+
+    user = os.getuid() if hasattr(os, "getuid") else os.environ.get("USERNAME", "")
+    return _DistributionsCache(Path(tempfile.gettempdir()) / f"ddtrace-{user}")
+
 
 @callonce
 def get_distributions() -> t.Mapping[str, str]:
     """returns the mapping from distribution name to version for all distributions in a python path"""
+    cache = _distributions_cache()
+    if cache is not None:
+        cached_pkgs = cache.get("distributions")
+        if cached_pkgs is not None:
+            return cached_pkgs
+
     try:
         import importlib.metadata as importlib_metadata
     except ImportError:
@@ -40,6 +145,9 @@ def get_distributions() -> t.Mapping[str, str]:
         if name and version:
             pkgs[name] = version
 
+    if cache is not None:
+        cache.set("distributions", pkgs)
+
     return pkgs
 
 
@@ -147,54 +255,114 @@ def _root_module(path: Path) -> str:
     raise ValueError(msg)
 
 
-@callonce
-def _package_for_root_module_mapping() -> t.Optional[t.Dict[str, Distribution]]:
-    try:
-        import importlib.metadata as importlib_metadata
-    except ImportError:
-        import importlib_metadata as importlib_metadata  # type: ignore[no-redef]
+class _RootModuleMapping(t.Mapping[str, Distribution]):
+    """Mapping of root modules to the distributions that provide them.
+
+    The files of the installed distributions are scanned lazily, only until the
+    requested root module is found. Iterating over the mapping scans all the
+    remaining distributions, after which ``on_complete`` is called with the
+    full mapping.
+    """
+
+    def __init__(self, on_complete: t.Optional[t.Callable[[t.Dict[str, Distribution]], None]] = None) -> None:
+        try:
+            import importlib.metadata as importlib_metadata
+        except ImportError:
+            import importlib_metadata as importlib_metadata  # type: ignore[no-redef]
 
-    namespaces: t.Dict[str, bool] = {}
+        self._mapping: t.Dict[str, Distribution] = {}
+        self._namespaces: t.Dict[str, bool] = {}
+        self._distributions: t.Optional[t.Iterator[t.Any]] = iter(importlib_metadata.distributions())
+        self._on_complete = on_complete
+        self._lock = threading.RLock()
 
-    def is_namespace(f: importlib_metadata.PackagePath):
+    def _is_namespace(self, f) -> bool:
         root = f.parts[0]
         try:
-            return namespaces[root]
+            return self._namespaces[root]
         except KeyError:
             pass
 
         if len(f.parts) < 2:
-            namespaces[root] = False
+            self._namespaces[root] = False
             return False
 
         located_f = t.cast(Path, f.locate())
         parent = located_f.parents[len(f.parts) - 2]
         if parent.is_dir() and not (parent / "__init__.py").exists():
-            namespaces[root] = True
+            self._namespaces[root] = True
             return True
 
-        namespaces[root] = False
+        self._namespaces[root] = False
         return False
 
-    try:
-        mapping = {}
-
-        for dist in importlib_metadata.distributions():
-            if not (files := dist.files):
+    def _add_distribution(self, dist) -> None:
+        if not (files := dist.files):
+            return
+        metadata = dist.metadata
+        d = Distribution(name=metadata["name"], version=metadata["version"])
+        for f in files:
+            root = f.parts[0]
+            if root.endswith(".dist-info") or root.endswith(".egg-info") or root == "..":
                 continue
-            metadata = dist.metadata
-            d = Distribution(name=metadata["name"], version=metadata["version"])
-            for f in files:
-                root = f.parts[0]
-                if root.endswith(".dist-info") or root.endswith(".egg-info") or root == "..":
-                    continue
-                if is_namespace(f):
-                    root = "/".join(f.parts[:2])
-                if root not in mapping:
-                    mapping[root] = d
-
-        return mapping
+            if self._is_namespace(f):
+                root = "/".join(f.parts[:2])
+            if root not in self._mapping:
+                self._mapping[root] = d
+
+    def _scan(self, root: t.Optional[str] = None) -> None:
+        """Scan distributions until the given root module is found, or all of them if root is None"""
+        with self._lock:
+            while self._distributions is not None and (root is None or root not in self._mapping):
+                try:
+                    dist = next(self._distributions, None)
+                    if dist is None:
+                        self._distributions = None
+                        if self._on_complete is not None:
+                            self._on_complete(self._mapping)
+                        break
+                    self._add_distribution(dist)
+                except Exception:
+                    self._distributions = None
+                    LOG.warning(
+                        "Unable to build package file mapping, "
+                        "please report this to https://github.com/DataDog/dd-trace-py/issues",
+                        exc_info=True,
+                    )
+
+    def __getitem__(self, root: str) -> Distribution:
+        self._scan(root)
+        return self._mapping[root]
+
+    def __contains__(self, root: object) -> bool:
+        if not isinstance(root, str):
+            return False
+        self._scan(root)
+        return root in self._mapping
+
+    def __iter__(self) -> t.Iterator[str]:
+        self._scan()
+        return iter(self._mapping)
+
+    def __len__(self) -> int:
+        self._scan()
+        return len(self._mapping)
+
 
+@callonce
+def _package_for_root_module_mapping() -> t.Optional[t.Mapping[str, Distribution]]:
+    cache = _distributions_cache()
+    on_complete: t.Optional[t.Callable[[t.Dict[str, Distribution]], None]] = None
+    if cache is not None:
+        cached_mapping = cache.get("root_modules")
+        if cached_mapping is not None:
+            return {root: Distribution(*dist) for root, dist in cached_mapping.items()}
+
+        def on_complete(mapping: t.Dict[str, Distribution]) -> None:
+            cache.set("root_modules", mapping)
+
+    try:
+        return _RootModuleMapping(on_complete)
     except Exception:
         LOG.warning(
             "Unable to build package file mapping, "
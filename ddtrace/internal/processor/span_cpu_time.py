@@ -0,0 +1,262 @@
+from dataclasses import dataclass
+from dataclasses import field
+import threading
+import time
+from time import thread_time_ns
+import typing
+import weakref
+
+from ddtrace._trace.processor import SpanProcessor
+from ddtrace._trace.provider import _DD_CONTEXTVAR
+from ddtrace._trace.span import Span
+from ddtrace.internal.logger import get_logger
+from ddtrace.internal.module import ModuleWatchdog
+
+
+log = get_logger(__name__)
+
+
+CPU_TIME_METRIC = "_dd.profiling.cpu_time_ns"
+
+
+def _thread_clock_id() -> typing.Optional[int]:
+    # The CPU clock of the current thread, which can be read from other threads
+    try:
+        return time.pthread_getcpuclockid(threading.get_ident())
+    except (AttributeError, OSError):
+        return None
+
+
+class _ThreadState:
+    __slots__ = ("target", "since", "clock_id", "lock", "__weakref__")
+
+    def __init__(self) -> None:
+        # The span the CPU time of the thread is currently accounted to
+        self.target: typing.Optional[Span] = None
+        # The CPU time of the thread when the target was last changed
+        self.since = 0
+        self.clock_id = _thread_clock_id()
+        # Taken when the target changes, which another thread might do when the target finishes
+        self.lock = threading.Lock()
+
+
+@dataclass(eq=False)
+class SpanCPUTimeProcessor(SpanProcessor):
+    """Account the CPU time of threads to the spans that are active on them.
+
+    The CPU clock of the current thread is read only when the span that the
+    CPU time is accounted to changes, i.e. when a span is activated or finished,
+    and when the event loop runs a callback in the context of a different span.
+    When a span finishes, the CPU time of the other threads still accounting to
+    it, e.g. the workers of a thread pool, is read from their CPU clock. The CPU
+    time is reported as the ``_dd.profiling.cpu_time_ns`` metric of the local
+    root spans, and includes the CPU time of all their descendants. When
+    ``all_spans`` is set, the metric is reported on every span.
+    """
+
+    all_spans: bool = False
+    _local: threading.local = field(default_factory=threading.local, init=False, repr=False, compare=False)
+    # The state of each thread, by thread ID, for as long as the thread is alive
+    _states: "weakref.WeakValueDictionary[int, _ThreadState]" = field(
+        default_factory=weakref.WeakValueDictionary, init=False, repr=False, compare=False
+    )
+    _states_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+    _context_provider: typing.Any = field(default=None, init=False, repr=False, compare=False)
+    # The asyncio module, until the first span is activated in an event loop
+    _asyncio: typing.Any = field(default=None, init=False, repr=False, compare=False)
+    _original_handle_run: typing.Optional[typing.Callable] = field(default=None, init=False, repr=False, compare=False)
+
+    def enable(self, context_provider: typing.Any) -> None:
+        self._context_provider = context_provider
+        context_provider._on_activate(self._on_activate)
+        ModuleWatchdog.register_module_hook("asyncio", self._on_asyncio_import)
+        self.register()
+
+    def disable(self) -> None:
+        self.unregister()
+        try:
+            ModuleWatchdog.unregister_module_hook("asyncio", self._on_asyncio_import)
+        except ValueError:
+            pass
+        self._asyncio = None
+        self._unpatch_asyncio()
+        if self._context_provider is not None:
+            self._context_provider._deregister_on_activate(self._on_activate)
+            self._context_provider = None
+
+    def _target(self, active: typing.Any) -> typing.Optional[Span]:
+        if not isinstance(active, Span):
+            return None
+        if not self.all_spans:
+            active = active._local_root
+        # Finished spans might still be set in the context until the next span
+        # is activated.
+        while active is not None and active.duration_ns is not None:
+            active = active._parent
+        return active
+
+    def _thread_state(self) -> _ThreadState:
+        try:
+            return self._local.state
+        except AttributeError:
+            state = self._local.state = _ThreadState()
+            with self._states_lock:
+                self._states[threading.get_ident()] = state
+            return state
+
+    def _charge(self, span: typing.Optional[Span], cpu_time_ns: int, finishing: typing.Optional[Span] = None) -> None:
+        # Finished spans might have been flushed already, so they must not be
+        # modified, unless they are being finished.
+        while span is not None and (span.duration_ns is None or span is finishing):
+            metrics = span._metrics
+            metrics[CPU_TIME_METRIC] = metrics.get(CPU_TIME_METRIC, 0) + cpu_time_ns
+            if not self.all_spans:
+                return
+            span = span._parent
+
+    def _switch(self, target: typing.Optional[Span]) -> typing.Optional[Span]:
+        """Account the CPU time of the current thread to the given span from now on.
+
+        Return the span the CPU time was previously accounted to.
+        """
+        state = self._thread_state()
+        previous = state.target
+        if target is previous:
+            return previous
+
+        with state.lock:
+            now = thread_time_ns()
+            # The target might have been flushed by another thread in the meantime
+            if state.target is not None:
+                self._charge(state.target, now - state.since)
+            state.target = target
+            state.since = now
+        return previous
+
+    def _on_activate(self, active: typing.Any) -> None:
+        target = self._target(active)
+        # Activating a span of the same trace is the most common case, and
+        # does not require reading the clock.
+        if target is not self._thread_state().target:
+            self._switch(target)
+        if target is not None and self._asyncio is not None:
+            self._watch_event_loop()
+
+    def on_span_start(self, span: Span) -> None:
+        # Started spans are accounted for when they are activated
+        pass
+
+    def on_span_finish(self, span: Span) -> None:
+        if self.all_spans or span._local_root is span:
+            self._flush_other_threads(span)
+
+        state = self._thread_state()
+        target = state.target
+        if target is None:
+            return
+
+        if self.all_spans:
+            # Account for the time spent in the finishing span, or in any of
+            # its descendants, before it is flushed.
+            ancestor: typing.Optional[Span] = target
+            while ancestor is not None and ancestor is not span:
+                ancestor = ancestor._parent
+            if ancestor is None:
+                return
+        elif target is not span:
+            return
+
+        with state.lock:
+            if state.target is not target:
+                return
+            now = thread_time_ns()
+            self._charge(target, now - state.since, span)
+            if target is span:
+                state.target = self._target(span._parent)
+            state.since = now
+
+    def _flush_other_threads(self, span: Span) -> None:
+        # Other threads keep accounting their CPU time to the span until they
+        # activate another one, e.g. the workers of a thread pool running the
+        # tasks of a request. Their CPU time since then is read from their
+        # clock, as the span would be flushed before they switch.
+        current = threading.get_ident()
+        with self._states_lock:
+            others = [state for ident, state in self._states.items() if ident != current and state.target is span]
+
+        for state in others:
+            with state.lock:
+                if state.target is not span:
+                    continue
+                if state.clock_id is None:
+                    log.debug("Cannot read the CPU clock of other threads, their CPU time is not accounted for")
+                    now = state.since
+                else:
+                    try:
+                        now = time.clock_gettime_ns(state.clock_id)
+                    except OSError:
+                        # The thread has exited
+                        continue
+                self._charge(span, now - state.since, span)
+                state.target = self._target(span._parent)
+                state.since = now
+
+    def _on_asyncio_import(self, asyncio: typing.Any) -> None:
+        self._asyncio = asyncio
+
+    def _watch_event_loop(self) -> None:
+        # The event loop callbacks are only instrumented once a span is
+        # activated in a running event loop, so that the processes which do
+        # not trace their event loops do not pay for it.
+        asyncio = self._asyncio
+        loop = asyncio.events._get_running_loop()
+        if loop is None:
+            return
+
+        self._asyncio = None
+        if type(loop).__module__.partition(".")[0] == "uvloop":
+            log.warning(
+                "Span CPU time accounting does not support uvloop event loops. The CPU time of the concurrent tasks "
+                "of an event loop might be accounted to the wrong spans."
+            )
+            return
+        self._patch_asyncio(asyncio)
+
+    def _patch_asyncio(self, asyncio: typing.Any) -> None:
+        if self._original_handle_run is not None:
+            return
+
+        handle_class = asyncio.events.Handle
+        original_run = self._original_handle_run = handle_class._run
+        switch = self._switch
+        target_of = self._target
+        local = self._local
+
+        # The event loop runs the callbacks, including the steps of the tasks,
+        # in the context they were scheduled from. We account the CPU time of
+        # each callback to the span active in its context.
+        def _run(handle):
+            active = handle._context.get(_DD_CONTEXTVAR)
+            if active is None:
+                # Most callbacks run outside of any span, and need no accounting
+                state = getattr(local, "state", None)
+                if state is None or state.target is None:
+                    return original_run(handle)
+
+            previous = switch(target_of(active))
+            try:
+                return original_run(handle)
+            finally:
+                switch(target_of(previous))
+
+        handle_class._run = _run
+        log.debug("Patched asyncio handles for span CPU time accounting")
+
+    def _unpatch_asyncio(self) -> None:
+        if self._original_handle_run is None:
+            return
+
+        import asyncio
+
+        asyncio.events.Handle._run = self._original_handle_run
+        self._original_handle_run = None
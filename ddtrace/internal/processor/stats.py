@@ -12,6 +12,7 @@ from ddtrace._trace.processor import SpanProcessor
 from ddtrace._trace.span import Span
 from ddtrace.internal import compat
 from ddtrace.internal.native import DDSketch
+from ddtrace.internal.utils.http import get_connection_pool
 from ddtrace.internal.utils.retry import fibonacci_backoff_with_jitter
 from ddtrace.settings._config import config
 from ddtrace.version import get_version
@@ -191,9 +192,10 @@ class SpanStatsProcessorV06(PeriodicService, SpanProcessor):
 
     def _flush_stats(self, payload: bytes) -> None:
         try:
-            conn = agent.get_connection(self._agent_url, self._timeout)
-            conn.request("PUT", self._endpoint, payload, self._headers)
-            resp = conn.getresponse()
+            with get_connection_pool(self._agent_url).connection(self._timeout) as conn:
+                conn.request("PUT", self._endpoint, payload, self._headers)
+                resp = conn.getresponse()
+                body = resp.read()
         except Exception:
             log.error("failed to submit span stats to the Datadog agent at %s", self._agent_endpoint, exc_info=True)
             raise
@@ -209,7 +211,7 @@ class SpanStatsProcessorV06(PeriodicService, SpanProcessor):
                     "failed to send stats payload, %s (%s) (%s) response from Datadog agent at %s",
                     resp.status,
                     resp.reason,
-                    resp.read(),
+                    body,
                     self._agent_endpoint,
                 )
             else:
@@ -241,6 +241,16 @@ class BudgetRateLimiterWithJitter:
         else:
             return RateLimitExceeded
 
+    def charge(self, amount: float) -> None:
+        """Take the given amount from the budget.
+
+        This can be used to account for calls that cost more than others. The
+        budget can become negative, in which case the following calls are
+        limited until it is replenished.
+        """
+        with self._lock:
+            self.budget -= amount
+
     def __call__(self, f: Callable[..., Any]) -> Callable[..., Any]:
         def limited_f(*args, **kwargs):
             return self.limit(f, *args, **kwargs)
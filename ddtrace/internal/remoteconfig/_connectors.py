@@ -1,25 +1,65 @@
-from ctypes import c_char
-from dataclasses import asdict
+"""Shared memory transport between the Remote Configuration publisher and its subscribers.
+
+The payloads are shared with a versioned, length-prefixed binary layout stored
+in a memory mapped file that is inherited by the forked workers. The mapping
+starts with a fixed header::
+
+    magic (4s) | version (I) | sequence (Q) | capacity (Q) | length (Q)
+
+The sequence number is incremented before and after every write, so that it is
+odd while the data is being written, and half of it is the generation of the
+data. The header is followed by ``length`` bytes of data, made of one segment
+per product::
+
+    count (I) | [name length (H) | name | generation (Q) | size (Q) | payloads] * count
+
+The generation of a segment is the one of the write that last changed its
+payloads, which allows subscribers to decode only the products that changed
+since they last read the shared data. When the data outgrows the mapping, the
+publisher grows the underlying file and the subscribers map it again.
+"""
+
 import json
+import mmap
 import os
+import struct
+import tempfile
+from typing import Dict
 from typing import List
+from typing import Optional
 from typing import Sequence
+from typing import Tuple
 from uuid import UUID
 
-from ddtrace.internal.compat import get_mp_context
-from ddtrace.internal.compat import to_unicode
+from ddtrace.internal import forksafe
 from ddtrace.internal.logger import get_logger
+from ddtrace.internal.remoteconfig import ConfigMetadata
 from ddtrace.internal.remoteconfig import Payload
 
 
 log = get_logger(__name__)
 
-# Size of the shared variable.
+# Initial size of the shared memory. The mapping grows as needed when the
+# shared data does not fit in it anymore.
 # It must be large enough to receive at least 2500 IPs or 2500 users to block.
 SHARED_MEMORY_SIZE = 0x100000
 
 SharedDataType = List[Payload]
 
+_MAGIC = b"DDRC"
+_VERSION = 1
+
+_HEADER = struct.Struct("<4sIQQQ")
+_COUNT = struct.Struct("<I")
+_SEGMENT = struct.Struct("<QQ")
+_NAME_LENGTH = struct.Struct("<H")
+_LENGTH = struct.Struct("<i")
+_INT = struct.Struct("<q")
+
+# Candidate directories for the file that backs the shared memory, in order
+# of preference. /dev/shm keeps the data off the disk where available.
+_SHM_DIRS = ("/dev/shm",)
+
 
 class UUIDEncoder(json.JSONEncoder):
     def default(self, o):
@@ -29,33 +69,170 @@ class UUIDEncoder(json.JSONEncoder):
         return json.JSONEncoder.default(self, o)
 
 
-class _DummySharedArray:
-    """Dummy shared array to be used when shared memory is not available.
+def _pack_str(buffer: bytearray, value: Optional[str]) -> None:
+    if value is None:
+        buffer += _LENGTH.pack(-1)
+    else:
+        data = value.encode("utf-8", errors="surrogatepass")
+        buffer += _LENGTH.pack(len(data))
+        buffer += data
+
+
+def _pack_int(buffer: bytearray, value: Optional[int]) -> None:
+    if value is None:
+        buffer += b"\x00"
+    else:
+        buffer += b"\x01"
+        buffer += _INT.pack(value)
+
+
+def _unpack_bytes(data: memoryview, offset: int) -> Tuple[Optional[bytes], int]:
+    (length,) = _LENGTH.unpack_from(data, offset)
+    offset += _LENGTH.size
+    if length < 0:
+        return None, offset
+    return bytes(data[offset : offset + length]), offset + length
+
+
+def _unpack_str(data: memoryview, offset: int) -> Tuple[Optional[str], int]:
+    value, offset = _unpack_bytes(data, offset)
+    return (None if value is None else value.decode("utf-8", errors="surrogatepass")), offset
+
+
+def _unpack_int(data: memoryview, offset: int) -> Tuple[Optional[int], int]:
+    if data[offset] == 0:
+        return None, offset + 1
+    (value,) = _INT.unpack_from(data, offset + 1)
+    return value, offset + 1 + _INT.size
+
+
+def encode_payloads(payload_list: Sequence[Payload]) -> bytes:
+    """Encode the payloads of a product segment."""
+    buffer = bytearray(_COUNT.pack(len(payload_list)))
+    for payload in payload_list:
+        metadata = payload.metadata
+        _pack_str(buffer, str(metadata.id))
+        _pack_str(buffer, metadata.product_name)
+        _pack_str(buffer, metadata.sha256_hash)
+        _pack_int(buffer, metadata.length)
+        _pack_int(buffer, metadata.tuf_version)
+        _pack_int(buffer, metadata.apply_state)
+        _pack_str(buffer, metadata.apply_error)
+        _pack_str(buffer, payload.path)
+        if payload.content is None:
+            buffer += _LENGTH.pack(-1)
+        else:
+            content = json.dumps(payload.content, cls=UUIDEncoder, ensure_ascii=False).encode()
+            buffer += _LENGTH.pack(len(content))
+            buffer += content
+    return bytes(buffer)
+
+
+def decode_payloads(data: memoryview) -> SharedDataType:
+    """Decode the payloads of a product segment."""
+    (count,) = _COUNT.unpack_from(data, 0)
+    offset = _COUNT.size
+    payload_list = []
+    for _ in range(count):
+        config_id, offset = _unpack_str(data, offset)
+        product_name, offset = _unpack_str(data, offset)
+        sha256_hash, offset = _unpack_str(data, offset)
+        length, offset = _unpack_int(data, offset)
+        tuf_version, offset = _unpack_int(data, offset)
+        apply_state, offset = _unpack_int(data, offset)
+        apply_error, offset = _unpack_str(data, offset)
+        path, offset = _unpack_str(data, offset)
+        content, offset = _unpack_bytes(data, offset)
+        payload_list.append(
+            Payload(
+                ConfigMetadata(
+                    id=config_id,  # type: ignore[arg-type]
+                    product_name=product_name,  # type: ignore[arg-type]
+                    sha256_hash=sha256_hash,
+                    length=length,
+                    tuf_version=tuf_version,
+                    apply_state=apply_state,
+                    apply_error=apply_error,
+                ),
+                path,  # type: ignore[arg-type]
+                None if content is None else json.loads(content),
+            )
+        )
+    return payload_list
+
+
+class _SharedMemory:
+    """Growable memory mapping shared with the forked child processes.
+
+    The mapping is backed by an unlinked temporary file, whose descriptor is
+    inherited by the child processes, so that they can map it again when the
+    publisher grows it.
+    """
+
+    def __init__(self, size: int) -> None:
+        shm_dir = next((d for d in _SHM_DIRS if os.path.isdir(d) and os.access(d, os.W_OK)), None)
+        self._file = tempfile.TemporaryFile(prefix="ddrc-", dir=shm_dir)
+        os.ftruncate(self._file.fileno(), size)
+        self.map = mmap.mmap(self._file.fileno(), size)
+
+    def resize(self, size: int) -> None:
+        # Close the current mapping first, as some platforms do not allow
+        # resizing a file that is mapped.
+        self.map.close()
+        os.ftruncate(self._file.fileno(), size)
+        self.map = mmap.mmap(self._file.fileno(), size)
+
+    def remap(self) -> None:
+        size = os.fstat(self._file.fileno()).st_size
+        if size != len(self.map):
+            self.map.close()
+            self.map = mmap.mmap(self._file.fileno(), size)
+
+
+class _DummySharedMemory:
+    """Dummy shared memory to be used when shared memory is not available.
     This class is used to avoid breaking the code when shared memory is not available.
     """
 
-    def __init__(self):
-        self.value = b""
+    def __init__(self, size: int) -> None:
+        self.map = bytearray(size)
+
+    def resize(self, size: int) -> None:
+        self.map.extend(bytes(size - len(self.map)))
+
+    def remap(self) -> None:
+        pass
 
 
 class PublisherSubscriberConnector:
-    """ "PublisherSubscriberConnector is the bridge between Publisher and Subscriber class that uses an array of chars
-    to share information between processes. `multiprocessing.Array``, as far as we know, was the most efficient way to
-    share information. We compare this approach with: Multiprocess Manager, Multiprocess Value, Multiprocess Queues
+    """PublisherSubscriberConnector is the bridge between Publisher and Subscriber class that uses a shared memory
+    mapping to share information between processes. The payloads are encoded in a binary layout with one segment per
+    product, so that subscribers only decode the products that changed since their last read.
     """
 
     def __init__(self):
         try:
-            self.data = get_mp_context().Array(c_char, SHARED_MEMORY_SIZE, lock=False)
-        except FileNotFoundError:
+            self.data = _SharedMemory(SHARED_MEMORY_SIZE)
+        except (OSError, ValueError):
             log.warning(
                 "Unable to create shared memory. Features relying on remote configuration will not work as expected."
             )
-            self.data = _DummySharedArray()
+            self.data = _DummySharedMemory(SHARED_MEMORY_SIZE)
+        _HEADER.pack_into(self.data.map, 0, _MAGIC, _VERSION, 0, len(self.data.map), 0)
+        # Serializes the accesses to the mapping within a process, as the
+        # publisher might replace it while a subscriber is reading it.
+        self._lock = forksafe.Lock()
         # Checksum attr validates if the Publisher send new data
         self.checksum = -1
-        # shared_data_counter attr validates if the Subscriber send new data
+        # Generation of the last write of the Publisher, and encoded segments
+        # by product name, with the generation of their last change.
+        self._generation = 0
+        self._segments: Dict[str, Tuple[int, bytes]] = {}
+        # shared_data_counter attr validates if the Subscriber read new data
         self.shared_data_counter = 0
+        # Decoded payloads by product name, with the generation of the segment
+        # they were decoded from.
+        self._decoded: Dict[str, Tuple[int, SharedDataType]] = {}
 
     @staticmethod
     def _hash_config(payload_sequence: Sequence[Payload]):
@@ -66,31 +243,114 @@ class PublisherSubscriberConnector:
                 result <<= 1
         return result
 
+    def _read_raw(self) -> Optional[Tuple[int, bytes]]:
+        with self._lock:
+            shared = self.data.map
+            magic, version, sequence, capacity, length = _HEADER.unpack_from(shared, 0)
+            if magic != _MAGIC or version != _VERSION:
+                log.debug("[%s][P: %s] unsupported shared data layout", os.getpid(), os.getppid())
+                return None
+            if sequence & 1 or (sequence >> 1) <= self.shared_data_counter:
+                # Either a write is in progress, and we will read the data on
+                # the next poll, or there is nothing new to read.
+                return None
+            if capacity > len(shared):
+                self.data.remap()
+                shared = self.data.map
+            raw = shared[_HEADER.size : _HEADER.size + length]
+            if _HEADER.unpack_from(shared, 0)[2] != sequence:
+                # The data changed while we were copying it
+                return None
+            return sequence >> 1, raw
+
     def read(self) -> SharedDataType:
-        config_raw = to_unicode(self.data.value)
-        config = json.loads(config_raw) if config_raw else None
-        if config is not None:
-            shared_data_counter = config["shared_data_counter"]
-            if shared_data_counter > self.shared_data_counter:
-                self.shared_data_counter += 1
-                return [Payload(**value) for value in config["payload_list"]]
-        return []
+        result = self._read_raw()
+        if result is None:
+            return []
+        generation, raw = result
+
+        data = memoryview(raw)
+        (count,) = _COUNT.unpack_from(data, 0)
+        offset = _COUNT.size
+        payload_list: SharedDataType = []
+        decoded: Dict[str, Tuple[int, SharedDataType]] = {}
+        for _ in range(count):
+            (name_length,) = _NAME_LENGTH.unpack_from(data, offset)
+            offset += _NAME_LENGTH.size
+            product = bytes(data[offset : offset + name_length]).decode()
+            offset += name_length
+            segment_generation, size = _SEGMENT.unpack_from(data, offset)
+            offset += _SEGMENT.size
+
+            cached = self._decoded.get(product)
+            if cached is not None and cached[0] == segment_generation:
+                payloads = cached[1]
+            else:
+                payloads = decode_payloads(data[offset : offset + size])
+            offset += size
+
+            decoded[product] = (segment_generation, payloads)
+            payload_list.extend(payloads)
+
+        self._decoded = decoded
+        self.shared_data_counter = generation
+        return payload_list
 
     def write(self, payload_list: Sequence[Payload]) -> None:
         last_checksum = self._hash_config(payload_list)
         if last_checksum != self.checksum:
-            data = self.serialize(payload_list, self.shared_data_counter + 1)
+            generation = self._generation + 1
+            data = self.serialize(payload_list, generation)
             data_len = len(data)
-            if data_len >= (SHARED_MEMORY_SIZE - 1000):
-                log.warning("Datadog Remote Config shared data is %s/%s", data_len, SHARED_MEMORY_SIZE)
-            self.data.value = data
+
+            with self._lock:
+                shared = self.data.map
+                sequence = _HEADER.unpack_from(shared, 0)[2]
+                if _HEADER.size + data_len > len(shared):
+                    capacity = len(shared)
+                    while _HEADER.size + data_len > capacity:
+                        capacity <<= 1
+                    log.debug("Growing Datadog Remote Config shared data from %s to %s", len(shared), capacity)
+                    try:
+                        self.data.resize(capacity)
+                    except (OSError, ValueError):
+                        log.warning("Datadog Remote Config shared data is %s/%s", data_len, len(shared), exc_info=True)
+                        return
+                    shared = self.data.map
+
+                # The sequence number is odd while the data is being written,
+                # and encodes the generation of the data once it is written.
+                _HEADER.pack_into(shared, 0, _MAGIC, _VERSION, sequence | 1, len(shared), data_len)
+                shared[_HEADER.size : _HEADER.size + data_len] = data
+                _HEADER.pack_into(shared, 0, _MAGIC, _VERSION, generation << 1, len(shared), data_len)
+
+            self._generation = generation
             log.debug("[%s][P: %s] write message of length %s", os.getpid(), os.getppid(), data_len)
             self.checksum = last_checksum
 
-    @staticmethod
-    def serialize(payload_list: Sequence[Payload], shared_data_counter: int) -> bytes:
-        return json.dumps(
-            {"payload_list": [asdict(p) for p in payload_list], "shared_data_counter": shared_data_counter},
-            cls=UUIDEncoder,
-            ensure_ascii=False,
-        ).encode()
+    def serialize(self, payload_list: Sequence[Payload], generation: int) -> bytes:
+        """Encode the payloads in per product segments.
+
+        The segments whose payloads did not change keep the generation of the
+        write that last changed them.
+        """
+        products: Dict[str, List[Payload]] = {}
+        for payload in payload_list:
+            products.setdefault(payload.metadata.product_name, []).append(payload)
+
+        buffer = bytearray(_COUNT.pack(len(products)))
+        segments: Dict[str, Tuple[int, bytes]] = {}
+        for product, payloads in products.items():
+            encoded = encode_payloads(payloads)
+            previous = self._segments.get(product)
+            segment_generation = previous[0] if previous is not None and previous[1] == encoded else generation
+            segments[product] = (segment_generation, encoded)
+
+            name = product.encode()
+            buffer += _NAME_LENGTH.pack(len(name))
+            buffer += name
+            buffer += _SEGMENT.pack(segment_generation, len(encoded))
+            buffer += encoded
+
+        self._segments = segments
+        return bytes(buffer)
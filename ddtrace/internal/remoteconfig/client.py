@@ -19,7 +19,6 @@ from typing import Tuple
 import uuid
 
 import ddtrace
-from ddtrace.internal import agent
 from ddtrace.internal import gitmetadata
 from ddtrace.internal import runtime
 from ddtrace.internal.hostname import get_hostname
@@ -31,6 +30,7 @@ from ddtrace.internal.remoteconfig._pubsub import PubSub
 from ddtrace.internal.remoteconfig.constants import REMOTE_CONFIG_AGENT_ENDPOINT
 from ddtrace.internal.service import ServiceStatus
 from ddtrace.internal.utils.formats import parse_tags_str
+from ddtrace.internal.utils.http import get_connection_pool
 from ddtrace.internal.utils.version import _pep440_to_semver
 from ddtrace.settings._agent import config as agent_config
 from ddtrace.settings._core import DDConfig
@@ -292,7 +292,6 @@ class RemoteConfigClient:
         self._products = dict()
 
     def _send_request(self, payload: str) -> Optional[Mapping[str, Any]]:
-        conn = None
         try:
             log.debug(
                 "[%s][P: %s] Requesting RC data from products: %s", os.getpid(), os.getppid(), str(self._products)
@@ -301,14 +300,16 @@ class RemoteConfigClient:
             if config.log_payloads:
                 log.debug("[%s][P: %s] RC request payload: %s", os.getpid(), os.getppid(), payload)  # noqa: G200
 
-            conn = agent.get_connection(self.agent_url, timeout=agent_config.trace_agent_timeout_seconds)
-            conn.request("POST", REMOTE_CONFIG_AGENT_ENDPOINT, payload, self._headers)
-            resp = conn.getresponse()
-            data_length = resp.headers.get("Content-Length")
+            pool = get_connection_pool(self.agent_url)
+            with pool.connection(timeout=agent_config.trace_agent_timeout_seconds) as conn:
+                conn.request("POST", REMOTE_CONFIG_AGENT_ENDPOINT, payload, self._headers)
+                resp = conn.getresponse()
+                data_length = resp.headers.get("Content-Length")
+                # Read the response even when empty so that the connection can be reused
+                data = resp.read()
             if data_length is not None and int(data_length) == 0:
                 log.debug("[%s][P: %s] RC response payload empty", os.getpid(), os.getppid())
                 return None
-            data = resp.read()
 
             if config.log_payloads:
                 log.debug(
@@ -317,9 +318,6 @@ class RemoteConfigClient:
         except OSError as e:
             log.debug("Unexpected connection error in remote config client request: %s", str(e))  # noqa: G200
             return None
-        finally:
-            if conn is not None:
-                conn.close()
 
         if resp.status == 404:
             # Remote configuration is not enabled or unsupported by the agent
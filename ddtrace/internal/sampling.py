@@ -167,6 +167,11 @@ class SpanSamplingRule:
                 name_match = self._name_matcher.match(name)
         return service_match and name_match
 
+    def _reset_limiter(self) -> None:
+        # The state of the rate limiter is inherited from the parent process
+        # on fork and should not be carried over.
+        self._limiter = RateLimiter(self._max_per_second)
+
     def apply_span_sampling_tags(self, span):
         # type: (Span) -> None
         span.set_metric(_SINGLE_SPAN_SAMPLING_MECHANISM, SamplingMechanism.SPAN_SAMPLING_RULE)
@@ -11,7 +11,6 @@ from ddtrace.internal.remoteconfig._pubsub import PubSub
 from ddtrace.internal.remoteconfig._subscribers import RemoteConfigSubscriber
 from ddtrace.internal.remoteconfig.worker import remoteconfig_poller
 from ddtrace.internal.runtime import get_ancestor_runtime_id
-from ddtrace.internal.symbol_db.symbols import SymbolDatabaseUploader
 
 
 DI_PRODUCT_KEY = "dynamic-instrumentation"
@@ -20,6 +19,10 @@ log = get_logger(__name__)
 
 
 def _rc_callback(data: t.List[Payload], test_tracer=None):
+    # DEV: The symbol collection machinery is only needed once Symbol DB is
+    # enabled remotely, so we avoid importing it on startup.
+    from ddtrace.internal.symbol_db.symbols import SymbolDatabaseUploader
+
     if get_ancestor_runtime_id() is not None and has_forked():
         log.debug("[PID %d] SymDB: Disabling Symbol DB in forked process", os.getpid())
         # We assume that forking is being used for spawning child worker
@@ -35,7 +35,7 @@ from ddtrace.internal.runtime import get_runtime_id
 from ddtrace.internal.safety import _isinstance
 from ddtrace.internal.utils.cache import cached
 from ddtrace.internal.utils.http import FormData
-from ddtrace.internal.utils.http import connector
+from ddtrace.internal.utils.http import get_connection_pool
 from ddtrace.internal.utils.http import multipart
 from ddtrace.internal.utils.inspection import linenos
 from ddtrace.internal.utils.inspection import undecorated
@@ -506,7 +506,7 @@ class ScopeContext:
         # replace it with the compressed JSON.
         body = body.replace(b"[symbols_placeholder]", gzip.compress(json.dumps(self.to_json()).encode("utf-8")))
 
-        with connector(agent_config.trace_agent_url, timeout=5.0)() as conn:
+        with get_connection_pool(agent_config.trace_agent_url).connection(timeout=5.0) as conn:
             log.debug("[PID %d] SymDB: Uploading symbols payload", os.getpid())
             conn.request("POST", "/symdb/v1/input", body, headers)
 
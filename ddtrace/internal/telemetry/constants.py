@@ -14,6 +14,7 @@ class TELEMETRY_NAMESPACE(Enum):
 TELEMETRY_TYPE_GENERATE_METRICS = "generate-metrics"
 TELEMETRY_TYPE_DISTRIBUTION = "distributions"
 TELEMETRY_TYPE_LOGS = "logs"
+TELEMETRY_TYPE_MESSAGE_BATCH = "message-batch"
 
 
 class TELEMETRY_LOG_LEVEL(Enum):
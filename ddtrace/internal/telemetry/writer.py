@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import gzip
 import http.client as httplib  # noqa: E402
 import itertools
 import os
@@ -16,7 +17,7 @@ from typing import Union  # noqa:F401
 import urllib.parse as parse
 
 from ddtrace.internal.logger import get_logger
-from ddtrace.internal.utils.http import get_connection
+from ddtrace.internal.utils.http import get_connection_pool
 from ddtrace.settings._agent import config as agent_config
 from ddtrace.settings._telemetry import config
 
@@ -35,6 +36,7 @@ from .constants import TELEMETRY_NAMESPACE
 from .constants import TELEMETRY_TYPE_DISTRIBUTION
 from .constants import TELEMETRY_TYPE_GENERATE_METRICS
 from .constants import TELEMETRY_TYPE_LOGS
+from .constants import TELEMETRY_TYPE_MESSAGE_BATCH
 from .data import get_application
 from .data import get_host_info
 from .data import get_python_config_vars
@@ -88,14 +90,17 @@ class _TelemetryClient:
     def send_event(self, request: Dict) -> Optional[httplib.HTTPResponse]:
         """Sends a telemetry request to the trace agent"""
         resp = None
-        conn = None
         try:
             rb_json, _ = self._encoder.encode(request)
             headers = self.get_headers(request)
-            with StopWatch() as sw:
-                conn = get_connection(self._telemetry_url)
+            if config.COMPRESSION_ENABLED:
+                rb_json = gzip.compress(rb_json, compresslevel=6)
+                headers["Content-Encoding"] = "gzip"
+            with StopWatch() as sw, get_connection_pool(self._telemetry_url).connection() as conn:
                 conn.request("POST", self._endpoint, rb_json, headers)
                 resp = conn.getresponse()
+                # The response body must be consumed before the connection can be reused
+                resp.read()
             if resp.status < 300:
                 log.debug(
                     "Instrumentation Telemetry sent %d in %.5fs to %s. response: %s",
@@ -108,11 +113,16 @@ class _TelemetryClient:
                 log.debug("Failed to send Instrumentation Telemetry to %s. response: %s", self.url, resp.status)
         except Exception as e:
             log.debug("Failed to send Instrumentation Telemetry to %s. Error: %s", self.url, str(e))
-        finally:
-            if conn is not None:
-                conn.close()
         return resp
 
+    def close(self):
+        # type: () -> None
+        """Close the idle keep-alive connections to the intake"""
+        try:
+            get_connection_pool(self._telemetry_url).close()
+        except Exception:
+            log.debug("Failed to close Instrumentation Telemetry connections", exc_info=True)
+
     def get_headers(self, request):
         # type: (Dict) -> Dict
         """Get all telemetry api v2 request headers"""
@@ -237,6 +247,7 @@ class TelemetryWriter(PeriodicService):
         """
         self._enabled = False
         self.reset_queues()
+        self._client.close()
 
     def enable_agentless_client(self, enabled=True):
         # type: (bool) -> None
@@ -244,6 +255,7 @@ class TelemetryWriter(PeriodicService):
         if self._client._agentless == enabled:
             return
 
+        self._client.close()
         self._client = _TelemetryClient(enabled)
 
     def _is_running(self):
@@ -261,18 +273,30 @@ class TelemetryWriter(PeriodicService):
             Payload types accepted by telemetry/proxy v2: app-started, app-closing, app-integrations-change
         """
         if self.enable():
-            event = {
-                "tracer_time": int(time.time()),
-                "runtime_id": get_runtime_id(),
-                "api_version": "v2",
-                "seq_id": next(self._sequence),
-                "debug": self._debug,
-                "application": get_application(config.SERVICE, config.VERSION, config.ENV),
-                "host": get_host_info(),
-                "payload": payload,
-                "request_type": payload_type,
-            }
-            self._events_queue.append(event)
+            self._events_queue.append(self._get_event(payload, payload_type))
+
+    def _get_event(self, payload, payload_type):
+        # type: (Union[Dict[str, Any], List[Any]], str) -> Dict[str, Any]
+        """Wraps a payload in the telemetry api v2 request envelope"""
+        return {
+            "tracer_time": int(time.time()),
+            "runtime_id": get_runtime_id(),
+            "api_version": "v2",
+            "seq_id": next(self._sequence),
+            "debug": self._debug,
+            "application": get_application(config.SERVICE, config.VERSION, config.ENV),
+            "host": get_host_info(),
+            "payload": payload,
+            "request_type": payload_type,
+        }
+
+    def _batch_events(self, events):
+        # type: (List[Dict]) -> Dict[str, Any]
+        """Packs a list of queued events into a single message-batch request"""
+        return self._get_event(
+            [{"request_type": event["request_type"], "payload": event["payload"]} for event in events],
+            TELEMETRY_TYPE_MESSAGE_BATCH,
+        )
 
     def add_integration(self, integration_name, patched, auto_patched=None, error_msg=None, version=""):
         # type: (str, bool, Optional[bool], Optional[str], Optional[str]) -> None
@@ -667,8 +691,12 @@ class TelemetryWriter(PeriodicService):
         self._app_heartbeat_event()
 
         telemetry_events = self._flush_events_queue()
-        for telemetry_event in telemetry_events:
-            self._client.send_event(telemetry_event)
+        if config.MESSAGE_BATCH_ENABLED and len(telemetry_events) > 1:
+            # Send all the pending events in a single request
+            self._client.send_event(self._batch_events(telemetry_events))
+        else:
+            for telemetry_event in telemetry_events:
+                self._client.send_event(telemetry_event)
 
     def app_shutdown(self):
         if self.started:
@@ -1,14 +1,19 @@
+from collections import deque
 from contextlib import contextmanager
 from dataclasses import dataclass
 from email.encoders import encode_noop
+from functools import partial
 from json import loads
 import logging
 import os
 import re
+import selectors
+from time import monotonic
 from typing import TYPE_CHECKING
 from typing import Any  # noqa:F401
 from typing import Callable  # noqa:F401
 from typing import ContextManager  # noqa:F401
+from typing import Deque  # noqa:F401
 from typing import Dict  # noqa:F401
 from typing import Generator  # noqa:F401
 from typing import List  # noqa:F401
@@ -19,6 +24,7 @@ from typing import Union  # noqa:F401
 from urllib import parse
 
 from ddtrace.constants import _USER_ID_KEY
+from ddtrace.internal import forksafe
 from ddtrace.internal._unpatched import unpatched_open as open  # noqa: A004
 from ddtrace.internal.constants import BLOCKED_RESPONSE_HTML
 from ddtrace.internal.constants import BLOCKED_RESPONSE_JSON
@@ -298,6 +304,207 @@ def get_connection(url: str, timeout: float = DEFAULT_TIMEOUT) -> ConnectionType
     raise ValueError("Unsupported protocol '%s'" % parsed.scheme)
 
 
+class ConnectionPool(object):
+    """A pool of keep-alive connections to a single URL.
+
+    Connections are borrowed with :meth:`connection` and are put back into the
+    pool only if the response was fully read and the server kept the connection
+    open. Connections that stayed idle for longer than ``idle_timeout`` seconds,
+    or that were closed by the server in the meantime, are evicted.
+
+    Example::
+        >>> pool = get_connection_pool("http://localhost:8126")
+        >>> with pool.connection(timeout=2.0) as conn:
+        ...     conn.request("GET", "/info")
+        ...     conn.getresponse().read()
+    """
+
+    def __init__(self, url, max_idle_connections=4, idle_timeout=10.0):
+        # type: (str, int, float) -> None
+        self.url = url
+        self.max_idle_connections = max_idle_connections
+        self.idle_timeout = idle_timeout
+        # Pairs of idle connections and the time they were returned to the pool, oldest first
+        self._idle = deque()  # type: Deque[Tuple[ConnectionType, float]]
+        self._lock = forksafe.Lock()
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+        # The counts last reported to telemetry
+        self._reported = (0, 0, 0)
+
+    @property
+    def reuse_ratio(self):
+        # type: () -> float
+        """The fraction of borrowed connections that were already open"""
+        borrowed = self.created + self.reused
+        return self.reused / borrowed if borrowed else 0.0
+
+    def _checkout(self, timeout):
+        # type: (float) -> ConnectionType
+        now = monotonic()
+        conn = None
+        with self._lock:
+            while self._idle and now - self._idle[0][1] > self.idle_timeout:
+                self._idle.popleft()[0].close()
+                self.evicted += 1
+            while self._idle:
+                # Prefer the most recently used connection, which is the least likely to have been dropped
+                candidate, _ = self._idle.pop()
+                if not _is_connection_dropped(candidate):
+                    conn = candidate
+                    self.reused += 1
+                    break
+                candidate.close()
+                self.evicted += 1
+            else:
+                self.created += 1
+
+        if conn is None:
+            return get_connection(self.url, timeout=timeout)
+
+        # Apply the timeout of the current request to the reused socket
+        conn.timeout = timeout
+        conn._reused = True
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn
+
+    def _checkin(self, conn):
+        # type: (ConnectionType) -> None
+        if not conn.is_reusable():
+            conn.close()
+            return
+
+        with self._lock:
+            if len(self._idle) < self.max_idle_connections:
+                self._idle.append((conn, monotonic()))
+                return
+        conn.close()
+
+    @contextmanager
+    def connection(self, timeout=DEFAULT_TIMEOUT):
+        # type: (float) -> Generator[ConnectionType, None, None]
+        """Borrow a connection from the pool for the duration of the context."""
+        conn = self._checkout(timeout)
+        try:
+            yield conn
+        except BaseException:
+            # The state of the connection is unknown
+            conn.close()
+            raise
+        self._checkin(conn)
+
+    def connector(self, timeout=DEFAULT_TIMEOUT):
+        # type: (float) -> Connector
+        """Return a :func:`connector`-like callable that borrows connections from the pool."""
+        return partial(self.connection, timeout)
+
+    def close(self):
+        # type: () -> None
+        """Close all the idle connections."""
+        with self._lock:
+            while self._idle:
+                self._idle.pop()[0].close()
+
+    def _counts_since_last_report(self):
+        # type: () -> Tuple[int, int, int]
+        with self._lock:
+            counts = (self.created, self.reused, self.evicted)
+            last, self._reported = self._reported, counts
+        return counts[0] - last[0], counts[1] - last[1], counts[2] - last[2]
+
+    def _reset(self):
+        # type: () -> None
+        # Only the current thread exists in the child process after a fork, so
+        # the lock is not needed. The child process must not share the sockets
+        # of the parent.
+        while self._idle:
+            self._idle.pop()[0].close()
+        self.created = self.reused = self.evicted = 0
+        self._reported = (0, 0, 0)
+
+    def __repr__(self):
+        return "<{} url={} idle={} created={} reused={} evicted={}>".format(
+            self.__class__.__name__, self.url, len(self._idle), self.created, self.reused, self.evicted
+        )
+
+
+# Unlike select.select, poll is not limited to file descriptors below FD_SETSIZE,
+# and it does not need a kernel object like epoll for a one-off check.
+_Selector = getattr(selectors, "PollSelector", selectors.DefaultSelector)
+
+
+def _is_connection_dropped(conn):
+    # type: (ConnectionType) -> bool
+    sock = conn.sock
+    if sock is None:
+        return True
+    try:
+        # An idle keep-alive socket becomes readable only when the server closed it
+        with _Selector() as selector:
+            selector.register(sock, selectors.EVENT_READ)
+            return bool(selector.select(0))
+    except (OSError, TypeError, ValueError):
+        return True
+
+
+_connection_pools = {}  # type: Dict[str, ConnectionPool]
+_connection_pools_lock = forksafe.Lock()
+
+
+def get_connection_pool(url):
+    # type: (str) -> ConnectionPool
+    """Return the process-wide connection pool for the given URL.
+
+    All the background services talking to the same endpoint (e.g. the agent,
+    over TCP or UDS) share the same pool.
+    """
+    try:
+        return _connection_pools[url]
+    except KeyError:
+        pass
+
+    verify_url(url)
+    with _connection_pools_lock:
+        pool = _connection_pools.get(url)
+        if pool is None:
+            # Imported here to avoid a circular import with the settings
+            from ddtrace.internal import core
+
+            core.on("telemetry.periodic", _report_connection_pool_metrics, "connection_pools")
+            pool = _connection_pools[url] = ConnectionPool(url)
+        return pool
+
+
+@forksafe.register
+def _reset_connection_pools():
+    # type: () -> None
+    # The pools are reset rather than replaced, since services keep a reference
+    # to them, e.g. through a connector.
+    for pool in _connection_pools.values():
+        pool._reset()
+
+
+def _report_connection_pool_metrics():
+    # type: () -> None
+    from ddtrace.internal.telemetry import telemetry_writer
+    from ddtrace.internal.telemetry.constants import TELEMETRY_NAMESPACE
+
+    created = reused = evicted = 0
+    for pool in list(_connection_pools.values()):
+        c, r, e = pool._counts_since_last_report()
+        created += c
+        reused += r
+        evicted += e
+
+    for state, count in (("created", created), ("reused", reused), ("evicted", evicted)):
+        if count:
+            telemetry_writer.add_count_metric(
+                TELEMETRY_NAMESPACE.TRACERS, "http_client.connections", count, (("state", state),)
+            )
+
+
 def verify_url(url: str) -> parse.ParseResult:
     """Validates that the given URL can be used as an intake
     Returns a parse.ParseResult.
@@ -0,0 +1,163 @@
+"""Cached formatting of exception tracebacks.
+
+Formatting a traceback requires looking up the source of every frame, which
+is by far the most expensive part of reporting an exception. The same
+exceptions tend to be raised from the same places over and over again, so we
+cache the formatted stack of each traceback, identified by the location of
+the code and the instruction of each of its frames. The exception messages change with every
+occurrence and are therefore formatted every time.
+"""
+
+from collections import OrderedDict
+import sys
+import traceback
+from types import TracebackType
+import typing as t
+
+from ddtrace.internal import forksafe
+
+
+_CAUSE_MESSAGE = "\nThe above exception was the direct cause of the following exception:\n\n"
+_CONTEXT_MESSAGE = "\nDuring handling of the above exception, another exception occurred:\n\n"
+
+if sys.version_info >= (3, 11):
+    _GROUP_TYPES: t.Tuple[t.Type[BaseException], ...] = (BaseExceptionGroup,)  # noqa: F821
+else:
+    _GROUP_TYPES = ()
+
+TracebackKey = t.Tuple[t.Tuple[str, int, str, int], ...]
+
+STACK_CACHE_SIZE = 1024
+
+_stack_cache: "OrderedDict[t.Tuple[TracebackKey, t.Optional[int]], str]" = OrderedDict()
+_stack_cache_lock = forksafe.Lock()
+
+
+def traceback_key(tb: t.Optional[TracebackType]) -> TracebackKey:
+    """Identify a traceback by the code locations and instructions of its frames.
+
+    The code objects are identified by their location rather than by their
+    id, which is reused once they are collected, e.g. for functions defined
+    at runtime. Unlike comparing the code objects themselves, this also tells
+    apart identical functions defined in different files.
+    """
+    key = []
+    _tb = tb
+    while _tb is not None:
+        code = _tb.tb_frame.f_code
+        key.append((code.co_filename, code.co_firstlineno, code.co_name, _tb.tb_lasti))
+        _tb = _tb.tb_next
+    return tuple(key)
+
+
+def fingerprint(tb: t.Optional[TracebackType]) -> int:
+    """Compute a 64-bit fingerprint of a traceback."""
+    return hash(traceback_key(tb)) & 0xFFFFFFFFFFFFFFFF
+
+
+def _format_stack(exc: BaseException, tb: t.Optional[TracebackType], limit: t.Optional[int]) -> t.Optional[str]:
+    """Format the stack part of a traceback, without the exception message."""
+    key = (traceback_key(tb), limit)
+    with _stack_cache_lock:
+        try:
+            stack = _stack_cache[key]
+            _stack_cache.move_to_end(key)
+            return stack
+        except KeyError:
+            pass
+
+    te = traceback.TracebackException(type(exc), exc, tb, limit=limit)
+    formatted = "".join(te.format(chain=False))
+    message = "".join(te.format_exception_only())
+    if not formatted.endswith(message):
+        return None
+    stack = formatted[: len(formatted) - len(message)]
+
+    with _stack_cache_lock:
+        _stack_cache[key] = stack
+        if len(_stack_cache) > STACK_CACHE_SIZE:
+            _stack_cache.popitem(last=False)
+
+    return stack
+
+
+def _exception_chain(
+    exc: BaseException, tb: t.Optional[TracebackType]
+) -> t.Optional[t.List[t.Tuple[t.Optional[str], BaseException, t.Optional[TracebackType]]]]:
+    # Follow the same chaining rules as traceback.print_exception, from the
+    # most recent exception to the oldest one.
+    chain = []
+    seen = {id(exc)}
+    _exc: t.Optional[BaseException] = exc
+    while _exc is not None:
+        if isinstance(_exc, _GROUP_TYPES):
+            # Exception groups have a nested layout that we do not cache
+            return None
+
+        msg: t.Optional[str] = None
+        chained: t.Optional[BaseException] = None
+        cause, context = _exc.__cause__, _exc.__context__
+        if cause is not None and id(cause) not in seen:
+            msg, chained = _CAUSE_MESSAGE, cause
+        elif context is not None and id(context) not in seen and not _exc.__suppress_context__:
+            msg, chained = _CONTEXT_MESSAGE, context
+
+        chain.append((msg, _exc, tb))
+
+        if chained is not None:
+            seen.add(id(chained))
+            tb = chained.__traceback__
+        _exc = chained
+
+    chain.reverse()
+    return chain
+
+
+def _format_exception_parts(
+    exc: BaseException, tb: t.Optional[TracebackType], limit: t.Optional[int]
+) -> t.Optional[t.List[t.Tuple[t.Optional[str], str, str]]]:
+    chain = _exception_chain(exc, tb)
+    if chain is None:
+        return None
+
+    parts = []
+    for msg, _exc, _tb in chain:
+        stack = _format_stack(_exc, _tb, limit)
+        if stack is None:
+            return None
+        parts.append((msg, stack, "".join(traceback.format_exception_only(type(_exc), _exc))))
+    return parts
+
+
+def format_exception(
+    exc_type: t.Type[BaseException],
+    exc_val: BaseException,
+    exc_tb: t.Optional[TracebackType],
+    limit: t.Optional[int] = None,
+    max_len: t.Optional[int] = None,
+) -> str:
+    """Format an exception like ``traceback.print_exception`` does.
+
+    If ``max_len`` is given, the number of frames is halved until the
+    formatted exception fits in ``max_len`` characters, or only one frame is
+    left.
+    """
+    if exc_val is None or not isinstance(exc_val, BaseException):
+        return "".join(traceback.format_exception(exc_type, exc_val, exc_tb, limit=limit))
+
+    while True:
+        parts = _format_exception_parts(exc_val, exc_tb, limit)
+        if parts is None:
+            formatted = "".join(traceback.format_exception(exc_type, exc_val, exc_tb, limit=limit))
+        else:
+            formatted = "".join(f"{msg or ''}{stack}{message}" for msg, stack, message in parts)
+
+        if max_len is None or len(formatted) <= max_len or limit is None or abs(limit) <= 1:
+            return formatted
+
+        limit //= 2
+
+
+def clear_cache() -> None:
+    with _stack_cache_lock:
+        _stack_cache.clear()
@@ -22,7 +22,7 @@ from ddtrace.internal import forksafe
 from ddtrace.internal.logger import get_logger
 from ddtrace.internal.periodic import PeriodicService
 from ddtrace.internal.utils.http import Response
-from ddtrace.internal.utils.http import get_connection
+from ddtrace.internal.utils.http import get_connection_pool
 from ddtrace.internal.utils.retry import fibonacci_backoff_with_jitter
 from ddtrace.llmobs import _telemetry as telemetry
 from ddtrace.llmobs._constants import AGENTLESS_EVAL_BASE_URL
@@ -213,30 +213,28 @@ class BaseLLMObsWriter(PeriodicService):
             )
 
     def _send_payload(self, payload: bytes, num_events: int):
-        conn = get_connection(self._intake)
         try:
-            conn.request("POST", self._endpoint, payload, self._headers)
-            resp = conn.getresponse()
-            if resp.status >= 300:
+            with get_connection_pool(self._intake).connection() as conn:
+                conn.request("POST", self._endpoint, payload, self._headers)
+                response = Response.from_http_response(conn.getresponse())
+            if response.status >= 300:
                 logger.error(
                     "failed to send %d LLMObs %s events to %s, got response code %d, status: %s",
                     num_events,
                     self.EVENT_TYPE,
                     self._url,
-                    resp.status,
-                    resp.read(),
+                    response.status,
+                    response.body,
                 )
                 telemetry.record_dropped_payload(num_events, event_type=self.EVENT_TYPE, error="http_error")
             else:
                 logger.debug("sent %d LLMObs %s events to %s", num_events, self.EVENT_TYPE, self._url)
-            return Response.from_http_response(resp)
+            return response
         except Exception:
             logger.error(
                 "failed to send %d LLMObs %s events to %s", num_events, self.EVENT_TYPE, self._intake, exc_info=True
             )
             raise
-        finally:
-            conn.close()
 
     @property
     def _url(self) -> str:
@@ -288,15 +286,11 @@ class LLMObsExperimentsClient(BaseLLMObsWriter):
             headers[EVP_SUBDOMAIN_HEADER_NAME] = self.EVP_SUBDOMAIN_HEADER_VALUE
 
         encoded_body = json.dumps(body).encode("utf-8") if body else b""
-        conn = get_connection(self._intake)
-        try:
-            url = self._intake + self._endpoint + path
-            logger.debug("requesting %s", url)
+        url = self._intake + self._endpoint + path
+        logger.debug("requesting %s", url)
+        with get_connection_pool(self._intake).connection() as conn:
             conn.request(method, url, encoded_body, headers)
-            resp = conn.getresponse()
-            return Response.from_http_response(resp)
-        finally:
-            conn.close()
+            return Response.from_http_response(conn.getresponse())
 
     def dataset_delete(self, dataset_id: str) -> None:
         path = "/api/unstable/llm-obs/v1/datasets/delete"
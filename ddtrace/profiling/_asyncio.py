@@ -29,6 +29,10 @@ def _task_get_name(task):
     return "Task-%d" % id(task)
 
 
+def _unlink_tasks(children, _future):
+    stack_v2.unlink_tasks(children)  # type: ignore[attr-defined]
+
+
 @ModuleWatchdog.after_module_imported("asyncio")
 def _(asyncio):
     # type: (ModuleType) -> None
@@ -66,6 +70,7 @@ def _(asyncio):
                 THREAD_LINK.link_object(loop)
 
     if init_stack_v2:
+        task_budget = config.stack.asyncio_task_budget
 
         @partial(wrap, sys.modules["asyncio"].tasks._GatheringFuture.__init__)
         def _(f, args, kwargs):
@@ -79,6 +84,9 @@ def _(asyncio):
                 parent = globals()["current_task"](loop)
                 for child in children:
                     stack_v2.link_tasks(parent, child)
+                if task_budget > 0:
+                    # The stack sampler keeps the links to find the tasks awaiting the gathered ones
+                    args[0].add_done_callback(partial(_unlink_tasks, children))
 
         if sys.hexversion >= 0x030C0000:
             scheduled_tasks = asyncio.tasks._scheduled_tasks.data
@@ -87,6 +95,11 @@ def _(asyncio):
             scheduled_tasks = asyncio.tasks._all_tasks.data
             eager_tasks = None
 
+        if task_budget > 0:
+            # The stack sampler only samples the running tasks, the tasks
+            # awaiting them, and a random subset of the other tasks
+            stack_v2.set_asyncio_task_budget(task_budget, asyncio.Task)  # type: ignore[attr-defined]
+
         stack_v2.init_asyncio(asyncio.tasks._current_tasks, scheduled_tasks, eager_tasks)  # type: ignore[attr-defined]
 
 
@@ -6,6 +6,7 @@
 #include <Python.h>
 
 #include "_memalloc_debug.h"
+#include "_memalloc_export.h"
 #include "_memalloc_heap.h"
 #include "_memalloc_reentrant.h"
 #include "_memalloc_tb.h"
@@ -214,7 +215,8 @@ alloc_tracker_free(alloc_tracker_t* alloc_tracker)
 }
 
 PyDoc_STRVAR(memalloc_start__doc__,
-             "start($module, max_nframe, max_events, heap_sample_size)\n"
+             "start($module, max_nframe, max_events, heap_sample_size,\n"
+             "      heap_growth_snapshots=0, heap_growth_max_sites=0)\n"
              "--\n"
              "\n"
              "Start tracing Python memory allocations.\n"
@@ -222,7 +224,10 @@ PyDoc_STRVAR(memalloc_start__doc__,
              "Sets the maximum number of frames stored in the traceback of a\n"
              "trace to max_nframe and the maximum number of events to max_events.\n"
              "Set heap_sample_size to the granularity of the heap profiler, in bytes.\n"
-             "If heap_sample_size is set to 0, it is disabled entirely.\n");
+             "If heap_sample_size is set to 0, it is disabled entirely.\n"
+             "If heap_growth_snapshots is not 0, the allocation sites whose live size\n"
+             "grew over that many consecutive heap exports are exported as heap growth\n"
+             "samples, tracking at most heap_growth_max_sites sites.\n");
 static PyObject*
 memalloc_start(PyObject* Py_UNUSED(module), PyObject* args)
 {
@@ -240,9 +245,11 @@ memalloc_start(PyObject* Py_UNUSED(module), PyObject* args)
 
     long max_nframe, max_events;
     long long int heap_sample_size;
+    long heap_growth_snapshots = 0, heap_growth_max_sites = 0;
 
     /* Store short ints in ints so we're sure they fit */
-    if (!PyArg_ParseTuple(args, "llL", &max_nframe, &max_events, &heap_sample_size))
+    if (!PyArg_ParseTuple(
+          args, "llL|ll", &max_nframe, &max_events, &heap_sample_size, &heap_growth_snapshots, &heap_growth_max_sites))
         return NULL;
 
     if (max_nframe < 1 || max_nframe > TRACEBACK_MAX_NFRAME) {
@@ -264,6 +271,17 @@ memalloc_start(PyObject* Py_UNUSED(module), PyObject* args)
         return NULL;
     }
 
+    if (heap_growth_snapshots < 0 || heap_growth_snapshots > UINT16_MAX) {
+        PyErr_Format(PyExc_ValueError, "the number of heap growth snapshots must be in range [0; %u]", UINT16_MAX);
+        return NULL;
+    }
+
+    if (heap_growth_max_sites < 0 || heap_growth_max_sites > TRACEBACK_ARRAY_MAX_COUNT) {
+        PyErr_Format(
+          PyExc_ValueError, "the number of heap growth sites must be in range [0; %u]", TRACEBACK_ARRAY_MAX_COUNT);
+        return NULL;
+    }
+
     if (memalloc_tb_init(global_memalloc_ctx.max_nframe) < 0)
         return NULL;
 
@@ -276,7 +294,11 @@ memalloc_start(PyObject* Py_UNUSED(module), PyObject* args)
 
     memalloc_gil_debug_check_init(&global_memalloc_ctx.alloc_gil_guard);
 
-    memalloc_heap_tracker_init((uint32_t)heap_sample_size);
+    if (!memalloc_heap_tracker_init(
+          (uint32_t)heap_sample_size, (uint32_t)heap_growth_snapshots, (size_t)heap_growth_max_sites)) {
+        PyErr_SetString(PyExc_RuntimeError, "failed to allocate heap profiler state");
+        return NULL;
+    }
 
     PyMemAllocatorEx alloc;
 
@@ -358,6 +380,101 @@ memalloc_heap_py(PyObject* Py_UNUSED(module), PyObject* Py_UNUSED(args))
     return memalloc_heap();
 }
 
+PyDoc_STRVAR(memalloc_export_heap__doc__,
+             "export_heap($module, api, threads, ignored_threads)\n"
+             "--\n"
+             "\n"
+             "Push the sampled heap to libdatadog with the given sample API capsule.\n"
+             "\n"
+             "threads maps the ids of the known threads to (native id, name) tuples.\n"
+             "The samples of the threads in ignored_threads are skipped.\n"
+             "Returns the number of samples pushed.");
+static PyObject*
+memalloc_export_heap(PyObject* Py_UNUSED(module), PyObject* args)
+{
+    PyObject* api = NULL;
+    PyObject* threads = NULL;
+    PyObject* ignored_threads = NULL;
+
+    if (!PyArg_ParseTuple(args, "OOO", &api, &threads, &ignored_threads))
+        return NULL;
+
+    if (!global_alloc_tracker) {
+        PyErr_SetString(PyExc_RuntimeError, "the memalloc module was not started");
+        return NULL;
+    }
+
+    memalloc_exporter_t exporter;
+    if (!memalloc_exporter_init(&exporter, api, threads, ignored_threads, 0))
+        return NULL;
+
+    size_t n = memalloc_heap_export(&exporter);
+
+    memalloc_exporter_wipe(&exporter);
+
+    return PyLong_FromSize_t(n);
+}
+
+PyDoc_STRVAR(memalloc_export_events__doc__,
+             "export_events($module, api, threads, ignored_threads, monotonic_ns)\n"
+             "--\n"
+             "\n"
+             "Push the allocations sampled so far to libdatadog with the given sample\n"
+             "API capsule, and reset the traces of memory blocks allocated by Python.\n"
+             "\n"
+             "threads maps the ids of the known threads to (native id, name) tuples.\n"
+             "The samples of the threads in ignored_threads are skipped.\n"
+             "Returns the number of samples pushed.");
+static PyObject*
+memalloc_export_events(PyObject* Py_UNUSED(module), PyObject* args)
+{
+    PyObject* api = NULL;
+    PyObject* threads = NULL;
+    PyObject* ignored_threads = NULL;
+    long long monotonic_ns = 0;
+
+    if (!PyArg_ParseTuple(args, "OOOL", &api, &threads, &ignored_threads, &monotonic_ns))
+        return NULL;
+
+    memalloc_exporter_t exporter;
+    if (!memalloc_exporter_init(&exporter, api, threads, ignored_threads, (int64_t)monotonic_ns))
+        return NULL;
+
+    /* Swap the tracker out like iter_events does, so that the allocations made
+     * while exporting go to the new one */
+    alloc_tracker_t* tracker = alloc_tracker_new();
+    if (!tracker) {
+        memalloc_exporter_wipe(&exporter);
+        PyErr_SetString(PyExc_RuntimeError, "failed to allocate new allocation tracker");
+        return NULL;
+    }
+
+    MEMALLOC_GIL_DEBUG_CHECK_ACQUIRE(&global_memalloc_ctx.alloc_gil_guard);
+    if (!global_alloc_tracker) {
+        MEMALLOC_GIL_DEBUG_CHECK_RELEASE(&global_memalloc_ctx.alloc_gil_guard);
+        alloc_tracker_free(tracker);
+        memalloc_exporter_wipe(&exporter);
+        PyErr_SetString(PyExc_RuntimeError, "the memalloc module was not started");
+        return NULL;
+    }
+    alloc_tracker_t* exported = global_alloc_tracker;
+    global_alloc_tracker = tracker;
+    MEMALLOC_GIL_DEBUG_CHECK_RELEASE(&global_memalloc_ctx.alloc_gil_guard);
+
+    size_t n = 0;
+    for (TRACEBACK_ARRAY_COUNT_TYPE i = 0; i < exported->allocs.count; i++) {
+        if (memalloc_export_alloc_sample(
+              &exporter, exported->allocs.tab[i], exported->alloc_count, exported->allocs.count)) {
+            n++;
+        }
+    }
+
+    alloc_tracker_free(exported);
+    memalloc_exporter_wipe(&exporter);
+
+    return PyLong_FromSize_t(n);
+}
+
 typedef struct
 {
     PyObject_HEAD alloc_tracker_t* alloc_tracker;
@@ -511,6 +628,14 @@ static PyTypeObject MemallocIterEvents_Type = {
 static PyMethodDef module_methods[] = { { "start", (PyCFunction)memalloc_start, METH_VARARGS, memalloc_start__doc__ },
                                         { "stop", (PyCFunction)memalloc_stop, METH_NOARGS, memalloc_stop__doc__ },
                                         { "heap", (PyCFunction)memalloc_heap_py, METH_NOARGS, memalloc_heap_py__doc__ },
+                                        { "export_heap",
+                                          (PyCFunction)memalloc_export_heap,
+                                          METH_VARARGS,
+                                          memalloc_export_heap__doc__ },
+                                        { "export_events",
+                                          (PyCFunction)memalloc_export_events,
+                                          METH_VARARGS,
+                                          memalloc_export_events__doc__ },
                                         /* sentinel */
                                         { NULL, NULL, 0, NULL } };
 
@@ -9,7 +9,22 @@ StackType = event.StackTraceType
 # (stack, nframe, thread_id)
 TracebackType = typing.Tuple[StackType, int, int]
 
-def start(max_nframe: int, max_events: int, heap_sample_size: int) -> None: ...
+def start(
+    max_nframe: int,
+    max_events: int,
+    heap_sample_size: int,
+    heap_growth_snapshots: int = 0,
+    heap_growth_max_sites: int = 0,
+) -> None: ...
 def stop() -> None: ...
 def heap() -> typing.List[typing.Tuple[TracebackType, int]]: ...
 def iter_events() -> typing.Iterator[typing.Tuple[TracebackType, int]]: ...
+def export_heap(
+    api: object, threads: typing.Dict[int, typing.Tuple[int, typing.Optional[str]]], ignored_threads: typing.Iterable[int]
+) -> int: ...
+def export_events(
+    api: object,
+    threads: typing.Dict[int, typing.Tuple[int, typing.Optional[str]]],
+    ignored_threads: typing.Iterable[int],
+    monotonic_ns: int,
+) -> int: ...
@@ -0,0 +1,314 @@
+#include <stdlib.h>
+#include <string.h>
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#include "_memalloc_export.h"
+
+#define STRING_IDS_INITIAL_CAPACITY 1024
+
+static bool
+exporter_init_threads(memalloc_exporter_t* exporter, PyObject* threads)
+{
+    if (!PyDict_Check(threads)) {
+        PyErr_SetString(PyExc_TypeError, "threads must be a dict");
+        return false;
+    }
+
+    Py_ssize_t size = PyDict_Size(threads);
+    if (size == 0) {
+        return true;
+    }
+
+    exporter->threads = PyMem_RawCalloc((size_t)size, sizeof(memalloc_thread_info_t));
+    if (exporter->threads == NULL) {
+        PyErr_NoMemory();
+        return false;
+    }
+
+    PyObject* key = NULL;
+    PyObject* value = NULL;
+    Py_ssize_t pos = 0;
+    while (PyDict_Next(threads, &pos, &key, &value)) {
+        PyObject* native_id = NULL;
+        PyObject* name = NULL;
+        if (!PyTuple_Check(value) || PyTuple_GET_SIZE(value) != 2) {
+            PyErr_SetString(PyExc_TypeError, "thread information must be a (native id, name) tuple");
+            return false;
+        }
+        native_id = PyTuple_GET_ITEM(value, 0);
+        name = PyTuple_GET_ITEM(value, 1);
+
+        memalloc_thread_info_t* info = &exporter->threads[exporter->nthreads];
+        info->thread_id = PyLong_AsUnsignedLong(key);
+        if (info->thread_id == (unsigned long)-1 && PyErr_Occurred()) {
+            return false;
+        }
+        info->native_id = native_id == Py_None ? (int64_t)info->thread_id : PyLong_AsLongLong(native_id);
+        if (info->native_id == -1 && PyErr_Occurred()) {
+            return false;
+        }
+        if (PyUnicode_Check(name)) {
+            Py_ssize_t name_len = 0;
+            info->name = PyUnicode_AsUTF8AndSize(name, &name_len);
+            if (info->name == NULL) {
+                /* Thread names that cannot be encoded are dropped */
+                PyErr_Clear();
+                name_len = 0;
+            }
+            info->name_len = (size_t)name_len;
+        }
+        exporter->nthreads++;
+    }
+
+    return true;
+}
+
+static bool
+exporter_init_ignored_threads(memalloc_exporter_t* exporter, PyObject* ignored_threads)
+{
+    PyObject* seq = PySequence_Fast(ignored_threads, "ignored threads must be iterable");
+    if (seq == NULL) {
+        return false;
+    }
+
+    Py_ssize_t size = PySequence_Fast_GET_SIZE(seq);
+    if (size > 0) {
+        exporter->ignored_threads = PyMem_RawCalloc((size_t)size, sizeof(unsigned long));
+        if (exporter->ignored_threads == NULL) {
+            Py_DECREF(seq);
+            PyErr_NoMemory();
+            return false;
+        }
+    }
+
+    for (Py_ssize_t i = 0; i < size; i++) {
+        unsigned long thread_id = PyLong_AsUnsignedLong(PySequence_Fast_GET_ITEM(seq, i));
+        if (thread_id == (unsigned long)-1 && PyErr_Occurred()) {
+            Py_DECREF(seq);
+            return false;
+        }
+        exporter->ignored_threads[exporter->nignored_threads++] = thread_id;
+    }
+
+    Py_DECREF(seq);
+    return true;
+}
+
+bool
+memalloc_exporter_init(memalloc_exporter_t* exporter,
+                       PyObject* api_capsule,
+                       PyObject* threads,
+                       PyObject* ignored_threads,
+                       int64_t monotonic_ns)
+{
+    memset(exporter, 0, sizeof(memalloc_exporter_t));
+    exporter->monotonic_ns = monotonic_ns;
+
+    exporter->api = PyCapsule_GetPointer(api_capsule, DDUP_C_API_CAPSULE_NAME);
+    if (exporter->api == NULL) {
+        return false;
+    }
+    if (exporter->api->version != DDUP_C_API_VERSION) {
+        PyErr_Format(PyExc_ValueError,
+                     "unsupported sample API version %u, expected %u",
+                     exporter->api->version,
+                     DDUP_C_API_VERSION);
+        exporter->api = NULL;
+        return false;
+    }
+
+    exporter->string_ids = PyMem_RawCalloc(STRING_IDS_INITIAL_CAPACITY, sizeof(memalloc_string_id_t));
+    if (exporter->string_ids == NULL) {
+        PyErr_NoMemory();
+        return false;
+    }
+    exporter->string_ids_capacity = STRING_IDS_INITIAL_CAPACITY;
+
+    if (!exporter_init_threads(exporter, threads) || !exporter_init_ignored_threads(exporter, ignored_threads)) {
+        memalloc_exporter_wipe(exporter);
+        return false;
+    }
+
+    return true;
+}
+
+void
+memalloc_exporter_wipe(memalloc_exporter_t* exporter)
+{
+    PyMem_RawFree(exporter->threads);
+    PyMem_RawFree(exporter->ignored_threads);
+    PyMem_RawFree(exporter->string_ids);
+    memset(exporter, 0, sizeof(memalloc_exporter_t));
+}
+
+static inline size_t
+string_ids_slot(PyObject* key, size_t capacity)
+{
+    /* Fibonacci hashing of the address, without the alignment bits */
+    uint64_t h = ((uint64_t)(uintptr_t)key >> 4) * 0x9E3779B97F4A7C15ULL;
+    return (size_t)(h >> 32) & (capacity - 1);
+}
+
+static void
+string_ids_insert(memalloc_string_id_t* table, size_t capacity, PyObject* key, uint32_t id)
+{
+    size_t slot = string_ids_slot(key, capacity);
+    while (table[slot].key != NULL) {
+        slot = (slot + 1) & (capacity - 1);
+    }
+    table[slot].key = key;
+    table[slot].id = id;
+}
+
+static bool
+string_ids_grow(memalloc_exporter_t* exporter)
+{
+    size_t capacity = exporter->string_ids_capacity * 2;
+    memalloc_string_id_t* table = PyMem_RawCalloc(capacity, sizeof(memalloc_string_id_t));
+    if (table == NULL) {
+        return false;
+    }
+    for (size_t i = 0; i < exporter->string_ids_capacity; i++) {
+        if (exporter->string_ids[i].key != NULL) {
+            string_ids_insert(table, capacity, exporter->string_ids[i].key, exporter->string_ids[i].id);
+        }
+    }
+    PyMem_RawFree(exporter->string_ids);
+    exporter->string_ids = table;
+    exporter->string_ids_capacity = capacity;
+    return true;
+}
+
+/* Get the interned id of a Python string. Id 0 is the empty string. */
+static uint32_t
+exporter_string_id(memalloc_exporter_t* exporter, PyObject* string)
+{
+    size_t slot = string_ids_slot(string, exporter->string_ids_capacity);
+    while (exporter->string_ids[slot].key != NULL) {
+        if (exporter->string_ids[slot].key == string) {
+            return exporter->string_ids[slot].id;
+        }
+        slot = (slot + 1) & (exporter->string_ids_capacity - 1);
+    }
+
+    uint32_t id = 0;
+    if (PyUnicode_Check(string)) {
+        /* The UTF-8 representation is cached by the string object */
+        Py_ssize_t size = 0;
+        const char* utf8 = PyUnicode_AsUTF8AndSize(string, &size);
+        if (utf8 != NULL) {
+            id = exporter->api->intern_string(utf8, (size_t)size);
+        } else {
+            PyErr_Clear();
+        }
+    }
+
+    /* Keep the load factor under 50% */
+    if ((exporter->string_ids_count + 1) * 2 > exporter->string_ids_capacity && !string_ids_grow(exporter)) {
+        /* We can still export without caching the id */
+        return id;
+    }
+    string_ids_insert(exporter->string_ids, exporter->string_ids_capacity, string, id);
+    exporter->string_ids_count++;
+
+    return id;
+}
+
+bool
+memalloc_exporter_is_ignored(memalloc_exporter_t* exporter, unsigned long thread_id)
+{
+    for (size_t i = 0; i < exporter->nignored_threads; i++) {
+        if (exporter->ignored_threads[i] == thread_id) {
+            return true;
+        }
+    }
+    return false;
+}
+
+static void
+exporter_push_threadinfo(memalloc_exporter_t* exporter, ddup_c_sample_t* sample, unsigned long thread_id)
+{
+    for (size_t i = 0; i < exporter->nthreads; i++) {
+        memalloc_thread_info_t* info = &exporter->threads[i];
+        if (info->thread_id == thread_id) {
+            exporter->api->push_threadinfo(sample, (int64_t)thread_id, info->native_id, info->name, info->name_len);
+            return;
+        }
+    }
+
+    /* The thread is gone, so we only know its id */
+    exporter->api->push_threadinfo(sample, (int64_t)thread_id, (int64_t)thread_id, "", 0);
+}
+
+static void
+exporter_push_frames(memalloc_exporter_t* exporter, ddup_c_sample_t* sample, traceback_t* tb)
+{
+    for (uint16_t i = 0; i < tb->nframe; i++) {
+        frame_t* frame = &tb->frames[i];
+        exporter->api->push_frame_interned(sample,
+                                           exporter_string_id(exporter, frame->name),
+                                           exporter_string_id(exporter, frame->filename),
+                                           (int64_t)frame->lineno);
+    }
+}
+
+bool
+memalloc_export_heap_sample(memalloc_exporter_t* exporter, traceback_t* tb)
+{
+    if (memalloc_exporter_is_ignored(exporter, tb->thread_id)) {
+        return false;
+    }
+
+    ddup_c_sample_t* sample = exporter->api->start_sample();
+    if (sample == NULL) {
+        return false;
+    }
+    exporter->api->push_heap(sample, (int64_t)tb->size);
+    exporter_push_threadinfo(exporter, sample, tb->thread_id);
+    exporter_push_frames(exporter, sample, tb);
+    exporter->api->flush_sample(sample);
+    exporter->api->drop_sample(sample);
+
+    return true;
+}
+
+bool
+memalloc_export_alloc_sample(memalloc_exporter_t* exporter, traceback_t* tb, uint64_t alloc_count, uint64_t count)
+{
+    if (count == 0 || memalloc_exporter_is_ignored(exporter, tb->thread_id)) {
+        return false;
+    }
+
+    ddup_c_sample_t* sample = exporter->api->start_sample();
+    if (sample == NULL) {
+        return false;
+    }
+    exporter->api->push_monotonic_ns(sample, exporter->monotonic_ns);
+    /* Same scaling as the Python implementation */
+    exporter->api->push_alloc(sample, (int64_t)(((double)tb->size * (double)alloc_count) / (double)count), (int64_t)count);
+    exporter_push_threadinfo(exporter, sample, tb->thread_id);
+    exporter_push_frames(exporter, sample, tb);
+    exporter->api->flush_sample(sample);
+    exporter->api->drop_sample(sample);
+
+    return true;
+}
+
+bool
+memalloc_export_heap_growth_sample(memalloc_exporter_t* exporter, traceback_t* tb, int64_t growth)
+{
+    ddup_c_sample_t* sample = exporter->api->start_sample();
+    if (sample == NULL) {
+        return false;
+    }
+    exporter->api->push_heap_growth(sample, growth);
+    /* The growth of a site is aggregated over all the threads, so the sample
+     * has no thread information */
+    exporter_push_frames(exporter, sample, tb);
+    exporter->api->flush_sample(sample);
+    exporter->api->drop_sample(sample);
+
+    return true;
+}
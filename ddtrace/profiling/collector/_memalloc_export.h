@@ -0,0 +1,85 @@
+#ifndef _DDTRACE_MEMALLOC_EXPORT_H
+#define _DDTRACE_MEMALLOC_EXPORT_H
+
+#include <stdbool.h>
+#include <stddef.h>
+#include <stdint.h>
+
+#include <Python.h>
+
+#include "_memalloc_tb.h"
+#include "ddup_c_api.h"
+
+/* Information about a thread known at export time */
+typedef struct
+{
+    unsigned long thread_id;
+    int64_t native_id;
+    /* Borrowed from the Python string, which the caller keeps alive */
+    const char* name;
+    size_t name_len;
+} memalloc_thread_info_t;
+
+/* Interned string id of a Python string, keyed by the address of the string */
+typedef struct
+{
+    PyObject* key;
+    uint32_t id;
+} memalloc_string_id_t;
+
+/* memalloc_exporter_t pushes sampled tracebacks to libdatadog through the C
+ * sample API exported by ddup, without creating any Python object.
+ *
+ * Everything that requires the Python API, like resolving the API capsule and
+ * the names of the threads, is done once when the exporter is initialized.
+ * Frame names are interned once per export: the string ids are cached by the
+ * address of the Python strings, which the tracebacks keep alive for the
+ * duration of the export. */
+typedef struct
+{
+    const ddup_c_api_t* api;
+    memalloc_thread_info_t* threads;
+    size_t nthreads;
+    unsigned long* ignored_threads;
+    size_t nignored_threads;
+    /* Open addressing table of interned string ids */
+    memalloc_string_id_t* string_ids;
+    size_t string_ids_capacity;
+    size_t string_ids_count;
+    int64_t monotonic_ns;
+} memalloc_exporter_t;
+
+/* Initialize an exporter from the API capsule, a mapping of thread ids to
+ * (native id, name) tuples and an iterable of the ids of the threads whose
+ * samples must be ignored. The mapping must be kept alive until the exporter
+ * is wiped. Returns false with an exception set on failure. */
+bool
+memalloc_exporter_init(memalloc_exporter_t* exporter,
+                       PyObject* api_capsule,
+                       PyObject* threads,
+                       PyObject* ignored_threads,
+                       int64_t monotonic_ns);
+
+void
+memalloc_exporter_wipe(memalloc_exporter_t* exporter);
+
+/* Whether the samples of the given thread must be ignored */
+bool
+memalloc_exporter_is_ignored(memalloc_exporter_t* exporter, unsigned long thread_id);
+
+/* Push a heap sample for the traceback. Returns true if a sample was pushed. */
+bool
+memalloc_export_heap_sample(memalloc_exporter_t* exporter, traceback_t* tb);
+
+/* Push an allocation sample for the traceback, scaled by the total number of
+ * allocations over the number of sampled allocations. Returns true if a sample
+ * was pushed. */
+bool
+memalloc_export_alloc_sample(memalloc_exporter_t* exporter, traceback_t* tb, uint64_t alloc_count, uint64_t count);
+
+/* Push a heap growth sample of the given size for the allocation site of the
+ * traceback. Returns true if a sample was pushed. */
+bool
+memalloc_export_heap_growth_sample(memalloc_exporter_t* exporter, traceback_t* tb, int64_t growth);
+
+#endif
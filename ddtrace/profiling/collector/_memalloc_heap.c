@@ -4,6 +4,7 @@
 #define PY_SSIZE_T_CLEAN
 #include "_memalloc_debug.h"
 #include "_memalloc_heap.h"
+#include "_memalloc_heap_growth.h"
 #include "_memalloc_heap_map.h"
 #include "_memalloc_reentrant.h"
 #include "_memalloc_tb.h"
@@ -79,6 +80,8 @@ typedef struct
         memalloc_heap_map_t* allocs_m;
         ptr_array_t frees;
     } freezer;
+    /* Live size of the allocation sites across the exported heap profiles */
+    memalloc_heap_growth_t growth;
 
     /* Debug guard to assert that GIL-protected critical sections are maintained
      * while accessing the profiler's state */
@@ -122,6 +125,7 @@ heap_tracker_wipe(heap_tracker_t* heap_tracker)
     memalloc_heap_map_delete(heap_tracker->allocs_m);
     memalloc_heap_map_delete(heap_tracker->freezer.allocs_m);
     ptr_array_wipe(&heap_tracker->freezer.frees);
+    memalloc_heap_growth_wipe(&heap_tracker->growth);
 }
 
 static void
@@ -179,12 +183,17 @@ heap_tracker_thaw(heap_tracker_t* heap_tracker)
 
 /* Public API */
 
-void
-memalloc_heap_tracker_init(uint32_t sample_size)
+bool
+memalloc_heap_tracker_init(uint32_t sample_size, uint32_t growth_snapshots, size_t growth_max_sites)
 {
     heap_tracker_init(&global_heap_tracker);
+    if (!memalloc_heap_growth_init(&global_heap_tracker.growth, growth_snapshots, growth_max_sites)) {
+        heap_tracker_wipe(&global_heap_tracker);
+        return false;
+    }
     global_heap_tracker.sample_size = sample_size;
     global_heap_tracker.current_sample_size = heap_tracker_next_sample_size(sample_size);
+    return true;
 }
 
 void
@@ -357,3 +366,20 @@ memalloc_heap(void)
 
     return heap_list;
 }
+
+size_t
+memalloc_heap_export(memalloc_exporter_t* exporter)
+{
+    heap_tracker_freeze(&global_heap_tracker);
+
+    /* Same as memalloc_heap, but the samples are pushed directly to the
+     * exporter instead of being converted to Python objects. The growth of the
+     * allocation sites since the previous exports is pushed while the
+     * tracebacks are still owned by this thread. */
+    size_t n = memalloc_heap_map_export_samples(global_heap_tracker.allocs_m, exporter, &global_heap_tracker.growth);
+    memalloc_heap_growth_export(&global_heap_tracker.growth, exporter);
+
+    heap_tracker_thaw(&global_heap_tracker);
+
+    return n;
+}
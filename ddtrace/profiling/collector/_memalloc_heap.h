@@ -7,19 +7,29 @@
 
 #include <Python.h>
 
+#include "_memalloc_export.h"
 #include "_utils.h"
 
 /* The maximum heap sample size is the maximum value we can store in a heap_tracker_t.allocated_memory */
 #define MAX_HEAP_SAMPLE_SIZE UINT32_MAX
 
-void
-memalloc_heap_tracker_init(uint32_t sample_size);
+/* Start tracking the heap. If growth_snapshots is not 0, the allocation sites
+ * which grew over that many consecutive exports are reported as heap growth
+ * samples, tracking at most growth_max_sites sites. Returns false if the
+ * tracker could not be allocated. */
+bool
+memalloc_heap_tracker_init(uint32_t sample_size, uint32_t growth_snapshots, size_t growth_max_sites);
 void
 memalloc_heap_tracker_deinit(void);
 
 PyObject*
 memalloc_heap();
 
+/* Push the sampled heap with the given exporter, along with the growth of the
+ * allocation sites, and return the number of heap samples pushed */
+size_t
+memalloc_heap_export(memalloc_exporter_t* exporter);
+
 void
 memalloc_heap_track(uint16_t max_nframe, void* ptr, size_t size, PyMemAllocatorDomain domain);
 void
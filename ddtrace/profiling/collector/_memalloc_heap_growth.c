@@ -0,0 +1,164 @@
+#include <string.h>
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#include "_memalloc_heap_growth.h"
+
+static inline uint64_t
+heap_growth_mix(uint64_t h)
+{
+    /* splitmix64 finalizer */
+    h ^= h >> 30;
+    h *= 0xBF58476D1CE4E5B9ULL;
+    h ^= h >> 27;
+    h *= 0x94D049BB133111EBULL;
+    h ^= h >> 31;
+    return h;
+}
+
+static inline uint64_t
+heap_growth_string_hash(PyObject* string)
+{
+    /* The hash of the strings is cached by the string objects, and does not
+     * depend on their address, so that the sites are stable even if the code
+     * objects they come from are recreated. */
+    Py_hash_t h = PyObject_Hash(string);
+    if (h == -1) {
+        PyErr_Clear();
+        return (uint64_t)(uintptr_t)string;
+    }
+    return (uint64_t)h;
+}
+
+static uint64_t
+heap_growth_traceback_hash(traceback_t* tb)
+{
+    uint64_t h = tb->nframe;
+    for (uint16_t i = 0; i < tb->nframe; i++) {
+        frame_t* frame = &tb->frames[i];
+        h = heap_growth_mix(h ^ heap_growth_string_hash(frame->filename));
+        h = heap_growth_mix(h ^ heap_growth_string_hash(frame->name));
+        h = heap_growth_mix(h ^ frame->lineno);
+    }
+    /* 0 marks the empty slots */
+    return h == 0 ? 1 : h;
+}
+
+/* Find the slot of the site with the given hash, or the empty slot where it
+ * belongs */
+static memalloc_heap_site_t*
+heap_growth_slot(memalloc_heap_site_t* table, size_t capacity, uint64_t hash)
+{
+    size_t slot = (size_t)hash & (capacity - 1);
+    while (table[slot].hash != 0 && table[slot].hash != hash) {
+        slot = (slot + 1) & (capacity - 1);
+    }
+    return &table[slot];
+}
+
+bool
+memalloc_heap_growth_init(memalloc_heap_growth_t* growth, uint32_t snapshots, size_t max_sites)
+{
+    memset(growth, 0, sizeof(memalloc_heap_growth_t));
+    if (snapshots == 0 || max_sites == 0) {
+        return true;
+    }
+
+    /* Keep the load factor under 50% */
+    size_t capacity = 1;
+    while (capacity < max_sites * 2) {
+        capacity <<= 1;
+    }
+
+    growth->previous = PyMem_RawCalloc(capacity, sizeof(memalloc_heap_site_t));
+    growth->current = PyMem_RawCalloc(capacity, sizeof(memalloc_heap_site_t));
+    if (growth->previous == NULL || growth->current == NULL) {
+        memalloc_heap_growth_wipe(growth);
+        return false;
+    }
+    growth->capacity = capacity;
+    growth->max_sites = max_sites;
+    growth->snapshots = snapshots;
+
+    return true;
+}
+
+void
+memalloc_heap_growth_wipe(memalloc_heap_growth_t* growth)
+{
+    PyMem_RawFree(growth->previous);
+    PyMem_RawFree(growth->current);
+    memset(growth, 0, sizeof(memalloc_heap_growth_t));
+}
+
+void
+memalloc_heap_growth_add(memalloc_heap_growth_t* growth, traceback_t* tb)
+{
+    if (growth->current == NULL) {
+        return;
+    }
+
+    uint64_t hash = heap_growth_traceback_hash(tb);
+    memalloc_heap_site_t* site = heap_growth_slot(growth->current, growth->capacity, hash);
+    if (site->hash == 0) {
+        if (growth->count >= growth->max_sites) {
+            return;
+        }
+        site->hash = hash;
+        site->tb = tb;
+        growth->count++;
+    }
+    site->size += tb->size;
+}
+
+size_t
+memalloc_heap_growth_export(memalloc_heap_growth_t* growth, memalloc_exporter_t* exporter)
+{
+    if (growth->current == NULL) {
+        return 0;
+    }
+
+    size_t n = 0;
+    uint32_t snapshot = ++growth->snapshot;
+    for (size_t i = 0; i < growth->capacity; i++) {
+        memalloc_heap_site_t* site = &growth->current[i];
+        if (site->hash == 0) {
+            continue;
+        }
+
+        memalloc_heap_site_t* previous = heap_growth_slot(growth->previous, growth->capacity, site->hash);
+        if (previous->hash == 0 || site->size < previous->size) {
+            /* New or shrinking sites start over */
+            site->streak = 0;
+            site->base_size = site->size;
+            site->last_growth = 0;
+        } else {
+            site->streak = previous->streak + 1;
+            site->base_size = previous->base_size;
+            site->last_growth = site->size > previous->size ? snapshot : previous->last_growth;
+        }
+
+        /* Report the sites which did not shrink over the last snapshots, and
+         * which are still growing, so that the sites that were filled once,
+         * like caches, stop being reported. */
+        if (site->streak >= growth->snapshots && site->size > site->base_size && site->last_growth != 0 &&
+            snapshot - site->last_growth < growth->snapshots) {
+            if (memalloc_export_heap_growth_sample(exporter, site->tb, (int64_t)(site->size - site->base_size))) {
+                n++;
+            }
+        }
+        /* The traceback is freed once the heap tracker is thawed */
+        site->tb = NULL;
+    }
+
+    /* The sites of this snapshot become the previous ones, and the sites which
+     * were not seen in this snapshot are dropped */
+    memalloc_heap_site_t* previous = growth->previous;
+    growth->previous = growth->current;
+    growth->current = previous;
+    memset(growth->current, 0, growth->capacity * sizeof(memalloc_heap_site_t));
+    growth->count = 0;
+
+    return n;
+}
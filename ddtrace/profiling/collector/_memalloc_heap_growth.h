@@ -0,0 +1,73 @@
+#ifndef _DDTRACE_MEMALLOC_HEAP_GROWTH_H
+#define _DDTRACE_MEMALLOC_HEAP_GROWTH_H
+
+#include <stdbool.h>
+#include <stddef.h>
+#include <stdint.h>
+
+#include "_memalloc_export.h"
+#include "_memalloc_tb.h"
+
+/* Live size of the sampled allocations of an allocation site, i.e. of the
+ * tracebacks with the same frames */
+typedef struct
+{
+    /* Hash of the frames of the site, 0 for empty slots */
+    uint64_t hash;
+    /* Live size of the site in the last snapshot */
+    uint64_t size;
+    /* Live size of the site when it started growing */
+    uint64_t base_size;
+    /* Number of consecutive snapshots in which the site did not shrink */
+    uint32_t streak;
+    /* Snapshot in which the live size of the site last increased */
+    uint32_t last_growth;
+    /* One of the tracebacks of the site. Only valid while the snapshot is
+     * being taken, since the tracebacks belong to the heap tracker. */
+    traceback_t* tb;
+} memalloc_heap_site_t;
+
+/* memalloc_heap_growth_t tracks the live size of the allocation sites across
+ * consecutive heap snapshots, to find the sites whose live size keeps growing,
+ * which are likely leaking memory.
+ *
+ * The sites are kept in two fixed-size open addressing tables: the one of the
+ * previous snapshot and the one being built for the current snapshot, which are
+ * swapped once the snapshot is complete. The memory used is therefore bounded
+ * by the maximum number of sites, and the sites that are not sampled anymore
+ * are dropped with the previous table. Sites seen once the table of the current
+ * snapshot is full are not tracked. */
+typedef struct
+{
+    memalloc_heap_site_t* previous;
+    memalloc_heap_site_t* current;
+    /* Number of slots of the tables, a power of two */
+    size_t capacity;
+    size_t max_sites;
+    size_t count;
+    /* Number of consecutive growing snapshots for a site to be reported */
+    uint32_t snapshots;
+    /* Number of the current snapshot */
+    uint32_t snapshot;
+} memalloc_heap_growth_t;
+
+/* Initialize the tracker to report the sites which grew over the given number
+ * of snapshots, tracking at most max_sites sites. Returns false if the tables
+ * could not be allocated. */
+bool
+memalloc_heap_growth_init(memalloc_heap_growth_t* growth, uint32_t snapshots, size_t max_sites);
+
+void
+memalloc_heap_growth_wipe(memalloc_heap_growth_t* growth);
+
+/* Account a sampled allocation to the snapshot being taken */
+void
+memalloc_heap_growth_add(memalloc_heap_growth_t* growth, traceback_t* tb);
+
+/* Complete the snapshot being taken, and push a heap growth sample for each
+ * site that grew over the configured number of snapshots with the given
+ * exporter. Returns the number of samples pushed. */
+size_t
+memalloc_heap_growth_export(memalloc_heap_growth_t* growth, memalloc_exporter_t* exporter);
+
+#endif
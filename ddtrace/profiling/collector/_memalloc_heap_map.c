@@ -3,6 +3,8 @@
 #include <Python.h>
 
 #include "_memalloc_debug.h"
+#include "_memalloc_export.h"
+#include "_memalloc_heap_growth.h"
 #include "_memalloc_tb.h"
 #include "vendor/cwisstable.h"
 
@@ -157,6 +159,22 @@ memalloc_heap_map_export(memalloc_heap_map_t* m)
     return heap_list;
 }
 
+size_t
+memalloc_heap_map_export_samples(memalloc_heap_map_t* m, memalloc_exporter_t* exporter, memalloc_heap_growth_t* growth)
+{
+    size_t n = 0;
+    HeapSamples_CIter it = HeapSamples_citer(&m->map);
+    for (const HeapSamples_Entry* e = HeapSamples_CIter_get(&it); e != NULL; e = HeapSamples_CIter_next(&it)) {
+        if (memalloc_export_heap_sample(exporter, e->val)) {
+            n++;
+        }
+        if (!memalloc_exporter_is_ignored(exporter, e->val->thread_id)) {
+            memalloc_heap_growth_add(growth, e->val);
+        }
+    }
+    return n;
+}
+
 void
 memalloc_heap_map_destructive_copy(memalloc_heap_map_t* dst, memalloc_heap_map_t* src)
 {
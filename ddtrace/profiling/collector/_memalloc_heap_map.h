@@ -2,6 +2,8 @@
 
 #include <Python.h>
 
+#include "_memalloc_export.h"
+#include "_memalloc_heap_growth.h"
 #include "_memalloc_tb.h"
 
 /* memalloc_heap_map_t tracks sampled allocations by their address.
@@ -35,6 +37,12 @@ memalloc_heap_map_remove(memalloc_heap_map_t* m, void* key);
 PyObject*
 memalloc_heap_map_export(memalloc_heap_map_t* m);
 
+/* Push a heap sample for each tracked allocation with the given exporter, and
+ * account the allocations to the heap growth snapshot being taken.
+ * Returns the number of samples pushed */
+size_t
+memalloc_heap_map_export_samples(memalloc_heap_map_t* m, memalloc_exporter_t* exporter, memalloc_heap_growth_t* growth);
+
 /* Copy the contents of src into dst, removing the items from src */
 void
 memalloc_heap_map_destructive_copy(memalloc_heap_map_t* dst, memalloc_heap_map_t* src);
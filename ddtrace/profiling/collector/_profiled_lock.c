@@ -0,0 +1,756 @@
+#include <stdbool.h>
+#include <stdint.h>
+#include <string.h>
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <frameobject.h>
+#include <pythread.h>
+
+#include "_pymacro.h"
+#include "ddup_c_api.h"
+
+#ifdef _PY39_AND_LATER
+#define profiled_lock_vectorcall PyObject_Vectorcall
+#else
+#define profiled_lock_vectorcall _PyObject_Vectorcall
+#endif
+
+/* Maximum number of arguments forwarded to the wrapped lock without allocating */
+#define PROFILED_LOCK_MAX_ARGS 8
+
+/* Names of the forwarded methods, interned when the module is initialized */
+static PyObject* acquire_string = NULL;
+static PyObject* release_string = NULL;
+static PyObject* enter_string = NULL;
+static PyObject* exit_string = NULL;
+static PyObject* aenter_string = NULL;
+static PyObject* aexit_string = NULL;
+
+typedef enum
+{
+    LOCK_EVENT_ACQUIRE,
+    LOCK_EVENT_RELEASE,
+} lock_event_t;
+
+static int64_t
+monotonic_ns(void)
+{
+#if PY_VERSION_HEX >= 0x030d0000
+    PyTime_t now;
+    if (PyTime_MonotonicRaw(&now) < 0) {
+        return 0;
+    }
+    return (int64_t)now;
+#else
+    return (int64_t)_PyTime_GetMonotonicClock();
+#endif
+}
+
+/* LockSampler holds the state shared by all the locks of a collector: the
+ * sample API, the capture sampler and the hooks used to retrieve what only
+ * Python knows about, i.e. the thread, task and span context of a sample and
+ * the name of the variable holding a lock. The hooks are only called for
+ * sampled events. */
+typedef struct
+{
+    PyObject_HEAD const ddup_c_api_t* api;
+    double capture_pct;
+    double counter;
+    uint16_t max_nframes;
+    /* Called with the thread id, returns the context tuple of a sample */
+    PyObject* context;
+    /* Called with the lock and the frame using it, returns the variable name of the lock */
+    PyObject* name_resolver;
+} LockSampler;
+
+/* Same logic as ddtrace.profiling.collector.CaptureSampler. The state is
+ * protected by the GIL. */
+static inline bool
+lock_sampler_capture(LockSampler* sampler)
+{
+    sampler->counter += sampler->capture_pct;
+    if (sampler->counter >= 100) {
+        sampler->counter -= 100;
+        return true;
+    }
+    return false;
+}
+
+static int
+LockSampler_init(LockSampler* self, PyObject* args, PyObject* kwargs)
+{
+    static char* kwlist[] = { "api", "capture_pct", "max_nframes", "context", "name_resolver", NULL };
+    PyObject* api_capsule = NULL;
+    double capture_pct = 0;
+    unsigned short max_nframes = 0;
+    PyObject* context = NULL;
+    PyObject* name_resolver = NULL;
+
+    if (!PyArg_ParseTupleAndKeywords(
+          args, kwargs, "OdHOO", kwlist, &api_capsule, &capture_pct, &max_nframes, &context, &name_resolver)) {
+        return -1;
+    }
+
+    if (capture_pct < 0 || capture_pct > 100) {
+        PyErr_SetString(PyExc_ValueError, "Capture percentage should be between 0 and 100 included");
+        return -1;
+    }
+
+    if (!PyCallable_Check(context) || !PyCallable_Check(name_resolver)) {
+        PyErr_SetString(PyExc_TypeError, "context and name_resolver must be callable");
+        return -1;
+    }
+
+    const ddup_c_api_t* api = PyCapsule_GetPointer(api_capsule, DDUP_C_API_CAPSULE_NAME);
+    if (api == NULL) {
+        return -1;
+    }
+    if (api->version != DDUP_C_API_VERSION) {
+        PyErr_Format(
+          PyExc_ValueError, "unsupported sample API version %u, expected %u", api->version, DDUP_C_API_VERSION);
+        return -1;
+    }
+
+    self->api = api;
+    self->capture_pct = capture_pct;
+    self->counter = 0;
+    self->max_nframes = max_nframes;
+    Py_INCREF(context);
+    Py_XSETREF(self->context, context);
+    Py_INCREF(name_resolver);
+    Py_XSETREF(self->name_resolver, name_resolver);
+
+    return 0;
+}
+
+static int
+LockSampler_traverse(LockSampler* self, visitproc visit, void* arg)
+{
+    Py_VISIT(self->context);
+    Py_VISIT(self->name_resolver);
+    return 0;
+}
+
+static int
+LockSampler_clear(LockSampler* self)
+{
+    Py_CLEAR(self->context);
+    Py_CLEAR(self->name_resolver);
+    return 0;
+}
+
+static void
+LockSampler_dealloc(LockSampler* self)
+{
+    PyObject_GC_UnTrack(self);
+    LockSampler_clear(self);
+    Py_TYPE(self)->tp_free((PyObject*)self);
+}
+
+PyDoc_STRVAR(LockSampler__doc__,
+             "LockSampler(api, capture_pct, max_nframes, context, name_resolver)\n"
+             "--\n"
+             "\n"
+             "Sampling state shared by the profiled locks of a collector.\n");
+
+static PyTypeObject LockSamplerType = {
+    PyVarObject_HEAD_INIT(NULL, 0).tp_name = "ddtrace.profiling.collector._profiled_lock.LockSampler",
+    .tp_basicsize = sizeof(LockSampler),
+    .tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC,
+    .tp_doc = LockSampler__doc__,
+    .tp_new = PyType_GenericNew,
+    .tp_init = (initproc)LockSampler_init,
+    .tp_traverse = (traverseproc)LockSampler_traverse,
+    .tp_clear = (inquiry)LockSampler_clear,
+    .tp_dealloc = (destructor)LockSampler_dealloc,
+};
+
+typedef struct
+{
+    PyObject_HEAD PyObject* wrapped;
+    LockSampler* sampler;
+    /* The name of the lock, in the format "<file>:<line>[:<variable>]". The
+     * variable name is resolved the first time an acquire is sampled. */
+    char* name;
+    size_t name_len;
+    bool name_resolved;
+    /* Time at which the lock was acquired, if the acquire was sampled */
+    int64_t acquired_at;
+    PyObject* weakreflist;
+} ProfiledLock;
+
+static int
+ProfiledLock_init(ProfiledLock* self, PyObject* args, PyObject* kwargs)
+{
+    static char* kwlist[] = { "wrapped", "sampler", "init_loc", NULL };
+    PyObject* wrapped = NULL;
+    LockSampler* sampler = NULL;
+    const char* init_loc = NULL;
+    Py_ssize_t init_loc_len = 0;
+
+    if (!PyArg_ParseTupleAndKeywords(
+          args, kwargs, "OO!s#", kwlist, &wrapped, &LockSamplerType, &sampler, &init_loc, &init_loc_len)) {
+        return -1;
+    }
+
+    char* name = PyMem_RawMalloc((size_t)init_loc_len + 1);
+    if (name == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    memcpy(name, init_loc, (size_t)init_loc_len + 1);
+    PyMem_RawFree(self->name);
+    self->name = name;
+    self->name_len = (size_t)init_loc_len;
+    self->name_resolved = false;
+    self->acquired_at = 0;
+
+    Py_INCREF(wrapped);
+    Py_XSETREF(self->wrapped, wrapped);
+    Py_INCREF(sampler);
+    Py_XSETREF(self->sampler, sampler);
+
+    return 0;
+}
+
+static int
+ProfiledLock_traverse(ProfiledLock* self, visitproc visit, void* arg)
+{
+    Py_VISIT(self->wrapped);
+    Py_VISIT(self->sampler);
+    return 0;
+}
+
+static int
+ProfiledLock_clear(ProfiledLock* self)
+{
+    Py_CLEAR(self->wrapped);
+    Py_CLEAR(self->sampler);
+    return 0;
+}
+
+static void
+ProfiledLock_dealloc(ProfiledLock* self)
+{
+    PyObject_GC_UnTrack(self);
+    if (self->weakreflist != NULL) {
+        PyObject_ClearWeakRefs((PyObject*)self);
+    }
+    ProfiledLock_clear(self);
+    PyMem_RawFree(self->name);
+    Py_TYPE(self)->tp_free((PyObject*)self);
+}
+
+/* Call a method of the wrapped lock */
+static PyObject*
+profiled_lock_call_wrapped(ProfiledLock* self,
+                           PyObject* method_name,
+                           PyObject* const* args,
+                           Py_ssize_t nargs,
+                           PyObject* kwnames)
+{
+    if (self->wrapped == NULL) {
+        PyErr_SetString(PyExc_ValueError, "wrapper has not been initialized");
+        return NULL;
+    }
+
+#ifdef _PY39_AND_LATER
+    /* Avoid creating a bound method when the arguments fit on the stack */
+    Py_ssize_t nkwargs = kwnames == NULL ? 0 : PyTuple_GET_SIZE(kwnames);
+    if (nargs + nkwargs < PROFILED_LOCK_MAX_ARGS) {
+        PyObject* stack[PROFILED_LOCK_MAX_ARGS];
+        stack[0] = self->wrapped;
+        for (Py_ssize_t i = 0; i < nargs + nkwargs; i++) {
+            stack[i + 1] = args[i];
+        }
+        return PyObject_VectorcallMethod(method_name, stack, (size_t)(nargs + 1), kwnames);
+    }
+#endif
+
+    PyObject* method = PyObject_GetAttr(self->wrapped, method_name);
+    if (method == NULL) {
+        return NULL;
+    }
+    PyObject* result = profiled_lock_vectorcall(method, args, (size_t)nargs, kwnames);
+    Py_DECREF(method);
+    return result;
+}
+
+/* Resolve the name of the variable holding the lock in the given frame, and
+ * cache the full name of the lock. */
+static void
+profiled_lock_resolve_name(ProfiledLock* self, PyFrameObject* frame)
+{
+    PyObject* variable = PyObject_CallFunctionObjArgs(self->sampler->name_resolver, self, frame, NULL);
+    if (variable == NULL) {
+        PyErr_Clear();
+        return;
+    }
+
+    /* Another thread might have resolved the name while we were calling into Python */
+    if (!self->name_resolved && PyUnicode_Check(variable)) {
+        Py_ssize_t variable_len = 0;
+        const char* utf8 = PyUnicode_AsUTF8AndSize(variable, &variable_len);
+        if (utf8 == NULL) {
+            PyErr_Clear();
+        } else if (variable_len == 0) {
+            self->name_resolved = true;
+        } else {
+            size_t name_len = self->name_len + 1 + (size_t)variable_len;
+            char* name = PyMem_RawRealloc(self->name, name_len + 1);
+            if (name != NULL) {
+                name[self->name_len] = ':';
+                memcpy(name + self->name_len + 1, utf8, (size_t)variable_len + 1);
+                self->name = name;
+                self->name_len = name_len;
+                self->name_resolved = true;
+            }
+        }
+    }
+
+    Py_DECREF(variable);
+}
+
+static void
+profiled_lock_push_string(ddup_c_sample_t* sample, void (*push)(ddup_c_sample_t*, const char*, size_t), PyObject* string)
+{
+    if (!PyUnicode_Check(string)) {
+        return;
+    }
+    Py_ssize_t len = 0;
+    const char* utf8 = PyUnicode_AsUTF8AndSize(string, &len);
+    if (utf8 == NULL) {
+        PyErr_Clear();
+        return;
+    }
+    push(sample, utf8, (size_t)len);
+}
+
+/* Push the thread, task and span information returned by the context hook,
+ * and return the frame of the task, if any, as a borrowed reference. The
+ * context is a tuple of (thread native id, thread name, task id, task name,
+ * task frame, span id, local root span id, trace type). */
+static PyFrameObject*
+profiled_lock_push_context(const ddup_c_api_t* api,
+                           ddup_c_sample_t* sample,
+                           unsigned long thread_id,
+                           PyObject* context)
+{
+    int64_t thread_native_id = (int64_t)thread_id;
+    const char* thread_name = "";
+    Py_ssize_t thread_name_len = 0;
+
+    if (context == NULL || !PyTuple_Check(context) || PyTuple_GET_SIZE(context) != 8) {
+        api->push_threadinfo(sample, (int64_t)thread_id, thread_native_id, thread_name, 0);
+        return NULL;
+    }
+
+    PyObject* item = PyTuple_GET_ITEM(context, 0);
+    if (PyLong_Check(item)) {
+        thread_native_id = PyLong_AsLongLong(item);
+        if (thread_native_id == -1 && PyErr_Occurred()) {
+            PyErr_Clear();
+            thread_native_id = (int64_t)thread_id;
+        }
+    }
+
+    item = PyTuple_GET_ITEM(context, 1);
+    if (PyUnicode_Check(item)) {
+        thread_name = PyUnicode_AsUTF8AndSize(item, &thread_name_len);
+        if (thread_name == NULL) {
+            PyErr_Clear();
+            thread_name = "";
+            thread_name_len = 0;
+        }
+    }
+    api->push_threadinfo(sample, (int64_t)thread_id, thread_native_id, thread_name, (size_t)thread_name_len);
+
+    item = PyTuple_GET_ITEM(context, 2);
+    if (PyLong_Check(item)) {
+        int64_t task_id = PyLong_AsLongLong(item);
+        if (task_id == -1 && PyErr_Occurred()) {
+            PyErr_Clear();
+        } else {
+            api->push_task_id(sample, task_id);
+        }
+    }
+    profiled_lock_push_string(sample, api->push_task_name, PyTuple_GET_ITEM(context, 3));
+
+    item = PyTuple_GET_ITEM(context, 5);
+    if (PyLong_Check(item)) {
+        uint64_t span_id = PyLong_AsUnsignedLongLong(item);
+        if (span_id == (uint64_t)-1 && PyErr_Occurred()) {
+            PyErr_Clear();
+        } else if (span_id != 0) {
+            api->push_span_id(sample, span_id);
+        }
+    }
+
+    item = PyTuple_GET_ITEM(context, 6);
+    if (PyLong_Check(item)) {
+        uint64_t local_root_span_id = PyLong_AsUnsignedLongLong(item);
+        if (local_root_span_id == (uint64_t)-1 && PyErr_Occurred()) {
+            PyErr_Clear();
+        } else if (local_root_span_id != 0) {
+            api->push_local_root_span_id(sample, local_root_span_id);
+        }
+    }
+    profiled_lock_push_string(sample, api->push_trace_type, PyTuple_GET_ITEM(context, 7));
+
+    item = PyTuple_GET_ITEM(context, 4);
+    return PyFrame_Check(item) ? (PyFrameObject*)item : NULL;
+}
+
+static uint32_t
+profiled_lock_intern(const ddup_c_api_t* api, PyObject* string)
+{
+    if (string == NULL || !PyUnicode_Check(string)) {
+        return 0;
+    }
+    /* The UTF-8 representation is cached by the string object */
+    Py_ssize_t len = 0;
+    const char* utf8 = PyUnicode_AsUTF8AndSize(string, &len);
+    if (utf8 == NULL) {
+        PyErr_Clear();
+        return 0;
+    }
+    return api->intern_string(utf8, (size_t)len);
+}
+
+/* Push the frames of the stack starting at the given frame */
+static void
+profiled_lock_push_frames(const ddup_c_api_t* api,
+                          ddup_c_sample_t* sample,
+                          PyFrameObject* pyframe,
+                          uint16_t max_nframes)
+{
+#ifdef _PY39_AND_LATER
+    Py_XINCREF(pyframe);
+#endif
+    for (uint16_t nframes = 0; pyframe != NULL && nframes < max_nframes; nframes++) {
+        int lineno = PyFrame_GetLineNumber(pyframe);
+#ifdef _PY39_AND_LATER
+        PyCodeObject* code = PyFrame_GetCode(pyframe);
+#else
+        PyCodeObject* code = pyframe->f_code;
+#endif
+        if (code != NULL) {
+            api->push_frame_interned(sample,
+                                     profiled_lock_intern(api, code->co_name),
+                                     profiled_lock_intern(api, code->co_filename),
+                                     lineno < 0 ? 0 : lineno);
+        }
+
+#ifdef _PY39_AND_LATER
+        Py_XDECREF(code);
+        PyFrameObject* back = PyFrame_GetBack(pyframe);
+        Py_DECREF(pyframe);
+        pyframe = back;
+#else
+        pyframe = pyframe->f_back;
+#endif
+    }
+#ifdef _PY39_AND_LATER
+    Py_XDECREF(pyframe);
+#endif
+}
+
+/* Push a sample for a sampled lock event. Errors are never propagated to the
+ * user of the lock, and any exception raised by the wrapped lock is kept. */
+static void
+profiled_lock_push_sample(ProfiledLock* self, lock_event_t event, int64_t value, int64_t end)
+{
+    LockSampler* sampler = self->sampler;
+    const ddup_c_api_t* api = sampler->api;
+
+#if PY_VERSION_HEX >= 0x030c0000
+    PyObject* exc = PyErr_GetRaisedException();
+#else
+    PyObject *exc_type, *exc_value, *exc_tb;
+    PyErr_Fetch(&exc_type, &exc_value, &exc_tb);
+#endif
+
+    /* The lock methods are implemented in C, so the current frame is the one
+     * of the caller of the lock. */
+    PyFrameObject* frame = PyEval_GetFrame();
+    if (!self->name_resolved && event == LOCK_EVENT_ACQUIRE && frame != NULL) {
+        profiled_lock_resolve_name(self, frame);
+    }
+
+    unsigned long thread_id = PyThread_get_thread_ident();
+    PyObject* context = PyObject_CallFunction(sampler->context, "k", thread_id);
+    if (context == NULL) {
+        PyErr_Clear();
+    }
+
+    ddup_c_sample_t* sample = api->start_sample();
+    if (sample != NULL) {
+        api->push_monotonic_ns(sample, end);
+        api->push_lock_name(sample, self->name, self->name_len);
+        if (event == LOCK_EVENT_ACQUIRE) {
+            api->push_acquire(sample, value, 1);
+        } else {
+            api->push_release(sample, value, 1);
+        }
+        PyFrameObject* task_frame = profiled_lock_push_context(api, sample, thread_id, context);
+        profiled_lock_push_frames(api, sample, task_frame != NULL ? task_frame : frame, sampler->max_nframes);
+        api->flush_sample(sample);
+        api->drop_sample(sample);
+    }
+
+    Py_XDECREF(context);
+    PyErr_Clear();
+
+#if PY_VERSION_HEX >= 0x030c0000
+    PyErr_SetRaisedException(exc);
+#else
+    PyErr_Restore(exc_type, exc_value, exc_tb);
+#endif
+}
+
+static PyObject*
+profiled_lock_acquire_impl(ProfiledLock* self,
+                           PyObject* method_name,
+                           PyObject* const* args,
+                           Py_ssize_t nargs,
+                           PyObject* kwnames)
+{
+    if (self->sampler == NULL || !lock_sampler_capture(self->sampler)) {
+        return profiled_lock_call_wrapped(self, method_name, args, nargs, kwnames);
+    }
+
+    int64_t start = monotonic_ns();
+    PyObject* result = profiled_lock_call_wrapped(self, method_name, args, nargs, kwnames);
+    int64_t end = monotonic_ns();
+
+    /* Only account for the release if the lock was actually acquired */
+    if (result != NULL && result != Py_False) {
+        self->acquired_at = end;
+    }
+    profiled_lock_push_sample(self, LOCK_EVENT_ACQUIRE, end - start, end);
+
+    return result;
+}
+
+static PyObject*
+profiled_lock_release_impl(ProfiledLock* self,
+                           PyObject* method_name,
+                           PyObject* const* args,
+                           Py_ssize_t nargs,
+                           PyObject* kwnames)
+{
+    /* Though it should generally be avoided, a lock can be released from
+     * another thread than the one that acquired it: we reset the acquire time
+     * before releasing so that only one release is accounted for. */
+    int64_t start = self->acquired_at;
+    self->acquired_at = 0;
+
+    PyObject* result = profiled_lock_call_wrapped(self, method_name, args, nargs, kwnames);
+
+    if (start != 0 && self->sampler != NULL) {
+        int64_t end = monotonic_ns();
+        profiled_lock_push_sample(self, LOCK_EVENT_RELEASE, end - start, end);
+    }
+
+    return result;
+}
+
+#define PROFILED_LOCK_METHOD(method, impl, name_string)                                                                \
+    static PyObject* ProfiledLock_##method(                                                                            \
+      ProfiledLock* self, PyObject* const* args, Py_ssize_t nargs, PyObject* kwnames)                                  \
+    {                                                                                                                  \
+        return impl(self, name_string, args, nargs, kwnames);                                                          \
+    }
+
+PROFILED_LOCK_METHOD(acquire, profiled_lock_acquire_impl, acquire_string)
+PROFILED_LOCK_METHOD(release, profiled_lock_release_impl, release_string)
+PROFILED_LOCK_METHOD(enter, profiled_lock_acquire_impl, enter_string)
+PROFILED_LOCK_METHOD(exit, profiled_lock_release_impl, exit_string)
+PROFILED_LOCK_METHOD(aenter, profiled_lock_acquire_impl, aenter_string)
+PROFILED_LOCK_METHOD(aexit, profiled_lock_release_impl, aexit_string)
+
+#define PROFILED_LOCK_METHOD_DEF(name, method)                                                                         \
+    {                                                                                                                  \
+        name, (PyCFunction)(void (*)(void))ProfiledLock_##method, METH_FASTCALL | METH_KEYWORDS, NULL                  \
+    }
+
+static PyMethodDef ProfiledLock_methods[] = {
+    PROFILED_LOCK_METHOD_DEF("acquire", acquire),
+    PROFILED_LOCK_METHOD_DEF("acquire_lock", acquire),
+    PROFILED_LOCK_METHOD_DEF("release", release),
+    PROFILED_LOCK_METHOD_DEF("__enter__", enter),
+    PROFILED_LOCK_METHOD_DEF("__exit__", exit),
+    PROFILED_LOCK_METHOD_DEF("__aenter__", aenter),
+    PROFILED_LOCK_METHOD_DEF("__aexit__", aexit),
+    /* sentinel */
+    { NULL, NULL, 0, NULL },
+};
+
+static PyObject*
+ProfiledLock_get_wrapped(ProfiledLock* self, void* Py_UNUSED(closure))
+{
+    if (self->wrapped == NULL) {
+        PyErr_SetString(PyExc_ValueError, "wrapper has not been initialized");
+        return NULL;
+    }
+    Py_INCREF(self->wrapped);
+    return self->wrapped;
+}
+
+static PyObject*
+ProfiledLock_get_class(ProfiledLock* self, void* Py_UNUSED(closure))
+{
+    /* Make isinstance checks against the type of the wrapped lock succeed */
+    PyObject* type = self->wrapped == NULL ? (PyObject*)Py_TYPE(self) : (PyObject*)Py_TYPE(self->wrapped);
+    Py_INCREF(type);
+    return type;
+}
+
+static PyObject*
+ProfiledLock_get_name(ProfiledLock* self, void* Py_UNUSED(closure))
+{
+    if (self->name == NULL) {
+        Py_RETURN_NONE;
+    }
+    return PyUnicode_DecodeUTF8(self->name, (Py_ssize_t)self->name_len, "replace");
+}
+
+static PyGetSetDef ProfiledLock_getset[] = {
+    { "__wrapped__", (getter)ProfiledLock_get_wrapped, NULL, "The wrapped lock.", NULL },
+    { "__class__", (getter)ProfiledLock_get_class, NULL, "The class of the wrapped lock.", NULL },
+    { "_dd_lock_name", (getter)ProfiledLock_get_name, NULL, "The name of the lock reported in samples.", NULL },
+    /* sentinel */
+    { NULL, NULL, NULL, NULL, NULL },
+};
+
+/* Attributes that are not implemented by the profiled lock are looked up on
+ * the wrapped lock */
+static PyObject*
+ProfiledLock_getattro(ProfiledLock* self, PyObject* name)
+{
+    PyObject* attr = PyObject_GenericGetAttr((PyObject*)self, name);
+    if (attr != NULL || self->wrapped == NULL || !PyErr_ExceptionMatches(PyExc_AttributeError)) {
+        return attr;
+    }
+    PyErr_Clear();
+    return PyObject_GetAttr(self->wrapped, name);
+}
+
+static int
+ProfiledLock_setattro(ProfiledLock* self, PyObject* name, PyObject* value)
+{
+    if (self->wrapped == NULL) {
+        PyErr_SetString(PyExc_ValueError, "wrapper has not been initialized");
+        return -1;
+    }
+    return PyObject_SetAttr(self->wrapped, name, value);
+}
+
+static PyObject*
+ProfiledLock_repr(ProfiledLock* self)
+{
+    if (self->wrapped == NULL) {
+        return PyUnicode_FromFormat("<%s at %p>", Py_TYPE(self)->tp_name, self);
+    }
+    return PyUnicode_FromFormat(
+      "<%s at %p for %s at %p>", Py_TYPE(self)->tp_name, self, Py_TYPE(self->wrapped)->tp_name, self->wrapped);
+}
+
+static Py_hash_t
+ProfiledLock_hash(ProfiledLock* self)
+{
+    if (self->wrapped == NULL) {
+        return PyObject_HashNotImplemented((PyObject*)self);
+    }
+    return PyObject_Hash(self->wrapped);
+}
+
+static PyObject*
+ProfiledLock_richcompare(ProfiledLock* self, PyObject* other, int op)
+{
+    if (self->wrapped == NULL) {
+        Py_RETURN_NOTIMPLEMENTED;
+    }
+    if (PyObject_TypeCheck(other, Py_TYPE(self)) && ((ProfiledLock*)other)->wrapped != NULL) {
+        other = ((ProfiledLock*)other)->wrapped;
+    }
+    return PyObject_RichCompare(self->wrapped, other, op);
+}
+
+PyDoc_STRVAR(ProfiledLock__doc__,
+             "ProfiledLock(wrapped, sampler, init_loc)\n"
+             "--\n"
+             "\n"
+             "Lock wrapper that samples how long the wrapped lock is waited for and held.\n");
+
+static PyTypeObject ProfiledLockType = {
+    PyVarObject_HEAD_INIT(NULL, 0).tp_name = "ddtrace.profiling.collector._profiled_lock.ProfiledLock",
+    .tp_basicsize = sizeof(ProfiledLock),
+    .tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE | Py_TPFLAGS_HAVE_GC,
+    .tp_doc = ProfiledLock__doc__,
+    .tp_new = PyType_GenericNew,
+    .tp_init = (initproc)ProfiledLock_init,
+    .tp_traverse = (traverseproc)ProfiledLock_traverse,
+    .tp_clear = (inquiry)ProfiledLock_clear,
+    .tp_dealloc = (destructor)ProfiledLock_dealloc,
+    .tp_methods = ProfiledLock_methods,
+    .tp_getset = ProfiledLock_getset,
+    .tp_getattro = (getattrofunc)ProfiledLock_getattro,
+    .tp_setattro = (setattrofunc)ProfiledLock_setattro,
+    .tp_repr = (reprfunc)ProfiledLock_repr,
+    .tp_hash = (hashfunc)ProfiledLock_hash,
+    .tp_richcompare = (richcmpfunc)ProfiledLock_richcompare,
+    .tp_weaklistoffset = offsetof(ProfiledLock, weakreflist),
+};
+
+PyDoc_STRVAR(module_doc, "Native lock wrappers for the lock profiler.");
+
+static struct PyModuleDef module_def = {
+    PyModuleDef_HEAD_INIT, "_profiled_lock", module_doc, 0, /* non-negative size to be able to unload the module */
+    NULL,                  NULL,             NULL,       NULL, NULL,
+};
+
+static bool
+intern_method_name(PyObject** string, const char* name)
+{
+    if (*string == NULL) {
+        *string = PyUnicode_InternFromString(name);
+    }
+    return *string != NULL;
+}
+
+PyMODINIT_FUNC
+PyInit__profiled_lock(void)
+{
+    if (!intern_method_name(&acquire_string, "acquire") || !intern_method_name(&release_string, "release") ||
+        !intern_method_name(&enter_string, "__enter__") || !intern_method_name(&exit_string, "__exit__") ||
+        !intern_method_name(&aenter_string, "__aenter__") || !intern_method_name(&aexit_string, "__aexit__")) {
+        return NULL;
+    }
+
+    if (PyType_Ready(&LockSamplerType) < 0 || PyType_Ready(&ProfiledLockType) < 0) {
+        return NULL;
+    }
+
+    PyObject* m = PyModule_Create(&module_def);
+    if (m == NULL) {
+        return NULL;
+    }
+
+    Py_INCREF(&LockSamplerType);
+    if (PyModule_AddObject(m, "LockSampler", (PyObject*)&LockSamplerType) < 0) {
+        Py_DECREF(&LockSamplerType);
+        Py_DECREF(m);
+        return NULL;
+    }
+
+    Py_INCREF(&ProfiledLockType);
+    if (PyModule_AddObject(m, "ProfiledLock", (PyObject*)&ProfiledLockType) < 0) {
+        Py_DECREF(&ProfiledLockType);
+        Py_DECREF(m);
+        return NULL;
+    }
+
+    return m;
+}
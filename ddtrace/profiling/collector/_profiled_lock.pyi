@@ -0,0 +1,25 @@
+import types
+import typing
+
+class LockSampler:
+    def __init__(
+        self,
+        api: object,
+        capture_pct: float,
+        max_nframes: int,
+        context: typing.Callable[[int], typing.Tuple],
+        name_resolver: typing.Callable[[typing.Any, types.FrameType], str],
+    ) -> None: ...
+
+class ProfiledLock:
+    __wrapped__: typing.Any
+    _dd_lock_name: str
+    def __init__(self, wrapped: typing.Any, sampler: LockSampler, init_loc: str) -> None: ...
+    def acquire(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Any: ...
+    def acquire_lock(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Any: ...
+    def release(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Any: ...
+    def __enter__(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Any: ...
+    def __exit__(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Any: ...
+    def __aenter__(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Any: ...
+    def __aexit__(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Any: ...
+    def __getattr__(self, name: str) -> typing.Any: ...
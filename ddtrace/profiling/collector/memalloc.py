@@ -1,6 +1,5 @@
 # -*- encoding: utf-8 -*-
 import logging
-from math import ceil
 import os
 import threading
 import time
@@ -14,6 +13,7 @@ except ImportError:
     logging.getLogger(__name__).debug("failed to import memalloc", exc_info=True)
     _memalloc = None  # type: ignore[assignment]
 
+from ddtrace.internal._threads import periodic_threads
 from ddtrace.internal.datadog.profiling import ddup
 from ddtrace.profiling import _threading
 from ddtrace.profiling import collector
@@ -36,6 +36,8 @@ class MemoryCollector(collector.PeriodicCollector):
         max_nframe: Optional[int] = None,
         heap_sample_size: Optional[int] = None,
         ignore_profiler: Optional[bool] = None,
+        heap_growth_snapshots: Optional[int] = None,
+        heap_growth_max_sites: Optional[int] = None,
     ):
         super().__init__()
         self._interval: float = _interval
@@ -44,6 +46,12 @@ class MemoryCollector(collector.PeriodicCollector):
         self.max_nframe: int = max_nframe if max_nframe is not None else config.max_frames
         self.heap_sample_size: int = heap_sample_size if heap_sample_size is not None else config.heap.sample_size
         self.ignore_profiler: bool = ignore_profiler if ignore_profiler is not None else config.ignore_profiler
+        self.heap_growth_snapshots: int = (
+            heap_growth_snapshots if heap_growth_snapshots is not None else config.heap.growth_snapshots
+        )
+        self.heap_growth_max_sites: int = (
+            heap_growth_max_sites if heap_growth_max_sites is not None else config.heap.growth_max_sites
+        )
 
     def _start_service(self):
         # type: (...) -> None
@@ -52,13 +60,25 @@ class MemoryCollector(collector.PeriodicCollector):
             raise collector.CollectorUnavailable
 
         try:
-            _memalloc.start(self.max_nframe, self._max_events, self.heap_sample_size)
+            _memalloc.start(
+                self.max_nframe,
+                self._max_events,
+                self.heap_sample_size,
+                self.heap_growth_snapshots,
+                self.heap_growth_max_sites,
+            )
         except RuntimeError:
             # This happens on fork because we don't call the shutdown hook since
             # the thread responsible for doing so is not running in the child
             # process. Therefore we stop and restart the collector instead.
             _memalloc.stop()
-            _memalloc.start(self.max_nframe, self._max_events, self.heap_sample_size)
+            _memalloc.start(
+                self.max_nframe,
+                self._max_events,
+                self.heap_sample_size,
+                self.heap_growth_snapshots,
+                self.heap_growth_max_sites,
+            )
 
         super(MemoryCollector, self)._start_service()
 
@@ -81,64 +101,37 @@ class MemoryCollector(collector.PeriodicCollector):
             if getattr(thread, "_ddtrace_profiling_ignore", False) and thread.ident is not None
         }
 
+    def _get_threads_info(self):
+        # type: () -> typing.Dict[int, typing.Tuple[int, typing.Optional[str]]]
+        # The native exporter cannot look up thread information by itself, so we resolve it once per export for all
+        # the threads we know of. Samples from threads that are gone by now only get their thread id.
+        thread_ids = {thread.ident for thread in threading.enumerate() if thread.ident is not None}
+        thread_ids.update(periodic_threads)
+        return {
+            thread_id: (_threading.get_thread_native_id(thread_id), _threading.get_thread_name(thread_id))
+            for thread_id in thread_ids
+        }
+
     def snapshot(self):
-        thread_id_ignore_set = self._get_thread_id_ignore_set()
+        thread_id_ignore_set = self._get_thread_id_ignore_set() if self.ignore_profiler else set()
 
+        # The samples are pushed to libdatadog straight from the heap tracker, without going through Python objects.
+        # The allocation sites which kept growing over the last snapshots are pushed as heap growth samples.
         try:
-            events = _memalloc.heap()
+            _memalloc.export_heap(ddup._C_API, self._get_threads_info(), thread_id_ignore_set)
         except RuntimeError:
             # DEV: This can happen if either _memalloc has not been started or has been stopped.
             LOG.debug("Unable to collect heap events from process %d", os.getpid(), exc_info=True)
-            return tuple()
-
-        for (frames, _, thread_id), size in events:
-            if not self.ignore_profiler or thread_id not in thread_id_ignore_set:
-                handle = ddup.SampleHandle()
-                handle.push_heap(size)
-                handle.push_threadinfo(
-                    thread_id, _threading.get_thread_native_id(thread_id), _threading.get_thread_name(thread_id)
-                )
-                try:
-                    for frame in frames:
-                        handle.push_frame(frame.function_name, frame.file_name, 0, frame.lineno)
-                    handle.flush_sample()
-                except AttributeError:
-                    # DEV: This might happen if the memalloc sofile is unlinked and relinked without module
-                    #      re-initialization.
-                    LOG.debug("Invalid state detected in memalloc module, suppressing profile")
         return tuple()
 
     def collect(self):
-        # TODO: The event timestamp is slightly off since it's going to be the time we copy the data from the
-        # _memalloc buffer to our Recorder. This is fine for now, but we might want to store the nanoseconds
-        # timestamp in C and then return it via iter_events.
+        # TODO: The event timestamp is slightly off since it's going to be the time we export the data from the
+        # _memalloc buffer. This is fine for now, but we might want to store the nanoseconds timestamp in C.
         try:
-            events_iter, count, alloc_count = _memalloc.iter_events()
+            _memalloc.export_events(
+                ddup._C_API, self._get_threads_info(), self._get_thread_id_ignore_set(), time.monotonic_ns()
+            )
         except RuntimeError:
             # DEV: This can happen if either _memalloc has not been started or has been stopped.
             LOG.debug("Unable to collect memory events from process %d", os.getpid(), exc_info=True)
-            return tuple()
-
-        # `events_iter` is a consumable view into `iter_events()`; copy it so we can send it to both pyprof
-        # and libdatadog. This will be changed if/when we ever return to only a single possible exporter
-        events = list(events_iter)
-        thread_id_ignore_set = self._get_thread_id_ignore_set()
-
-        for (frames, _, thread_id), size, _ in events:
-            if thread_id in thread_id_ignore_set:
-                continue
-            handle = ddup.SampleHandle()
-            handle.push_monotonic_ns(time.monotonic_ns())
-            handle.push_alloc(int((ceil(size) * alloc_count) / count), count)  # Roundup to help float precision
-            handle.push_threadinfo(
-                thread_id, _threading.get_thread_native_id(thread_id), _threading.get_thread_name(thread_id)
-            )
-            try:
-                for frame in frames:
-                    handle.push_frame(frame.function_name, frame.file_name, 0, frame.lineno)
-                handle.flush_sample()
-            except AttributeError:
-                # DEV: This might happen if the memalloc sofile is unlinked and relinked without module
-                #      re-initialization.
-                LOG.debug("Invalid state detected in memalloc module, suppressing profile")
         return tuple()
@@ -1,12 +1,18 @@
 from __future__ import absolute_import
 
 import abc
+import collections
+import functools
 import logging
 import random
+import re
+import time
 import typing
 
 import wrapt
 
+from ddtrace.internal import forksafe
+from ddtrace.internal import periodic
 from ddtrace.internal.datadog.profiling import ddup
 from ddtrace.profiling import _threading
 from ddtrace.profiling import collector
@@ -16,18 +22,82 @@ from ddtrace.trace import Tracer
 
 LOG = logging.getLogger(__name__)
 
+NANOS_PER_MICROSECOND = 1e3
+
+# Maximum number of profiler steps waiting to be converted. When the conversion does not keep up with the training
+# loop, the events of the oldest step are dropped, and the values of the next step are scaled to account for them.
+MAX_PENDING_STEPS = 2
+
+# Number of events aggregated between two releases of the GIL, so that the conversion of a large step does not
+# stall the training loop.
+EVENTS_PER_CHUNK = 10_000
+
+# The frames of the stacks recorded with `with_stack=True` look like "path/to/file.py(42): function"
+_STACK_FRAME_RE = re.compile(r"^(.*)\((\d+)\): (.*)$")
+
 
 class _WrappedTorchProfiler(wrapt.ObjectProxy):
     def __init__(
         self,
         wrapped: typing.Any,
         tracer: typing.Optional[Tracer],
+        ingester: typing.Optional["TorchEventIngester"] = None,
     ) -> None:
         wrapt.ObjectProxy.__init__(self, wrapped)
-        self.on_trace_ready = handle_torch_trace
+        self.on_trace_ready = functools.partial(handle_torch_trace, ingester=ingester)
         self._self_tracer = tracer
 
 
+class TorchEventIngester(periodic.ForksafeAwakeablePeriodicService):
+    """Convert the events of the PyTorch profiler into samples from a background thread.
+
+    The events of each step are handed over by the thread running the training loop, which then goes on without
+    waiting for their conversion. Each pending step is held as ``[events, trace_start_ns, steps]``, where ``steps``
+    is the number of profiler steps its values stand for, including the steps that were dropped in its favor.
+    """
+
+    def __init__(self, interval: float = 1.0) -> None:
+        super().__init__(interval=interval)
+        self._pending: typing.Deque[typing.List[typing.Any]] = collections.deque()
+        self._lock = forksafe.Lock()
+        self.dropped_steps = 0
+
+    def submit(self, events: typing.Any, trace_start_ns: int) -> None:
+        steps = 1
+        with self._lock:
+            if len(self._pending) >= MAX_PENDING_STEPS:
+                # The oldest step is estimated from the next one rather than lost from the totals
+                dropped = self._pending.popleft()[2]
+                if self._pending:
+                    self._pending[0][2] += dropped
+                else:
+                    steps += dropped
+                self.dropped_steps += 1
+                LOG.debug("Dropped the events of a PyTorch profiler step, %d steps dropped so far", self.dropped_steps)
+            self._pending.append([events, trace_start_ns, steps])
+        self.awake()
+
+    def periodic(self) -> None:
+        self.drain()
+
+    def drain(self) -> None:
+        while True:
+            with self._lock:
+                try:
+                    events, trace_start_ns, steps = self._pending.popleft()
+                except IndexError:
+                    return
+            try:
+                ingest_events(events, trace_start_ns, config.pytorch.events_limit, steps)
+            except Exception:
+                LOG.error("Failed to convert the events of a PyTorch profiler step", exc_info=True)
+
+    def reset(self) -> None:
+        # The events of the parent process are not reported by the child
+        self._pending.clear()
+        self.dropped_steps = 0
+
+
 class MLProfilerCollector(collector.CaptureSamplerCollector):
     """Record ML framework (i.e. pytorch) profiler usage."""
 
@@ -36,6 +106,7 @@ class MLProfilerCollector(collector.CaptureSamplerCollector):
         self.tracer = None
         # Holds the pytorch profiler object which is wrapped by this class
         self._original: typing.Any = None
+        self._ingester: typing.Optional[TorchEventIngester] = None
 
     @abc.abstractmethod
     def _get_patch_target(self):
@@ -58,6 +129,8 @@ class MLProfilerCollector(collector.CaptureSamplerCollector):
         except ImportError as e:
             raise collector.CollectorUnavailable(e)
         self._torch_module = torch
+        self._ingester = TorchEventIngester()
+        self._ingester.start()
         self.patch()
         super()._start_service()  # type: ignore[safe-super]
 
@@ -66,6 +139,16 @@ class MLProfilerCollector(collector.CaptureSamplerCollector):
         """Stop collecting framework profiler usage."""
         super()._stop_service()  # type: ignore[safe-super]
         self.unpatch()
+        if self._ingester is not None:
+            self._ingester.stop()
+            self._ingester.join()
+            self._ingester = None
+
+    def snapshot(self):
+        # type: (...) -> None
+        # Convert the events still waiting, so that they are part of the profile about to be exported
+        if self._ingester is not None:
+            self._ingester.drain()
 
     def patch(self):
         # type: (...) -> None
@@ -78,6 +161,7 @@ class MLProfilerCollector(collector.CaptureSamplerCollector):
             return self.PROFILED_TORCH_CLASS(
                 profiler,
                 self.tracer,
+                self._ingester,
             )
 
         self._set_patch_target(wrapt.FunctionWrapper(self._original, profiler_init))
@@ -108,26 +192,12 @@ class TorchProfilerCollector(MLProfilerCollector):
         self._torch_module.profiler.profile = value
 
 
-def handle_torch_trace(prof):
-    NANOS_PER_MICROSECOND = 1e3
+def handle_torch_trace(prof, ingester=None):
     LOG.debug("handle_torch_trace called")
     events = prof.events()
     if len(events) == 0:
         return
 
-    # need an upper bound of events collected, can be adjusted based on profile size.
-    # Sadly, there is no way AFAICT to tell the PyTorch profiler itself to limit the num of samples.
-    # We truncate to keep the uploaded profile to a reasonable size.
-    # For now, experiment with a default of 1_000_000 if nothing is set.
-    # TODO, better values here.
-    collection_fraction = 1.0
-    num_events_to_report = min(len(events), config.pytorch.events_limit or 1_000_000)
-    if num_events_to_report < len(events):
-        LOG.debug("Dropped events.  num_events_to_report %d. len(events): %d", num_events_to_report, len(events))
-        collection_fraction = num_events_to_report / len(events)
-
-    empty_events_count = 0
-
     # earlier versions use microsecond, later versions use nanosecond
     kineto_results = prof.profiler.kineto_results
     if hasattr(kineto_results, "trace_start_ns"):
@@ -137,72 +207,141 @@ def handle_torch_trace(prof):
     else:
         raise AttributeError("Neither trace_start_ns nor trace_start_us exists")
 
-    for e in events:
-        if collection_fraction < random.random():  # nosec: used for sampling, not security
-            continue
+    if ingester is None:
+        ingest_events(events, trace_start_ns, config.pytorch.events_limit)
+    else:
+        ingester.submit(events, trace_start_ns)
 
-        handle = ddup.SampleHandle()
-        data_added = False
 
-        # cpu time sample
-        if e.cpu_time > 0:
-            data_added = True
-            handle.push_cputime(int(e.cpu_time * NANOS_PER_MICROSECOND), e.count)
+class _EventAggregate(object):
+    __slots__ = ("count", "cpu_time", "gpu_time", "gpu_flops", "gpu_memory", "end_ns")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.cpu_time = 0.0
+        self.gpu_time = 0.0
+        self.gpu_flops = 0
+        self.gpu_memory = 0
+        self.end_ns = 0
+
+
+def aggregate_events(
+    events: typing.Sequence[typing.Any], events_limit: int, trace_start_ns: int
+) -> typing.Tuple[typing.Dict[typing.Tuple, _EventAggregate], float]:
+    """Sum the values of the events by op name, stack, device and thread.
+
+    At most ``events_limit`` events are read: when there are more, a random subset of them is aggregated, and the
+    returned weight is the factor to apply to the values to estimate the values of all the events. The GIL is
+    released every ``EVENTS_PER_CHUNK`` events.
+    """
+    # Sadly, there is no way AFAICT to tell the PyTorch profiler itself to limit the num of samples.
+    num_events = len(events)
+    num_events_to_report = min(num_events, events_limit or 1_000_000)
+    if num_events_to_report < num_events:
+        LOG.debug("Sampling events. num_events_to_report %d. len(events): %d", num_events_to_report, num_events)
+        indices = random.sample(range(num_events), num_events_to_report)  # nosec: used for sampling, not security
+        indices.sort()
+        selected: typing.Iterable[typing.Any] = (events[i] for i in indices)
+        weight = num_events / num_events_to_report
+    else:
+        selected = events
+        weight = 1.0
+
+    aggregates: typing.Dict[typing.Tuple, _EventAggregate] = {}
+    empty_events_count = 0
+    for i, e in enumerate(selected, 1):
+        if i % EVENTS_PER_CHUNK == 0:
+            # Let the other threads, like the one running the training loop, take the GIL
+            time.sleep(0)
+
+        cpu_time = e.cpu_time if e.cpu_time > 0 else 0
 
-        # gpu time sample - both device_time and cuda_time are in microseconds
+        # gpu time - both device_time and cuda_time are in microseconds
+        gpu_time = 0
         if hasattr(e, "device_time") and e.device_time > 0:
-            data_added = True
-            time_elapsed = int(e.device_time * NANOS_PER_MICROSECOND)
-            handle.push_gpu_gputime(time_elapsed, e.count)
+            gpu_time = e.device_time
         elif hasattr(e, "cuda_time") and e.cuda_time > 0:
-            data_added = True
-            time_elapsed = int(e.cuda_time * NANOS_PER_MICROSECOND)
-            handle.push_gpu_gputime(time_elapsed, e.count)
+            gpu_time = e.cuda_time
 
-        # gpu flops sample
-        if e.flops is not None and e.flops > 0:
-            data_added = True
-            handle.push_gpu_flops(e.flops, e.count)
+        gpu_flops = e.flops if e.flops is not None and e.flops > 0 else 0
 
-        # GPU memory usage
         # earlier versions of torch use cuda_memory_usage, recent versions use device_memory_usage
+        gpu_memory = 0
         if hasattr(e, "device_memory_usage") and e.device_memory_usage is not None and e.device_memory_usage > 0:
-            data_added = True
-            handle.push_gpu_memory(e.device_memory_usage, e.count)
+            gpu_memory = e.device_memory_usage
         elif hasattr(e, "cuda_memory_usage") and e.cuda_memory_usage is not None and e.cuda_memory_usage > 0:
-            data_added = True
-            handle.push_gpu_memory(e.cuda_memory_usage, e.count)
-
-        # If there is data, flush it to the profile.
-        # Otherwise, do nothing and the sample object will be dropped when it goes out of scope
-        if data_added:
-            handle.push_frame(e.name, "unknown-file", 0, 0)
-            # Pushing pseudoframes for the device name ("device.CPU" or "device.CUDA")
-            # onto the stack allows differentation of pytorch frames from other profiling frames
-            # in the flame graph.
-            # Note that stacks go root last, so this goes at the end
-            handle.push_frame("PYTORCH_" + str(e.device_type), "unknown-file", 0, 0)
-
-            handle.push_gpu_device_name("cuda " + str(e.device_index))
-
-            if str(e.device_type).startswith("DeviceType.CPU"):
-                # There is a known issue with getting thread ids and names from pytorch.
-                # If we can't get one, just use a default name.
-                handle.push_threadinfo(
-                    e.thread,
-                    _threading.get_thread_native_id(e.thread),
-                    _threading.get_thread_name(e.thread) or "PYTORCH-CPU-THREAD-" + str(e.thread),
-                )
-            elif str(e.device_type).startswith("DeviceType.CUDA"):
-                handle.push_threadinfo(
-                    e.thread, _threading.get_thread_native_id(e.thread), "PYTORCH-CUDA-" + str(e.device_index)
-                )
-            else:
-                raise AttributeError(f"Unexpected device_type {e.device_type}")
+            gpu_memory = e.cuda_memory_usage
 
-            handle.push_absolute_ns(int(trace_start_ns + e.time_range.end * NANOS_PER_MICROSECOND))
-            handle.flush_sample()
-        else:
+        if not (cpu_time or gpu_time or gpu_flops or gpu_memory):
             if empty_events_count % 1000 == 0:
                 LOG.debug("%d events with no data to record: %s", empty_events_count, e)
             empty_events_count += 1
+            continue
+
+        # The stack is only recorded when the profiler is created with `with_stack=True`
+        key = (e.name, tuple(getattr(e, "stack", None) or ()), str(e.device_type), e.device_index, e.thread)
+        aggregate = aggregates.get(key)
+        if aggregate is None:
+            aggregate = aggregates[key] = _EventAggregate()
+        aggregate.count += e.count
+        aggregate.cpu_time += cpu_time
+        aggregate.gpu_time += gpu_time
+        aggregate.gpu_flops += gpu_flops
+        aggregate.gpu_memory += gpu_memory
+        aggregate.end_ns = max(aggregate.end_ns, int(trace_start_ns + e.time_range.end * NANOS_PER_MICROSECOND))
+
+    return aggregates, weight
+
+
+def ingest_events(events: typing.Sequence[typing.Any], trace_start_ns: int, events_limit: int, steps: int = 1) -> None:
+    """Push one sample for each op name, stack, device and thread of the events of a profiler step.
+
+    The values are scaled by ``steps`` when the events stand for several profiler steps.
+    """
+    aggregates, weight = aggregate_events(events, events_limit, trace_start_ns)
+    weight *= steps
+
+    for (name, stack, device_type, device_index, thread), aggregate in aggregates.items():
+        handle = ddup.SampleHandle()
+        count = max(int(aggregate.count * weight), 1)
+
+        if aggregate.cpu_time:
+            handle.push_cputime(int(aggregate.cpu_time * weight * NANOS_PER_MICROSECOND), count)
+        if aggregate.gpu_time:
+            handle.push_gpu_gputime(int(aggregate.gpu_time * weight * NANOS_PER_MICROSECOND), count)
+        if aggregate.gpu_flops:
+            handle.push_gpu_flops(int(aggregate.gpu_flops * weight), count)
+        if aggregate.gpu_memory:
+            handle.push_gpu_memory(int(aggregate.gpu_memory * weight), count)
+
+        handle.push_frame(name, "unknown-file", 0, 0)
+        # The stack of the op starts with the innermost frame
+        for frame in stack:
+            match = _STACK_FRAME_RE.match(frame)
+            if match is None:
+                handle.push_frame(frame, "unknown-file", 0, 0)
+            else:
+                handle.push_frame(match.group(3), match.group(1), 0, int(match.group(2)))
+        # Pushing pseudoframes for the device name ("device.CPU" or "device.CUDA")
+        # onto the stack allows differentation of pytorch frames from other profiling frames
+        # in the flame graph.
+        # Note that stacks go root last, so this goes at the end
+        handle.push_frame("PYTORCH_" + device_type, "unknown-file", 0, 0)
+
+        handle.push_gpu_device_name("cuda " + str(device_index))
+
+        if device_type.startswith("DeviceType.CPU"):
+            # There is a known issue with getting thread ids and names from pytorch.
+            # If we can't get one, just use a default name.
+            handle.push_threadinfo(
+                thread,
+                _threading.get_thread_native_id(thread),
+                _threading.get_thread_name(thread) or "PYTORCH-CPU-THREAD-" + str(thread),
+            )
+        elif device_type.startswith("DeviceType.CUDA"):
+            handle.push_threadinfo(thread, _threading.get_thread_native_id(thread), "PYTORCH-CUDA-" + str(device_index))
+        else:
+            raise AttributeError(f"Unexpected device_type {device_type}")
+
+        handle.push_absolute_ns(aggregate.end_ns)
+        handle.flush_sample()
@@ -467,6 +467,8 @@ class StackCollector(collector.PeriodicCollector):
             # TODO take the `threading` import out of here and just handle it in v2 startup
             threading.init_stack_v2()
             stack_v2.set_adaptive_sampling(config.stack.v2_adaptive_sampling)
+            stack_v2.set_overhead_budget(self.max_time_usage_pct)
+            stack_v2.set_thread_state_sampling(config.stack.thread_state_enabled)
             stack_v2.start()
 
     def _start_service(self):
@@ -16,6 +16,7 @@ from ddtrace.internal import service
 from ddtrace.internal import uwsgi
 from ddtrace.internal.datadog.profiling import ddup
 from ddtrace.internal.module import ModuleWatchdog
+from ddtrace.internal.processor.span_cpu_time import SpanCPUTimeProcessor
 from ddtrace.internal.telemetry import telemetry_writer
 from ddtrace.internal.telemetry.constants import TELEMETRY_APM_PRODUCT
 from ddtrace.profiling import collector
@@ -119,6 +120,7 @@ class _ProfilerInstance(service.Service):
         _stack_v2_enabled: bool = profiling_config.stack.v2_enabled,
         _lock_collector_enabled: bool = profiling_config.lock.enabled,
         _pytorch_collector_enabled: bool = profiling_config.pytorch.enabled,
+        _span_cpu_time_enabled: bool = profiling_config.span_cpu_time,
         enable_code_provenance: bool = profiling_config.code_provenance,
         endpoint_collection_enabled: bool = profiling_config.endpoint_collection,
     ):
@@ -135,6 +137,7 @@ class _ProfilerInstance(service.Service):
         self._stack_v2_enabled: bool = _stack_v2_enabled
         self._lock_collector_enabled: bool = _lock_collector_enabled
         self._pytorch_collector_enabled: bool = _pytorch_collector_enabled
+        self._span_cpu_time_enabled: bool = _span_cpu_time_enabled
         self.enable_code_provenance: bool = enable_code_provenance
         self.endpoint_collection_enabled: bool = endpoint_collection_enabled
 
@@ -142,6 +145,7 @@ class _ProfilerInstance(service.Service):
         self._collectors: List[Union[stack.StackCollector, memalloc.MemoryCollector]] = []
         self._collectors_on_import: Any = None
         self._scheduler: Optional[Union[scheduler.Scheduler, scheduler.ServerlessScheduler]] = None
+        self._span_cpu_time_processor: Optional[SpanCPUTimeProcessor] = None
         self._lambda_function_name: Optional[str] = os.environ.get("AWS_LAMBDA_FUNCTION_NAME")
 
         self.__post_init__()
@@ -175,6 +179,9 @@ class _ProfilerInstance(service.Service):
             timeline_enabled=profiling_config.timeline_enabled,
             output_filename=profiling_config.output_pprof,
             sample_pool_capacity=profiling_config.sample_pool_capacity,
+            upload_queue_size=profiling_config.upload_queue_size,
+            upload_dump_dir=profiling_config.upload_dump_dir,
+            upload_dump_max_files=profiling_config.upload_dump_max_files,
         )
         ddup.start()
 
@@ -253,6 +260,9 @@ class _ProfilerInstance(service.Service):
         if self._memory_collector_enabled:
             self._collectors.append(memalloc.MemoryCollector())
 
+        if self._span_cpu_time_enabled and self.tracer is not None:
+            self._span_cpu_time_processor = SpanCPUTimeProcessor(all_spans=profiling_config.span_cpu_time_all_spans)
+
         self._build_default_exporters()
 
         scheduler_class = (
@@ -297,6 +307,9 @@ class _ProfilerInstance(service.Service):
                 collectors.append(col)
         self._collectors = collectors
 
+        if self._span_cpu_time_processor is not None:
+            self._span_cpu_time_processor.enable(self.tracer.context_provider)
+
         if self._scheduler is not None:
             self._scheduler.start()
 
@@ -314,6 +327,9 @@ class _ProfilerInstance(service.Service):
                 except ValueError:
                     pass
 
+        if self._span_cpu_time_processor is not None:
+            self._span_cpu_time_processor.disable()
+
         if self._scheduler is not None:
             self._scheduler.stop()
             # Wait for the export to be over: export might need collectors (e.g., for snapshot) so we can't stop
@@ -323,6 +339,9 @@ class _ProfilerInstance(service.Service):
             if flush:
                 # Do not stop the collectors before flushing, they might be needed (snapshot)
                 self._scheduler.flush()
+                # The last profile is sent in the background: give it a chance to go out before exiting
+                if not ddup.wait_uploads(profiling_config.api_timeout):
+                    LOG.debug("Timed out waiting for the profiles to be uploaded")
 
         for col in reversed(self._collectors):
             try:
@@ -8,6 +8,8 @@ from typing import Optional
 import ddtrace
 from ddtrace.internal import periodic
 from ddtrace.internal.datadog.profiling import ddup
+from ddtrace.internal.telemetry import telemetry_writer
+from ddtrace.internal.telemetry.constants import TELEMETRY_NAMESPACE
 from ddtrace.settings.profiling import config
 from ddtrace.trace import Tracer
 
@@ -52,6 +54,25 @@ class Scheduler(periodic.PeriodicService):
         ddup.upload(self._tracer, self._enable_code_provenance)
 
         self._last_export = time.time_ns()
+        self._report_upload_stats()
+
+    @staticmethod
+    def _report_upload_stats():
+        # type: (...) -> None
+        # The profiles are sent in the background, so these are the stats of the uploads done since the last flush
+        try:
+            stats = ddup.upload_stats()
+        except Exception:
+            LOG.debug("Failed to get the upload stats", exc_info=True)
+            return
+
+        for name in ("succeeded", "failed", "dropped", "dumped"):
+            if stats[name]:
+                telemetry_writer.add_count_metric(TELEMETRY_NAMESPACE.PROFILER, "upload." + name, stats[name])
+        for latency_ns in stats["latencies_ns"]:
+            telemetry_writer.add_distribution_metric(
+                TELEMETRY_NAMESPACE.PROFILER, "upload.latency_ms", latency_ns / 1e6
+            )
 
     def periodic(self):
         # type: (...) -> None
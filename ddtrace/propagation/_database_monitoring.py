@@ -6,7 +6,9 @@ import ddtrace
 from ddtrace import config as dd_config
 from ddtrace.internal import core
 from ddtrace.internal.logger import get_logger
-from ddtrace.settings.peer_service import PeerServiceConfig
+from ddtrace.internal.utils.cache import LFUCache
+from ddtrace.internal.utils.cache import cached
+from ddtrace.settings.peer_service import _ps_config
 from ddtrace.vendor.sqlcommenter import generate_sql_comment as _generate_sql_comment
 
 from ..internal import compat
@@ -16,7 +18,10 @@ from ..settings._database_monitoring import dbm_config
 
 
 if TYPE_CHECKING:
+    from typing import Any  # noqa:F401
+    from typing import Dict  # noqa:F401
     from typing import Optional  # noqa:F401
+    from typing import Tuple  # noqa:F401
 
     from ddtrace.trace import Span  # noqa:F401
 
@@ -31,14 +36,34 @@ DBM_VERSION_KEY: Literal["ddpv"] = "ddpv"
 DBM_TRACE_PARENT_KEY: Literal["traceparent"] = "traceparent"
 DBM_TRACE_INJECTED_TAG: Literal["_dd.dbm_trace_injected"] = "_dd.dbm_trace_injected"
 
+# Maximum number of distinct service comments cached by each propagator
+DBM_SERVICE_COMMENT_CACHE_SIZE = 256
+
+# The traceparent sorts after all the other tags of the comment, which only depend on the service
+_TRACE_PARENT_SEPARATOR = ",%s=" % DBM_TRACE_PARENT_KEY
+
 log = get_logger(__name__)
 
 
+@cached()
+def _encode_comment(dbm_comment):
+    # type: (str) -> bytes
+    return dbm_comment.encode("utf-8", errors="strict")
+
+
 def default_sql_injector(dbm_comment, sql_statement):
     # type: (str, Union[str, bytes]) -> Union[str, bytes]
     try:
         if isinstance(sql_statement, bytes):
-            return dbm_comment.encode("utf-8", errors="strict") + sql_statement
+            # Only the service part of the comment is cached, the traceparent changes with every span
+            service_comment, separator, trace_context = dbm_comment.partition(_TRACE_PARENT_SEPARATOR)
+            if separator:
+                return (
+                    _encode_comment(service_comment)
+                    + (separator + trace_context).encode("utf-8", errors="strict")
+                    + sql_statement
+                )
+            return _encode_comment(dbm_comment) + sql_statement
         return dbm_comment + sql_statement
     except (TypeError, ValueError):
         log.warning(
@@ -50,6 +75,29 @@ def default_sql_injector(dbm_comment, sql_statement):
     return sql_statement
 
 
+def mysql_query_attributes_injector(cursor, attributes):
+    # type: (Any, Dict[str, str]) -> bool
+    """Attach the given attributes to the next query executed by a mysql-connector cursor.
+
+    Query attributes are sent alongside the statement, which leaves the statement text unchanged.
+    Returns ``False`` if the cursor does not support query attributes.
+    """
+    add_attribute = getattr(cursor, "add_attribute", None)
+    if add_attribute is None:
+        return False
+    try:
+        remove_attribute = getattr(cursor, "remove_attribute", None)
+        for name, value in attributes.items():
+            if remove_attribute is not None:
+                # Attributes persist across executions, replace the ones set by the previous query
+                remove_attribute(name)
+            add_attribute(name, value)
+    except Exception:
+        log.debug("Failed to set query attributes on cursor %r", cursor, exc_info=True)
+        return False
+    return True
+
+
 class _DBM_Propagator(object):
     def __init__(
         self,
@@ -60,6 +108,7 @@ class _DBM_Propagator(object):
         peer_hostname_tag="out.host",
         peer_db_name_tag="db.name",
         peer_service_tag="peer.service",
+        query_attributes_injector=None,
     ):
         self.sql_pos = sql_pos
         self.sql_kw = sql_kw
@@ -68,8 +117,12 @@ class _DBM_Propagator(object):
         self.peer_hostname_tag = peer_hostname_tag
         self.peer_db_name_tag = peer_db_name_tag
         self.peer_service_tag = peer_service_tag
+        self.query_attributes_injector = query_attributes_injector
+        # The service comment only depends on the (service, env, version, peer) tags, which take a small number of
+        # distinct values. Caching it avoids generating and url-encoding the same comment on every query.
+        self._service_comments = LFUCache(DBM_SERVICE_COMMENT_CACHE_SIZE)
 
-    def inject(self, dbspan, args, kwargs):
+    def inject(self, dbspan, args, kwargs, cursor=None):
         # run sampling before injection to propagate correct sampling priority
         if hasattr(ddtrace, "tracer") and hasattr(ddtrace.tracer, "sample"):
             if dbspan.context.sampling_priority is None:
@@ -77,7 +130,18 @@ class _DBM_Propagator(object):
         else:
             log.error("ddtrace.tracer.sample is not available, unable to sample span.")
 
-        dbm_comment = self._get_dbm_comment(dbspan)
+        trace_context_injected = False
+        if (
+            dbm_config.propagation_mode == "full"
+            and dbm_config.query_attributes_enabled
+            and cursor is not None
+            and self.query_attributes_injector is not None
+        ):
+            trace_context_injected = self.query_attributes_injector(
+                cursor, {DBM_TRACE_PARENT_KEY: dbspan.context._traceparent}
+            )
+
+        dbm_comment = self._get_dbm_comment(dbspan, include_trace_context=not trace_context_injected)
         if dbm_comment is None:
             # injection_mode is disabled
             return args, kwargs
@@ -89,45 +153,72 @@ class _DBM_Propagator(object):
         args, kwargs = set_argument_value(args, kwargs, self.sql_pos, self.sql_kw, sql_with_dbm_tags)
         return args, kwargs
 
-    def _get_dbm_comment(self, db_span):
-        # type: (Span) -> Optional[str]
+    def _get_dbm_comment(self, db_span, include_trace_context=True):
+        # type: (Span, bool) -> Optional[str]
         """Generate DBM trace injection comment and updates span tags
         This method will set the ``_dd.dbm_trace_injected: "true"`` tag
         on ``db_span`` if the configured injection mode is ``"full"``.
+        The traceparent is only added to the comment if ``include_trace_context``
+        is true, otherwise it is expected to be propagated by other means.
         """
         if dbm_config.propagation_mode == "disabled":
             return None
 
         # set the following tags if DBM injection mode is full or service
-        peer_service_enabled = PeerServiceConfig().set_defaults_enabled
         service_name_key = db_span.service
-        if peer_service_enabled:
+        if _ps_config.set_defaults_enabled:
             db_name = db_span.get_tags().get("db.name")
             service_name_key = compat.ensure_text(db_name) if db_name else db_span.service
 
+        key = (
+            dd_config.service,
+            dd_config.env,
+            dd_config.version,
+            service_name_key,
+            db_span.get_tag(self.peer_db_name_tag),
+            db_span.get_tag(self.peer_hostname_tag),
+            db_span.get_tag(self.peer_service_tag),
+        )
+        sql_comment = self._service_comments.get(key, self._generate_service_comment)
+
+        if dbm_config.propagation_mode == "full":
+            db_span.set_tag_str(DBM_TRACE_INJECTED_TAG, "true")
+            if include_trace_context:
+                traceparent = db_span.context._traceparent
+                if self.comment_generator is _generate_sql_comment and sql_comment:
+                    # traceparent sorts after all the other keys, append it to the cached comment
+                    # instead of generating the whole comment again.
+                    return "%s,%s='%s'*/ " % (sql_comment[:-3], DBM_TRACE_PARENT_KEY, traceparent)
+                dbm_tags = self._dbm_tags(key)
+                dbm_tags[DBM_TRACE_PARENT_KEY] = traceparent
+                return self._generate_comment(dbm_tags)
+
+        return sql_comment
+
+    def _generate_service_comment(self, key):
+        # type: (Tuple[Optional[str], ...]) -> str
+        return self._generate_comment(self._dbm_tags(key))
+
+    @staticmethod
+    def _dbm_tags(key):
+        # type: (Tuple[Optional[str], ...]) -> Dict[str, Optional[str]]
+        service, env, version, service_name_key, peer_db_name, peer_hostname, peer_service = key
         dbm_tags = {
-            DBM_PARENT_SERVICE_NAME_KEY: dd_config.service,
-            DBM_ENVIRONMENT_KEY: dd_config.env,
-            DBM_VERSION_KEY: dd_config.version,
+            DBM_PARENT_SERVICE_NAME_KEY: service,
+            DBM_ENVIRONMENT_KEY: env,
+            DBM_VERSION_KEY: version,
             DBM_DATABASE_SERVICE_NAME_KEY: service_name_key,
         }
-
-        peer_db_name = db_span.get_tag(self.peer_db_name_tag)
         if peer_db_name:
             dbm_tags[DBM_PEER_DB_NAME_KEY] = peer_db_name
-
-        peer_hostname = db_span.get_tag(self.peer_hostname_tag)
         if peer_hostname:
             dbm_tags[DBM_PEER_HOSTNAME_KEY] = peer_hostname
-
-        peer_service = db_span.get_tag(self.peer_service_tag)
         if peer_service:
             dbm_tags[DBM_PEER_SERVICE_KEY] = peer_service
+        return dbm_tags
 
-        if dbm_config.propagation_mode == "full":
-            db_span.set_tag_str(DBM_TRACE_INJECTED_TAG, "true")
-            dbm_tags[DBM_TRACE_PARENT_KEY] = db_span.context._traceparent
-
+    def _generate_comment(self, dbm_tags):
+        # type: (Dict[str, Optional[str]]) -> str
         sql_comment = self.comment_generator(**dbm_tags)
         if sql_comment:
             # replace leading whitespace with trailing whitespace
@@ -135,10 +226,10 @@ class _DBM_Propagator(object):
         return ""
 
 
-def handle_dbm_injection(int_config, span, args, kwargs):
+def handle_dbm_injection(int_config, span, args, kwargs, cursor=None):
     dbm_propagator = getattr(int_config, "_dbm_propagator", None)
     if dbm_propagator:
-        args, kwargs = dbm_propagator.inject(span, args, kwargs)
+        args, kwargs = dbm_propagator.inject(span, args, kwargs, cursor)
 
     return span, args, kwargs
 
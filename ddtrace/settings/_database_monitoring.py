@@ -14,5 +14,13 @@ class DatabaseMonitoringConfig(DDConfig):
         validator=validators.choice(["disabled", "full", "service"]),
     )
 
+    query_attributes_enabled = DDConfig.v(
+        bool,
+        "query_attributes_enabled",
+        default=False,
+        help="In full mode, propagate the trace context as query attributes instead of in the SQL comment for "
+        "drivers that support them, so that the statement text does not change across traces",
+    )
+
 
 dbm_config = DatabaseMonitoringConfig()
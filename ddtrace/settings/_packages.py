@@ -0,0 +1,25 @@
+import typing as t
+
+from ddtrace.settings._core import DDConfig
+
+
+class PackagesCacheConfig(DDConfig):
+    __prefix__ = "dd.packages.cache"
+
+    enabled = DDConfig.v(
+        bool,
+        "enabled",
+        help="Persist the mapping of installed distributions and their root modules on disk",
+        help_type="Boolean",
+        default=True,
+    )
+    dir = DDConfig.v(
+        t.Optional[str],
+        "dir",
+        help="Directory where the distribution mapping cache is stored. Defaults to the system temporary directory",
+        help_type="String",
+        default=None,
+    )
+
+
+config = PackagesCacheConfig()
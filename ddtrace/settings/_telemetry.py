@@ -23,6 +23,8 @@ class TelemetryConfig(DDConfig):
     INSTALL_TIME = DDConfig.v(t.Optional[str], "instrumentation.install_time", default=None)
     FORCE_START = DDConfig.v(bool, "instrumentation_telemetry.tests.force_app_started", default=False, private=True)
     LOG_COLLECTION_ENABLED = DDConfig.v(bool, "telemetry.log_collection.enabled", default=True)
+    MESSAGE_BATCH_ENABLED = DDConfig.v(bool, "telemetry.message_batch.enabled", default=True)
+    COMPRESSION_ENABLED = DDConfig.v(bool, "telemetry.compression.enabled", default=True)
 
 
 config = TelemetryConfig()
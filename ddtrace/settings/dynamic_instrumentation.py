@@ -96,6 +96,25 @@ class DynamicInstrumentationConfig(DDConfig):
         deprecations=[("upload.flush_interval", None, "4.0")],
     )
 
+    deferred_capture = DDConfig.v(
+        bool,
+        "deferred_capture.enabled",
+        default=False,
+        help_type="Boolean",
+        help=(
+            "Defer the serialization of snapshots to the uploader thread. Only references to the captured values "
+            "are kept when a probe is hit, so changes made to mutable objects afterwards might be reflected"
+        ),
+    )
+
+    max_deferred_signals = DDConfig.v(
+        int,
+        "deferred_capture.max_signals",
+        default=1000,
+        help_type="Integer",
+        help="Maximum number of snapshots awaiting serialization when deferred capture is enabled",
+    )
+
     diagnostics_interval = DDConfig.v(
         int,
         "diagnostics.interval",
@@ -21,9 +21,12 @@ class HttpConfig(object):
         # type: (Optional[Mapping[str, str]]) -> None
         self._header_tags = {normalize_header_name(k): v for k, v in header_tags.items()} if header_tags else {}
         self.trace_query_string = None
+        # Bumped whenever the traced headers change so that precompiled header plans can be rebuilt
+        self._version = 0
 
     def _reset(self):
         self._header_tags = {}
+        self._version += 1
         self._header_tag_name.invalidate()
 
     @cachedmethod()
@@ -61,6 +64,7 @@ class HttpConfig(object):
             # Empty tag is replaced by the default tag for this header:
             #  Host on the request defaults to http.request.headers.host
             self._header_tags.setdefault(normalized_header_name, "")
+        self._version += 1
 
         # Mypy can't catch cached method's invalidate()
         self._header_tag_name.invalidate()  # type: ignore[attr-defined]
@@ -147,6 +147,24 @@ class ProfilingConfig(DDConfig):
         help="Whether to enable the endpoint data collection in profiles",
     )
 
+    span_cpu_time = DDConfig.v(
+        bool,
+        "span_cpu_time_enabled",
+        default=False,
+        help_type="Boolean",
+        help="Whether to report the CPU time consumed while a trace is active on a thread as the "
+        "``_dd.profiling.cpu_time_ns`` metric of its local root span",
+    )
+
+    span_cpu_time_all_spans = DDConfig.v(
+        bool,
+        "span_cpu_time_all_spans",
+        default=False,
+        help_type="Boolean",
+        help="Whether to report the ``_dd.profiling.cpu_time_ns`` metric on every span, rather than on local root "
+        "spans only. Requires ``DD_PROFILING_SPAN_CPU_TIME_ENABLED``",
+    )
+
     output_pprof = DDConfig.v(
         t.Optional[str],
         "output_pprof",
@@ -171,6 +189,33 @@ class ProfilingConfig(DDConfig):
         help="The interval in seconds to wait before flushing out recorded events",
     )
 
+    upload_queue_size = DDConfig.v(
+        int,
+        "upload_queue_size",
+        default=2,
+        help_type="Integer",
+        help="The maximum number of profiles waiting to be uploaded. The profiles are uploaded from a dedicated "
+        "thread, and the oldest ones are dropped once this number is reached, e.g. while the agent is unreachable.",
+    )
+
+    upload_dump_dir = DDConfig.v(
+        t.Optional[str],
+        "upload_dump_dir",
+        default=None,
+        help_type="String",
+        help="The directory where the profiles which could not be uploaded, or which were dropped, are dumped for "
+        "inspection. The dumped profiles are not uploaded again.",
+    )
+
+    upload_dump_max_files = DDConfig.v(
+        int,
+        "upload_dump_max_files",
+        default=10,
+        help_type="Integer",
+        help="The maximum number of profiles kept in the upload dump directory, by all the processes using it. "
+        "The oldest ones are removed first.",
+    )
+
     capture_pct = DDConfig.v(
         float,
         "capture_pct",
@@ -202,8 +247,9 @@ class ProfilingConfig(DDConfig):
         "max_time_usage_pct",
         default=1.0,
         help_type="Float",
-        help="The percentage of maximum time the stack profiler can use when computing "
-        "statistics. Must be greater than 0 and lesser or equal to 100",
+        help="The percentage of the CPU time of the process the stack profiler can use. When sampling costs more, "
+        "the stack profiler lowers its sampling rate, then samples a subset of the threads and limits the depth of "
+        "the stacks. Must be greater than 0 and lesser or equal to 100",
     )
 
     api_timeout = DDConfig.v(
@@ -290,6 +336,27 @@ class ProfilingConfigStack(DDConfig):
         private=True,
     )
 
+    asyncio_task_budget = DDConfig.v(
+        int,
+        "asyncio_task_budget",
+        default=0,
+        help_type="Integer",
+        help="The maximum number of suspended asyncio tasks to sample. When set, the stack profiler samples the "
+        "running tasks, the tasks awaiting them, and a random subset of the other tasks, instead of all the tasks. "
+        "This bounds the overhead of the profiler for applications with many suspended tasks. "
+        "Set to ``0`` to sample all the tasks.",
+    )
+
+    thread_state_enabled = DDConfig.v(
+        bool,
+        "thread_state_enabled",
+        default=False,
+        help_type="Boolean",
+        help="Whether to sample the state of the threads with the v2 stack profiler: running, holding the GIL, "
+        "blocked while holding the GIL, waiting for the GIL, or blocked. The states are reported as the "
+        "``thread-state-time`` profile, labeled with the ``thread state`` label. Only supported on Linux.",
+    )
+
 
 class ProfilingConfigLock(DDConfig):
     __item__ = __prefix__ = "lock"
@@ -350,7 +417,34 @@ class ProfilingConfigHeap(DDConfig):
         help_type="Integer",
         help="",
     )
-    sample_size = DDConfig.d(int, _derive_default_heap_sample_size)
+
+    growth_snapshots = DDConfig.v(
+        int,
+        "growth_snapshots",
+        default=0,
+        help_type="Integer",
+        help="The number of consecutive heap profiles over which the live size of an allocation site must keep "
+        "growing for the site to be reported in the ``heap-growth`` profile, to help finding memory leaks. "
+        "Set to ``0`` to disable the heap growth profile.",
+    )
+
+    growth_max_sites = DDConfig.v(
+        int,
+        "growth_max_sites",
+        default=1024,
+        help_type="Integer",
+        help="The maximum number of allocation sites tracked for the ``heap-growth`` profile",
+    )
+
+    @property
+    def sample_size(self) -> int:
+        # DEV: Deriving the default sample size requires psutil, which we only
+        # want to import when the heap profiler is actually started.
+        try:
+            return self._derived_sample_size
+        except AttributeError:
+            self._derived_sample_size: int = _derive_default_heap_sample_size(self)
+            return self._derived_sample_size
 
 
 class ProfilingConfigPytorch(DDConfig):
@@ -369,7 +463,8 @@ class ProfilingConfigPytorch(DDConfig):
         "events_limit",
         default=1_000_000,
         help_type="Integer",
-        help="How many events the PyTorch profiler records each collection",
+        help="How many events of each PyTorch profiler step are converted into samples. The events of the steps "
+        "with more events are sampled",
     )
 
 
@@ -424,8 +519,12 @@ def config_str(config):
         configured_features.append("mem")
     if config.heap.sample_size > 0:
         configured_features.append("heap")
+        if config.heap.growth_snapshots > 0:
+            configured_features.append("heapgrowth")
     if config.pytorch.enabled:
         configured_features.append("pytorch")
+    if config.span_cpu_time:
+        configured_features.append("spancpu")
     configured_features.append("exp_dd")
     configured_features.append("CAP" + str(config.capture_pct))
     configured_features.append("MAXF" + str(config.max_frames))
@@ -746,7 +746,10 @@ if not IS_PYSTON:
                 "ddtrace/profiling/collector/_memalloc_heap.c",
                 "ddtrace/profiling/collector/_memalloc_reentrant.c",
                 "ddtrace/profiling/collector/_memalloc_heap_map.c",
+                "ddtrace/profiling/collector/_memalloc_heap_growth.c",
+                "ddtrace/profiling/collector/_memalloc_export.c",
             ],
+            include_dirs=["ddtrace/internal/datadog/profiling/dd_wrapper/include"],
             extra_compile_args=(
                 debug_compile_args
                 # If NDEBUG is set, assert statements are compiled out. Make
@@ -760,6 +763,14 @@ if not IS_PYSTON:
                 else ["/std:c11", "/experimental:c11atomics"]
             ),
         ),
+        Extension(
+            "ddtrace.profiling.collector._profiled_lock",
+            sources=["ddtrace/profiling/collector/_profiled_lock.c"],
+            include_dirs=["ddtrace/internal/datadog/profiling/dd_wrapper/include"],
+            extra_compile_args=(
+                debug_compile_args + ["-std=c11"] + fast_build_args if CURRENT_OS != "Windows" else ["/std:c11"]
+            ),
+        ),
         Extension(
             "ddtrace.internal._threads",
             sources=["ddtrace/internal/_threads.cpp"],
@@ -780,6 +791,15 @@ if not IS_PYSTON:
                 extra_compile_args=extra_compile_args + debug_compile_args + fast_build_args,
             )
         )
+        ext_modules.append(
+            Extension(
+                "ddtrace.appsec._ddwaf._marshal",
+                sources=[
+                    "ddtrace/appsec/_ddwaf/_marshal.c",
+                ],
+                extra_compile_args=extra_compile_args + debug_compile_args + fast_build_args,
+            )
+        )
         ext_modules.append(
             Extension(
                 "ddtrace.appsec._iast._ast.iastpatch",
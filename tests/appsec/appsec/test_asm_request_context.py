@@ -3,6 +3,7 @@ import logging
 import pytest
 
 from ddtrace.appsec import _asm_request_context
+from ddtrace.appsec._constants import SPAN_DATA_NAMES
 from ddtrace.internal._exceptions import BlockingException
 from tests.appsec.utils import asm_context
 from tests.utils import override_global_config
@@ -51,6 +52,19 @@ def test_set_get_headers():
         assert _asm_request_context.get_headers() == _TEST_HEADERS
 
 
+def test_changed_addresses():
+    with asm_context(config=config_asm):
+        _asm_request_context.pop_changed_addresses()
+        _asm_request_context.set_ip(_TEST_IP)
+        _asm_request_context.set_headers(_TEST_HEADERS)
+        assert _asm_request_context.pop_changed_addresses() == {
+            SPAN_DATA_NAMES.REQUEST_HTTP_IP,
+            SPAN_DATA_NAMES.REQUEST_HEADERS_NO_COOKIES,
+        }
+        assert _asm_request_context.pop_changed_addresses() == set()
+    assert _asm_request_context.pop_changed_addresses() == set()
+
+
 def test_call_block_callable_none():
     with asm_context(config=config_asm):
         _asm_request_context.set_block_request_callable(None)
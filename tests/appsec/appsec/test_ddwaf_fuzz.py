@@ -80,6 +80,16 @@ def test_limits(obj, res, trunc):
     assert (obs.string_length, obs.container_size, obs.container_depth) == trunc
 
 
+def test_large_body_limits():
+    obs = _observator()
+    body = {"field_%d" % i: ["x" * 5000, {"nested": i}] for i in range(1000)}
+    dd_obj = ddwaf_object(body, observator=obs)
+    res = dd_obj.struct
+    assert len(res) == 256
+    assert all(len(v[0]) == 4096 and v[1] == {"nested": int(k[6:])} for k, v in res.items())
+    assert (obs.string_length, obs.container_size, obs.container_depth) == (5000, 1000, None)
+
+
 if __name__ == "__main__":
     import atheris
 
@@ -2,6 +2,7 @@ import ast
 import base64
 import contextlib
 import functools
+import gzip
 import http.client as httplib
 import importlib
 from itertools import product
@@ -593,15 +594,31 @@ class TelemetryTestSession(object):
             if "api/v2/apmtelemetry" not in req["url"]:
                 # /test/session/requests captures non telemetry payloads, ignore these requests
                 continue
-            req["body"] = json.loads(base64.b64decode(req["body"]))
-            # filter heartbeat requests to reduce noise
-            if req["body"]["request_type"] == "app-heartbeat" and filter_heartbeats:
-                continue
-            if request_type is None or req["body"]["request_type"] == request_type:
-                requests.append(req)
+            body = base64.b64decode(req["body"])
+            if body[:2] == b"\x1f\x8b":
+                body = gzip.decompress(body)
+            req["body"] = json.loads(body)
+            for unpacked in self._unpack_batch(req):
+                # filter heartbeat requests to reduce noise
+                if unpacked["body"]["request_type"] == "app-heartbeat" and filter_heartbeats:
+                    continue
+                if request_type is None or unpacked["body"]["request_type"] == request_type:
+                    requests.append(unpacked)
 
         return sorted(requests, key=lambda r: r["body"]["seq_id"], reverse=True)
 
+    @staticmethod
+    def _unpack_batch(req):
+        """Split a message-batch request into one request per batched event"""
+        if req["body"]["request_type"] != "message-batch":
+            return [req]
+        unpacked = []
+        for event in req["body"]["payload"]:
+            body = dict(req["body"], request_type=event["request_type"], payload=event["payload"])
+            headers = dict(req["headers"], **{"DD-Telemetry-Request-Type": event["request_type"]})
+            unpacked.append(dict(req, body=body, headers=headers))
+        return unpacked
+
     def get_events(self, event_type=None, filter_heartbeats=True, subprocess=False):
         """Get a list of the event payloads sent to the test agent
 
@@ -21,6 +21,7 @@ from ddtrace.internal.datastreams.processor import ConsumerPartitionKey
 from ddtrace.internal.datastreams.processor import DataStreamsCtx
 from ddtrace.internal.datastreams.processor import PartitionKey
 from ddtrace.internal.utils.retry import fibonacci_backoff_with_jitter
+from ddtrace.propagation.http import HTTPPropagator as Propagator
 from ddtrace.trace import Pin
 from ddtrace.trace import TraceFilter
 from ddtrace.trace import tracer as ddtracer
@@ -933,6 +934,26 @@ def test_context_header_injection_works_no_client_added_headers(kafka_topic, pro
         assert propagation_asserted is True
 
 
+def test_consume_batch_links_every_message_context(empty_kafka_topic, dummy_tracer, producer, consumer):
+    Pin._override(producer, tracer=dummy_tracer)
+    Pin._override(consumer, tracer=dummy_tracer)
+    with override_config("kafka", dict(distributed_tracing_enabled=True)):
+        producer.produce(empty_kafka_topic, b"batch message 1", key="key 1")
+        producer.produce(empty_kafka_topic, b"batch message 2", key="key 2")
+        producer.flush()
+
+        messages = consumer.consume(num_messages=2, timeout=10)
+    assert len(messages) == 2
+
+    consume_span = [s for t in dummy_tracer.pop_traces() for s in t if s.name == "kafka.consume"][-1]
+    contexts = [Propagator.extract(dict(m.headers())) for m in messages]
+    assert consume_span.parent_id == contexts[0].span_id
+    assert [link.span_id for link in consume_span._links] == [contexts[1].span_id]
+
+    Pin._override(consumer, tracer=None)
+    Pin._override(producer, tracer=None)
+
+
 def test_consumer_uses_active_context_when_no_valid_distributed_context_exists(
     kafka_topic, producer, consumer, dummy_tracer
 ):
@@ -40,6 +40,37 @@ def test_data_streams_loop_protection():
     assert child_hash == expected_child_hash
 
 
+def test_data_streams_set_checkpoints():
+    tags = ["direction:in", "group:group1", "topic:topicA", "type:kafka"]
+    now = time.time()
+    upstream = processor.new_pathway(now - 2)
+    upstream.set_checkpoint(["direction:out", "topic:topicA", "type:kafka"], now_sec=now - 1)
+    carrier = {}
+    DsmPathwayCodec.encode(upstream, carrier)
+
+    # Two messages from the same upstream pathway and one without any context
+    ctx = processor.set_checkpoints(tags, [carrier, carrier, {}], [10, 20, 30], now_sec=now)
+
+    expected_hash = upstream._compute_hash(sorted(tags), upstream.hash)
+    now_ns = int(now * 1e9)
+    bucket_time_ns = int(now_ns - (now_ns % 1e10))
+    pathway_stats = processor._buckets[bucket_time_ns].pathway_stats
+    stats = pathway_stats[(",".join(sorted(tags)), expected_hash, upstream.hash)]
+    assert stats.full_pathway_latency.count == 2
+    assert stats.payload_size.count == 2
+    assert stats.payload_size.sum == 30
+
+    # The checkpoint of each message matches the one of set_checkpoint
+    single = DsmPathwayCodec.decode(carrier, processor)
+    single.set_checkpoint(tags, now_sec=now)
+    assert single.hash == expected_hash
+
+    # The context of the last message becomes the current context
+    new_pathway_hash = processor.new_pathway()._compute_hash(sorted(tags), 0)
+    assert ctx.hash == new_pathway_hash
+    assert pathway_stats[(",".join(sorted(tags)), new_pathway_hash, 0)].full_pathway_latency.count >= 1
+
+
 def test_kafka_offset_monitoring():
     now = time.time()
     processor.track_kafka_commit("group1", "topic1", 1, 10, now)
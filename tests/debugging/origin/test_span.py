@@ -2,6 +2,7 @@ from pathlib import Path
 import typing as t
 
 import ddtrace
+from ddtrace.debugging._origin.span import _CODE_ORIGIN_CACHE
 from ddtrace.debugging._origin.span import SpanCodeOriginProcessorEntry
 from ddtrace.debugging._origin.span import SpanCodeOriginProcessorExit
 from ddtrace.debugging._session import Session
@@ -151,3 +152,29 @@ class SpanProbeTestCase(TracerTestCase):
         assert _exit.get_tag("_dd.code_origin.type") is None
         assert _exit.get_tag("_dd.code_origin.frames.0.file") is None
         assert _exit.get_tag("_dd.code_origin.frames.0.line") is None
+
+    def test_span_origin_exit_cached(self):
+        def exit_call():
+            with self.tracer.trace("exit", span_type=SpanTypes.SQL):
+                pass
+
+        for _ in range(2):
+            exit_call()
+
+        self.assert_span_count(2)
+        first, second = self.get_spans()
+
+        # The code origin information is resolved once per code object
+        assert _CODE_ORIGIN_CACHE[exit_call.__code__].is_user
+        assert _CODE_ORIGIN_CACHE[exit_call.__code__].line == str(exit_call.__code__.co_firstlineno)
+
+        for n in range(2):
+            for tag in ("file", "line", "type", "method"):
+                name = f"_dd.code_origin.frames.{n}.{tag}"
+                assert first.get_tag(name) is not None
+                assert first.get_tag(name) == second.get_tag(name)
+
+        assert first.get_tag("_dd.code_origin.frames.0.line") == str(exit_call.__code__.co_firstlineno)
+        assert first.get_tag("_dd.code_origin.frames.1.line") == str(
+            self.test_span_origin_exit_cached.__code__.co_firstlineno
+        )
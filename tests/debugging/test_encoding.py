@@ -6,16 +6,19 @@ import json
 import sys
 import threading
 
+import mock
 import pytest
 
-from ddtrace.debugging._encoding import JSONTree
+from ddtrace.debugging._encoding import JSONStreamEncoder
 from ddtrace.debugging._encoding import LogSignalJsonEncoder
 from ddtrace.debugging._encoding import SignalQueue
 from ddtrace.debugging._probe.model import MAXSIZE
 from ddtrace.debugging._probe.model import CaptureLimits
+from ddtrace.debugging._signal import snapshot as snapshot_module
 from ddtrace.debugging._signal import utils
 from ddtrace.debugging._signal.snapshot import Snapshot
 from ddtrace.debugging._signal.snapshot import _capture_context
+from ddtrace.debugging._signal.snapshot import _DeferredContext
 from ddtrace.debugging._signal.utils import BUILTIN_MAPPING_TYPES
 from ddtrace.debugging._signal.utils import BUILTIN_SEQUENCE_TYPES
 from ddtrace.internal._encoding import BufferFull
@@ -269,6 +272,89 @@ def test_batch_flush_reencode():
     assert len(queue.flush()) == a + b + 3
 
 
+def test_batch_deferred_capture():
+    items = [1, 2, 3]
+
+    s = Snapshot(
+        probe=create_snapshot_line_probe(probe_id="batch-test", source_file="foo.py", line=42),
+        frame=inspect.currentframe(),
+        thread=threading.current_thread(),
+    )
+
+    with debugger_config(
+        DD_DYNAMIC_INSTRUMENTATION_DEFERRED_CAPTURE_ENABLED="true",
+        DD_DYNAMIC_INSTRUMENTATION_DEFERRED_CAPTURE_MAX_SIGNALS="2",
+    ):
+        eager = _capture_context(s.frame, (None, None, None))
+        s.line({})
+
+        # The frame is not kept until the snapshot is encoded
+        assert s.frame is None
+
+        # Changes made after the probe was hit are not reflected in the snapshot
+        items.append(4)
+
+        queue = SignalQueue(LogSignalJsonEncoder(None))
+
+        # Nothing is encoded until the queue is flushed
+        assert queue.put(s) == queue.put(s) == 0
+        assert queue.count == 2
+
+        with pytest.raises(BufferFull):
+            queue.put(s)
+
+        payload = queue.flush()
+        assert queue.count == 0
+        assert queue.flush() is None
+
+    decoded = json.loads(payload.decode())
+    assert len(decoded) == 2
+    assert decoded[0]["debugger"]["snapshot"]["captures"]["lines"]["42"]["locals"]["items"] == eager["locals"]["items"]
+    assert decoded[0]["debugger"]["snapshot"]["captures"]["lines"]["42"]["locals"]["items"]["size"] == 3
+
+
+def test_batch_deferred_capture_mutated(monkeypatch):
+    def capture(self):
+        raise RuntimeError("dictionary changed size during iteration")
+
+    s = Snapshot(
+        probe=create_snapshot_line_probe(probe_id="batch-test", source_file="foo.py", line=42),
+        frame=inspect.currentframe(),
+        thread=threading.current_thread(),
+    )
+
+    with debugger_config(DD_DYNAMIC_INSTRUMENTATION_DEFERRED_CAPTURE_ENABLED="true"):
+        s.line({})
+
+        queue = SignalQueue(LogSignalJsonEncoder(None))
+        queue.put(s)
+
+        # Signals whose values change while they are captured are dropped
+        monkeypatch.setattr(_DeferredContext, "capture", capture)
+        assert queue.flush() is None
+        assert queue.count == 0
+
+
+def test_batch_deferred_capture_cpu_budget(monkeypatch):
+    s = Snapshot(
+        probe=create_snapshot_line_probe(probe_id="batch-test", source_file="foo.py", line=42),
+        frame=inspect.currentframe(),
+        thread=threading.current_thread(),
+    )
+
+    with debugger_config(DD_DYNAMIC_INSTRUMENTATION_DEFERRED_CAPTURE_ENABLED="true"):
+        s.line({})
+
+        queue = SignalQueue(LogSignalJsonEncoder(None))
+        queue.put(s)
+
+        # Snapshots that exceed the CPU budget use the budget of the following
+        # snapshots of the probe.
+        monkeypatch.setattr(snapshot_module, "DEFERRED_CAPTURE_CPU_BUDGET", 1e-9)
+        assert queue.flush() is not None
+        assert s.probe.limiter.budget < 0
+
+
 # ---- Side effects ----
 
 
@@ -470,136 +556,78 @@ def test_encoding_stopping_cond_map_size(count, result):
     assert utils.capture_value({i: i for i in range(100)}, stopping_cond=CountBudget(count)) == result
 
 
-def test_json_tree():
-    tree = JSONTree(r'{"a": 1, "b": {"a": [{"a": 1, "b": 2}, {"a": 1, "notCapturedReason": "depth"}], "b": 2}}')
+def test_json_stream_encoder():
+    payload = {"a": 1, "b": {"a": [{"a": 1, "b": 2}, {"a": 1, "notCapturedReason": "depth"}], "b": 2.5, 3: None}}
+    buffer = bytearray(b"[")
 
-    def node_to_tuple(node: JSONTree.Node):
-        return (
-            node.start,
-            node.end,
-            node.level,
-            node.not_captured,
-            node.pruned,
-            [node_to_tuple(_) for _ in node.children],
-        )
-
-    assert node_to_tuple(tree.root) == (
-        0,
-        88,
-        0,
-        False,
-        0,
-        [
-            (
-                14,
-                87,
-                1,
-                False,
-                0,
-                [
-                    (21, 37, 2, False, 0, []),
-                    (39, 77, 2, True, 0, []),
-                ],
-            )
-        ],
-    )
-
-    assert [node_to_tuple(_) for _ in sorted(tree.leaves)] == [
-        (39, 77, 2, True, 0, []),
-        (21, 37, 2, False, 0, []),
-    ]
+    JSONStreamEncoder(buffer, 1 << 10).encode(payload)
+    assert buffer.decode() == "[" + json.dumps(payload)
 
 
 @pytest.mark.parametrize(
-    "size, expected",
+    "budget,expected",
     [
-        (
-            800,
-            r"""{
-                "keep": {"type": "list", "size":2, "elements": [
-                    {"type": "str", "value": "aaaaaaaaaaaaaaaaaaaaaaaaaaaa"},
-                    {"type": "str", "value": "aaaaaaaaaaaaaaaaaaaaaaaaaaaa"}
-                ]},
-                "prune": {"type": "list", "size":2, "elements": [
-                    {"type": "Custom", "notCapturedReason": "depth"},
-                    {"type": "Custom", "notCapturedReason": "depth"}
-                ]}
-            }""",
-        ),
-        (
-            440,
-            r"""{
-                "keep": {"type": "list", "size":2, "elements": [
-                    {"type": "str", "value": "aaaaaaaaaaaaaaaaaaaaaaaaaaaa"},
-                    {"type": "str", "value": "aaaaaaaaaaaaaaaaaaaaaaaaaaaa"}
-                ]},
-                "prune": {"type": "list", "size":2, "elements": [
-                    {"pruned":true},
-                    {"pruned":true}
-                ]}
-            }""",
-        ),
-        (
-            350,
-            r"""{
-                "keep": {"type": "list", "size":2, "elements": [
-                    {"type": "str", "value": "aaaaaaaaaaaaaaaaaaaaaaaaaaaa"},
-                    {"type": "str", "value": "aaaaaaaaaaaaaaaaaaaaaaaaaaaa"}
-                ]},
-                "prune": {"pruned":true}
-            }""",
-        ),
-        (
-            270,
-            r"""{
-                "keep": {"type": "list", "size":2, "elements": [
-                    {"type": "str", "value": "aaaaaaaaaaaaaaaaaaaaaaaaaaaa"},
-                    {"pruned":true}
-                ]},
-                "prune": {"pruned":true}
-            }""",
-        ),
-        (
-            240,
-            r"""{
-                "keep": {"type": "list", "size":2, "elements": [
-                    {"pruned":true},
-                    {"pruned":true}
-                ]},
-                "prune": {"pruned":true}
-            }""",
-        ),
-        (
-            120,
-            r"""{
-                "keep": {"pruned":true},
-                "prune": {"pruned":true}
-            }""",
-        ),
-        (20, r'{"pruned":true}'),
+        (1 << 10, {"a": [{"b": "x" * 32}, {"b": "y" * 32}], "c": {"d": 1}}),
+        (100, {"a": [{"b": "x" * 32}, {"pruned": True}], "c": {"d": 1}}),
+        (64, {"a": [{"pruned": True}, {"pruned": True}], "c": {"d": 1}}),
     ],
 )
-def test_json_pruning_not_capture_depth(size, expected):
+def test_json_stream_encoder_budget(budget, expected):
+    payload = {"a": [{"b": "x" * 32}, {"b": "y" * 32}], "c": {"d": 1}}
+    buffer = bytearray()
+
+    JSONStreamEncoder(buffer, budget, min_level=1).encode(payload)
+    assert len(buffer) <= budget
+    assert json.loads(buffer) == expected
+
+
+def test_json_stream_encoder_single_pass():
+    leaf = {"type": "str", "value": "x" * 32}
+    payload = {"a": {"b": {"c": {"d": [leaf, leaf, leaf, leaf]}}}}
+    buffer = bytearray()
+
+    # Only the leaves are encoded, once each, even though the objects containing them do not fit
+    with mock.patch.object(json, "dumps", wraps=json.dumps) as dumps:
+        JSONStreamEncoder(buffer, 200, min_level=1).encode(payload)
+
+    assert len(buffer) <= 200
+    assert json.loads(buffer) == {"a": {"b": {"c": {"d": [leaf, leaf, {"pruned": True}, {"pruned": True}]}}}}
+    assert dumps.call_args_list == [mock.call(leaf)] * 4
+
+
+def test_json_stream_encoder_stops_past_budget():
+    class Unserializable:
+        pass
+
+    buffer = bytearray()
+
+    # Objects starting past the budget are pruned without being walked
+    JSONStreamEncoder(buffer, 32, min_level=1).encode({"a": {"b": "x" * 64}, "c": {"d": [Unserializable()]}})
+    assert json.loads(buffer) == {"a": {"pruned": True}, "c": {"pruned": True}}
+
+
+def test_log_signal_encoder_prunes_large_snapshots():
     class TestEncoder(LogSignalJsonEncoder):
-        MAX_SIGNAL_SIZE = size
+        MAX_SIGNAL_SIZE = 1 << 12
         MIN_LEVEL = 0
 
-    assert (
-        TestEncoder(None).pruned(
-            r"""{
-                "keep": {"type": "list", "size":2, "elements": [
-                    {"type": "str", "value": "aaaaaaaaaaaaaaaaaaaaaaaaaaaa"},
-                    {"type": "str", "value": "aaaaaaaaaaaaaaaaaaaaaaaaaaaa"}
-                ]},
-                "prune": {"type": "list", "size":2, "elements": [
-                    {"type": "Custom", "notCapturedReason": "depth"},
-                    {"type": "Custom", "notCapturedReason": "depth"}
-                ]}
-            }""",
-        )
-        == expected
+    s = Snapshot(
+        probe=create_snapshot_line_probe(probe_id="prune-test", source_file="foo.py", line=42),
+        frame=inspect.currentframe(),
+        thread=threading.current_thread(),
     )
 
+    # DEV: This local variable will appear in the snapshot and make it exceed
+    # the maximum signal size.
+    large = [{"value": "a" * 64} for _ in range(MAXSIZE)]  # noqa: F841
+
+    s.line({})
+
+    encoded = TestEncoder(None).encode(s)
+    assert len(encoded) <= TestEncoder.MAX_SIGNAL_SIZE
+    assert b'{"pruned":true}' in encoded
+    assert json.loads(encoded)["debugger"]["snapshot"]["id"] == s.uuid
+
 
 def test_capture_value_redacted_type():
     class Foo:
@@ -76,3 +76,65 @@ def test_write_read():
     assert global_connector.read()[0].content == {"data": "4"}
     global_connector.write(any_product({"data": "4"}))
     assert global_connector.read() == []
+
+
+def test_connector_decodes_only_changed_products():
+    connector = PublisherSubscriberConnector()
+    asm_data = build_payload("ASM_DATA", {"rules_data": []}, "asm_data")
+    connector.write([asm_data, build_payload("ASM", {"a": "b"}, "asm")])
+    first = connector.read()
+    assert [p.content for p in first] == [{"rules_data": []}, {"a": "b"}]
+
+    connector.write([asm_data, build_payload("ASM", {"c": "d"}, "asm")])
+    second = connector.read()
+    assert [p.content for p in second] == [{"rules_data": []}, {"c": "d"}]
+    # The unchanged product is not decoded again
+    assert second[0] is first[0]
+    assert second[1] is not first[1]
+
+
+def test_connector_deleted_payload():
+    connector = PublisherSubscriberConnector()
+    connector.write([build_payload("ASM", None, "asm")])
+    (payload,) = connector.read()
+    assert payload.content is None
+    assert payload.metadata.product_name == "ASM"
+    assert payload.path == "Datadog/1/ASM/asm"
+
+
+def test_connector_grows_shared_memory():
+    from ddtrace.internal.remoteconfig._connectors import SHARED_MEMORY_SIZE
+
+    connector = PublisherSubscriberConnector()
+    ips = ["10.0.%d.%d" % (i // 256, i % 256) for i in range(0x10000)]
+    ips += ["192.168.%d.%d" % (i // 256, i % 256) for i in range(0x10000)]
+    connector.write(any_product({"ips": ips}))
+    assert len(connector.data.map) > SHARED_MEMORY_SIZE
+    assert connector.read()[0].content == {"ips": ips}
+
+
+@pytest.mark.subprocess()
+def test_connector_grows_shared_memory_across_fork():
+    import os
+    import time
+
+    from ddtrace.internal.remoteconfig._connectors import SHARED_MEMORY_SIZE
+    from ddtrace.internal.remoteconfig._connectors import PublisherSubscriberConnector
+    from tests.utils import remote_config_build_payload as build_payload
+
+    connector = PublisherSubscriberConnector()
+    users = ["user-%d@example.com" % i for i in range(0x20000)]
+
+    pid = os.fork()
+    if pid == 0:
+        for _ in range(200):
+            data = connector.read()
+            if data:
+                assert len(connector.data.map) > SHARED_MEMORY_SIZE
+                os._exit(0 if data[0].content == {"users": users} else 2)
+            time.sleep(0.05)
+        os._exit(1)
+
+    connector.write([build_payload("ASM_DATA", {"users": users}, "asm_data")])
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
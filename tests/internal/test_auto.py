@@ -16,3 +16,28 @@ def test_auto():
     import ddtrace.auto  # noqa:F401
 
     assert "threading" not in sys.modules
+
+
+@pytest.mark.subprocess(
+    env=dict(
+        DD_PROFILING_ENABLED="false",
+        DD_RUNTIME_METRICS_ENABLED="false",
+        DD_APPSEC_ENABLED="false",
+        DD_IAST_ENABLED="false",
+        DD_LLMOBS_ENABLED="false",
+    )
+)
+def test_auto_lazy_subsystems():
+    import sys
+
+    import ddtrace.auto  # noqa:F401
+
+    for module in (
+        "ddtrace.appsec._iast",
+        "ddtrace.appsec._processor",
+        "ddtrace.internal.runtime.runtime_metrics",
+        "ddtrace.internal.symbol_db.symbols",
+        "ddtrace.llmobs",
+        "ddtrace.vendor.psutil",
+    ):
+        assert module not in sys.modules, module
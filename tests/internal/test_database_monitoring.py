@@ -1,7 +1,9 @@
 import logging
 
+import mock
 import pytest
 
+from ddtrace.propagation import _database_monitoring as _database_monitoring_propagation
 from ddtrace.propagation._database_monitoring import default_sql_injector
 from ddtrace.settings import _database_monitoring
 from tests.utils import override_env
@@ -196,6 +198,89 @@ def test_dbm_peer_entity_tags():
         assert dbspan.get_tag(_database_monitoring.DBM_TRACE_INJECTED_TAG) is not None
 
 
+@pytest.mark.subprocess(
+    env=dict(
+        DD_DBM_PROPAGATION_MODE="full",
+        DD_SERVICE="orders-app",
+        DD_ENV="staging",
+        DD_VERSION="v7343437-d7ac743",
+    )
+)
+def test_dbm_service_comment_cached():
+    import mock
+
+    from ddtrace.propagation import _database_monitoring
+    from ddtrace.trace import tracer
+
+    comment_generator = mock.Mock(wraps=_database_monitoring._generate_sql_comment)
+    dbm_propagator = _database_monitoring._DBM_Propagator(0, "query", comment_generator=comment_generator)
+
+    for _ in range(3):
+        with tracer.trace("dbspan", service="orders-db") as dbspan:
+            sqlcomment = dbm_propagator._get_dbm_comment(dbspan)
+            assert (
+                sqlcomment
+                == "/*dddbs='orders-db',dde='staging',ddps='orders-app',ddpv='v7343437-d7ac743',traceparent='%s'*/ "
+                % (dbspan.context._traceparent,)
+            ), sqlcomment
+
+    # The comment is generated only once, the traceparent is appended to the cached comment
+    assert comment_generator.call_count == 1
+
+    with tracer.trace("dbspan", service="users-db") as dbspan:
+        sqlcomment = dbm_propagator._get_dbm_comment(dbspan, include_trace_context=False)
+        assert sqlcomment == "/*dddbs='users-db',dde='staging',ddps='orders-app',ddpv='v7343437-d7ac743'*/ "
+        assert dbspan.get_tag(_database_monitoring.DBM_TRACE_INJECTED_TAG) == "true"
+
+    assert comment_generator.call_count == 2
+
+
+@pytest.mark.subprocess(
+    env=dict(
+        DD_DBM_PROPAGATION_MODE="full",
+        DD_DBM_QUERY_ATTRIBUTES_ENABLED="true",
+        DD_SERVICE="orders-app",
+        DD_ENV="staging",
+        DD_VERSION="v7343437-d7ac743",
+    )
+)
+def test_dbm_full_mode_query_attributes():
+    from ddtrace.propagation import _database_monitoring
+    from ddtrace.trace import tracer
+
+    class Cursor(object):
+        def __init__(self):
+            self.attributes = {}
+
+        def add_attribute(self, name, value):
+            self.attributes[name] = value
+
+        def remove_attribute(self, name):
+            self.attributes.pop(name, None)
+
+    dbm_propagator = _database_monitoring._DBM_Propagator(
+        0, "query", query_attributes_injector=_database_monitoring.mysql_query_attributes_injector
+    )
+    service_comment = "/*dddbs='orders-db',dde='staging',ddps='orders-app',ddpv='v7343437-d7ac743'*/ "
+
+    cursor = Cursor()
+    for _ in range(2):
+        with tracer.trace("dbspan", service="orders-db") as dbspan:
+            args, kwargs = dbm_propagator.inject(dbspan, ("SELECT * from table;",), {}, cursor)
+            # the statement text does not depend on the trace
+            assert args == (service_comment + "SELECT * from table;",)
+            assert kwargs == {}
+            assert cursor.attributes == {"traceparent": dbspan.context._traceparent}
+            assert dbspan.get_tag(_database_monitoring.DBM_TRACE_INJECTED_TAG) == "true"
+
+    # Cursors that do not support query attributes get the traceparent in the comment
+    with tracer.trace("dbspan", service="orders-db") as dbspan:
+        args, _ = dbm_propagator.inject(dbspan, ("SELECT * from table;",), {}, object())
+        assert args == (
+            "%s,traceparent='%s'*/ SELECT * from table;" % (service_comment[:-3], dbspan.context._traceparent),
+        )
+
+
 def test_default_sql_injector(caplog):
     # test sql injection with unicode str
     dbm_comment = "/*dddbs='orders-db'*/ "
@@ -207,6 +292,15 @@ def test_default_sql_injector(caplog):
     str_query = "select * from table;".encode("utf-8")
     assert default_sql_injector(dbm_comment, str_query) == b"/*dddbs='orders-db'*/ select * from table;"
 
+    # test sql injection of a comment with a traceparent, which is not cached with the service comment
+    with mock.patch.object(
+        _database_monitoring_propagation, "_encode_comment", wraps=_database_monitoring_propagation._encode_comment
+    ) as encode_comment:
+        for traceparent in ("00-0001-0002-01", "00-0003-0004-01"):
+            dbm_comment = "/*dddbs='orders-db',traceparent='%s'*/ " % traceparent
+            assert default_sql_injector(dbm_comment, str_query) == dbm_comment.encode("utf-8") + str_query
+    assert encode_comment.call_args_list == [mock.call("/*dddbs='orders-db'")] * 2
+
     # test sql injection with a non supported type
     with caplog.at_level(logging.INFO):
         dbm_comment = "/*dddbs='orders-db'*/ "
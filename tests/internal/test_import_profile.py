@@ -0,0 +1,37 @@
+import pytest
+
+
+def test_import_profiler(tmp_path, monkeypatch):
+    import sys
+
+    from ddtrace.internal.import_profile import ImportProfiler
+
+    (tmp_path / "import_profile_parent.py").write_text("import time\ntime.sleep(0.01)\nimport import_profile_child\n")
+    (tmp_path / "import_profile_child.py").write_text("import time\ntime.sleep(0.02)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    ImportProfiler.install()
+    try:
+        import import_profile_parent  # noqa:F401
+
+        costs = ImportProfiler._instance.costs
+    finally:
+        ImportProfiler.uninstall()
+        sys.modules.pop("import_profile_parent", None)
+        sys.modules.pop("import_profile_child", None)
+
+    parent = costs["import_profile_parent"]
+    child = costs["import_profile_child"]
+
+    assert child.self_ns >= 20e6
+    assert child.cumulative_ns == child.self_ns
+    assert parent.self_ns >= 10e6
+    assert parent.cumulative_ns >= parent.self_ns + child.cumulative_ns
+
+
+@pytest.mark.subprocess(env=dict(_DD_IMPORT_PROFILE_FILE="-"), err=lambda err: "| ddtrace.bootstrap.preload\n" in err)
+def test_import_profiler_report():
+    import ddtrace.auto  # noqa:F401
+    from ddtrace.internal.import_profile import ImportProfiler
+
+    assert not ImportProfiler.is_installed()
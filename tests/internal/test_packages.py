@@ -1,3 +1,5 @@
+import os
+
 import pytest
 
 from ddtrace.internal.packages import _third_party_packages
@@ -143,3 +145,45 @@ def test_third_party_packages_symlinks(tmp_path):
     code_file_2.write_bytes(b"#")
 
     assert not is_user_code(code_file_2)
+
+
+def test_distributions_cache(tmp_path, monkeypatch):
+    from ddtrace.internal.packages import _DistributionsCache
+
+    site_packages = tmp_path / "site-packages"
+    site_packages.mkdir()
+    monkeypatch.setattr("sys.path", [str(site_packages)])
+
+    cache = _DistributionsCache(tmp_path / "cache")
+    assert cache.get("distributions") is None
+    cache.set("distributions", {"foo": "1.0.0"})
+
+    # The cache is shared with other processes running in the same environment
+    assert _DistributionsCache(tmp_path / "cache").get("distributions") == {"foo": "1.0.0"}
+
+    # Installing a new distribution changes the modification time of the site-packages directory
+    (site_packages / "bar-2.0.0.dist-info").mkdir()
+    os.utime(site_packages, ns=(0, 0))
+    assert _DistributionsCache(tmp_path / "cache").get("distributions") is None
+
+
+def test_root_module_mapping_lazy():
+    from ddtrace.internal.packages import _RootModuleMapping
+
+    completed = []
+    mapping = _RootModuleMapping(completed.append)
+
+    assert mapping["pytest"].name == "pytest"
+    assert "not-a-root-module" not in mapping
+
+    # Looking up a missing root module scans all the distributions
+    assert completed == [dict(mapping)]
+
+
+@pytest.mark.subprocess(env={"DD_PACKAGES_CACHE_ENABLED": "false"})
+def test_distributions_cache_disabled():
+    from ddtrace.internal.packages import _distributions_cache
+    from ddtrace.internal.packages import _package_for_root_module_mapping
+
+    assert _distributions_cache() is None
+    assert _package_for_root_module_mapping()["pytest"].name == "pytest"
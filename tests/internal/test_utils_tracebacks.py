@@ -0,0 +1,95 @@
+import io
+import traceback
+
+import pytest
+
+from ddtrace.internal.utils import tracebacks
+
+
+def _raise(n, message):
+    if n:
+        _raise(n - 1, message)
+    raise ValueError(message)
+
+
+def _raise_chained(message):
+    try:
+        _raise(2, "inner")
+    except ValueError as e:
+        raise KeyError(message) from e
+
+
+def _raise_context(message):
+    try:
+        _raise(2, "inner")
+    except ValueError:
+        raise RuntimeError(message)
+
+
+def _print_exception(exc, limit):
+    buff = io.StringIO()
+    traceback.print_exception(type(exc), exc, exc.__traceback__, file=buff, limit=limit)
+    return buff.getvalue()
+
+
+@pytest.mark.parametrize("f", [_raise_chained, _raise_context, lambda message: _raise(5, message)])
+@pytest.mark.parametrize("limit", [None, 2, -1, -3])
+def test_format_exception_matches_traceback(f, limit):
+    tracebacks.clear_cache()
+
+    for message in ("first", "second"):
+        try:
+            f(message)
+        except Exception as e:
+            # The second occurrence is served from the cache, with its own message
+            assert tracebacks.format_exception(type(e), e, e.__traceback__, limit=limit) == _print_exception(e, limit)
+            assert message in tracebacks.format_exception(type(e), e, e.__traceback__, limit=limit)
+
+
+def test_format_exception_max_len():
+    try:
+        _raise(20, "boom")
+    except ValueError as e:
+        full = tracebacks.format_exception(type(e), e, e.__traceback__, limit=-20)
+        fitted = tracebacks.format_exception(type(e), e, e.__traceback__, limit=-20, max_len=len(full) // 2)
+
+        limit = -20
+        expected = _print_exception(e, limit)
+        while len(expected) > len(full) // 2:
+            limit //= 2
+            expected = _print_exception(e, limit)
+
+        assert limit > -20
+        assert fitted == expected
+
+
+def test_traceback_fingerprint():
+    fingerprints = set()
+    for _ in range(2):
+        try:
+            _raise(3, "boom")
+        except ValueError as e:
+            fingerprints.add(tracebacks.fingerprint(e.__traceback__))
+
+    try:
+        _raise(4, "boom")
+    except ValueError as e:
+        assert tracebacks.fingerprint(e.__traceback__) not in fingerprints
+
+    assert len(fingerprints) == 1
+
+
+def test_format_exception_dynamic_code():
+    tracebacks.clear_cache()
+
+    # Identical functions defined at runtime in different files, which might be given the same id once collected
+    for filename in ("first.py", "second.py", "first.py"):
+        namespace = {}
+        exec(compile("def f():\n    raise ValueError('boom')\n", filename, "exec"), namespace)
+        try:
+            namespace["f"]()
+        except ValueError as e:
+            formatted = tracebacks.format_exception(type(e), e, e.__traceback__)
+            assert formatted == _print_exception(e, None)
+            assert 'File "%s"' % filename in formatted
+        del namespace
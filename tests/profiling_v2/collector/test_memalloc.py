@@ -134,6 +134,103 @@ def test_memory_collector_ignore_profiler(tmp_path):
         assert "No samples found" in str(e)
 
 
+def test_memory_collector_heap_snapshot(tmp_path):
+    test_name = "test_memory_collector_heap_snapshot"
+    pprof_prefix = str(tmp_path / test_name)
+    output_filename = pprof_prefix + "." + str(os.getpid())
+
+    ddup.config(
+        service=test_name,
+        version="test",
+        env="test",
+        output_filename=pprof_prefix,
+    )
+    ddup.start()
+
+    mc = memalloc.MemoryCollector(heap_sample_size=64)
+    with mc:
+        x = _allocate_1k()  # noqa: F841
+        # The heap samples are exported natively, straight from the heap tracker
+        mc.snapshot()
+
+    ddup.upload()
+
+    profile = pprof_utils.parse_profile(output_filename)
+    samples = pprof_utils.get_samples_with_value_type(profile, "heap-space")
+    assert len(samples) > 0
+
+    pprof_utils.assert_profile_has_sample(
+        profile,
+        samples,
+        expected_sample=pprof_utils.StackEvent(
+            thread_name="MainThread",
+            thread_id=threading.main_thread().ident,
+            locations=[
+                pprof_utils.StackLocation(
+                    function_name="_allocate_1k", filename="test_memalloc.py", line_no=_ALLOC_LINE_NUMBER
+                )
+            ],
+        ),
+    )
+
+
+def _leak_1k(leak):
+    leak.append(_allocate_1k())
+
+
+def _allocate_and_free_1k():
+    return len(_allocate_1k())
+
+
+def test_memory_collector_heap_growth(tmp_path):
+    test_name = "test_memory_collector_heap_growth"
+    pprof_prefix = str(tmp_path / test_name)
+    output_filename = pprof_prefix + "." + str(os.getpid())
+
+    ddup.config(
+        service=test_name,
+        version="test",
+        env="test",
+        output_filename=pprof_prefix,
+    )
+    ddup.start()
+
+    leak = []
+    mc = memalloc.MemoryCollector(heap_sample_size=64, heap_growth_snapshots=3)
+    with mc:
+        for _ in range(5):
+            _leak_1k(leak)
+            _allocate_and_free_1k()
+            mc.snapshot()
+
+    ddup.upload()
+
+    profile = pprof_utils.parse_profile(output_filename)
+    samples = pprof_utils.get_samples_with_value_type(profile, "heap-growth")
+    assert len(samples) > 0
+
+    # Only the allocations which are kept alive are reported as growing
+    pprof_utils.assert_profile_has_sample(
+        profile,
+        samples,
+        expected_sample=pprof_utils.StackEvent(
+            locations=[
+                pprof_utils.StackLocation(
+                    function_name="_allocate_1k", filename="test_memalloc.py", line_no=_ALLOC_LINE_NUMBER
+                ),
+                pprof_utils.StackLocation(
+                    function_name="_leak_1k", filename="test_memalloc.py", line_no=_leak_1k.__code__.co_firstlineno + 1
+                ),
+            ],
+        ),
+    )
+    for sample in samples:
+        for location_id in sample.location_id:
+            location = pprof_utils.get_location_with_id(profile, location_id)
+            function = pprof_utils.get_function_with_id(profile, location.line[0].function_id)
+            assert profile.string_table[function.name] != "_allocate_and_free_1k"
+
+
 @pytest.mark.subprocess(
     env=dict(DD_PROFILING_HEAP_SAMPLE_SIZE="8", DD_PROFILING_OUTPUT_PPROF="/tmp/test_heap_profiler_large_heap_overhead")
 )
@@ -294,6 +294,69 @@ def test_push_span_none_span_type(tmp_path, tracer):
         )
 
 
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Thread states are only sampled on Linux")
+@pytest.mark.subprocess(
+    env=dict(
+        DD_PROFILING_STACK_THREAD_STATE_ENABLED="true",
+        DD_PROFILING_OUTPUT_PPROF="/tmp/test_thread_state",
+    ),
+    err=None,
+)
+def test_thread_state():
+    import collections
+    import os
+    import threading
+    import time
+
+    from ddtrace.profiling import profiler
+    from ddtrace.trace import tracer
+    from tests.profiling.collector import pprof_utils
+
+    def spin():
+        end = time.monotonic() + 2
+        while time.monotonic() < end:
+            sum(range(1000))
+
+    def sleep():
+        time.sleep(2)
+
+    p = profiler.Profiler(tracer=tracer)
+    p.start()
+
+    with tracer.trace("thread_state") as span:
+        threads = [threading.Thread(target=spin, name="spin %d" % i) for i in range(2)]
+        threads.append(threading.Thread(target=sleep, name="sleep"))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    p.stop()
+
+    profile = pprof_utils.parse_profile(os.environ["DD_PROFILING_OUTPUT_PPROF"] + "." + str(os.getpid()))
+    samples = pprof_utils.get_samples_with_value_type(profile, "thread-state-time")
+    assert len(samples) > 0
+
+    states = collections.defaultdict(set)
+    for sample in samples:
+        thread_name = pprof_utils.get_label_with_key(profile.string_table, sample, "thread name")
+        state = pprof_utils.get_label_with_key(profile.string_table, sample, "thread state")
+        thread_name = profile.string_table[thread_name.str]
+        states[thread_name].add(profile.string_table[state.str])
+
+        # The samples of the main thread are linked to the span it is waiting in
+        if thread_name == "MainThread":
+            span_id = pprof_utils.get_label_with_key(profile.string_table, sample, "span id")
+            if span_id is not None:
+                assert span_id.num == span.span_id
+
+    # The spinning threads compete for the GIL
+    for i in range(2):
+        assert {"holding-gil", "waiting-gil"} <= states["spin %d" % i], states
+    assert states["sleep"] == {"blocked"}, states
+    assert "blocked" in states["MainThread"], states
+
+
 @pytest.mark.skipif(not stack.FEATURES["stack-exceptions"], reason="Stack exceptions are not supported")
 @pytest.mark.parametrize("stack_v2_enabled", [True, False])
 def test_exception_collection(stack_v2_enabled, tmp_path):
@@ -659,6 +722,85 @@ def test_max_time_usage_over():
         stack.StackCollector(max_time_usage_pct=200)
 
 
+@pytest.mark.subprocess()
+def test_overhead_budget_invalid():
+    import pytest
+
+    from ddtrace.internal.datadog.profiling import stack_v2
+
+    for budget in (0, -1, 100.5):
+        with pytest.raises(ValueError):
+            stack_v2.set_overhead_budget(budget)
+    stack_v2.set_overhead_budget(100)
+
+
+@pytest.mark.subprocess(
+    env=dict(
+        DD_PROFILING_MAX_TIME_USAGE_PCT="0.01",
+        DD_PROFILING_OUTPUT_PPROF="/tmp/test_overhead_budget",
+    ),
+    err=None,
+)
+def test_overhead_budget():
+    import json
+    import os
+    import threading
+    import time
+
+    from ddtrace.internal.datadog.profiling import ddup
+    from ddtrace.profiling import profiler
+    from ddtrace.trace import tracer
+    from tests.profiling.collector import pprof_utils
+
+    # The lowest limit on the depth of the stacks, and the most it is relaxed to while over the budget
+    min_stack_depth_limit = 16
+    max_stack_depth_limit = 2 * min_stack_depth_limit
+
+    def deep(n):
+        if n:
+            return deep(n - 1)
+        time.sleep(6)
+
+    p = profiler.Profiler(tracer=tracer)
+    p.start()
+
+    threads = [threading.Thread(target=deep, args=(200,), name="deep %d" % i) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # The metadata is only sent with the profiles uploaded to the agent, so it is read directly
+    metadata = json.loads(ddup.take_sampling_metadata())["stack_sampling"]
+    assert metadata["rounds"] > 0
+    assert metadata["thread_sampling_probability"] < 1.0, metadata
+    assert min_stack_depth_limit <= metadata["stack_depth_limit"] <= max_stack_depth_limit, metadata
+
+    p.stop()
+
+    # Even with a tiny budget, the threads keep being sampled, with their stacks cut at the depth limit
+    profile = pprof_utils.parse_profile(os.environ["DD_PROFILING_OUTPUT_PPROF"] + "." + str(os.getpid()))
+    samples = pprof_utils.get_samples_with_value_type(profile, "wall-time")
+    limited = []
+    for sample in samples:
+        thread_name = pprof_utils.get_label_with_key(profile.string_table, sample, "thread name")
+        if not profile.string_table[thread_name.str].startswith("deep "):
+            continue
+        function_names = []
+        for location_id in sample.location_id:
+            location = pprof_utils.get_location_with_id(profile, location_id)
+            function = pprof_utils.get_function_with_id(profile, location.line[0].function_id)
+            function_names.append(profile.string_table[function.name])
+        omitted = [name for name in function_names if name.endswith(" frames omitted>")]
+        if omitted and len(function_names) - 1 <= max_stack_depth_limit:
+            limited.append((omitted[0], len(function_names) - 1))
+
+    assert limited, "no sample of the deep threads was limited by the overhead budget"
+    for omitted, depth in limited:
+        # The frames beyond the limit are counted, so that the stack still accounts for all of them
+        assert int(omitted[1:].split(" ")[0]) + depth > 200, (omitted, depth)
+
+
 @pytest.mark.parametrize(
     "stack_v2_enabled",
     [True, False],
@@ -119,3 +119,99 @@ def test_asyncio():
             ],
         ),
     )
+
+
+@pytest.mark.subprocess(
+    env=dict(
+        DD_PROFILING_OUTPUT_PPROF="/tmp/test_stack_asyncio_task_budget",
+        DD_PROFILING_STACK_ASYNCIO_TASK_BUDGET="100",
+    ),
+    err=None,
+)
+def test_asyncio_task_budget():
+    import asyncio
+    import os
+    import time
+
+    from ddtrace.internal.datadog.profiling import stack_v2
+    from ddtrace.profiling import profiler
+    from tests.profiling.collector import pprof_utils
+
+    assert stack_v2.is_available, stack_v2.failure_msg
+
+    async def idle(event):
+        await event.wait()
+
+    async def busy():
+        start_time = time.monotonic()
+        while time.monotonic() < start_time + 2:
+            time.sleep(0.01)
+            await asyncio.sleep(0)
+
+    async def short():
+        time.sleep(0.05)
+
+    async def outer():
+        # Short tasks start and complete between two refreshes of the sampled subset
+        for _ in range(20):
+            await asyncio.create_task(short(), name="short")
+
+    async def main():
+        event = asyncio.Event()
+        idle_tasks = [asyncio.create_task(idle(event), name="idle") for _ in range(10000)]
+        await asyncio.sleep(0)
+        await asyncio.create_task(busy(), name="busy")
+        await asyncio.create_task(outer(), name="outer")
+
+        event.set()
+        await asyncio.gather(*idle_tasks)
+
+    p = profiler.Profiler()
+    p.start()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(main())
+    p.stop()
+
+    output_filename = os.environ["DD_PROFILING_OUTPUT_PPROF"] + "." + str(os.getpid())
+    profile = pprof_utils.parse_profile(output_filename)
+    samples = pprof_utils.get_samples_with_label_key(profile, "task name")
+    assert len(samples) > 0
+
+    # Only a bounded subset of the suspended tasks is sampled
+    idle_samples = [
+        sample
+        for sample in samples
+        if profile.string_table[pprof_utils.get_label_with_key(profile.string_table, sample, "task name").str] == "idle"
+    ]
+    assert 0 < len(idle_samples) < 10000
+
+    # The running task is always sampled
+    pprof_utils.assert_profile_has_sample(
+        profile,
+        samples,
+        expected_sample=pprof_utils.StackEvent(
+            thread_name="MainThread",
+            task_name="busy",
+            locations=[
+                pprof_utils.StackLocation(
+                    function_name="busy", filename="test_stack_asyncio.py", line_no=busy.__code__.co_firstlineno + 3
+                ),
+            ],
+        ),
+    )
+
+    # The short tasks are sampled while they run, even though they complete between two refreshes of the subset
+    pprof_utils.assert_profile_has_sample(
+        profile,
+        samples,
+        expected_sample=pprof_utils.StackEvent(
+            thread_name="MainThread",
+            task_name="short",
+            locations=[
+                pprof_utils.StackLocation(
+                    function_name="short", filename="test_stack_asyncio.py", line_no=short.__code__.co_firstlineno + 1
+                ),
+            ],
+        ),
+    )
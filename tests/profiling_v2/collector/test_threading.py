@@ -81,6 +81,25 @@ def test_patch():
     assert collector._original == threading.Lock
 
 
+def test_profiled_lock_behaves_like_lock():
+    with collector_threading.ThreadingLockCollector(capture_pct=100):
+        lock = threading.Lock()
+
+        assert isinstance(lock, type(lock.__wrapped__))
+        assert not lock.locked()
+        assert lock.acquire(blocking=False)
+        assert lock.locked()
+        assert not lock.acquire(blocking=False)
+        lock.release()
+        with pytest.raises(RuntimeError):
+            lock.release()
+
+        condition = threading.Condition(lock)
+        with condition:
+            condition.notify_all()
+        assert not lock.locked()
+
+
 @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="only works on linux")
 @pytest.mark.subprocess(err=None)
 # For macOS: Could print 'Error uploading' but okay to ignore since we are checking if native_id is set
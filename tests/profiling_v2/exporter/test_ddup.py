@@ -62,3 +62,61 @@ def test_tags_propagated():
     # Profiler could add tags, so check that tags is a superset of config.tags
     for k, v in config.tags.items():
         assert tags[k] == v
+
+
+@pytest.mark.subprocess(
+    env=dict(
+        DD_PROFILING_UPLOAD_QUEUE_SIZE="1",
+        DD_PROFILING_UPLOAD_DUMP_DIR="/tmp/test_ddup_upload_dump",
+        DD_PROFILING_UPLOAD_DUMP_MAX_FILES="2",
+        DD_TRACE_AGENT_URL="http://localhost:1",
+    ),
+    err=None,
+)
+def test_upload_dump():
+    import glob
+    import os
+    import shutil
+
+    from ddtrace.internal.datadog.profiling import ddup
+    from ddtrace.settings.profiling import config
+    from ddtrace.trace import tracer
+
+    dump_dir = config.upload_dump_dir
+    shutil.rmtree(dump_dir, ignore_errors=True)
+    os.makedirs(dump_dir)
+
+    # Profiles dumped by another process, and a file which is not a profile
+    for name in ("profile.1.0", "profile.1.1", "other"):
+        path = os.path.join(dump_dir, name)
+        with open(path, "wb"):
+            pass
+        os.utime(path, (0, 0))
+
+    ddup.config(
+        env="my_env",
+        service="my_service",
+        version="my_version",
+        tags={},
+        upload_queue_size=config.upload_queue_size,
+        upload_dump_dir=dump_dir,
+        upload_dump_max_files=config.upload_dump_max_files,
+    )
+    ddup.start()
+
+    # Nothing listens on the agent URL, so the uploads fail and the profiles are dumped. The oldest profiles in the
+    # directory are removed, whichever process dumped them.
+    for _ in range(4):
+        ddup.upload(tracer, False)
+    assert ddup.wait_uploads(30.0)
+
+    stats = ddup.upload_stats()
+    assert stats["succeeded"] == 0
+    assert stats["dropped"] == 4
+    assert stats["dumped"] == 4
+    assert len(glob.glob(os.path.join(dump_dir, "profile.%d.*" % os.getpid()))) == 2
+    assert sorted(os.listdir(dump_dir))[0] == "other"
+    assert len(os.listdir(dump_dir)) == 3
+
+    # The stats are reset once taken
+    assert ddup.upload_stats()["dumped"] == 0
@@ -0,0 +1,163 @@
+import gzip
+import sys
+
+import lz4.frame
+import mock
+import pytest
+
+from ddtrace.commands import ddtrace_profile
+from ddtrace.internal.datadog.profiling import pprof
+from tests.profiling.collector.pprof_utils import pprof_pb2
+
+
+def _write_profile(path, samples, time_nanos=0, duration_nanos=60 * 10**9):
+    """Writes a profile with cpu-time and wall-time values, like the profiler does.
+
+    Each sample is given as its stack, from the root to the leaf, its cpu-time and wall-time values and its labels.
+    """
+    profile = pprof_pb2.Profile()
+    strings = {"": 0}
+
+    def string(s):
+        if s not in strings:
+            strings[s] = len(strings)
+        return strings[s]
+
+    for type_, unit in (("cpu-time", "nanoseconds"), ("wall-time", "nanoseconds")):
+        sample_type = profile.sample_type.add()
+        sample_type.type = string(type_)
+        sample_type.unit = string(unit)
+
+    functions = {}
+    for stack, values, labels in samples:
+        sample = profile.sample.add()
+        for name in reversed(stack):
+            if name not in functions:
+                functions[name] = len(functions) + 1
+                function = profile.function.add()
+                function.id = functions[name]
+                function.name = string(name)
+                function.filename = string("app.py")
+                location = profile.location.add()
+                location.id = functions[name]
+                line = location.line.add()
+                line.function_id = functions[name]
+                line.line = functions[name] * 10
+            sample.location_id.append(functions[name])
+        sample.value.extend(values)
+        for key, value in labels.items():
+            label = sample.label.add()
+            label.key = string(key)
+            if isinstance(value, int):
+                label.num = value
+            else:
+                label.str = string(value)
+
+    profile.string_table.extend(sorted(strings, key=strings.get))
+    profile.time_nanos = time_nanos
+    profile.duration_nanos = duration_nanos
+    with open(path, "wb") as f:
+        f.write(lz4.frame.compress(profile.SerializeToString()))
+
+
+@pytest.fixture
+def profiles(tmp_path):
+    main = {"thread name": "MainThread", "span id": 42, "trace endpoint": "GET /users"}
+    worker = {"thread name": "Worker-1", "task name": "poll"}
+    _write_profile(
+        str(tmp_path / "app.100.1"),
+        [
+            (("main", "handle", "query"), [30, 50], main),
+            (("main", "handle"), [10, 10], main),
+            (("run", "poll"), [5, 100], worker),
+        ],
+        time_nanos=1000 * 10**9,
+    )
+    _write_profile(
+        str(tmp_path / "app.200.1"),
+        [
+            (("main", "handle", "query"), [20, 20], main),
+            (("run", "poll"), [0, 60], worker),
+        ],
+        time_nanos=2000 * 10**9,
+    )
+    return tmp_path
+
+
+def _merge(capsys, *args):
+    with pytest.raises(SystemExit) as exc:
+        ddtrace_profile.main(["merge"] + list(args))
+    return exc.value.code, capsys.readouterr().out
+
+
+def test_merge_collapsed(profiles, capsys):
+    code, out = _merge(capsys, str(profiles / "app.*"))
+    assert code == 0
+    assert out.splitlines() == ["main;handle 10", "main;handle;query 50", "run;poll 5"]
+
+
+def test_merge_sample_type_and_filters(profiles, capsys):
+    code, out = _merge(capsys, "--sample-type", "wall-time", "--thread", "Worker-*", str(profiles / "app.*"))
+    assert code == 0
+    assert out.splitlines() == ["run;poll 160"]
+
+    code, out = _merge(capsys, "--span", "42", "--endpoint", "GET /users", str(profiles / "app.*"))
+    assert code == 0
+    assert out.splitlines() == ["main;handle 10", "main;handle;query 50"]
+
+
+def test_merge_pid_and_time_window(profiles, capsys):
+    code, out = _merge(capsys, "--pid", "200", str(profiles / "app.*"))
+    assert code == 0
+    assert out.splitlines() == ["main;handle;query 20"]
+
+    code, out = _merge(capsys, "--since", "1500", str(profiles / "app.*"))
+    assert code == 0
+    assert out.splitlines() == ["main;handle;query 20"]
+
+    code, out = _merge(capsys, "--until", "3000", "--since", "2500", str(profiles / "app.*"))
+    assert code == 1
+
+
+def test_merge_top(profiles, capsys):
+    code, out = _merge(capsys, "--format", "top", "--lines", str(profiles / "app.*"))
+    assert code == 0
+    lines = out.splitlines()
+    assert lines[0] == "cpu-time (nanoseconds) in 2 profiles"
+    assert lines[2].split() == ["50", "76.92%", "50", "76.92%", "query", "(app.py:10)"]
+    assert lines[3].split() == ["10", "15.38%", "60", "92.31%", "handle", "(app.py:20)"]
+    assert lines[4].split()[:2] == ["5", "7.69%"]
+
+
+def test_merge_group_by(profiles, capsys):
+    code, out = _merge(capsys, "--group-by", "thread name", str(profiles / "app.100.*"))
+    assert code == 0
+    assert out.splitlines() == ["MainThread;main;handle 10", "MainThread;main;handle;query 30", "Worker-1;run;poll 5"]
+
+
+def test_stack_aggregator_bounded():
+    aggregator = pprof.StackAggregator(max_stacks=10)
+    for i in range(100):
+        aggregator.add(("f%d" % i,), i)
+        aggregator.add(("hot",), 1000)
+    assert len(aggregator.stacks) <= 10
+    assert aggregator.stacks[("hot",)] == 100000
+    assert aggregator.total() == 100000 + sum(range(100))
+    assert aggregator.dropped_stacks > 0
+
+
+@pytest.mark.parametrize("compress", [lz4.frame.compress, gzip.compress, bytes])
+def test_read_file(tmp_path, compress):
+    path = tmp_path / "profile.1.0"
+    path.write_bytes(compress(b"\x0a\x02\x08\x01"))
+
+    assert pprof.read_file(str(path)) == b"\x0a\x02\x08\x01"
+
+
+def test_read_file_lz4_not_installed(tmp_path):
+    path = tmp_path / "profile.1.0"
+    path.write_bytes(lz4.frame.compress(b"\x0a\x02\x08\x01"))
+
+    with mock.patch.dict(sys.modules, {"lz4": None, "lz4.frame": None}):
+        with pytest.raises(pprof.PprofError, match=r"lz4 package .* pip install 'ddtrace\[lz4\]'"):
+            pprof.read_file(str(path))
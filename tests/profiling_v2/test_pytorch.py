@@ -1,6 +1,7 @@
 import os
 import sys
 
+import mock
 import pytest
 
 from tests.profiling.collector import pprof_utils
@@ -42,3 +43,149 @@ def test_call_script_pytorch_gpu(tmp_path, monkeypatch):
 
     gpu_device_label_samples = pprof_utils.get_samples_with_label_key(profile, "gpu device name")
     assert len(gpu_device_label_samples) > 0
+
+
+class _FakeEvent(object):
+    """A synthetic event of the PyTorch profiler, with the attributes read by the collector."""
+
+    def __init__(self, name, device_type="DeviceType.CPU", cpu_time=0, device_time=0, stack=(), thread=1, end=10):
+        self.name = name
+        self.device_type = device_type
+        self.device_index = 0
+        self.cpu_time = cpu_time
+        self.device_time = device_time
+        self.flops = None
+        self.device_memory_usage = None
+        self.count = 1
+        self.thread = thread
+        self.stack = list(stack)
+        self.time_range = type("Interval", (), {"end": end})()
+
+
+def test_aggregate_events():
+    from ddtrace.profiling.collector import pytorch
+
+    events = [
+        _FakeEvent("aten::mm", cpu_time=10, stack=["model.py(12): forward"], end=5),
+        _FakeEvent("aten::mm", cpu_time=20, stack=["model.py(12): forward"], end=20),
+        _FakeEvent("aten::mm", cpu_time=5, stack=["model.py(30): backward"]),
+        _FakeEvent("aten::mm", device_type="DeviceType.CUDA", device_time=7),
+        _FakeEvent("aten::empty"),
+    ]
+    aggregates, weight = pytorch.aggregate_events(events, 100, trace_start_ns=1000)
+    assert weight == 1.0
+    assert len(aggregates) == 3
+
+    forward = aggregates[("aten::mm", ("model.py(12): forward",), "DeviceType.CPU", 0, 1)]
+    assert (forward.count, forward.cpu_time, forward.gpu_time) == (2, 30, 0)
+    assert forward.end_ns == 1000 + 20 * 1000
+
+    cuda = aggregates[("aten::mm", (), "DeviceType.CUDA", 0, 1)]
+    assert (cuda.count, cuda.cpu_time, cuda.gpu_time) == (1, 0, 7)
+
+
+def test_aggregate_events_budget():
+    from ddtrace.profiling.collector import pytorch
+
+    events = [_FakeEvent("aten::add", cpu_time=1, thread=i % 4) for i in range(100000)]
+    aggregates, weight = pytorch.aggregate_events(events, 1000, trace_start_ns=0)
+    assert weight == 100.0
+    assert len(aggregates) == 4
+    assert sum(aggregate.count for aggregate in aggregates.values()) == 1000
+
+
+def test_aggregate_events_releases_gil():
+    from ddtrace.profiling.collector import pytorch
+
+    events = [_FakeEvent("aten::add", cpu_time=1) for _ in range(25000)]
+    with mock.patch.object(pytorch.time, "sleep") as sleep:
+        aggregates, _ = pytorch.aggregate_events(events, 0, trace_start_ns=0)
+    assert sleep.call_args_list == [mock.call(0)] * 2
+    assert sum(aggregate.count for aggregate in aggregates.values()) == 25000
+
+
+def test_ingester_accounts_for_dropped_steps():
+    from ddtrace.profiling.collector import pytorch
+
+    ingester = pytorch.TorchEventIngester()
+    with mock.patch.object(ingester, "awake"):
+        for i in range(5):
+            ingester.submit([_FakeEvent("aten::add", cpu_time=1)], i)
+    assert ingester.dropped_steps == 3
+
+    with mock.patch.object(pytorch, "ingest_events") as ingest_events:
+        ingester.drain()
+    # The dropped steps are estimated from the oldest step still pending
+    assert [(c.args[1], c.args[3]) for c in ingest_events.call_args_list] == [(3, 4), (4, 1)]
+
+
+@pytest.mark.subprocess(
+    env=dict(DD_PROFILING_OUTPUT_PPROF="/tmp/test_pytorch_ingester"),
+)
+def test_ingester():
+    import os
+
+    from ddtrace.internal.datadog.profiling import ddup
+    from ddtrace.profiling.collector import pytorch
+    from tests.profiling.collector import pprof_utils
+
+    class Event(object):
+        def __init__(self, name, cpu_time):
+            self.name = name
+            self.device_type = "DeviceType.CPU"
+            self.device_index = 0
+            self.cpu_time = cpu_time
+            self.device_time = 0
+            self.flops = None
+            self.device_memory_usage = None
+            self.count = 1
+            self.thread = 1
+            self.stack = ["train.py(7): step"]
+            self.time_range = type("Interval", (), {"end": 10})()
+
+    class KinetoResults(object):
+        def trace_start_ns(self):
+            return 1000
+
+    class Prof(object):
+        def __init__(self, events):
+            self._events = events
+            self.profiler = type("Profiler", (), {"kineto_results": KinetoResults()})()
+
+        def events(self):
+            return self._events
+
+    pprof_prefix = os.environ["DD_PROFILING_OUTPUT_PPROF"]
+    ddup.config(env="test", service="test_ingester", version="my_version", output_filename=pprof_prefix)
+    ddup.start()
+
+    ingester = pytorch.TorchEventIngester(interval=60.0)
+    ingester.start()
+    # 10 steps with 100 events of the same op each, from the training loop thread
+    for _ in range(10):
+        pytorch.handle_torch_trace(Prof([Event("aten::conv2d", 3) for _ in range(100)]), ingester=ingester)
+    ingester.stop()
+    ingester.join()
+    ingester.drain()
+    ddup.upload()
+
+    profile = pprof_utils.parse_profile(pprof_prefix + "." + str(os.getpid()))
+    samples = pprof_utils.get_samples_with_value_type(profile, "cpu-time")
+    # The events of each step are aggregated into a single sample
+    assert 0 < len(samples) <= 10
+    cpu_time_idx = pprof_utils.get_sample_type_index(profile, "cpu-time")
+    total = sum(sample.value[cpu_time_idx] for sample in samples)
+    # The values of the dropped steps are estimated from the steps that were converted
+    assert total == 10 * 100 * 3 * 1000
+
+    pprof_utils.assert_profile_has_sample(
+        profile,
+        samples,
+        expected_sample=pprof_utils.StackEvent(
+            locations=[
+                pprof_utils.StackLocation(function_name="aten::conv2d", filename="unknown-file", line_no=0),
+                pprof_utils.StackLocation(function_name="step", filename="train.py", line_no=7),
+                pprof_utils.StackLocation(function_name="PYTORCH_DeviceType.CPU", filename="unknown-file", line_no=0),
+            ],
+        ),
+    )
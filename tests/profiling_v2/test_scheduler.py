@@ -50,3 +50,23 @@ def test_serverless_periodic(mock_periodic):
     assert s._profiled_intervals == 0
     assert s.interval == 1
     mock_periodic.assert_called()
+
+
+@mock.patch("ddtrace.profiling.scheduler.telemetry_writer")
+@mock.patch("ddtrace.profiling.scheduler.ddup")
+def test_upload_stats_reported(mock_ddup, mock_telemetry_writer):
+    mock_ddup.upload_stats.return_value = {
+        "succeeded": 2,
+        "failed": 1,
+        "dropped": 1,
+        "dumped": 1,
+        "latencies_ns": [5_000_000, 20_000_000],
+    }
+    s = scheduler.Scheduler()
+    s.flush()
+    mock_ddup.upload.assert_called_once()
+
+    counts = {c.args[1]: c.args[2] for c in mock_telemetry_writer.add_count_metric.call_args_list}
+    assert counts == {"upload.succeeded": 2, "upload.failed": 1, "upload.dropped": 1, "upload.dumped": 1}
+    latencies = [c.args[2] for c in mock_telemetry_writer.add_distribution_metric.call_args_list]
+    assert latencies == [5.0, 20.0]
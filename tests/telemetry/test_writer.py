@@ -1,3 +1,5 @@
+import gzip
+import json
 import os
 import sys
 import sysconfig
@@ -429,6 +431,8 @@ import ddtrace.settings.exception_replay
         {"name": "DD_PROFILING_ENABLE_CODE_PROVENANCE", "origin": "default", "value": True},
         {"name": "DD_PROFILING_ENDPOINT_COLLECTION_ENABLED", "origin": "default", "value": True},
         {"name": "DD_PROFILING_HEAP_ENABLED", "origin": "env_var", "value": False},
+        {"name": "DD_PROFILING_HEAP_GROWTH_MAX_SITES", "origin": "default", "value": 1024},
+        {"name": "DD_PROFILING_HEAP_GROWTH_SNAPSHOTS", "origin": "default", "value": 0},
         {"name": "DD_PROFILING_HEAP_SAMPLE_SIZE", "origin": "default", "value": None},
         {"name": "DD_PROFILING_IGNORE_PROFILER", "origin": "default", "value": False},
         {"name": "DD_PROFILING_LOCK_ENABLED", "origin": "env_var", "value": False},
@@ -442,11 +446,18 @@ import ddtrace.settings.exception_replay
         {"name": "DD_PROFILING_PYTORCH_ENABLED", "origin": "default", "value": False},
         {"name": "DD_PROFILING_PYTORCH_EVENTS_LIMIT", "origin": "default", "value": 1000000},
         {"name": "DD_PROFILING_SAMPLE_POOL_CAPACITY", "origin": "default", "value": 4},
+        {"name": "DD_PROFILING_SPAN_CPU_TIME_ALL_SPANS", "origin": "default", "value": False},
+        {"name": "DD_PROFILING_SPAN_CPU_TIME_ENABLED", "origin": "default", "value": False},
+        {"name": "DD_PROFILING_STACK_ASYNCIO_TASK_BUDGET", "origin": "default", "value": 0},
         {"name": "DD_PROFILING_STACK_ENABLED", "origin": "env_var", "value": False},
+        {"name": "DD_PROFILING_STACK_THREAD_STATE_ENABLED", "origin": "default", "value": False},
         {"name": "DD_PROFILING_STACK_V2_ENABLED", "origin": "default", "value": True},
         {"name": "DD_PROFILING_TAGS", "origin": "default", "value": ""},
         {"name": "DD_PROFILING_TIMELINE_ENABLED", "origin": "default", "value": False},
+        {"name": "DD_PROFILING_UPLOAD_DUMP_DIR", "origin": "default", "value": None},
+        {"name": "DD_PROFILING_UPLOAD_DUMP_MAX_FILES", "origin": "default", "value": 10},
         {"name": "DD_PROFILING_UPLOAD_INTERVAL", "origin": "env_var", "value": 10.0},
+        {"name": "DD_PROFILING_UPLOAD_QUEUE_SIZE", "origin": "default", "value": 2},
         {"name": "DD_PROFILING__FORCE_LEGACY_EXPORTER", "origin": "default", "value": False},
         {"name": "DD_REMOTE_CONFIGURATION_ENABLED", "origin": "env_var", "value": True},
         {"name": "DD_REMOTE_CONFIG_POLL_INTERVAL_SECONDS", "origin": "env_var", "value": 1.0},
@@ -625,9 +636,10 @@ def test_app_closing_event(telemetry_writer, test_agent_session, mock_time):
 
     requests = test_agent_session.get_requests("app-closing")
     assert len(requests) == 1
-    # ensure a valid request body was sent
-    totel_events = len(test_agent_session.get_events())
-    assert requests[0]["body"] == _get_request_body({}, "app-closing", totel_events)
+    # ensure a valid request body was sent. All the events are sent in a single message-batch
+    # request, which is assigned the sequence number following the batched events.
+    total_events = len(test_agent_session.get_events(filter_heartbeats=False))
+    assert requests[0]["body"] == _get_request_body({}, "app-closing", total_events + 1)
 
 
 def test_add_integration(telemetry_writer, test_agent_session, mock_time):
@@ -665,7 +677,11 @@ def test_add_integration(telemetry_writer, test_agent_session, mock_time):
                 },
             ]
         }
-        assert requests[0]["body"] == _get_request_body(expected_payload, "app-integrations-change", seq_id=2)
+        # app-started, app-integrations-change and app-heartbeat are sent in a single message-batch request
+        total_events = len(test_agent_session.get_events(filter_heartbeats=False))
+        assert requests[0]["body"] == _get_request_body(
+            expected_payload, "app-integrations-change", seq_id=total_events + 1
+        )
 
 
 def test_app_client_configuration_changed_event(telemetry_writer, test_agent_session, mock_time):
@@ -713,6 +729,8 @@ def test_send_failing_request(mock_status, telemetry_writer):
     with override_global_config(dict(_telemetry_dependency_collection=False)):
         # force periodic call to flush the first app_started call
         telemetry_writer.periodic(force_flush=True)
+        # drop the keep-alive connection so that the next request goes through httpretty
+        telemetry_writer._client.close()
         with httpretty.enabled():
             httpretty.register_uri(httpretty.POST, telemetry_writer._client.url, status=mock_status)
             with mock.patch("ddtrace.internal.telemetry.writer.log") as log:
@@ -726,6 +744,56 @@ def test_send_failing_request(mock_status, telemetry_writer):
                 )
 
 
+def test_periodic_sends_message_batch(telemetry_writer):
+    """asserts that all the queued events are sent in a single gzipped message-batch request"""
+    with override_global_config(dict(_telemetry_dependency_collection=False)):
+        telemetry_writer._client.close()
+        with httpretty.enabled(allow_net_connect=False):
+            httpretty.register_uri(httpretty.POST, telemetry_writer._client.url, status=202)
+            telemetry_writer.add_integration("integration-t", True, True, "")
+            telemetry_writer.periodic(force_flush=True)
+
+            requests = httpretty.latest_requests()
+            assert len(requests) == 1
+            assert requests[0].headers["Content-Encoding"] == "gzip"
+            assert requests[0].headers["DD-Telemetry-Request-Type"] == "message-batch"
+
+            body = json.loads(gzip.decompress(requests[0].body))
+            assert body["request_type"] == "message-batch"
+            request_types = [event["request_type"] for event in body["payload"]]
+            assert "app-started" in request_types
+            assert "app-integrations-change" in request_types
+            assert "app-heartbeat" in request_types
+            assert all(set(event) == {"request_type", "payload"} for event in body["payload"])
+
+            # a single queued event is not wrapped in a batch
+            telemetry_writer.periodic(force_flush=True)
+            assert len(httpretty.latest_requests()) == 2
+            assert httpretty.last_request().headers["DD-Telemetry-Request-Type"] == "app-heartbeat"
+
+
+def test_periodic_message_batch_disabled(telemetry_writer):
+    """asserts that events are sent one request at a time when message batching is disabled"""
+    original_batch, original_compression = telemetry_config.MESSAGE_BATCH_ENABLED, telemetry_config.COMPRESSION_ENABLED
+    try:
+        telemetry_config.MESSAGE_BATCH_ENABLED = False
+        telemetry_config.COMPRESSION_ENABLED = False
+        with override_global_config(dict(_telemetry_dependency_collection=False)):
+            telemetry_writer._client.close()
+            with httpretty.enabled(allow_net_connect=False):
+                httpretty.register_uri(httpretty.POST, telemetry_writer._client.url, status=202)
+                telemetry_writer.add_integration("integration-t", True, True, "")
+                telemetry_writer.periodic(force_flush=True)
+
+                request_types = [r.headers["DD-Telemetry-Request-Type"] for r in httpretty.latest_requests()]
+                assert request_types == ["app-started", "app-integrations-change", "app-heartbeat"]
+                assert "Content-Encoding" not in httpretty.last_request().headers
+                assert json.loads(httpretty.last_request().body)["request_type"] == "app-heartbeat"
+    finally:
+        telemetry_config.MESSAGE_BATCH_ENABLED = original_batch
+        telemetry_config.COMPRESSION_ENABLED = original_compression
+
+
 def test_app_heartbeat_event_periodic(mock_time, telemetry_writer, test_agent_session):
     # type: (mock.Mock, Any, Any) -> None
     """asserts that we queue/send app-heartbeat when periodc() is called"""
@@ -1,9 +1,20 @@
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
 import os
 import re
+import socket
+import threading
+import time
 from urllib import parse
 
+import mock
 import pytest
 
+from ddtrace.internal.telemetry.constants import TELEMETRY_NAMESPACE
+from ddtrace.internal.utils.http import ConnectionPool
+from ddtrace.internal.utils.http import _report_connection_pool_metrics
+from ddtrace.internal.utils.http import _reset_connection_pools
+from ddtrace.internal.utils.http import get_connection_pool
 from ddtrace.internal.utils.http import normalize_header_name
 from ddtrace.internal.utils.http import redact_url
 from ddtrace.internal.utils.http import strip_query_string
@@ -79,3 +90,154 @@ def test_redact_url_not_redacts_with_param(url):
 )
 def test_redact_url_does_redact(url, regex, query_string, expected):
     assert redact_url(url, regex, query_string) == expected
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        close = self.path == "/close"
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        if close:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(b"ok")
+        # /drop closes the connection without telling the client
+        self.close_connection = close or self.path == "/drop"
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def keep_alive_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield "http://127.0.0.1:%d" % server.server_address[1]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _get(pool, path="/"):
+    with pool.connection(timeout=1.0) as conn:
+        conn.request("GET", path)
+        return conn.getresponse().read()
+
+
+def test_connection_pool_reuses_connections(keep_alive_server):
+    pool = ConnectionPool(keep_alive_server)
+    for _ in range(3):
+        assert _get(pool) == b"ok"
+
+    assert (pool.created, pool.reused) == (1, 2)
+    assert pool.reuse_ratio == 2 / 3
+    pool.close()
+
+
+def test_connection_pool_discards_closed_connections(keep_alive_server):
+    pool = ConnectionPool(keep_alive_server)
+    assert _get(pool, "/close") == b"ok"
+    assert _get(pool) == b"ok"
+
+    assert (pool.created, pool.reused) == (2, 0)
+    pool.close()
+
+
+def test_connection_pool_evicts_idle_connections(keep_alive_server):
+    pool = ConnectionPool(keep_alive_server, idle_timeout=0.01)
+    assert _get(pool) == b"ok"
+    time.sleep(0.02)
+    assert _get(pool) == b"ok"
+
+    assert (pool.created, pool.reused, pool.evicted) == (2, 0, 1)
+    pool.close()
+
+
+def test_connection_pool_unread_response_is_not_reused(keep_alive_server):
+    pool = ConnectionPool(keep_alive_server)
+    with pool.connection() as conn:
+        conn.request("GET", "/")
+        conn.getresponse()
+    assert _get(pool) == b"ok"
+
+    assert (pool.created, pool.reused) == (2, 0)
+    pool.close()
+
+
+def test_connection_pool_reuses_high_fd_connections(keep_alive_server):
+    resource = pytest.importorskip("resource")
+    fd = 2048
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard != resource.RLIM_INFINITY and hard <= fd:
+        pytest.skip("cannot open file descriptors above FD_SETSIZE")
+    resource.setrlimit(resource.RLIMIT_NOFILE, (fd + 1, hard))
+    try:
+        pool = ConnectionPool(keep_alive_server)
+        with pool.connection(timeout=1.0) as conn:
+            conn.request("GET", "/")
+            assert conn.getresponse().read() == b"ok"
+            # Move the socket past the range supported by select.select
+            sock = conn.sock
+            conn.sock = socket.socket(fileno=os.dup2(sock.fileno(), fd))
+            sock.close()
+        assert _get(pool) == b"ok"
+
+        assert (pool.created, pool.reused) == (1, 1)
+        pool.close()
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+
+def test_connection_pool_retries_stale_connections(keep_alive_server):
+    pool = ConnectionPool(keep_alive_server)
+    assert _get(pool, "/drop") == b"ok"
+    # Pretend the connection was closed by the server only after being checked out
+    with mock.patch("ddtrace.internal.utils.http._is_connection_dropped", return_value=False):
+        assert _get(pool) == b"ok"
+    assert _get(pool) == b"ok"
+
+    assert (pool.created, pool.reused) == (1, 2)
+    pool.close()
+
+
+def test_get_connection_pool_is_shared():
+    assert get_connection_pool("http://localhost:8126") is get_connection_pool("http://localhost:8126")
+    assert get_connection_pool("unix:///var/run/datadog/apm.socket") is not get_connection_pool("http://localhost:8126")
+    with pytest.raises(ValueError):
+        get_connection_pool("bad://localhost:8126")
+
+
+def test_connection_pool_reset_after_fork(keep_alive_server):
+    pool = get_connection_pool(keep_alive_server)
+    connect = pool.connector(timeout=1.0)
+    with connect() as conn:
+        conn.request("GET", "/")
+        conn.getresponse().read()
+    assert len(pool._idle) == 1
+
+    _reset_connection_pools()
+
+    # Services holding on to the pool use the same one as new services
+    assert get_connection_pool(keep_alive_server) is pool
+    assert not pool._idle
+    assert (pool.created, pool.reused, pool.evicted) == (0, 0, 0)
+
+
+def test_connection_pool_metrics(keep_alive_server):
+    pool = get_connection_pool(keep_alive_server)
+    _report_connection_pool_metrics()
+
+    with mock.patch("ddtrace.internal.telemetry.telemetry_writer.add_count_metric") as add_count_metric:
+        for _ in range(3):
+            assert _get(pool) == b"ok"
+        _report_connection_pool_metrics()
+        _report_connection_pool_metrics()
+
+    assert add_count_metric.call_args_list == [
+        mock.call(TELEMETRY_NAMESPACE.TRACERS, "http_client.connections", 1, (("state", "created"),)),
+        mock.call(TELEMETRY_NAMESPACE.TRACERS, "http_client.connections", 2, (("state", "reused"),)),
+    ]
@@ -1,3 +1,5 @@
+import threading
+import time
 from typing import Any  # noqa:F401
 
 import mock
@@ -21,6 +23,8 @@ from ddtrace.constants import USER_REJECT
 from ddtrace.ext import SpanTypes
 from ddtrace.internal.constants import HIGHER_ORDER_TRACE_ID_BITS
 from ddtrace.internal.processor.endpoint_call_counter import EndpointCallCounterProcessor
+from ddtrace.internal.processor.span_cpu_time import CPU_TIME_METRIC
+from ddtrace.internal.processor.span_cpu_time import SpanCPUTimeProcessor
 from ddtrace.internal.sampling import SamplingMechanism
 from ddtrace.internal.sampling import SpanSamplingRule
 from ddtrace.internal.telemetry.constants import TELEMETRY_NAMESPACE
@@ -194,6 +198,86 @@ def test_aggregator_reset_with_args():
     assert len(aggr._span_metrics["spans_created"]) == 1
 
 
+def test_aggregator_reset_reuse_sampling_rules():
+    """
+    Validates that the span aggregator can adopt the sampling rules of the
+    current sampling processor on reset, instead of parsing them again.
+    """
+    with override_global_config(
+        dict(
+            _trace_sampling_rules='[{"sample_rate": 0.5, "service": "web"}]',
+            _sampling_rules='[{"service": "web", "name": "request", "max_per_second": 10}]',
+        )
+    ):
+        aggr = SpanAggregator(partial_flush_enabled=False, partial_flush_min_spans=1, dd_processors=[])
+        aggr.writer = DummyWriter()
+
+        sampling_proc = aggr.sampling_processor
+        (span_rule,) = sampling_proc.single_span_rules
+        (trace_rule,) = sampling_proc.sampler.rules
+        limiter = span_rule._limiter
+
+        with mock.patch("ddtrace._trace.processor.get_span_sampling_rules") as get_span_sampling_rules:
+            aggr.reset(reuse_sampling_rules=True)
+
+        get_span_sampling_rules.assert_not_called()
+        assert aggr.sampling_processor is not sampling_proc
+        assert aggr.sampling_processor.single_span_rules == [span_rule]
+        assert aggr.sampling_processor.sampler.rules == [trace_rule]
+        # The rate limiter state is not carried over
+        assert span_rule._limiter is not limiter
+
+
+@pytest.mark.subprocess(
+    env=dict(
+        DD_TRACE_PREFORK_WARM_ENABLED="true",
+        DD_TRACE_SAMPLING_RULES='[{"sample_rate": 0.5, "service": "web"}]',
+        DD_SPAN_SAMPLING_RULES='[{"service": "web", "name": "request", "max_per_second": 10}]',
+    ),
+    err=None,
+)
+def test_tracer_prefork_warm_reuses_sampling_rules_after_fork():
+    import os
+
+    import mock
+
+    from ddtrace._trace.processor import SpanAggregator
+    from ddtrace.trace import tracer
+
+    sampling_proc = tracer._span_aggregator.sampling_processor
+    (span_rule,) = sampling_proc.single_span_rules
+    (trace_rule,) = sampling_proc.sampler.rules
+    # Exhaust the rate limiter of the span sampling rule in the parent
+    span_rule._limiter.tokens = 0
+    limiter = span_rule._limiter
+
+    with mock.patch.object(SpanAggregator, "reset", autospec=True, side_effect=SpanAggregator.reset) as reset:
+        pid = os.fork()
+        if pid == 0:
+            # child
+            try:
+                reset.assert_called_once()
+                assert reset.call_args.kwargs["reuse_sampling_rules"] is True
+
+                child_proc = tracer._span_aggregator.sampling_processor
+                assert child_proc is not sampling_proc
+                assert child_proc.single_span_rules[0] is span_rule
+                assert child_proc.sampler.rules[0] is trace_rule
+                # The rate limiter is reset rather than inherited from the parent
+                assert span_rule._limiter is not limiter
+                assert span_rule._limiter.tokens == span_rule._limiter.max_tokens == 10
+            except BaseException:
+                os._exit(1)
+            os._exit(12)
+
+        _, status = os.waitpid(pid, 0)
+
+    assert os.WEXITSTATUS(status) == 12
+    # The parent keeps its own state
+    assert tracer._span_aggregator.sampling_processor is sampling_proc
+    assert span_rule._limiter is limiter
+
+
 def test_aggregator_bad_processor():
     class Proc(TraceProcessor):
         def process_trace(self, trace):
@@ -755,6 +839,171 @@ def test_endpoint_call_counter_processor_real_tracer():
     assert tracer._endpoint_call_counter_span_processor.reset()[0] == {"a": 2, "b": 1}
 
 
+def _burn_cpu():
+    sum(i * i for i in range(100000))
+
+
+def test_span_cpu_time_processor_local_root():
+    tracer = DummyTracer()
+    processor = SpanCPUTimeProcessor()
+    processor.enable(tracer.context_provider)
+    try:
+        with tracer.trace("parent") as parent:
+            _burn_cpu()
+            with tracer.trace("child") as child:
+                _burn_cpu()
+            _burn_cpu()
+
+        # Work done after the trace is finished is not accounted for
+        _burn_cpu()
+    finally:
+        processor.disable()
+
+    assert CPU_TIME_METRIC not in child.get_metrics()
+    assert parent.get_metric(CPU_TIME_METRIC) > 0
+
+    with tracer.trace("disabled") as disabled:
+        _burn_cpu()
+    assert disabled.get_metric(CPU_TIME_METRIC) is None
+
+
+def test_span_cpu_time_processor_all_spans():
+    tracer = DummyTracer()
+    processor = SpanCPUTimeProcessor(all_spans=True)
+    processor.enable(tracer.context_provider)
+    try:
+        with tracer.trace("parent") as parent:
+            with tracer.trace("child") as child:
+                _burn_cpu()
+            _burn_cpu()
+    finally:
+        processor.disable()
+
+    child_cpu_time = child.get_metric(CPU_TIME_METRIC)
+    assert child_cpu_time > 0
+    # The parent includes the CPU time of its children
+    assert parent.get_metric(CPU_TIME_METRIC) > child_cpu_time
+
+
+@pytest.mark.skipif(not hasattr(time, "pthread_getcpuclockid"), reason="The CPU clock of other threads is not readable")
+def test_span_cpu_time_processor_thread_pool():
+    tracer = DummyTracer()
+    processor = SpanCPUTimeProcessor()
+    processor.enable(tracer.context_provider)
+
+    worker_cpu_time = []
+    activated = threading.Event()
+    root_finished = threading.Event()
+
+    def worker(root):
+        # The worker keeps accounting to the root until it activates another span
+        tracer.context_provider.activate(root)
+        start = time.thread_time_ns()
+        _burn_cpu()
+        worker_cpu_time.append(time.thread_time_ns() - start)
+        activated.set()
+        root_finished.wait()
+
+    try:
+        with tracer.trace("root") as root:
+            thread = threading.Thread(target=worker, args=(root,))
+            thread.start()
+            activated.wait()
+        root_finished.set()
+        thread.join()
+    finally:
+        processor.disable()
+
+    assert root.get_metric(CPU_TIME_METRIC) >= worker_cpu_time[0]
+
+
+def test_span_cpu_time_processor_asyncio_not_traced():
+    import asyncio
+
+    tracer = DummyTracer()
+    processor = SpanCPUTimeProcessor()
+    processor.enable(tracer.context_provider)
+    original_run = asyncio.events.Handle._run
+    try:
+        # Event loops without any span are not instrumented
+        asyncio.run(asyncio.sleep(0))
+        assert asyncio.events.Handle._run is original_run
+
+        async def traced():
+            with tracer.trace("traced"):
+                await asyncio.sleep(0)
+
+        asyncio.run(traced())
+        assert asyncio.events.Handle._run is not original_run
+    finally:
+        processor.disable()
+    assert asyncio.events.Handle._run is original_run
+
+
+def test_span_cpu_time_processor_uvloop_not_supported():
+    import asyncio
+
+    class Loop(asyncio.SelectorEventLoop):
+        pass
+
+    Loop.__module__ = "uvloop"
+
+    tracer = DummyTracer()
+    processor = SpanCPUTimeProcessor()
+    processor.enable(tracer.context_provider)
+    original_run = asyncio.events.Handle._run
+
+    async def traced():
+        with tracer.trace("traced"):
+            await asyncio.sleep(0)
+
+    loop = Loop()
+    try:
+        with mock.patch("ddtrace.internal.processor.span_cpu_time.log") as log:
+            loop.run_until_complete(traced())
+        assert asyncio.events.Handle._run is original_run
+        log.warning.assert_called_once()
+    finally:
+        loop.close()
+        processor.disable()
+
+
+@pytest.mark.subprocess()
+def test_span_cpu_time_processor_asyncio():
+    import asyncio
+
+    from ddtrace.internal.processor.span_cpu_time import CPU_TIME_METRIC
+    from ddtrace.internal.processor.span_cpu_time import SpanCPUTimeProcessor
+    from tests.utils import DummyTracer
+
+    tracer = DummyTracer()
+    processor = SpanCPUTimeProcessor()
+    processor.enable(tracer.context_provider)
+
+    async def idle():
+        with tracer.trace("idle") as span:
+            for _ in range(10):
+                await asyncio.sleep(0)
+        return span
+
+    async def busy():
+        with tracer.trace("busy") as span:
+            for _ in range(10):
+                sum(i * i for i in range(100000))
+                await asyncio.sleep(0)
+        return span
+
+    async def main():
+        return await asyncio.gather(idle(), busy())
+
+    idle_span, busy_span = asyncio.run(main())
+    processor.disable()
+
+    # The CPU time of the busy task is not accounted to the idle one, even
+    # though they run concurrently on the same thread.
+    assert busy_span.get_metric(CPU_TIME_METRIC) > 10 * (idle_span.get_metric(CPU_TIME_METRIC) or 0)
+
+
 def test_trace_tag_processor_adds_chunk_root_tags():
     tracer = DummyTracer()
 
@@ -280,3 +280,11 @@ def test_rate_limiter_with_jitter_not_raise():
     limiter = BudgetRateLimiterWithJitter(limit_rate=1, raise_on_exceed=False)
 
     assert [limiter.limit(lambda: None) for _ in range(10)][1:] == [RateLimitExceeded] * 9
+
+
+def test_rate_limiter_with_jitter_charge():
+    limiter = BudgetRateLimiterWithJitter(limit_rate=1, tau=10, raise_on_exceed=False)
+
+    limiter.charge(8.5)
+    assert limiter.limit(lambda: None) is not RateLimitExceeded
+    assert limiter.limit(lambda: None) is RateLimitExceeded
@@ -627,6 +627,49 @@ def test_set_http_meta_case_sensitive_headers_notfound(mock_store_headers, span,
     mock_store_headers.assert_called()
 
 
+def test_header_plan_follows_traced_headers(span, int_config):
+    plan = trace_utils._header_plan(int_config.myint)
+    assert plan.request_tags == {}
+    assert trace_utils._header_plan(int_config.myint) is plan
+
+    int_config.myint.http.trace_headers(["Content-Type"])
+    int_config._http.trace_headers(["X-Global"])
+    plan = trace_utils._header_plan(int_config.myint)
+    assert plan.request_tags == {
+        "content-type": "http.request.headers.content-type",
+        "x-global": "http.request.headers.x-global",
+    }
+    assert plan.response_tags["content-type"] == "http.response.headers.content-type"
+
+    trace_utils.set_http_meta(
+        span,
+        int_config.myint,
+        request_headers={"CONTENT-TYPE": "text/plain", "x-global": "1", "accept": "*/*"},
+        response_headers={"Content-Type": "application/json"},
+    )
+    assert span.get_tag("http.request.headers.content-type") == "text/plain"
+    assert span.get_tag("http.request.headers.x-global") == "1"
+    assert span.get_tag("http.request.headers.accept") is None
+    assert span.get_tag("http.response.headers.content-type") == "application/json"
+
+
+def test_set_http_meta_case_sensitive_headers_client_ip(span, int_config):
+    with override_global_config(dict(_retrieve_client_ip=True)):
+        trace_utils.set_http_meta(
+            span,
+            int_config.myint,
+            request_headers={
+                "HTTP_USER_AGENT": "dd-agent/1.0.0",
+                "HTTP_REFERER": "https://example.com/path",
+                "X_FORWARDED_FOR": "8.8.8.8",
+            },
+            headers_are_case_sensitive=True,
+        )
+    assert span.get_tag(http.USER_AGENT) == "dd-agent/1.0.0"
+    assert span.get_tag(http.REFERRER_HOSTNAME) == "example.com"
+    assert span.get_tag(http.CLIENT_IP) == "8.8.8.8"
+
+
 ALL_IP_HEADERS = (
     ("x-forwarded-for", "1.1.1.1"),
     ("x-real-ip", "2.2.2.2"),